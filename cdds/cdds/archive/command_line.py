@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2019-2025, Met Office.
+# (C) British Crown Copyright 2019-2026, Met Office.
 # Please see LICENSE.md for license details.
 # pylint: disable = no-member
 """The :mod:`command_line` module contains the main functions for the command line scripts in the ``bin`` directory."""
@@ -10,6 +10,7 @@ from cdds.common import configure_logger
 
 from cdds import __version__
 from cdds.archive.store import store_mip_output_data
+from cdds.archive.constants import ARCHIVE_LISTING_CACHE_TTL, ARCHIVE_MAX_CONCURRENT_PUTS
 from cdds.archive.spice import run_store_spice_job
 from cdds.common.constants import PRINT_STACK_TRACE
 
@@ -47,7 +48,9 @@ def main_store(arguments: List[str] = None) -> int:
 
     exit_code = 0
     try:
-        num_critical_issues = store_mip_output_data(request, args.stream, args.mip_approved_variables_path)
+        num_critical_issues = store_mip_output_data(request, args.stream, args.mip_approved_variables_path,
+                                                    args.max_concurrent_puts, args.resume,
+                                                    args.listing_cache_ttl, args.refresh_listing_cache)
         if num_critical_issues > 0:
             exit_code = 1
     except BaseException as exc:
@@ -142,6 +145,15 @@ def parse_args_store(user_arguments: List[str], default_log_name: str) -> Namesp
     help_msg = ('Specify the stream from which to archive. If not specified, '
                 'data from all streams present will be archived.')
     parser.add_argument('--stream', help=help_msg)
+    parser.add_argument('--max_concurrent_puts', type=int, default=ARCHIVE_MAX_CONCURRENT_PUTS,
+                        help='The number of variables archived to MASS at the same time.')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip the variables that a previous run has recorded as archived with the same files.')
+    parser.add_argument('--listing_cache_ttl', type=float, default=ARCHIVE_LISTING_CACHE_TTL,
+                        help=('The number of seconds listings of MASS are cached in the proc directory for, so that '
+                              'reruns do not list the same locations again. Listings are not cached if 0.'))
+    parser.add_argument('--refresh_listing_cache', action='store_true',
+                        help='List MASS again instead of using cached listings, and update the cache.')
 
     # Only for functional tests:
     parser.add_argument(
@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2019-2025, Met Office.
+# (C) British Crown Copyright 2019-2026, Met Office.
 # Please see LICENSE.md for license details.
 """The :mod:`constants` module contains constants (values that should never be changed by a user and exist for
 readability and maintainability purposes) for CDDS archive.
@@ -87,6 +87,12 @@ MASS_STATUS_DICT = {
             'valid': False,
         },
 }
+ARCHIVE_LISTING_CACHE_FILENAME = 'mass_listings.db'
+ARCHIVE_LISTING_CACHE_TTL = 0  # seconds, listings are not cached if 0
+ARCHIVE_MAX_CONCURRENT_PUTS = 1
+ARCHIVE_OUTCOME_LOG_FILENAME = 'cdds_store_outcomes{}.jsonl'
+ARCHIVE_RETRIES = 3
+ARCHIVE_RETRY_DELAY = 60  # seconds
 SPICE_STORE_LOG_NAME = 'cdds_store_spice.log'
 SPICE_STORE_MEMORY = '1G'
 SPICE_STORE_QUEUE = 'normal'
@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2019-2025, Met Office.
+# (C) British Crown Copyright 2019-2026, Met Office.
 # Please see LICENSE.md for license details.
 """The :mod:`mass` module contains the code required to archive |output netCDF files| to MASS."""
 
@@ -7,19 +7,27 @@ import logging
 import os
 import shutil
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from typing import List, Dict, Tuple
 from pathlib import Path
 
 from cdds.common import construct_string_from_facet_string
-from cdds.common.mass import (mass_isdir, mass_mkdir, mass_move, mass_put, mass_rmdir,
+from cdds.common.mass import (mass_isdir, mass_mkdir, mass_mkdirs, mass_move, mass_put, mass_rmdir,
                               mass_rm_empty_dirs, mass_test, mass_list_records)
+from cdds.common.mass_exception import MassError, MassFailure, VariableArchivingError
+from cdds.common.mass_record import MassRecordIndex
 from cdds.common.request.request import Request
 from cdds.common.plugins.plugins import PluginStore
 
-from cdds.archive.constants import (DATA_PUBLICATION_STATUS_DICT,
+from cdds.archive.constants import (ARCHIVE_RETRIES,
+                                    ARCHIVE_RETRY_DELAY,
+                                    DATA_PUBLICATION_STATUS_DICT,
                                     MASS_STATUS_DICT,
                                     SUPERSEDED_INFO_FILE_STR)
+from cdds.archive.outcome_log import ARCHIVED, FAILED
 from cdds.archive.stored_state_checks import get_stored_state
 from cdds.common.constants import DATESTAMP_PARSER_STR
 from cdds.common.grids import retrieve_grid_info
@@ -221,7 +229,7 @@ def check_stored_status(
                 'this operation.')
     valid_vars = []
     invalid_vars = []
-    mass_records = mass_list_records(archive_dir)
+    mass_records = MassRecordIndex(mass_list_records(archive_dir))
     for var_dict in mip_approved_variables:
         stored_data_dict = get_stored_data(var_dict, mass_records)
         var_dict.update({'stored_data': stored_data_dict})
@@ -255,10 +263,11 @@ def get_stored_data(var_dict, mass_records):
         this | MIP output variable| required to archive the relevant
         |output netCDF files|.
 
-    mass_records: dict
+    mass_records: dict or MassRecordIndex
         Dictionary of mass records where keys are the record/archive paths and
         the values the corresponding MassRecord storing the properties of the
-        MASS content of the respective record.
+        MASS content of the respective record, or an index of these records
+        (which should be built once when looking up many variables).
 
     Returns
     -------
@@ -270,20 +279,20 @@ def get_stored_data(var_dict, mass_records):
         contains a list of the files present in the archive for that state
         and version.
     """
+    if not isinstance(mass_records, MassRecordIndex):
+        mass_records = MassRecordIndex(mass_records)
     stored_data_dict = {}
     root_path = var_dict['mass_path']
     for status_id, pub_status in list(DATA_PUBLICATION_STATUS_DICT.items()):
         state_path = os.path.join(root_path, pub_status)
-        if state_path not in mass_records.keys():
+        if state_path not in mass_records:
             continue
 
         mass_record = mass_records[state_path]
         status_present = mass_record.is_dir
         if status_present:
             stored_data_dict[status_id] = {}
-            datestamp_paths = [
-                r.path for r in mass_records.values() if r.parent == state_path
-            ]  # get children # mass_list_dir(state_path, False)
+            datestamp_paths = mass_records.children(state_path)
 
             for dt_path in datestamp_paths:
                 try:
@@ -295,10 +304,7 @@ def get_stored_data(var_dict, mass_records):
                     dt1 = None
 
                 if dt1:
-                    data_file_paths = [
-                        r.path for r in mass_records.values() if r.parent == dt_path
-                    ]  # mass_list_dir(dt_path, False)
-                    stored_data_dict[status_id][dt_str] = data_file_paths
+                    stored_data_dict[status_id][dt_str] = mass_records.children(dt_path)
     return stored_data_dict
 
 
@@ -463,7 +469,8 @@ MASS_PREPROC_CMD = {
 }
 
 
-def run_archiving_commands(var_dict: Dict[str, str], simulation: bool) -> None:
+def run_archiving_commands(var_dict: Dict[str, str], simulation: bool, create_dir: bool = True,
+                           retry: bool = False) -> None:
     """Run all required archiving commands for this |MIP output variable|.
 
     Parameters
@@ -473,6 +480,11 @@ def run_archiving_commands(var_dict: Dict[str, str], simulation: bool) -> None:
         relevant |output netCDF files|.
     simulation : bool
         If true, do not execute MASS commands, but output the command that would be run to the log.
+    create_dir : bool
+        If false, the directory the files are archived to has already been created.
+    retry : bool
+        If true, the commands are run again after a transient MASS error, so the files archived before the error are
+        skipped.
     """
     logger = logging.getLogger(__name__)
 
@@ -491,18 +503,27 @@ def run_archiving_commands(var_dict: Dict[str, str], simulation: bool) -> None:
            ''.format(**var_dict))
     logger.info(msg)
     mass_dest = get_mass_path(var_dict)
-    mass_mkdir(mass_dest, simulation=simulation, create_parents=True, exist_ok=True)
+    if create_dir:
+        mass_mkdir(mass_dest, simulation=simulation, create_parents=True, exist_ok=True)
     if var_dict['mip_output_files']:
         mass_put(var_dict['mip_output_files'], mass_dest,
                  simulation=simulation,
-                 check_mass_location=False)
+                 check_mass_location=False,
+                 ignore_existing=retry)
     else:
         logger.info('All files already found in MASS.')
 
 
-def archive_files(mip_approved_variables: List[Dict[str, str]], simulation: bool) -> None:
+def archive_files(mip_approved_variables: List[Dict[str, str]], simulation: bool, max_concurrent: int = 1,
+                  outcome_log=None, resume: bool = False, retries: int = ARCHIVE_RETRIES,
+                  retry_delay: float = ARCHIVE_RETRY_DELAY) -> None:
     """Archive the files specified by ``mip_approved_variables`` in MASS.
 
+    With more than one concurrent variable, the directories of all variables are created first with as few
+    ``moo mkdir`` commands as possible and the archiving commands of the variables are then run in parallel. As when
+    archiving one variable at a time, no further variable is started once a variable has failed; the variables
+    already being archived are finished before the error is raised.
+
     Parameters
     ----------
     mip_approved_variables : List[Dict[str, str]]
@@ -510,16 +531,75 @@ def archive_files(mip_approved_variables: List[Dict[str, str]], simulation: bool
         required to archive the relevant |output netCDF files|.
     simulation : bool
         If true, do not execute MASS commands, but output the command that would be run to the log.
+    max_concurrent : int
+        The number of variables archived at the same time.
+    outcome_log : cdds.archive.outcome_log.ArchiveOutcomeLog, optional
+        The log the outcome of archiving each variable is written to.
+    resume : bool
+        If true, skip the variables that the outcome log records as archived with the same files.
+    retries : int
+        The number of times the archiving commands of a variable are retried after a transient MASS error.
+    retry_delay : float
+        The delay in seconds before the first retry, doubled for each further retry.
+
+    Raises
+    ------
+    VariableArchivingError
+        Raised if any variable could not be archived when archiving variables in parallel.
     """
     logger = logging.getLogger(__name__)
+    outcomes = outcome_log.read() if outcome_log is not None and resume else {}
+    var_dicts = []
     for var_dict in mip_approved_variables:
+        if outcome_log is not None and outcome_log.is_archived(var_dict, get_mass_path(var_dict), outcomes):
+            logger.info('Variable {mip_table_id}/{variable_id} has already been archived, skipping'.format(**var_dict))
+            continue
+        var_dicts.append(var_dict)
+    failure = threading.Event()
+
+    def archive_variable(var_dict, create_dir=True):
         logger.info('\nProcessing variable {mip_table_id}/{variable_id}'
                     ''.format(**var_dict))
         logger.info('Archiving mode: {0}'.format(
             MASS_STATUS_DICT[var_dict['mass_status']]['description']))
+        files = list(var_dict['mip_output_files'])
         var_dict = filter_data_files(var_dict)
-        run_archiving_commands(var_dict, simulation)
-    num_vars_archived = len(mip_approved_variables)
+        try:
+            _run_with_retries(lambda retry: run_archiving_commands(var_dict, simulation, create_dir, retry),
+                              retries, retry_delay)
+        except Exception as exc:
+            failure.set()
+            if outcome_log is not None and not simulation:
+                outcome_log.record(var_dict, get_mass_path(var_dict), files, FAILED, str(exc) or repr(exc))
+            raise
+        if outcome_log is not None and not simulation:
+            outcome_log.record(var_dict, get_mass_path(var_dict), files, ARCHIVED)
+
+    if max_concurrent > 1:
+        mass_mkdirs([get_mass_path(var_dict) for var_dict in var_dicts], simulation)
+
+        def archive_unless_failed(var_dict):
+            if failure.is_set():
+                return False
+            archive_variable(var_dict, False)
+            return True
+
+        with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
+            futures = [executor.submit(archive_unless_failed, var_dict) for var_dict in var_dicts]
+        failed = []
+        for var_dict, future in zip(var_dicts, futures):
+            variable = '{mip_table_id}/{variable_id}'.format(**var_dict)
+            if future.exception() is not None:
+                failed.append(variable)
+                logger.critical('Failed to archive variable {}: {}'.format(variable, future.exception()))
+            elif not future.result():
+                logger.info('Variable {} was not archived after an earlier failure'.format(variable))
+        if failed:
+            raise VariableArchivingError('Failed to archive variables: {}'.format(', '.join(failed)))
+    else:
+        for var_dict in var_dicts:
+            archive_variable(var_dict)
+    num_vars_archived = len(var_dicts)
     if simulation:
         logger.info('Dataset archiving simulated for {num_vars} variables.'
                     ''.format(num_vars=num_vars_archived))
@@ -530,6 +610,26 @@ def archive_files(mip_approved_variables: List[Dict[str, str]], simulation: bool
         logger.info('Archiving complete.')
 
 
+def _run_with_retries(command, retries, retry_delay, sleep=time.sleep):
+    """Run the MASS commands and run them again after a system or access error,
+    which may not occur again, waiting longer after each attempt. The commands
+    are told whether they are being retried, as the failed attempt may have
+    changed MASS before the error."""
+    logger = logging.getLogger(__name__)
+    attempt = 0
+    while True:
+        try:
+            return command(attempt > 0)
+        except MassError as error:
+            transient = getattr(error, 'mass_failure', None) in (MassFailure.SYSTEM_ERROR, MassFailure.ACCESS_ERROR)
+            if not transient or attempt >= retries:
+                raise
+            delay = retry_delay * 2 ** attempt
+            logger.warning('Transient MASS error, retrying in {} seconds: {}'.format(delay, error.msg))
+            sleep(delay)
+            attempt += 1
+
+
 def cleanup_archive_dir(archive_root_dir: str, mip_approved_variables: List[Dict[str, str]], simulation: bool) -> None:
     """Clean up the archived files specified by ``mip_approved_variables`` in MASS by removing all empty directories.
 
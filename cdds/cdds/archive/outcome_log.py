@@ -0,0 +1,102 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""The :mod:`outcome_log` module contains the log of the outcome of archiving each |MIP output variable|, which allows
+a rerun of ``cdds_store`` to skip the variables that have already been archived."""
+import datetime
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+ARCHIVED = 'archived'
+FAILED = 'failed'
+
+
+class ArchiveOutcomeLog:
+    """Appends the outcome of archiving each |MIP output variable| to a file with one JSON record per line."""
+
+    def __init__(self, log_path: str):
+        """
+        Parameters
+        ----------
+        log_path : str
+            Path to the log file, which is created if it does not exist.
+        """
+        self.log_path = log_path
+        self._lock = threading.Lock()
+
+    def read(self) -> Dict[tuple, dict]:
+        """Return the latest outcome of each variable in the log.
+
+        Returns
+        -------
+        Dict[tuple, dict]
+            The last record of each variable, keyed by the variable name and its location in MASS.
+        """
+        outcomes = {}
+        if not os.path.exists(self.log_path):
+            return outcomes
+        with open(self.log_path) as log_file:
+            for line in log_file:
+                if line.strip():
+                    record = json.loads(line)
+                    outcomes[(record['variable'], record['mass_path'])] = record
+        return outcomes
+
+    def is_archived(self, var_dict: Dict, mass_path: str, outcomes: Dict[tuple, dict]) -> bool:
+        """Return whether the log records that the same files of a variable have been archived to the same location.
+
+        Parameters
+        ----------
+        var_dict : Dict
+            The information about the |MIP output variable|.
+        mass_path : str
+            The location in MASS the files are archived to.
+        outcomes : Dict[tuple, dict]
+            The outcomes read from the log.
+
+        Returns
+        -------
+        bool
+            True if the variable does not need to be archived again.
+        """
+        record = outcomes.get((_variable_name(var_dict), mass_path))
+        return (record is not None and record['status'] == ARCHIVED
+                and sorted(record['files']) == _filenames(var_dict['mip_output_files']))
+
+    def record(self, var_dict: Dict, mass_path: str, files: List[str], status: str,
+               error: Optional[str] = None) -> None:
+        """Append the outcome of archiving a variable to the log.
+
+        Parameters
+        ----------
+        var_dict : Dict
+            The information about the |MIP output variable|.
+        mass_path : str
+            The location in MASS the files are archived to.
+        files : List[str]
+            All the files of the variable, including any that were already in MASS.
+        status : str
+            The outcome, ``archived`` or ``failed``.
+        error : str, optional
+            The reason the variable could not be archived.
+        """
+        record = {
+            'variable': _variable_name(var_dict),
+            'mass_path': mass_path,
+            'files': _filenames(files),
+            'status': status,
+            'error': error,
+            'time': datetime.datetime.now().isoformat(timespec='seconds'),
+        }
+        with self._lock:
+            with open(self.log_path, 'a') as log_file:
+                log_file.write(json.dumps(record) + '\n')
+
+
+def _variable_name(var_dict):
+    return '{mip_table_id}/{variable_id}'.format(**var_dict)
+
+
+def _filenames(files):
+    return sorted(os.path.basename(path) for path in files)
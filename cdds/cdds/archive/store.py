@@ -9,12 +9,17 @@ import re
 from re import Match, Pattern
 from typing import Any, Dict, List
 
-from cdds.archive.constants import DATA_PUBLICATION_STATUS_DICT
+from cdds.archive.constants import (ARCHIVE_LISTING_CACHE_FILENAME, ARCHIVE_LISTING_CACHE_TTL,
+                                    ARCHIVE_MAX_CONCURRENT_PUTS, ARCHIVE_OUTCOME_LOG_FILENAME,
+                                    DATA_PUBLICATION_STATUS_DICT)
 from cdds.archive.exception import NoDataToArchiveError
 from cdds.archive.mass import (archive_files, construct_mass_paths, construct_archive_dir_mass_path,
                                check_stored_status, cleanup_archive_dir)
+from cdds.archive.outcome_log import ArchiveOutcomeLog
 from cdds.common import get_most_recent_file
-from cdds.common.cdds_files.cdds_directories import requested_variables_file
+from cdds.common.cdds_files.cdds_directories import component_directory, log_directory, requested_variables_file
+from cdds.common.crawler import DirectoryCrawler
+from cdds.common.mass_cache import MassListingCache, set_listing_cache
 from cdds.common.constants import (
     APPROVED_VARS_FILENAME_REGEX,
     APPROVED_VARS_FILENAME_STREAM_REGEX,
@@ -27,7 +32,10 @@ from cdds.common.request.request import Request
 from cdds.common.variables import RequestedVariablesList
 
 
-def store_mip_output_data(request: Request, stream: str, mip_approved_variables_file: str) -> int:
+def store_mip_output_data(request: Request, stream: str, mip_approved_variables_file: str,
+                          max_concurrent: int = ARCHIVE_MAX_CONCURRENT_PUTS, resume: bool = False,
+                          listing_cache_ttl: float = ARCHIVE_LISTING_CACHE_TTL,
+                          refresh_listing_cache: bool = False) -> int:
     """Archive the |output netCDF files| in MASS.
 
     Parameters
@@ -38,6 +46,15 @@ def store_mip_output_data(request: Request, stream: str, mip_approved_variables_
         The |Stream identifier| of the |MIP output variables| to be processed. If none, all variables will be processed.
     mip_approved_variables_file : str
         The path to approved variables file output by CDDS quality control.
+    max_concurrent : int
+        The number of variables archived at the same time.
+    resume : bool
+        If true, skip the variables which a previous run has recorded as archived with the same files.
+    listing_cache_ttl : float
+        The number of seconds listings of MASS are cached for in the archive directory of the proc directory. Listings
+        are not cached if 0.
+    refresh_listing_cache : bool
+        If true, list MASS again rather than use cached listings.
 
     Returns
     -------
@@ -70,20 +87,33 @@ def store_mip_output_data(request: Request, stream: str, mip_approved_variables_
         mip_approved_variables, request, mass_path_root, datestamp, new_status
     )
 
-    # Clean up archive directory to avoid left empty directories
-    archive_dir = construct_archive_dir_mass_path(mass_path_root, request)
-    # TODO gh#1013
-    # cleanup_archive_dir(archive_dir, mip_approved_variables, request.common.simulation)
+    if listing_cache_ttl > 0 and not request.common.simulation:
+        cache_directory = component_directory(request, 'archive')
+        os.makedirs(cache_directory, exist_ok=True)
+        set_listing_cache(MassListingCache(os.path.join(cache_directory, ARCHIVE_LISTING_CACHE_FILENAME),
+                                           listing_cache_ttl, refresh_listing_cache))
+    try:
+        # Clean up archive directory to avoid left empty directories
+        archive_dir = construct_archive_dir_mass_path(mass_path_root, request)
+        # TODO gh#1013
+        # cleanup_archive_dir(archive_dir, mip_approved_variables, request.common.simulation)
 
-    mip_approved_variables, invalid_variables = check_stored_status(mip_approved_variables, archive_dir)
+        mip_approved_variables, invalid_variables = check_stored_status(mip_approved_variables, archive_dir)
 
-    num_critical_issues_in_checks = len(invalid_variables)
-    logger.info('Comparing datasets to data in MASS found {} critical issues'.format(num_critical_issues_in_checks))
+        num_critical_issues_in_checks = len(invalid_variables)
+        logger.info('Comparing datasets to data in MASS found {} critical issues'.format(num_critical_issues_in_checks))
 
-    # Archive the 'output netCDF files' in MASS.
-    archive_files(mip_approved_variables, request.common.simulation)
+        # Archive the 'output netCDF files' in MASS.
+        outcome_log = None
+        if not request.common.simulation:
+            outcome_log = ArchiveOutcomeLog(os.path.join(
+                log_directory(request, 'archive', True),
+                ARCHIVE_OUTCOME_LOG_FILENAME.format('_{}'.format(stream) if stream else '')))
+        archive_files(mip_approved_variables, request.common.simulation, max_concurrent, outcome_log, resume)
 
-    return num_critical_issues_in_checks
+        return num_critical_issues_in_checks
+    finally:
+        set_listing_cache(None)
 
 
 def get_variables_to_process(
@@ -310,11 +340,17 @@ def retrieve_file_paths(mip_approved_variables: List[Dict[str, Any]], request: R
 
     model_file_info = PluginStore.instance().get_plugin().model_file_info()
 
+    # List the output directories of all variables in one parallel crawl.
+    file_lists: Dict[str, List[str]] = {}
+    output_dirs = list(dict.fromkeys(var_dict['output_dir'] for var_dict in mip_approved_variables))
+    for record in DirectoryCrawler().crawl(output_dirs, recursive=False):
+        file_lists.setdefault(record.directory, []).append(record.filename)
+
     for var_dict in mip_approved_variables:
         path_to_var = var_dict['output_dir']
         if os.path.isdir(path_to_var):
             valid_fname = functools.partial(model_file_info.is_relevant_for_archiving, request, var_dict)
-            file_list = os.listdir(path_to_var)
+            file_list = file_lists.get(path_to_var, [])
             data_files = []
             if len(file_list) > 0:
                 start_date, end_date = model_file_info.get_date_range(file_list, var_dict['frequency'])
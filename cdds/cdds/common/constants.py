@@ -107,6 +107,10 @@ INVENTORY_DB_FILENAME = 'inventory'
 INVENTORY_ROOT_DIR = os.path.join(os.environ['CDDS_ETC'], 'inventory')
 INVENTORY_FACET_LIST = ["mip_era", "mip", "institution", "model", "experiment", "variant", "mip_table", "variable",
                         "grid", "status", "timestamp"]
+# The number of directory listings run at the same time when populating the inventory.
+INVENTORY_MAX_CONCURRENT_LISTINGS = 1
+# The number of facet levels at the bottom of the inventory tree that are listed with one recursive listing.
+INVENTORY_RECURSIVE_LEVELS = 4
 INVENTORY_HEADINGS = ['Mip Era', 'Mip', 'Institute', 'Model', 'Experiment', 'Variant', 'Mip Table', 'Variable Name',
                       'Grid', 'Status', 'Version', 'Facet String']
 INVENTORY_HEADINGS_FORMAT = '{:7} {:6} {:10} {:18} {:15} {:10} {:10} {:20} {:4} {:10} {:10} {:10}'
@@ -0,0 +1,141 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""
+The :mod:`crawler` module contains the directory crawler shared by the
+components that look for |output netCDF files| (quality control,
+concatenation setup and archiving).
+"""
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple, Union
+
+from cdds.common.stat_cache import StatCache
+
+CRAWLER_MAX_WORKERS = 8
+# Listings of directories modified less than this many seconds before they were scanned are not kept, as further
+# changes within the resolution of the file system timestamps would not change the modification time.
+RECENTLY_MODIFIED_SECONDS = 2
+
+
+@dataclass
+class FileRecord:
+    """A file found by the crawler, with the facets parsed from its name."""
+    directory: str
+    filename: str
+    facets: Dict[str, Optional[str]] = field(default_factory=dict)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, self.filename)
+
+
+class DirectoryCrawler:
+    """
+    Lists directory trees with :func:`os.scandir`, scanning the directories
+    at each depth of the trees in a pool of threads.
+
+    The listing of every scanned directory is kept with the modification
+    time of the directory, so a directory is only scanned again by a later
+    crawl if entries have been added to or removed from it since. The
+    listings can be persisted in a snapshot file to be reused by later
+    processes.
+    """
+
+    def __init__(self, max_workers: int = CRAWLER_MAX_WORKERS, snapshot_file: Optional[str] = None):
+        """
+        Parameters
+        ----------
+        max_workers : int
+            Number of threads scanning directories.
+        snapshot_file : str, optional
+            The JSON file the directory listings are read from and saved to.
+            If not given, the listings are only kept in memory.
+        """
+        self.max_workers = max_workers
+        self.snapshot_file = snapshot_file
+        self._listings = StatCache(snapshot_file)
+
+    def crawl(self, roots: Union[str, Iterable[str]], recursive: bool = True,
+              file_pattern: Union[str, Pattern, None] = None,
+              exclude_pattern: Union[str, Pattern, None] = None) -> List[FileRecord]:
+        """
+        Return the files in the given directories.
+
+        Parameters
+        ----------
+        roots : str or iterable of str
+            The directories to crawl.
+        recursive : bool
+            If True, also crawl the subdirectories of the roots.
+        file_pattern : str or Pattern, optional
+            Only files whose names match this regular expression are
+            returned. The named groups of the match are the facets of the
+            returned records.
+        exclude_pattern : str or Pattern, optional
+            Subdirectories whose paths match this regular expression (using
+            :func:`re.search`) are not crawled.
+
+        Returns
+        -------
+        List[FileRecord]
+            The files found, sorted by directory and filename.
+        """
+        if isinstance(roots, str):
+            roots = [roots]
+        file_regex = re.compile(file_pattern) if isinstance(file_pattern, str) else file_pattern
+        exclude_regex = re.compile(exclude_pattern) if isinstance(exclude_pattern, str) else exclude_pattern
+        records = []
+        directories = list(roots)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while directories:
+                subdirectories = []
+                for directory, (files, children) in zip(directories, executor.map(self._list, directories)):
+                    for filename in files:
+                        match = file_regex.match(filename) if file_regex is not None else None
+                        if file_regex is not None and match is None:
+                            continue
+                        records.append(FileRecord(directory, filename, match.groupdict() if match else {}))
+                    if recursive:
+                        subdirectories += [os.path.join(directory, child) for child in children]
+                if exclude_regex is not None:
+                    subdirectories = [path for path in subdirectories if not exclude_regex.search(path)]
+                directories = subdirectories
+        return sorted(records, key=lambda record: (record.directory, record.filename))
+
+    def save(self) -> None:
+        """Write the directory listings to the snapshot file, if there is one."""
+        self._listings.save()
+
+    def _list(self, directory: str) -> Tuple[List[str], List[str]]:
+        # Like os.walk, directories which cannot be read are treated as empty and symbolic links to directories
+        # are not followed.
+        try:
+            stat_result = os.stat(directory)
+        except OSError:
+            return [], []
+        listing = self._listings.get(directory, stat_result)
+        if listing is not None:
+            return listing[0], listing[1]
+        recently_modified = time.time() - stat_result.st_mtime_ns / 1e9 < RECENTLY_MODIFIED_SECONDS
+        files, subdirectories = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        files.append(entry.name)
+                    elif not entry.is_symlink():
+                        subdirectories.append(entry.name)
+        except OSError:
+            return [], []
+        if recently_modified:
+            self._listings.discard(directory)
+        else:
+            self._listings.add(directory, [files, subdirectories], stat_result.st_size, stat_result.st_mtime_ns)
+        return files, subdirectories
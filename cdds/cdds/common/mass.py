@@ -1,13 +1,15 @@
-# (C) British Crown Copyright 2019-2025, Met Office.
+# (C) British Crown Copyright 2019-2026, Met Office.
 # Please see LICENSE.md for license details.
 """The :mod:`mass` module interact with the MASS archiving system."""
 import logging
 import subprocess
 import re
+import tempfile
 
 from cdds.common.mass_exception import (MassError, DirAlreadyExistMassError, FileNotExistMassError,
                                         VariableArchivingError, MassFailure)
-from cdds.common.mass_record import get_records_from_stdout
+from cdds.common.mass_cache import get_listing_cache
+from cdds.common.mass_record import MassRecordStore, get_records_from_lines
 
 
 def mass_list_dir(mass_path, simulation):
@@ -143,20 +145,18 @@ def mass_list_empty_dirs(mass_path, search_mass_paths=None, simulation=False):
         return []
 
     try:
-        stdout = run_mass_command(moo_cmd)
-        logger.debug('{} output:\n{}'.format(' '.join(moo_cmd), stdout))
+        record_map = get_records_from_lines(list_mass_command_lines(moo_cmd), search_mass_paths)
+        logger.debug('{} listed {} records'.format(' '.join(moo_cmd), len(record_map)))
     except FileNotExistMassError:
-        stdout = ''
+        record_map = MassRecordStore()
     except subprocess.CalledProcessError:
-        stdout = ''
+        record_map = MassRecordStore()
         logger.critical('Error getting listing of a directory in MASS.')
     except RuntimeError as e:
         logger.critical(str(e))
         raise e
 
-    record_map = get_records_from_stdout(stdout, search_mass_paths)
-    empty_dirs = {k: v for k, v in record_map.items() if v.is_dir and v.is_empty}
-    return list(empty_dirs.keys())
+    return record_map.empty_dirs()
 
 
 def mass_list_records(mass_path, simulation=False):
@@ -173,8 +173,8 @@ def mass_list_records(mass_path, simulation=False):
 
     Returns
     -------
-    dict
-        Dictionary of mass records where keys are the record paths and values the corresponding MassRecord.
+    MassRecordStore
+        Mapping of the record paths to the corresponding MassRecord.
     """
     logger = logging.getLogger(__name__)
     moo_cmd = ['moo', 'ls', '-Rl', mass_path]
@@ -183,19 +183,18 @@ def mass_list_records(mass_path, simulation=False):
         return []
 
     try:
-        stdout = run_mass_command(moo_cmd)
-        logger.debug('{} output:\n{}'.format(' '.join(moo_cmd), stdout))
+        record_map = get_records_from_lines(list_mass_command_lines(moo_cmd))
+        logger.debug('{} listed {} records'.format(' '.join(moo_cmd), len(record_map)))
     except FileNotExistMassError:
         logger.debug('The MASS URI "{}" does not exist.'.format(mass_path))
-        stdout = ''
+        record_map = MassRecordStore()
     except subprocess.CalledProcessError:
-        stdout = ''
+        record_map = MassRecordStore()
         logger.critical('Error getting listing of a directory in MASS.')
     except RuntimeError as e:
         logger.critical(str(e))
         raise e
 
-    record_map = get_records_from_stdout(stdout)
     return record_map
 
 
@@ -221,38 +220,38 @@ def mass_list_files_recursively(mass_path, simulation):
         logger.info('simulating mass command: {cmd}'
                     ''.format(cmd=' '.join(moo_cmd)))
         return []
+    datasets = {}
     try:
-        stdout_str = run_mass_command(moo_cmd)
+        for m in list_mass_command_lines(moo_cmd):
+            if m.startswith('F'):
+                _add_dataset_file(datasets, m.split())
     except subprocess.CalledProcessError:
-        stdout_str = ''
         logger.critical('Error getting listing of a directory in MASS.')
     except RuntimeError as e:
         logger.critical(str(e))
         raise e
-    mass_paths = [s1 for s1 in stdout_str.split('\n') if s1]
-    datasets = {}
-    for m in mass_paths:
-        if m[0] == 'F':
-            elems = [s1 for s1 in m.split()]
-            (mip, institution, model, experiment, variant, mip_table, variable, grid, status,
-             timestamp, filename) = elems[8].split('/')[-11:]
-            if filename.endswith('.nc'):
-                dataset_id = '{}.{}.{}.{}.{}.{}.{}.{}.{}'.format(
-                    'CMIP6', mip, institution, model, experiment, variant, mip_table, variable, grid)
-                if dataset_id not in datasets:
-                    datasets[dataset_id] = {
-                        'status': status,
-                        'timestamp': timestamp,
-                        'files': []
-                    }
-                datasets[dataset_id]['files'].append({
-                    'filesize': elems[4],
-                    'filename': filename,
-                    'mass_path': elems[8]
-                })
     return datasets
 
 
+def _add_dataset_file(datasets, elems):
+    (mip, institution, model, experiment, variant, mip_table, variable, grid, status,
+     timestamp, filename) = elems[8].split('/')[-11:]
+    if filename.endswith('.nc'):
+        dataset_id = '{}.{}.{}.{}.{}.{}.{}.{}.{}'.format(
+            'CMIP6', mip, institution, model, experiment, variant, mip_table, variable, grid)
+        if dataset_id not in datasets:
+            datasets[dataset_id] = {
+                'status': status,
+                'timestamp': timestamp,
+                'files': []
+            }
+        datasets[dataset_id]['files'].append({
+            'filesize': elems[4],
+            'filename': filename,
+            'mass_path': elems[8]
+        })
+
+
 def mass_isdir(mass_path, simulation):
     """Check whether the specified directory currently exists in MASS.
 
@@ -335,6 +334,7 @@ def mass_mkdir(mass_path, simulation, create_parents, exist_ok=False):
 
     try:
         stdout_str = run_mass_command(moo_cmd)
+        invalidate_listings([mass_path])
         logger.debug('creating directory in mass {0}'.format(mass_path))
         logger.debug('moo mkdir output:\n{0}'.format(stdout_str))
     except DirAlreadyExistMassError as error:
@@ -350,7 +350,51 @@ def mass_mkdir(mass_path, simulation, create_parents, exist_ok=False):
         raise VariableArchivingError()
 
 
-def mass_put(input_files, mass_path, simulation, check_mass_location):
+def mass_mkdirs(mass_paths, simulation, chunk_size=100):
+    """Create directories, and any parent directories required, in MASS with
+    as few MOOSE commands as possible. Directories that already exist are
+    ignored.
+
+    Parameters
+    ----------
+    mass_paths: list
+        The locations in MASS of the directories to create.
+    simulation: bool
+        If true, do not execute MASS commands, but output the command that
+        would be run to the log.
+    chunk_size: int
+        The maximum number of directories created by one command.
+
+    Raises
+    ------
+    VariableArchivingEror
+        Raised if there is an error executing any of the mass commands.
+    """
+    logger = logging.getLogger(__name__)
+    # the parents of a directory are created along with it
+    paths = sorted(set(mass_paths))
+    leaf_paths = [path for index, path in enumerate(paths)
+                  if index + 1 == len(paths) or not paths[index + 1].startswith(path.rstrip('/') + '/')]
+    for index in range(0, len(leaf_paths), chunk_size):
+        chunk = leaf_paths[index:index + chunk_size]
+        moo_cmd = ['moo', 'mkdir', '-p'] + chunk
+        if simulation:
+            logger.info('simulating mass command: {cmd}'.format(cmd=' '.join(moo_cmd)))
+            continue
+        try:
+            stdout_str = run_mass_command(moo_cmd)
+            invalidate_listings(chunk)
+            logger.debug('moo mkdir output:\n{0}'.format(stdout_str))
+        except DirAlreadyExistMassError:
+            logger.debug('Some of the directories exist already, creating them one at a time')
+            for mass_path in chunk:
+                mass_mkdir(mass_path, simulation, create_parents=True, exist_ok=True)
+        except RuntimeError as e:
+            logger.critical(str(e))
+            raise VariableArchivingError()
+
+
+def mass_put(input_files, mass_path, simulation, check_mass_location, ignore_existing=False):
     """Add each of the specified files to the archive at the given location.
 
     Parameters
@@ -366,6 +410,10 @@ def mass_put(input_files, mass_path, simulation, check_mass_location):
     check_mass_location: bool
         If true, check whether the location in the archive exists, and
         create a directory there if  it does not, before archiving the files.
+    ignore_existing: bool
+        If true, skip the files which already exist at the location, e.g.
+        when repeating a put that was interrupted after archiving some of
+        the files.
 
     Returns
     -------
@@ -379,7 +427,7 @@ def mass_put(input_files, mass_path, simulation, check_mass_location):
     logger = logging.getLogger(__name__)
     if check_mass_location:
         mass_mkdir(mass_path, create_parents=True, simulation=simulation, exist_ok=True)
-    moo_cmd = ['moo', 'put'] + input_files + [mass_path]
+    moo_cmd = ['moo', 'put'] + (['-i'] if ignore_existing else []) + input_files + [mass_path]
     if simulation:
         logger.info('simulating mass command: {cmd}'
                     ''.format(cmd=' '.join(moo_cmd)))
@@ -397,6 +445,9 @@ def mass_put(input_files, mass_path, simulation, check_mass_location):
     except RuntimeError as e:
         logger.critical(str(e))
         raise VariableArchivingError()
+    finally:
+        # a failed command may still have changed MASS
+        invalidate_listings([mass_path])
 
 
 def mass_move(src_mass_files, dest_mass_path, simulation, check_mass_location):
@@ -446,6 +497,9 @@ def mass_move(src_mass_files, dest_mass_path, simulation, check_mass_location):
     except RuntimeError as e:
         logger.critical(str(e))
         raise VariableArchivingError()
+    finally:
+        # a failed command may still have changed MASS
+        invalidate_listings(src_mass_files + [dest_mass_path])
 
 
 def mass_rmdir(mass_dir, simulation):
@@ -467,6 +521,9 @@ def mass_rmdir(mass_dir, simulation):
     except RuntimeError as e:
         logger.critical(str(e))
         raise VariableArchivingError()
+    finally:
+        # a failed command may still have changed MASS
+        invalidate_listings([mass_dir])
 
 
 def mass_available(simulation):
@@ -569,14 +626,82 @@ def run_mass_command(command):
     str
         The standard output from the command.
     """
-    logger = logging.getLogger(__name__)
     process = subprocess.Popen(command,
                                stdout=subprocess.PIPE,
                                stderr=subprocess.PIPE,
                                universal_newlines=True)
     (stdout, stderr) = process.communicate()
-    return_code = process.returncode
+    _check_mass_return_code(command, process.returncode, stdout, stderr)
+    return stdout
 
+
+def list_mass_command_lines(command):
+    """Return the lines output by a MOOSE listing command, from the listing
+    cache if one has been set with
+    :func:`cdds.common.mass_cache.set_listing_cache`.
+
+    Parameters
+    ----------
+    command: list of strings
+        The listing command, ending with the MASS path to list.
+
+    Returns
+    -------
+    iterable of str
+        The lines of the standard output without line endings.
+    """
+    cache = get_listing_cache()
+    if cache is None:
+        return run_mass_command_lines(command)
+    return cache.lines(command, run_mass_command_lines)
+
+
+def invalidate_listings(mass_paths):
+    """Remove the cached listings that are affected by changes to the given
+    MASS paths, if listings are cached.
+
+    Parameters
+    ----------
+    mass_paths: list of strings
+        The MASS paths that have been changed.
+    """
+    cache = get_listing_cache()
+    if cache is not None:
+        cache.invalidate(mass_paths)
+
+
+def run_mass_command_lines(command):
+    """Run the command in a new process and yield the lines of its standard
+    output as they are written, so that long listings never have to be held
+    in memory. The standard error is buffered in a temporary file.
+
+    Parameters
+    ----------
+    command: list of strings
+        The command to run.
+
+    Yields
+    ------
+    str
+        The lines of the standard output without line endings.
+    """
+    with tempfile.TemporaryFile(mode='w+') as stderr_file:
+        process = subprocess.Popen(command,
+                                   stdout=subprocess.PIPE,
+                                   stderr=stderr_file,
+                                   universal_newlines=True)
+        try:
+            for line in process.stdout:
+                yield line.rstrip('\n')
+        finally:
+            process.stdout.close()
+            return_code = process.wait()
+        stderr_file.seek(0)
+        _check_mass_return_code(command, return_code, '', stderr_file.read())
+
+
+def _check_mass_return_code(command, return_code, stdout, stderr):
+    logger = logging.getLogger(__name__)
     if return_code == 2 and 'NOT_FOUND' in stderr:
         not_exist_error = MassFailure.NOT_EXIST_ERROR
         logger.debug(not_exist_error.get_message(command, stdout, stderr))
@@ -605,5 +730,3 @@ def run_mass_command(command):
         command_str = ' '.join(command)
         msg = 'Problem running command "{}" (return code: {}): {}'.format(command_str, return_code, stderr)
         raise RuntimeError(msg)
-
-    return stdout
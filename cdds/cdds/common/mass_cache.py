@@ -0,0 +1,185 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""
+The :mod:`mass_cache` module contains an on-disk cache of MASS listings, so
+that the same locations are not listed again by every step of a run or by
+reruns shortly afterwards.
+"""
+import logging
+import sqlite3
+import time
+import zlib
+from typing import Callable, Iterable, Iterator, List, Optional
+
+_LISTING_CACHE = None
+
+# The size of the pieces the compressed listings are decompressed in.
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def get_listing_cache() -> Optional['MassListingCache']:
+    """Return the listing cache used by the MASS functions, or None if listings are not cached."""
+    return _LISTING_CACHE
+
+
+def set_listing_cache(cache: Optional['MassListingCache']) -> None:
+    """Set the listing cache used by the MASS functions.
+
+    Parameters
+    ----------
+    cache : Optional[MassListingCache]
+        The cache, or None to stop caching listings.
+    """
+    global _LISTING_CACHE
+    _LISTING_CACHE = cache
+
+
+class MassListingCache:
+    """
+    Stores the output of MOOSE listing commands compressed in a sqlite
+    database, keyed by the listing options and the listed MASS path. Entries
+    are used until they are older than the time-to-live or until a change to
+    MASS made through CDDS at or below the listed path invalidates them.
+    """
+
+    def __init__(self, db_file: str, ttl: float, refresh: bool = False):
+        """
+        Parameters
+        ----------
+        db_file : str
+            Path to the database file, created if it does not exist.
+        ttl : float
+            The number of seconds a listing is used for.
+        refresh : bool
+            If true, list each location again the first time it is requested
+            and replace the cached listing.
+        """
+        self.db_file = db_file
+        self.ttl = ttl
+        self.refresh = refresh
+        self._refreshed = set()
+        with self._connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS listing '
+                '(options TEXT NOT NULL, '
+                'mass_path TEXT NOT NULL, '
+                'created REAL NOT NULL, '
+                'data BLOB NOT NULL, '
+                'PRIMARY KEY (options, mass_path))')
+
+    def lines(self, moo_cmd: List[str], run_command: Callable[[List[str]], Iterable[str]]) -> Iterator[str]:
+        """
+        Yield the lines output by a MOOSE listing command, from the cache if
+        there is a current entry and otherwise from running the command, in
+        which case the complete output is added to the cache.
+
+        Parameters
+        ----------
+        moo_cmd : List[str]
+            The listing command, ending with the MASS path to list.
+        run_command : Callable[[List[str]], Iterable[str]]
+            Runs the command and returns the lines of its output.
+
+        Yields
+        ------
+        str
+            The lines of the output without line endings.
+        """
+        logger = logging.getLogger(__name__)
+        options, mass_path = ' '.join(moo_cmd[:-1]), _normalise(moo_cmd[-1])
+        data = self._read(options, mass_path)
+        if data is not None:
+            logger.debug('Using cached listing of "{}" for "{}"'.format(mass_path, options))
+            yield from _decompress_lines(data)
+            return
+
+        started = time.time()
+        compressor = zlib.compressobj()
+        chunks = []
+        for line in run_command(moo_cmd):
+            chunks.append(compressor.compress(line.encode() + b'\n'))
+            yield line
+        chunks.append(compressor.flush())
+        self._write(options, mass_path, started, b''.join(chunks))
+
+    def invalidate(self, mass_paths: List[str]) -> None:
+        """
+        Remove the listings that include any of the given MASS paths, or
+        that are of locations below them.
+
+        Parameters
+        ----------
+        mass_paths : List[str]
+            The MASS paths that have changed.
+        """
+        with self._connect() as connection:
+            connection.executemany(
+                'DELETE FROM listing WHERE substr(?1, 1, length(mass_path) + 1) = mass_path || \'/\' '
+                'OR ?1 = mass_path OR substr(mass_path, 1, length(?1) + 1) = ?1 || \'/\'',
+                [(_normalise(mass_path),) for mass_path in mass_paths])
+
+    def clear(self) -> None:
+        """Remove all listings from the cache."""
+        with self._connect() as connection:
+            connection.execute('DELETE FROM listing')
+
+    def _read(self, options, mass_path):
+        if self.refresh and (options, mass_path) not in self._refreshed:
+            return None
+        with self._connect() as connection:
+            row = connection.execute(
+                'SELECT data FROM listing WHERE options = ? AND mass_path = ? AND created > ?',
+                (options, mass_path, time.time() - self.ttl)).fetchone()
+        return None if row is None else row[0]
+
+    def _write(self, options, mass_path, created, data):
+        with self._connect() as connection:
+            connection.execute('DELETE FROM listing WHERE created <= ?', (time.time() - self.ttl,))
+            connection.execute('INSERT OR REPLACE INTO listing (options, mass_path, created, data) VALUES (?, ?, ?, ?)',
+                               (options, mass_path, created, data))
+        self._refreshed.add((options, mass_path))
+
+    def _connect(self):
+        # A connection for each operation, so that the cache can be used from several threads.
+        connection = sqlite3.connect(self.db_file, timeout=60)
+        return _ClosingConnection(connection)
+
+
+class _ClosingConnection:
+    """Commits, or rolls back on error, and closes a sqlite connection on leaving the context."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self.connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.connection.commit()
+            else:
+                self.connection.rollback()
+        finally:
+            self.connection.close()
+
+
+def _normalise(mass_path):
+    return mass_path.rstrip('/')
+
+
+def _decompressed_chunks(data):
+    decompressor = zlib.decompressobj()
+    for index in range(0, len(data), READ_CHUNK_SIZE):
+        yield decompressor.decompress(data[index:index + READ_CHUNK_SIZE])
+    yield decompressor.flush()
+
+
+def _decompress_lines(data):
+    remainder = b''
+    for chunk in _decompressed_chunks(data):
+        *lines, remainder = (remainder + chunk).split(b'\n')
+        for line in lines:
+            yield line.decode()
+    if remainder:
+        yield remainder.decode()
@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2019-2025, Met Office.
+# (C) British Crown Copyright 2019-2026, Met Office.
 # Please see LICENSE.md for license details.
 """Exceptions raised by accessing MASS"""
 from enum import Enum
@@ -63,6 +63,7 @@ class MassError(Exception):
     def __init__(self, mass_failure, command):
         super(MassError, self).__init__(mass_failure.get_message(command))
         self.msg = mass_failure.get_message(command)
+        self.mass_failure = mass_failure
 
 
 class FileNotExistMassError(MassError):
@@ -1,6 +1,13 @@
-# (C) British Crown Copyright 2019-2025, Met Office.
+# (C) British Crown Copyright 2019-2026, Met Office.
 # Please see LICENSE.md for license details.
 """The :mod:`mass_record` module contains record object of the MASS archiving system and functions on this record."""
+import sys
+from array import array
+from bisect import bisect_right
+from collections import defaultdict
+from collections.abc import Mapping
+
+MOOSE_URI_PREFIX = 'moose:'
 
 
 def filter_records_by_paths(record_map, search_paths):
@@ -22,11 +29,8 @@ def filter_records_by_paths(record_map, search_paths):
         Filtered map of records where the path contains at least one path of
         the given search paths.
     """
-    result = {}
-    for search_path in search_paths:
-        matches = {k: v for (k, v) in record_map.items() if v.path_contains(search_path)}
-        result.update(matches)
-    return result
+    matcher = SearchPathMatcher(search_paths)
+    return {k: v for (k, v) in record_map.items() if matcher.matches(v.path)}
 
 
 def get_records_from_stdout(stdout, searched_paths=None):
@@ -48,18 +52,86 @@ def get_records_from_stdout(stdout, searched_paths=None):
     dict
         Map of records where keys are the record paths and values the corresponding MassRecord.
     """
-    stdout_lines = [line for line in stdout.split('\n') if line]
-    record_map = {}
-    for line in stdout_lines:
-        entries = [entry for entry in line.split()]
-        path_index = len(entries) - 1
-        record = MassRecord(entries[path_index], entries[0])
-        record_map[record.path] = record
-
-    set_is_empty_flag(record_map)
-    if searched_paths:
-        record_map = filter_records_by_paths(record_map, searched_paths)
-    return record_map
+    return dict(get_records_from_lines(stdout.split('\n'), searched_paths).items())
+
+
+def get_records_from_lines(lines, searched_paths=None):
+    """Returns a store of the Mass records for the paths in the lines of the output of
+    a mass ls -lR command, which are consumed one at a time so that the whole output
+    never has to be held in memory. The empty flags are set and the records are
+    filtered by the searched paths in the same pass.
+
+    Parameters
+    ----------
+    lines: iterable
+        Lines of the output of a mass ls -lR command.
+
+    searched_paths: list
+        List of paths that are looked for. If set, only records whose paths contain
+        (completely or partly) at least one of the given paths are stored.
+
+    Returns
+    -------
+    MassRecordStore
+        Store of the records, mapping the record paths to the corresponding MassRecord.
+    """
+    store = MassRecordStore()
+    matcher = SearchPathMatcher(searched_paths) if searched_paths else None
+    for line in lines:
+        entries = line.split()
+        if not entries:
+            continue
+        path = entries[-1]
+        # e.g. F owner 0.00 GBP 1000 2021-03-08 11:21:10 GMT moose:/adhoc/users/owner/test.txt
+        size = int(entries[4]) if len(entries) == 9 else None
+        store.add(path, entries[0], size, keep=matcher is None or matcher.matches(path))
+    return store
+
+
+class SearchPathMatcher:
+    """A SearchPathMatcher checks whether a path contains (completely or partly)
+    at least one of many search paths, with the same result as checking
+    ``search_path in path`` for each of them but in logarithmic time.
+
+    Search paths that are MOOSE URIs can only be contained at the start of
+    another MOOSE URI, so they are kept sorted without the search paths that
+    start with another one, where the only candidate prefix of a path is found
+    with a binary search. Other search paths are checked one by one.
+    """
+
+    def __init__(self, search_paths):
+        """
+        Parameters
+        ----------
+        search_paths: list
+            List of paths that are looked for.
+        """
+        self._prefixes = []
+        for search_path in sorted(path for path in search_paths if path.startswith(MOOSE_URI_PREFIX)):
+            if not self._prefixes or not search_path.startswith(self._prefixes[-1]):
+                self._prefixes.append(search_path)
+        self._substrings = [path for path in search_paths if not path.startswith(MOOSE_URI_PREFIX)]
+
+    def matches(self, path):
+        """Returns if the path contains at least one of the search paths.
+
+        Parameters
+        ----------
+        path: str
+            The path to check.
+
+        Returns
+        -------
+        bool
+            True if at least one search path is contained in the path.
+        """
+        if self._prefixes:
+            index = bisect_right(self._prefixes, path) - 1
+            if index >= 0 and path.startswith(self._prefixes[index]):
+                return True
+            if path.find(MOOSE_URI_PREFIX, 1) != -1 and any(prefix in path for prefix in self._prefixes):
+                return True
+        return any(search_path in path for search_path in self._substrings)
 
 
 def set_is_empty_flag(record_map):
@@ -188,3 +260,162 @@ class MassRecord:
 
     def path_contains(self, search_path):
         return search_path in self._path
+
+
+class MassRecordIndex:
+    """A MassRecordIndex object indexes a map of Mass records by their parent
+    path, so that the children of a record are found without scanning all
+    records.
+    """
+
+    def __init__(self, record_map):
+        """
+        Parameters
+        ----------
+        record_map: dict
+            Map of records where keys are the record paths and values the corresponding MassRecord.
+        """
+        self._records = record_map
+        self._children = defaultdict(list)
+        for path, record in record_map.items():
+            self._children[record.parent].append(path)
+
+    def __contains__(self, path):
+        return path in self._records
+
+    def __getitem__(self, path):
+        return self._records[path]
+
+    def children(self, path):
+        """Returns the paths of the records directly contained in a record.
+
+        Parameters
+        ----------
+        path: str
+            Path of the record.
+
+        Returns
+        -------
+        list
+            Paths of the child records in the order of the record map.
+        """
+        return list(self._children.get(path, []))
+
+
+class MassRecordStore(Mapping):
+    """A MassRecordStore object holds the records of a MASS listing in columns
+    rather than as one MassRecord per entry: the parent directory paths are
+    stored once and shared, names are interned and sizes and flags are kept
+    in typed arrays. It is a read-only mapping of the record paths to
+    MassRecord objects, which are created when they are looked up.
+    """
+
+    def __init__(self):
+        self._dir_ids = {}
+        self._dir_paths = []
+        self._dir_parents = []
+        self._not_empty = set()
+        self._parents = array('l')
+        self._names = []
+        self._is_dir = bytearray()
+        self._sizes = array('q')
+        self._rows = defaultdict(dict)
+
+    def add(self, path, media_type, size=None, keep=True):
+        """Adds a record to the store.
+
+        Parameters
+        ----------
+        path: str
+            Absolute path of the record.
+        media_type: str
+            Type of the record, 'D' for a directory.
+        size: int
+            Size of the record in bytes, if known.
+        keep: bool
+            If False, the record only counts towards the emptiness of its
+            parent directories and is not stored.
+        """
+        parent, _, name = path.rpartition('/')
+        parent_id = self._dir_id(parent)
+        is_dir = media_type == 'D'
+        if is_dir:
+            self._dir_id(path)
+        else:
+            # files, collections and data sets are not empty and neither are the directories containing them
+            dir_id = parent_id
+            while dir_id is not None and dir_id not in self._not_empty:
+                self._not_empty.add(dir_id)
+                dir_id = self._dir_parents[dir_id]
+        if not keep:
+            return
+        row = self._rows[parent_id].get(name)
+        if row is not None:
+            self._is_dir[row] = is_dir
+            self._sizes[row] = -1 if size is None else size
+            return
+        self._rows[parent_id][sys.intern(name)] = len(self._names)
+        self._parents.append(parent_id)
+        self._names.append(sys.intern(name))
+        self._is_dir.append(is_dir)
+        self._sizes.append(-1 if size is None else size)
+
+    def _dir_id(self, path):
+        dir_id = self._dir_ids.get(path)
+        if dir_id is None:
+            parent = path.rpartition('/')[0] if '/' in path else None
+            parent_id = self._dir_id(parent) if parent else None
+            dir_id = len(self._dir_paths)
+            self._dir_ids[path] = dir_id
+            self._dir_paths.append(path)
+            self._dir_parents.append(parent_id)
+        return dir_id
+
+    def _row(self, path):
+        parent, _, name = path.rpartition('/')
+        parent_id = self._dir_ids.get(parent)
+        if parent_id is None:
+            return None
+        return self._rows.get(parent_id, {}).get(name)
+
+    def _path(self, row):
+        return '{}/{}'.format(self._dir_paths[self._parents[row]], self._names[row])
+
+    def _record(self, row):
+        path = self._path(row)
+        record = MassRecord(path, 'D' if self._is_dir[row] else 'F')
+        record.set_empty(bool(self._is_dir[row]) and self._dir_ids[path] not in self._not_empty)
+        return record
+
+    def __getitem__(self, path):
+        row = self._row(path)
+        if row is None:
+            raise KeyError(path)
+        return self._record(row)
+
+    def __contains__(self, path):
+        return self._row(path) is not None
+
+    def __iter__(self):
+        return (self._path(row) for row in range(len(self._names)))
+
+    def __len__(self):
+        return len(self._names)
+
+    def size(self, path):
+        """Returns the size of a record in bytes, or None if it is not known."""
+        row = self._row(path)
+        if row is None:
+            raise KeyError(path)
+        return None if self._sizes[row] < 0 else self._sizes[row]
+
+    def empty_dirs(self):
+        """Returns the paths of the stored directories that do not contain any files.
+
+        Returns
+        -------
+        list
+            Paths of the empty directories in the order they were added.
+        """
+        return [self._path(row) for row in range(len(self._names))
+                if self._is_dir[row] and self._dir_ids[self._path(row)] not in self._not_empty]
@@ -0,0 +1,365 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""
+The :mod:`moo_simulator` module contains a stand-in for the MOOSE command
+line client, backed by a local directory tree, so that the code
+interacting with MASS can be tested and benchmarked without access to
+MASS.
+
+The simulator is run as the ``moo`` command by putting the wrapper script
+written by :func:`install_moo_simulator` first on the ``PATH``. It supports
+the ``ls`` (``-R``, ``-l``), ``get``, ``put``, ``select``, ``filter``,
+``test``, ``mkdir``, ``mv``, ``rmdir``, ``getstats`` and ``si`` commands,
+with a configurable latency per command, delay per tape mount and injected
+failures. ``select`` and ``filter`` retrieve whole files, the filter files
+are not applied.
+"""
+import fcntl
+import json
+import os
+import random
+import shutil
+import stat
+import sys
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional, Tuple
+
+# The environment variable with the path of the configuration file of the simulator.
+MOO_SIMULATOR_CONFIG = 'CDDS_MOO_SIMULATOR_CONFIG'
+MOOSE_URI_PREFIX = 'moose:'
+
+NOT_FOUND_ERROR = 2, '(TSSC_PATH_DOES_NOT_EXIST) NOT_FOUND: {}'
+ALREADY_EXISTS_ERROR = 2, '(PATH_ALREADY_EXISTS) {}'
+DIR_ALREADY_EXISTS_ERROR = 10, '(PATH_ALREADY_EXISTS) {}'
+USAGE_ERROR = 4, 'Usage error: {}'
+
+
+@dataclass
+class MooSimulatorConfig:
+    """The configuration of the simulator."""
+    # The local directory holding the simulated MASS tree, i.e. moose:/crum/u-ab123 is <root>/crum/u-ab123.
+    root: str
+    # Seconds every command takes in addition to its work.
+    latency: float = 0.0
+    # Seconds taken to mount each tape read by a retrieval.
+    tape_mount_delay: float = 0.0
+    # The files of a directory, sorted by name, are stored on tapes of this many files.
+    files_per_tape: int = 100
+    tape_limit: int = 50
+    # Probability that a command fails with the failure message.
+    failure_rate: float = 0.0
+    # Number of commands that fail before any succeeds.
+    fail_first: int = 0
+    # The commands failures are injected into, all commands if empty.
+    failure_commands: List[str] = field(default_factory=list)
+    failure_code: int = 3
+    failure_message: str = '(SSC_STORAGE_SYSTEM_UNAVAILABLE) STORAGE_SYSTEM_UNAVAILABLE'
+
+    def save(self, config_file: str) -> None:
+        """Write the configuration to a JSON file."""
+        with open(config_file, 'w') as file_handle:
+            json.dump(asdict(self), file_handle, indent=2)
+
+    @classmethod
+    def load(cls, config_file: str) -> 'MooSimulatorConfig':
+        """Read the configuration from a JSON file written by :meth:`save`."""
+        with open(config_file) as file_handle:
+            return cls(**json.load(file_handle))
+
+
+def install_moo_simulator(bin_dir: str, config: MooSimulatorConfig) -> str:
+    """
+    Write the configuration and a ``moo`` script running the simulator to
+    the given directory. Commands run with the directory first on the
+    ``PATH`` then use the simulator instead of MOOSE.
+
+    Parameters
+    ----------
+    bin_dir : str
+        The directory to write the script to.
+    config : MooSimulatorConfig
+        The configuration of the simulator.
+
+    Returns
+    -------
+    str
+        The path of the ``moo`` script.
+    """
+    os.makedirs(bin_dir, exist_ok=True)
+    os.makedirs(config.root, exist_ok=True)
+    config_file = os.path.join(bin_dir, 'moo_simulator.json')
+    config.save(config_file)
+    package_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    script = os.path.join(bin_dir, 'moo')
+    with open(script, 'w') as file_handle:
+        file_handle.write(
+            '#!/bin/sh\n'
+            'export {}="{}"\n'
+            'export PYTHONPATH="{}${{PYTHONPATH:+:$PYTHONPATH}}"\n'
+            'exec "{}" -m cdds.common.moo_simulator "$@"\n'.format(
+                MOO_SIMULATOR_CONFIG, config_file, package_dir, sys.executable))
+    os.chmod(script, os.stat(script).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return script
+
+
+class MooSimulator:
+    """Runs MOOSE commands against the simulated MASS tree."""
+
+    def __init__(self, config: MooSimulatorConfig, config_file: Optional[str] = None):
+        """
+        Parameters
+        ----------
+        config : MooSimulatorConfig
+            The configuration of the simulator.
+        config_file : str, optional
+            The configuration file, next to which the number of commands run
+            is counted for ``fail_first``.
+        """
+        self.config = config
+        self.config_file = config_file
+        self._tape_indexes = {}
+
+    def run(self, arguments: List[str]) -> Tuple[int, str, str]:
+        """
+        Run a MOOSE command.
+
+        Parameters
+        ----------
+        arguments : List[str]
+            The arguments of ``moo``, starting with the command.
+
+        Returns
+        -------
+        Tuple[int, str, str]
+            The return code, standard output and standard error.
+        """
+        if not arguments:
+            return USAGE_ERROR[0], '', USAGE_ERROR[1].format('no command given')
+        command, arguments = arguments[0], arguments[1:]
+        handler = getattr(self, '_{}'.format(command), None)
+        if handler is None:
+            return USAGE_ERROR[0], '', USAGE_ERROR[1].format('unknown command {}'.format(command))
+        time.sleep(self.config.latency)
+        if self._inject_failure(command):
+            return self.config.failure_code, '', self.config.failure_message
+        options = [argument for argument in arguments if argument.startswith('-')]
+        paths = [argument for argument in arguments if not argument.startswith('-')]
+        try:
+            return handler(options, paths)
+        except MooCommandError as exc:
+            return exc.code, '', exc.message
+
+    def local_path(self, uri: str) -> str:
+        """Return the local path of a MASS URI."""
+        if not uri.startswith(MOOSE_URI_PREFIX):
+            raise MooCommandError(USAGE_ERROR, 'not a MASS URI {}'.format(uri))
+        return os.path.join(self.config.root, uri[len(MOOSE_URI_PREFIX):].lstrip('/'))
+
+    def uri(self, local_path: str) -> str:
+        """Return the MASS URI of a local path in the simulated tree."""
+        return '{}/{}'.format(MOOSE_URI_PREFIX, os.path.relpath(local_path, self.config.root))
+
+    def tape(self, local_path: str) -> str:
+        """Return the identifier of the tape a file is stored on."""
+        directory, filename = os.path.split(local_path)
+        if directory not in self._tape_indexes:
+            self._tape_indexes[directory] = {name: index for index, name in enumerate(sorted(os.listdir(directory)))}
+        index = self._tape_indexes[directory][filename]
+        return 'T{:08X}{:04d}'.format(zlib.crc32(self.uri(directory).encode()), index // self.config.files_per_tape)
+
+    def _inject_failure(self, command: str) -> bool:
+        if self.config.failure_commands and command not in self.config.failure_commands:
+            return False
+        if self.config.fail_first and self.config_file:
+            with open('{}.calls'.format(self.config_file), 'a+') as file_handle:
+                fcntl.flock(file_handle, fcntl.LOCK_EX)
+                file_handle.seek(0)
+                calls = int(file_handle.read() or 0)
+                file_handle.seek(0)
+                file_handle.truncate()
+                file_handle.write(str(calls + 1))
+            if calls < self.config.fail_first:
+                return True
+        return random.random() < self.config.failure_rate
+
+    def _existing_path(self, uri: str) -> str:
+        path = self.local_path(uri)
+        if not os.path.exists(path):
+            raise MooCommandError(NOT_FOUND_ERROR, uri)
+        return path
+
+    def _mount(self, paths: List[str]) -> None:
+        tapes = {self.tape(path) for path in paths}
+        time.sleep(self.config.tape_mount_delay * len(tapes))
+
+    def _copy(self, sources: List[str], target: str, overwrite: bool, ignore_existing: bool) -> None:
+        if not os.path.isdir(target):
+            raise MooCommandError(NOT_FOUND_ERROR, target)
+        for source in sources:
+            destination = os.path.join(target, os.path.basename(source))
+            if os.path.exists(destination) and not overwrite:
+                if ignore_existing:
+                    continue
+                raise MooCommandError(ALREADY_EXISTS_ERROR, destination)
+            shutil.copyfile(source, destination)
+
+    def _retrieve(self, options: List[str], sources: List[str], target: str) -> Tuple[int, str, str]:
+        self._mount(sources)
+        self._copy(sources, target, '-f' in options, '-i' in options)
+        return 0, '', ''
+
+    def _ls(self, options, paths):
+        recursive = any('R' in option for option in options if not option.startswith('--'))
+        long_format = any('l' in option for option in options if not option.startswith('--'))
+        lines = []
+        for uri in paths:
+            path = self._existing_path(uri)
+            if os.path.isdir(path):
+                entries = self._walk(path) if recursive else [
+                    os.path.join(path, name) for name in sorted(os.listdir(path))]
+            else:
+                entries = [path]
+            lines += [self._ls_line(entry) if long_format else self.uri(entry) for entry in entries]
+        return 0, ''.join('{}\n'.format(line) for line in lines), ''
+
+    def _walk(self, path):
+        entries = []
+        for name in sorted(os.listdir(path)):
+            entry = os.path.join(path, name)
+            entries.append(entry)
+            if os.path.isdir(entry):
+                entries += self._walk(entry)
+        return entries
+
+    def _ls_line(self, path):
+        stat_result = os.stat(path)
+        modified = time.strftime('%Y-%m-%d %H:%M:%S GMT', time.gmtime(stat_result.st_mtime))
+        if os.path.isdir(path):
+            return 'D {}         {} {}'.format(_owner(), modified, self.uri(path))
+        return 'F {}         0.00 GBP {:>16} {} {}'.format(_owner(), stat_result.st_size, modified, self.uri(path))
+
+    def _get(self, options, paths):
+        if len(paths) < 2:
+            raise MooCommandError(USAGE_ERROR, 'get needs sources and a target')
+        sources = [self._existing_path(uri) for uri in paths[:-1]]
+        return self._retrieve(options, sources, paths[-1])
+
+    def _select(self, options, paths):
+        if len(paths) != 3:
+            raise MooCommandError(USAGE_ERROR, 'select needs a filter file, a source and a target')
+        source = self._existing_path(paths[1])
+        sources = [os.path.join(source, name) for name in sorted(os.listdir(source))]
+        if '-n' in options:
+            self._mount(sources)
+            return 0, '', ''
+        return self._retrieve(options, sources, paths[2])
+
+    def _filter(self, options, paths):
+        if len(paths) < 3:
+            raise MooCommandError(USAGE_ERROR, 'filter needs a filter file, sources and a target')
+        sources = [self._existing_path(uri) for uri in paths[1:-1]]
+        return self._retrieve(options, sources, paths[-1])
+
+    def _put(self, options, paths):
+        if len(paths) < 2:
+            raise MooCommandError(USAGE_ERROR, 'put needs sources and a target')
+        for source in paths[:-1]:
+            if not os.path.isfile(source):
+                raise MooCommandError(NOT_FOUND_ERROR, source)
+        if not os.path.isdir(self.local_path(paths[-1])):
+            raise MooCommandError(NOT_FOUND_ERROR, paths[-1])
+        self._copy(paths[:-1], self.local_path(paths[-1]), '-f' in options, '-i' in options)
+        return 0, '', ''
+
+    def _mv(self, options, paths):
+        if len(paths) < 2:
+            raise MooCommandError(USAGE_ERROR, 'mv needs sources and a target')
+        target = self._existing_path(paths[-1])
+        for uri in paths[:-1]:
+            shutil.move(self._existing_path(uri), target)
+        return 0, '', ''
+
+    def _test(self, options, paths):
+        path = self.local_path(paths[0])
+        if '-d' in options:
+            exists = os.path.isdir(path)
+        elif '-f' in options:
+            exists = os.path.isfile(path)
+        else:
+            exists = os.path.exists(path)
+        return 0, '{}\n'.format('true' if exists else 'false'), ''
+
+    def _mkdir(self, options, paths):
+        for uri in paths:
+            path = self.local_path(uri)
+            if os.path.exists(path):
+                raise MooCommandError(DIR_ALREADY_EXISTS_ERROR, uri)
+            if '-p' in options:
+                os.makedirs(path)
+            elif not os.path.isdir(os.path.dirname(path)):
+                raise MooCommandError(NOT_FOUND_ERROR, uri)
+            else:
+                os.mkdir(path)
+        return 0, '', ''
+
+    def _rmdir(self, options, paths):
+        for uri in paths:
+            path = self._existing_path(uri)
+            if os.listdir(path) and '--force' not in options:
+                raise MooCommandError(USAGE_ERROR, 'directory not empty {}'.format(uri))
+            shutil.rmtree(path)
+        return 0, '', ''
+
+    def _getstats(self, options, paths):
+        lines = []
+        for uri in paths:
+            path = self._existing_path(uri)
+            files = self._walk(path) if os.path.isdir(path) else [path]
+            lines += ['{} {}'.format(self.tape(entry), self.uri(entry)) for entry in files if os.path.isfile(entry)]
+        return 0, ''.join('{}\n'.format(line) for line in lines), ''
+
+    def _si(self, options, paths):
+        return 0, ('MOOSE simulator\n'
+                   'Multiple-get tape-number limit: {}\n'
+                   'GET commands enabled: true\n'
+                   'PUT commands enabled: true\n'.format(self.config.tape_limit)), ''
+
+
+class MooCommandError(Exception):
+    """Raised when a simulated MOOSE command fails."""
+
+    def __init__(self, error, detail):
+        super(MooCommandError, self).__init__(error[1].format(detail))
+        self.code = error[0]
+        self.message = error[1].format(detail)
+
+
+def _owner():
+    return os.environ.get('USER', 'cdds')
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Run the simulator as the ``moo`` command.
+
+    Parameters
+    ----------
+    arguments : List[str], optional
+        The command line arguments, by default those of the process.
+
+    Returns
+    -------
+    int
+        The return code of the command.
+    """
+    config_file = os.environ[MOO_SIMULATOR_CONFIG]
+    simulator = MooSimulator(MooSimulatorConfig.load(config_file), config_file)
+    code, stdout, stderr = simulator.run(sys.argv[1:] if arguments is None else arguments)
+    sys.stdout.write(stdout)
+    sys.stderr.write(stderr)
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""The :mod:`netcdf` module contains code related to the layout of |netCDF| files."""
+import struct
+
+# Sizes in bytes of the netCDF classic external data types.
+NC_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 4, 6: 8, 7: 1, 8: 2, 9: 4, 10: 8, 11: 8}
+NC_DIMENSION, NC_VARIABLE, NC_ATTRIBUTE = 10, 11, 12
+
+
+def classic_netcdf_minimum_size(filepath):
+    """Return the size a classic format |netCDF| file must have to hold
+    all the data described by its header.
+
+    The classic formats (CDF-1, CDF-2 and CDF-5) store the offset of every
+    variable in the header at the start of the file, so tools that only
+    read the header do not notice a truncated file, and reading the
+    missing data returns fill values instead of failing.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the |netCDF| file.
+
+    Returns
+    -------
+    int or None
+        The minimum size of the file in bytes, or None if the file is not
+        in a classic format (e.g. it is a netCDF4/HDF5 file).
+
+    Raises
+    ------
+    ValueError
+        If the header of a classic format file cannot be parsed.
+    """
+    with open(filepath, 'rb') as file_handle:
+        magic = file_handle.read(4)
+        if len(magic) < 4 or magic[:3] != b'CDF' or magic[3] not in (1, 2, 5):
+            return None
+        reader = _HeaderReader(file_handle, magic[3])
+        try:
+            return reader.minimum_size()
+        except (KeyError, struct.error) as exc:
+            raise ValueError('{}: invalid header'.format(filepath)) from exc
+
+
+class _HeaderReader(object):
+    """Reads the header of a classic format netCDF file, see
+    https://docs.unidata.ucar.edu/netcdf-c/current/file_format_specifications.html"""
+
+    def __init__(self, file_handle, version):
+        self.file_handle = file_handle
+        # CDF-5 uses 64 bit counts, CDF-2 and CDF-5 use 64 bit offsets.
+        self.count_format = '>q' if version == 5 else '>i'
+        self.offset_format = '>i' if version == 1 else '>q'
+
+    def minimum_size(self):
+        numrecs = self._unpack(self.count_format)
+        dimensions = [length for _, length in self._list(NC_DIMENSION, self._dimension)]
+        self._list(NC_ATTRIBUTE, self._attribute)
+        variables = self._list(NC_VARIABLE, self._variable)
+
+        record_variables = [var for var in variables if var[0] and dimensions[var[0][0]] == 0]
+        record_size = sum(var[2] for var in record_variables)
+        end = self.file_handle.tell()
+        for dimension_ids, nc_type, vsize, begin in variables:
+            is_record = dimension_ids and dimensions[dimension_ids[0]] == 0
+            shape = [dimensions[dimension_id] for dimension_id in dimension_ids[1 if is_record else 0:]]
+            data_size = NC_TYPE_SIZES[nc_type]
+            for length in shape:
+                data_size *= length
+            if is_record:
+                if numrecs > 0:
+                    end = max(end, begin + (numrecs - 1) * record_size + data_size)
+            else:
+                end = max(end, begin + data_size)
+        return end
+
+    def _unpack(self, fmt):
+        size = struct.calcsize(fmt)
+        return struct.unpack(fmt, self.file_handle.read(size))[0]
+
+    def _list(self, tag, read_item):
+        list_tag = self._unpack('>i')
+        count = self._unpack(self.count_format)
+        if list_tag not in (0, tag):
+            raise struct.error('unexpected tag {}'.format(list_tag))
+        return [read_item() for _ in range(count)]
+
+    def _name(self):
+        length = self._unpack(self.count_format)
+        self.file_handle.read(_padded(length))
+
+    def _dimension(self):
+        self._name()
+        return None, self._unpack(self.count_format)
+
+    def _attribute(self):
+        self._name()
+        nc_type = self._unpack('>i')
+        count = self._unpack(self.count_format)
+        self.file_handle.seek(_padded(count * NC_TYPE_SIZES[nc_type]), 1)
+
+    def _variable(self):
+        self._name()
+        rank = self._unpack(self.count_format)
+        dimension_ids = [self._unpack(self.count_format) for _ in range(rank)]
+        self._list(NC_ATTRIBUTE, self._attribute)
+        nc_type = self._unpack('>i')
+        vsize = self._unpack(self.count_format)
+        begin = self._unpack(self.offset_format)
+        return dimension_ids, nc_type, vsize, begin
+
+
+def _padded(length):
+    return (length + 3) // 4 * 4
@@ -0,0 +1,91 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""
+The storage layout rules of the CMIP7 internal packing requirements, as
+enforced by ``check_cmip7_packing`` and produced by ``cmip7repack``.
+
+These rules are shared by the packing checks run before repacking and by
+the steps that write netCDF files, so that files written with the target
+layout are recognised as already packed.
+"""
+from math import prod
+from typing import Optional, Sequence, Tuple
+
+# Minimum uncompressed chunk size, in bytes, of a chunked data variable.
+CMIP7_MINIMUM_CHUNK_SIZE = 4 * (2**20)
+
+
+def data_chunk_is_large_enough(chunk_shape: Sequence[int], itemsize: int) -> bool:
+    """
+    Return whether the chunks of a data variable meet the CMIP7 chunk size
+    requirement, i.e. whether the uncompressed chunk size, or the size of a
+    chunk one element longer along the leading dimension, is at least
+    ``CMIP7_MINIMUM_CHUNK_SIZE``.
+
+    Parameters
+    ----------
+    chunk_shape : Sequence[int]
+        The chunk shape of the data variable.
+    itemsize : int
+        The size in bytes of one element of the data variable.
+
+    Returns
+    -------
+    bool
+        True if the chunks are large enough.
+    """
+    chunk_size = prod(chunk_shape) * itemsize
+    lee_way = prod(chunk_shape[1:]) * itemsize if len(chunk_shape) > 1 else 0
+    return chunk_size + lee_way >= CMIP7_MINIMUM_CHUNK_SIZE
+
+
+def data_chunk_shape(shape: Sequence[int], itemsize: int, inner_chunk_shape: Optional[Sequence[int]] = None,
+                     target_size: int = CMIP7_MINIMUM_CHUNK_SIZE) -> Tuple[int, ...]:
+    """
+    Return the chunk shape ``cmip7repack`` would give a data variable.
+
+    Only the leading (time) dimension of the chunk is changed, to the
+    largest length for which the chunk is no bigger than ``target_size``
+    (but at least one element). The chunk never exceeds the data shape.
+
+    Parameters
+    ----------
+    shape : Sequence[int]
+        The shape of the data variable, leading dimension first.
+    itemsize : int
+        The size in bytes of one element of the data variable.
+    inner_chunk_shape : Sequence[int], optional
+        The chunk shape of the trailing dimensions. Defaults to the full
+        size of each trailing dimension.
+    target_size : int
+        The target uncompressed chunk size in bytes.
+
+    Returns
+    -------
+    Tuple[int, ...]
+        The chunk shape.
+    """
+    if inner_chunk_shape is None:
+        inner_chunk_shape = shape[1:]
+    inner_chunk_shape = [min(length, size) for length, size in zip(inner_chunk_shape, shape[1:])]
+    leading_length = target_size // (itemsize * prod(inner_chunk_shape))
+    leading_length = max(1, min(leading_length, shape[0]))
+    return (leading_length,) + tuple(inner_chunk_shape)
+
+
+def time_chunk_shape(shape: Sequence[int]) -> Tuple[int, ...]:
+    """
+    Return the chunk shape of the time coordinate or time bounds variable,
+    which must be stored as a single chunk.
+
+    Parameters
+    ----------
+    shape : Sequence[int]
+        The shape of the variable.
+
+    Returns
+    -------
+    Tuple[int, ...]
+        The chunk shape.
+    """
+    return tuple(max(1, length) for length in shape)
@@ -1,6 +1,11 @@
-# (C) British Crown Copyright 2018-2025, Met Office.
+# (C) British Crown Copyright 2018-2026, Met Office.
 # Please see LICENSE.md for license details.
 """The :mod:`pp` module contains code related to PP |model output files|."""
+from collections import namedtuple
+import mmap
+import os
+import struct
+
 from iris.fileformats.pp import STASH
 
 from cdds.common.constants import (
@@ -28,3 +33,97 @@ def stash_to_int(stash_string):
                 section=STASH.from_msi(stash_string).section,
                 item=STASH.from_msi(stash_string).item))
     return stash_int
+
+
+# Positions (0-based) of the integer words of a PP header used by CDDS.
+LBYR, LBYRD, LBTIM, LBPROC, LBUSER4 = 0, 6, 12, 24, 41
+PP_HEADER_WORDS = 64
+PP_HEADER_INTEGERS = 45
+
+PPFieldHeader = namedtuple('PPFieldHeader', ['stash', 'lbproc', 'lbtim', 't1', 't2'])
+PPFieldHeader.__doc__ = """The header of a PP field.
+
+``stash`` is the |STASH code| in integer form (LBUSER4), ``t1`` and ``t2``
+are the (year, month, day, hour, minute, day number or second) validity
+and data times (LBYR to LBDAY and LBYRD to LBDAYD).
+"""
+
+
+def read_pp_headers(filepath):
+    """Return the headers of all fields in a PP file.
+
+    Only the headers are read: the file is memory mapped and the data
+    records are skipped using their record lengths. Files with 32 or 64 bit
+    words, 4 or 8 byte record markers and either byte order are supported.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the PP file.
+
+    Returns
+    -------
+    list of PPFieldHeader
+        The header of each field, in the order of the fields in the file.
+
+    Raises
+    ------
+    ValueError
+        If the file is empty or not a valid PP file.
+    """
+    with open(filepath, 'rb') as file_handle:
+        if os.fstat(file_handle.fileno()).st_size == 0:
+            raise ValueError('{} is empty'.format(filepath))
+        with mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            byte_order, marker_type, word_size = _pp_layout(buffer, filepath)
+            return list(_scan_pp_headers(buffer, filepath, byte_order, marker_type, word_size))
+
+
+def _pp_layout(buffer, filepath):
+    # The first record of a PP file is a header, so its record markers give
+    # the byte order and the sizes of the markers and of the words. Both
+    # markers are checked, as the start of an 8 byte little endian marker is
+    # also a valid 4 byte marker.
+    for byte_order in '><':
+        for marker_type in 'iq':
+            marker_format = byte_order + marker_type
+            marker_size = struct.calcsize(marker_type)
+            if len(buffer) < marker_size:
+                continue
+            header_length = struct.unpack_from(marker_format, buffer)[0]
+            trailer_offset = marker_size + header_length
+            for word_size in (4, 8):
+                if header_length == PP_HEADER_WORDS * word_size and \
+                        trailer_offset + marker_size <= len(buffer) and \
+                        struct.unpack_from(marker_format, buffer, trailer_offset)[0] == header_length:
+                    return byte_order, marker_type, word_size
+    raise ValueError('{} is not a PP file'.format(filepath))
+
+
+def _scan_pp_headers(buffer, filepath, byte_order, marker_type, word_size):
+    marker_format = byte_order + marker_type
+    marker_size = struct.calcsize(marker_type)
+    integers_format = '{}{}{}'.format(byte_order, PP_HEADER_INTEGERS, 'i' if word_size == 4 else 'q')
+    header_length = PP_HEADER_WORDS * word_size
+    offset = 0
+    while offset < len(buffer):
+        offset, header = _read_record(buffer, filepath, offset, marker_format, marker_size)
+        if header[1] - header[0] != header_length:
+            raise ValueError('{}: unexpected header length at byte {}'.format(filepath, header[0]))
+        ints = struct.unpack_from(integers_format, buffer, header[0])
+        offset, _ = _read_record(buffer, filepath, offset, marker_format, marker_size)
+        yield PPFieldHeader(ints[LBUSER4], ints[LBPROC], ints[LBTIM], ints[LBYR:LBYR + 6], ints[LBYRD:LBYRD + 6])
+
+
+def _read_record(buffer, filepath, offset, marker_format, marker_size):
+    # Returns the offset of the next record and the start and end of the
+    # content of this (Fortran unformatted sequential) record.
+    if offset + marker_size > len(buffer):
+        raise ValueError('{}: truncated record at byte {}'.format(filepath, offset))
+    length = struct.unpack_from(marker_format, buffer, offset)[0]
+    start = offset + marker_size
+    end = start + length
+    if length < 0 or end + marker_size > len(buffer) or \
+            struct.unpack_from(marker_format, buffer, end)[0] != length:
+        raise ValueError('{}: corrupt record at byte {}'.format(filepath, offset))
+    return end + marker_size, (start, end)
@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2020-2025, Met Office.
+# (C) British Crown Copyright 2020-2026, Met Office.
 # Please see LICENSE.md for license details.
 """The :mod:`sqlite` module contains helper functions to simplify sqlite queries."""
 
@@ -65,3 +65,22 @@ def execute_query(cursor, sql, params):
         Cursor object
     """
     return cursor.execute(*(sql, params))
+
+
+def execute_insert_many(cursor, table, columns, rows, pk='id'):
+    """Executes a single prepared insert query for many rows.
+
+    Parameters
+    ----------
+    cursor : sqlite3.Cursor
+        Db cursor.
+    table : str
+        Db table name.
+    columns : list
+        List of column names.
+    rows : iterable
+        Iterable of tuples containing the values of the columns for each row.
+    pk : str
+        Name of the primary key (default 'id').
+    """
+    cursor.executemany(generate_insert_sql(table, columns, pk), rows)
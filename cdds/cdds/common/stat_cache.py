@@ -0,0 +1,103 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""
+The :mod:`stat_cache` module contains a cache of values derived from files
+or directories, which are reused while the files or directories have not
+changed and can be persisted in a JSON file to be reused by later processes.
+"""
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+
+class StatCache:
+    """
+    Stores JSON serialisable values keyed by path. A value is only returned
+    while the size and modification time of its path are the same as when
+    the value was added, so values are not used once the file or directory
+    they were derived from has changed.
+    """
+
+    def __init__(self, cache_file: Optional[str] = None):
+        """
+        Parameters
+        ----------
+        cache_file : str, optional
+            The JSON file the values are read from and saved to. If not
+            given, the values are only kept in memory.
+        """
+        self.cache_file = cache_file
+        self._entries: Dict[str, Tuple[int, int, Any]] = {}
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file) as file_handle:
+                for path, (size, mtime_ns, value) in json.load(file_handle).items():
+                    self._entries[path] = (size, mtime_ns, value)
+
+    def get(self, path: str, stat_result: Optional[os.stat_result] = None) -> Optional[Any]:
+        """
+        Return the value stored for the path if it is still valid.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file or directory.
+        stat_result : os.stat_result, optional
+            The current status of the path, if already known.
+
+        Returns
+        -------
+        Optional[Any]
+            The stored value, or None if there is none or the path has
+            changed since it was added.
+        """
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+        if stat_result is None:
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                return None
+        size, mtime_ns, value = entry
+        if stat_result.st_size != size or stat_result.st_mtime_ns != mtime_ns:
+            return None
+        return value
+
+    def add(self, path: str, value: Any, size: int, mtime_ns: int) -> None:
+        """
+        Add a value, replacing any earlier one for the path.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file or directory.
+        value : Any
+            The JSON serialisable value.
+        size : int
+            The size of the path when the value was derived from it.
+        mtime_ns : int
+            The modification time, in nanoseconds, of the path when the value
+            was derived from it.
+        """
+        self._entries[path] = (size, mtime_ns, value)
+
+    def discard(self, path: str) -> None:
+        """
+        Remove the value stored for the path, if there is one.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file or directory.
+        """
+        self._entries.pop(path, None)
+
+    def save(self) -> None:
+        """Write the values to the cache file, if there is one."""
+        if not self.cache_file:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+        temporary_file = "{}.tmp".format(self.cache_file)
+        with open(temporary_file, "w") as file_handle:
+            json.dump({path: list(entry) for path, entry in self._entries.items()}, file_handle)
+        os.replace(temporary_file, self.cache_file)
@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2017-2025, Met Office.
+# (C) British Crown Copyright 2017-2026, Met Office.
 # Please see LICENSE.md for license details.
 """CMOR netCDF file concatenation routines"""
 import glob
@@ -8,7 +8,10 @@ import sqlite3
 import time
 import multiprocessing
 
+import netCDF4
+
 from cdds.common import run_command
+from cdds.common.packing import data_chunk_shape, time_chunk_shape
 from cdds.convert.constants import (DEFAULT_SQLITE_TIMEOUT, NCRCAT,
                                     TASK_STATUS_COMPLETE, TASK_STATUS_STARTED,
                                     TASK_STATUS_FAILED)
@@ -42,6 +45,72 @@ def prepare_to_concatenate_files(input_files, output_file, dummy_run):
         logger.info('Directory created.')
 
 
+def packing_options(input_files):
+    """Return the ncrcat options that chunk the concatenated output with the
+    CMIP7 storage layout (see :mod:`cdds.common.packing`), so that repacking
+    the output is not needed.
+
+    The data variable (given by the ``variable_id`` global attribute) is
+    chunked along time to the chunk size used by ``cmip7repack``, while the
+    time coordinates and their bounds are each written as a single chunk,
+    using the per-variable form of the NCO ``--cnk_dmn`` option. Only the
+    file headers are read: the first file for the layout of the variables
+    and every file for the length of its time dimension.
+
+    Parameters
+    ----------
+    input_files : list
+        Names of the input files
+
+    Returns
+    -------
+    list
+        The ncrcat options, or an empty list if the layout cannot be
+        determined from the input files, in which case ncrcat uses its
+        default chunking and the output may need repacking.
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        with netCDF4.Dataset(input_files[0]) as dataset:
+            if 'variable_id' not in dataset.ncattrs():
+                return []
+            variable = dataset.variables.get(dataset.getncattr('variable_id'))
+            if variable is None or not variable.dimensions or variable.dimensions[0] != 'time':
+                return []
+            shape = list(variable.shape)
+            itemsize = variable.dtype.itemsize
+            chunking = variable.chunking()
+            inner_chunk_shape = None if chunking == 'contiguous' else chunking[1:]
+            time_variables = _time_variables(dataset)
+        for input_file in input_files[1:]:
+            with netCDF4.Dataset(input_file) as dataset:
+                shape[0] += len(dataset.dimensions['time'])
+    except (OSError, KeyError) as err:
+        logger.warning('Unable to determine the storage layout from the input files, concatenating with the '
+                       'default chunking of ncrcat: {}'.format(err))
+        return []
+    time_chunk_length = data_chunk_shape(shape, itemsize, inner_chunk_shape)[0]
+    options = ['--cnk_plc=all', '--cnk_dmn', 'time,{}'.format(time_chunk_length)]
+    single_chunk_length = time_chunk_shape(shape[:1])[0]
+    if single_chunk_length > time_chunk_length:
+        for name in time_variables:
+            options += ['--cnk_dmn', '{},time,{}'.format(name, single_chunk_length)]
+    return options
+
+
+def _time_variables(dataset):
+    # The time coordinate variable and its bounds, which must each be stored as a single chunk.
+    if 'time' not in dataset.variables:
+        return []
+    time_variables = ['time']
+    for attribute in ['bounds', 'climatology']:
+        if attribute in dataset.variables['time'].ncattrs():
+            bounds = dataset.variables['time'].getncattr(attribute)
+            if bounds in dataset.variables:
+                time_variables.append(bounds)
+    return time_variables
+
+
 def concatenate_files(input_files, output_file, candidate_file,
                       dummy_run=False):
     """Perform the concatenation operation.
@@ -68,7 +137,7 @@ def concatenate_files(input_files, output_file, candidate_file,
         if the ncrcat concatenation operation fails
     """
     logger = logging.getLogger(__name__)
-    command = NCRCAT + input_files + ['-o', candidate_file]
+    command = NCRCAT + packing_options(input_files) + input_files + ['-o', candidate_file]
     if dummy_run:
         logger.info('Dummy command: "{}"'.format(' '.join(command)))
     else:
@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2017-2025, Met Office.
+# (C) British Crown Copyright 2017-2026, Met Office.
 # Please see LICENSE.md for license details.
 """CMOR netCDF file aggregation routines"""
 from configparser import ConfigParser
@@ -14,6 +14,7 @@ from metomi.isodatetime.data import TimePoint, Calendar, Duration, get_is_leap_y
 from metomi.isodatetime.parsers import TimePointParser
 
 from cdds.common.constants import LOG_TIMESTAMP_FORMAT
+from cdds.common.crawler import DirectoryCrawler
 from cdds.common.plugins.plugins import PluginStore
 from cdds.convert.constants import TASK_STATUS_NOT_STARTED
 from cdds.convert.exceptions import ArgumentError
@@ -113,7 +114,7 @@ def organise_concatenations(reference_date, start_date, end_date,
     return concatenation_work
 
 
-def list_cmor_files(location, pattern, mip_table=None, recursive=False):
+def list_cmor_files(location, pattern, mip_table=None, recursive=False, crawler=None):
     """Retrieve the list of input CMOR format files in location that match
     the supplied pattern.
 
@@ -127,26 +128,25 @@ def list_cmor_files(location, pattern, mip_table=None, recursive=False):
         The name of the mip table currently being processed
     recursive : bool, optional
         if True recursively search through supplied location
+    crawler : DirectoryCrawler, optional
+        The crawler used to list the location. Passing the same crawler to
+        several calls avoids scanning unchanged directories again.
 
     Returns
     -------
     list
         filenames found
     """
-    ncfiles = []
+    if crawler is None:
+        crawler = DirectoryCrawler()
     if mip_table is None:
         location_to_search = location
     else:
         location_to_search = os.path.join(location, mip_table)
 
     model_file_info = PluginStore.instance().get_plugin().model_file_info()
-    for root, _, files in os.walk(location_to_search):
-        for filename in fnmatch.filter(files, pattern):
-            if model_file_info.is_cmor_file(filename):
-                ncfiles.append(os.path.join(root, filename))
-        if not recursive:
-            break
-    return ncfiles
+    records = crawler.crawl(location_to_search, recursive=recursive, file_pattern=fnmatch.translate(pattern))
+    return [record.path for record in records if model_file_info.is_cmor_file(record.filename)]
 
 
 def write_concatenation_work_db(concatenation_work, output_file,
@@ -357,7 +357,7 @@ def get_file_frequency_shape(filename):
 
 def build_concatenation_work_dict(available_variables, config,
                                   reference_date, start_date, end_date,
-                                  model_id):
+                                  model_id, crawler=None):
     """Return a dictionary describing the concatenation work to be done.
 
     Parameters
@@ -374,6 +374,8 @@ def build_concatenation_work_dict(available_variables, config,
         End date for processing
     model_id: str
         The |model identifier| for this package.
+    crawler : DirectoryCrawler, optional
+        The crawler used to list the staging location.
 
     Returns
     -------
@@ -390,7 +392,8 @@ def build_concatenation_work_dict(available_variables, config,
         input_filenames = list_cmor_files(input_files_dir,
                                           filename_pattern,
                                           # mip_table=mip_table,
-                                          recursive=config['recursive'])
+                                          recursive=config['recursive'],
+                                          crawler=crawler)
         if len(input_filenames) == 1:
             logger.info('Found single file {}'.format(input_filenames[0]))
         else:
@@ -476,15 +479,19 @@ def concatenation_setup(config_file, log_file, append_log):
     start_date = TimePoint(year=start_year, month_of_year=1, day_of_month=1)
     end_date = TimePoint(year=end_year, month_of_year=1, day_of_month=1)
 
+    # The staging location is only scanned once, later listings reuse the
+    # listings of unchanged directories.
+    crawler = DirectoryCrawler()
     available_variables = set()
     for filename in list_cmor_files(config['staging_location'], '*',
-                                    recursive=config['recursive']):
+                                    recursive=config['recursive'],
+                                    crawler=crawler):
         variable_tuple = tuple(os.path.basename(filename).split('_')[:-1])
         available_variables.add(variable_tuple)
 
     all_concatenation_work = build_concatenation_work_dict(
         available_variables, config, reference_date, start_date, end_date,
-        config['model_id'])
+        config['model_id'], crawler)
 
     write_concatenation_work_db(all_concatenation_work, config['output_file'])
     logger.info('Concatenation setup complete. Exiting')
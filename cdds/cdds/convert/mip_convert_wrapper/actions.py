@@ -1,10 +1,12 @@
-# (C) British Crown Copyright 2017-2025, Met Office.
+# (C) British Crown Copyright 2017-2026, Met Office.
 # Please see LICENSE.md for license details.
 """Routines to perform actions such as running mip_convert or managing the
 log files
 """
 import glob
+import json
 import logging
+import math
 import os
 import shutil
 import subprocess
@@ -12,6 +14,85 @@ import subprocess
 from cdds.common.constants import CDDS_DEFAULT_DIRECTORY_PERMISSIONS
 from cdds.convert.exceptions import MipConvertWrapperDiskUsageError
 from cdds.convert.mip_convert_wrapper.common import print_env
+from cdds.convert.mip_convert_wrapper.constants import BYTES_PER_MB, RESOURCE_RECORD_FILENAME
+
+
+class DiskUsageTracker(object):
+    """Keeps a running account of the space used by the files CDDS places
+    in a staging directory, so that the usage can be reported without
+    running ``du`` over the directory tree.
+
+    Sizes are taken from the allocated blocks of each file (as ``du``
+    does) and are keyed by path, so recording the same file twice does
+    not count it twice.
+    """
+
+    def __init__(self, staging_dir):
+        """
+        Parameters
+        ----------
+        staging_dir: str
+            The path to the staging directory being accounted for.
+        """
+        self.staging_dir = staging_dir
+        self._file_sizes = {}
+
+    @staticmethod
+    def _allocated_bytes(stat_result):
+        blocks = getattr(stat_result, 'st_blocks', None)
+        if blocks is None:
+            return stat_result.st_size
+        return blocks * 512
+
+    def add_file(self, path):
+        """Record a file that has been written to the staging directory.
+
+        Parameters
+        ----------
+        path: str
+            The path to the file.
+        """
+        self._file_sizes[os.path.abspath(path)] = self._allocated_bytes(os.stat(path))
+
+    def remove_file(self, path):
+        """Forget a file that has been removed from the staging directory.
+
+        Parameters
+        ----------
+        path: str
+            The path to the file.
+        """
+        self._file_sizes.pop(os.path.abspath(path), None)
+
+    def add_directory(self, directory):
+        """Record every file below the given directory, e.g. the CMOR
+        outputs written by MIP Convert. Only file sizes are read, using a
+        single ``os.scandir`` pass over the directory.
+
+        Parameters
+        ----------
+        directory: str
+            The path to the directory.
+        """
+        if not os.path.isdir(directory):
+            return
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    self.add_directory(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    path = os.path.abspath(entry.path)
+                    self._file_sizes[path] = self._allocated_bytes(entry.stat(follow_symlinks=False))
+
+    @property
+    def usage_in_bytes(self):
+        """int: The number of bytes recorded in the staging directory."""
+        return sum(self._file_sizes.values())
+
+    @property
+    def usage_in_mb(self):
+        """int: The recorded usage in MB, rounded up as ``du --block-size=1M`` does."""
+        return int(math.ceil(self.usage_in_bytes / BYTES_PER_MB))
 
 
 def copy_logs(mip_convert_log, cmor_log_file, target_dir):
@@ -161,18 +242,25 @@ def run_mip_convert(stream, dummy_run, timestamp, user_config_template_name,
     return return_code
 
 
-def get_disk_usage_in_mb(staging_dir):
-    """Get the disk usage in MB of the specified directory.
+def get_disk_usage_in_mb(staging_dir, disk_usage_tracker=None):
+    """Get the disk usage in MB of the specified directory. If a
+    tracker is provided the usage it has recorded is returned, otherwise
+    ``du`` is run over the directory.
+
     Parameters
     ----------
     staging_dir: str
         The path to the directory to get the disk usage for.
+    disk_usage_tracker: DiskUsageTracker, optional
+        Tracker holding the usage of the files written to staging_dir.
 
     Returns
     -------
     int
         The disk usage in MB.
     """
+    if disk_usage_tracker is not None:
+        return disk_usage_tracker.usage_in_mb
     du_cmd = 'du -s --block-size=1M {staging_dir}'.format(
         staging_dir=staging_dir)
     du_output = subprocess.check_output(du_cmd, shell=True, universal_newlines=True)
@@ -180,7 +268,7 @@ def get_disk_usage_in_mb(staging_dir):
     return du_in_mb
 
 
-def check_disk_usage(staging_dir, max_space_in_mb):
+def check_disk_usage(staging_dir, max_space_in_mb, disk_usage_tracker=None):
     """Check the current disk usage of the data in staging_dir, and raises an
     exception if exceeds the allocated space specified by max_space.
 
@@ -190,6 +278,8 @@ def check_disk_usage(staging_dir, max_space_in_mb):
         The path to the directory to get the disk usage for.
     max_space_in_mb: int
         The space allocated to the staging_dir directory in MB.
+    disk_usage_tracker: DiskUsageTracker, optional
+        Tracker holding the usage of the files written to staging_dir.
 
     Raises
     ------
@@ -198,7 +288,7 @@ def check_disk_usage(staging_dir, max_space_in_mb):
         max space.
     """
     logger = logging.getLogger(__name__)
-    du_in_mb = get_disk_usage_in_mb(staging_dir)
+    du_in_mb = get_disk_usage_in_mb(staging_dir, disk_usage_tracker)
     if du_in_mb > max_space_in_mb:
         msg1 = ('Usage of $TMPDIR measured at {0}MB, which exceeds '
                 'allocation of {1}MB'.format(du_in_mb, max_space_in_mb))
@@ -208,21 +298,58 @@ def check_disk_usage(staging_dir, max_space_in_mb):
         staging_dir))
 
 
-def report_disk_usage(staging_dir):
-    """Report current disk usage of the data in staging_dir to the log.
+def report_disk_usage(staging_dir, disk_usage_tracker=None, resource_record_dir=None):
+    """Report current disk usage of the data in staging_dir to the log and,
+    if a directory is given, to the task's resource record.
 
     Parameters
     ----------
     staging_dir: str
         The path to the directory to get the disk usage for.
+    disk_usage_tracker: DiskUsageTracker, optional
+        Tracker holding the usage of the files written to staging_dir.
+    resource_record_dir: str, optional
+        The directory to write the resource record to, normally the Cylc
+        task log directory.
     """
     logger = logging.getLogger(__name__)
     logger.info('mip_convert resource reporting:')
-    du_in_mb = get_disk_usage_in_mb(staging_dir)
+    du_in_mb = get_disk_usage_in_mb(staging_dir, disk_usage_tracker)
     du_msg = (
         'du command shows the following $TMPDIR usage at '
         '{0:.2f}MB'.format(du_in_mb))
     logger.info(du_msg)
+    if resource_record_dir:
+        write_resource_record(resource_record_dir, {'used_storage': du_in_mb})
+
+
+def write_resource_record(resource_record_dir, resources):
+    """Write the resources used by this task to the resource record in the
+    given directory, updating any values already recorded there.
+
+    Parameters
+    ----------
+    resource_record_dir: str
+        The directory containing the resource record.
+    resources: dict
+        The resources to record.
+
+    Returns
+    -------
+    str
+        The path to the resource record.
+    """
+    logger = logging.getLogger(__name__)
+    record_path = os.path.join(resource_record_dir, RESOURCE_RECORD_FILENAME)
+    record = {}
+    if os.path.exists(record_path):
+        with open(record_path) as file_handle:
+            record = json.load(file_handle)
+    record.update(resources)
+    with open(record_path, 'w') as file_handle:
+        json.dump(record, file_handle, indent=4, sort_keys=True)
+    logger.info('Resource record written to "{}"'.format(record_path))
+    return record_path
 
 
 def manage_critical_issues(mip_convert_config_dir, mip_convert_log, stream, fields_to_log=None):
@@ -1,6 +1,8 @@
-# (C) British Crown Copyright 2024-2025, Met Office.
+# (C) British Crown Copyright 2024-2026, Met Office.
 # Please see LICENSE.md for license details.
 CMOR_LOG_FILENAME_TEMPLATE = 'cmor.{}.log'
 MIP_CONVERT_LOG_BASE_NAME = 'mip_convert'
+BYTES_PER_MB = 1024 * 1024
+RESOURCE_RECORD_FILENAME = 'resource_usage.json'
 RUN_MIP_CONVERT_LOG_NAME = 'run_mip_convert'
 USER_CONFIG_TEMPLATE_NAME = 'mip_convert.cfg.{}'
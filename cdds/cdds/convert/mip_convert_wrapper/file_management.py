@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2017-2025, Met Office.
+# (C) British Crown Copyright 2017-2026, Met Office.
 # Please see LICENSE.md for license details.
 """Routines for generating links to data files in order to restrict the
 volume of data that MIP Convert can see and attempt to read
@@ -262,6 +262,7 @@ def _assemble_file_dicts(all_files, cycle_dirs, filename_processor,
 def copy_to_staging_dir(expected_files,
                         old_input_location,
                         new_input_location,
+                        disk_usage_tracker=None,
                         ):
     """Copy data from old_input_location to new_input_location. These values
     should be constructed using the get_paths function in this module.
@@ -274,6 +275,8 @@ def copy_to_staging_dir(expected_files,
         Location of input files.
     new_input_location : str
         Location to copy input files to.
+    disk_usage_tracker : DiskUsageTracker, optional
+        Tracker to record the size of each copied file with.
 
     Returns
     -------
@@ -309,6 +312,8 @@ def copy_to_staging_dir(expected_files,
         for i in range(NUM_FILE_COPY_ATTEMPTS):
             try:
                 shutil.copy(full_path_src, full_path_dest)
+                if disk_usage_tracker is not None:
+                    disk_usage_tracker.add_file(full_path_dest)
                 process_count += 1
                 # escape if successful
                 break
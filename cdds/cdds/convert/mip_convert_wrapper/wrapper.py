@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2019-2025, Met Office.
+# (C) British Crown Copyright 2019-2026, Met Office.
 # Please see LICENSE.md for license details.
 """Module for the main function for the mip convert wrapper run in the suite."""
 import logging
@@ -16,8 +16,8 @@ from cdds.common.cdds_files.cdds_directories import input_data_directory, output
 from cdds.common.request.request import read_request
 from cdds.convert.constants import FILEPATH_METOFFICE
 from cdds.convert.exceptions import WrapperEnvironmentError, WrapperMissingFilesError
-from cdds.convert.mip_convert_wrapper.actions import (check_disk_usage, manage_critical_issues, manage_logs,
-                                                      report_disk_usage, run_mip_convert, copy_logs)
+from cdds.convert.mip_convert_wrapper.actions import (DiskUsageTracker, check_disk_usage, manage_critical_issues,
+                                                      manage_logs, report_disk_usage, run_mip_convert, copy_logs)
 from cdds.convert.mip_convert_wrapper.common import print_env
 from cdds.convert.mip_convert_wrapper.constants import (USER_CONFIG_TEMPLATE_NAME, CMOR_LOG_FILENAME_TEMPLATE,
                                                         MIP_CONVERT_LOG_BASE_NAME, RUN_MIP_CONVERT_LOG_NAME)
@@ -86,7 +86,9 @@ def run_mip_convert_wrapper():
         logger.info('No work for this job step. Exiting with code 0')
         return exit_code
 
+    disk_usage_tracker = None
     if staging_dir:
+        disk_usage_tracker = DiskUsageTracker(staging_dir)
         input_staging_dir = os.path.join(staging_dir, 'input')
         work_dir = input_staging_dir
         output_staging_dir = os.path.join(staging_dir, 'output')
@@ -123,10 +125,11 @@ def run_mip_convert_wrapper():
             num_files_processed = copy_to_staging_dir(expected_files,
                                                       old_input_dir,
                                                       new_input_dir,
+                                                      disk_usage_tracker,
                                                       )
             # Check the current disk usage of $TMPDIR and throw an exception if
             # usage is already exceeding the $TMPDIR allocation.
-            check_disk_usage(staging_dir, max_temp_space_in_mb)
+            check_disk_usage(staging_dir, max_temp_space_in_mb, disk_usage_tracker)
         else:
             # Set up symlinks to the data
             try:
@@ -197,9 +200,11 @@ def run_mip_convert_wrapper():
 
     # move file from staging directory to output directory
     if staging_dir:
-        # report the amount of space used in the staging directory
-        report_disk_usage(staging_dir)
-        check_disk_usage(staging_dir, max_temp_space_in_mb)
+        # account for the CMOR outputs and report the amount of space used in
+        # the staging directory
+        disk_usage_tracker.add_directory(output_staging_dir)
+        report_disk_usage(staging_dir, disk_usage_tracker, cycl_task_log_dir)
+        check_disk_usage(staging_dir, max_temp_space_in_mb, disk_usage_tracker)
         component_dir_list = os.listdir(output_staging_dir)
         for dir1 in component_dir_list:
             full_comp_dir_path = os.path.join(output_staging_dir, dir1)
@@ -0,0 +1,252 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""
+In-process checks of the CMIP7 internal packing requirements of netCDF-4 files.
+
+The checks follow the rules of the ``check_cmip7_packing`` tool provided by
+cmip7repack, but only read the HDF5 metadata of each file (chunk shapes,
+filters and layout) using pyfive, so no subprocess is needed per file.
+"""
+
+import concurrent.futures
+import logging
+import os
+from dataclasses import asdict, dataclass
+from math import prod
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pyfive
+
+from cdds.common.packing import data_chunk_is_large_enough
+from cdds.common.stat_cache import StatCache
+
+# Return codes, matching the exit codes of check_cmip7_packing.
+PACKING_PASS = 0
+PACKING_FAIL = 1
+
+
+@dataclass
+class PackingVerdict:
+    """The result of checking the packing of a single file."""
+    file_path: str
+    size: int
+    mtime_ns: int
+    return_code: int
+    message: str = ""
+
+    @property
+    def passed(self) -> bool:
+        return self.return_code == PACKING_PASS
+
+
+def check_packing(file_path: str) -> PackingVerdict:
+    """
+    Check that a netCDF-4 file meets the CMIP7 internal packing requirements.
+
+    The following are checked, as by ``check_cmip7_packing``:
+
+    1. The internal file metadata is consolidated at the start of the file.
+    2. The ``time`` coordinate variable and its bounds variable are
+       contiguous or have a single chunk.
+    3. The data variable (given by the ``variable_id`` global attribute) is
+       contiguous, has a single chunk or has chunks of at least 4 MiB.
+
+    Parameters
+    ----------
+    file_path : str
+        The full path to the netCDF file to be checked.
+
+    Returns
+    -------
+    PackingVerdict
+        The verdict for the file.
+
+    Raises
+    ------
+    RuntimeError
+        If the file does not exist, cannot be opened or cannot be parsed as
+        an HDF5 file.
+    """
+    try:
+        stat_result = os.stat(file_path)
+        hdf_file = pyfive.File(file_path)
+    except FileNotFoundError:
+        raise RuntimeError(f"check_cmip7_packing failed for file: '{file_path}': file does not exist")
+    except PermissionError:
+        raise RuntimeError(f"check_cmip7_packing failed for file: '{file_path}': file can not be opened")
+    except Exception:
+        raise RuntimeError(f"check_cmip7_packing failed for file: '{file_path}': file can not be parsed")
+
+    def verdict(return_code: int, message: str = "") -> PackingVerdict:
+        return PackingVerdict(file_path, stat_result.st_size, stat_result.st_mtime_ns, return_code, message)
+
+    with hdf_file:
+        try:
+            if not hdf_file.consolidated_metadata:
+                return verdict(PACKING_FAIL, "does not have consolidated internal metadata")
+        except Exception:
+            raise RuntimeError(f"check_cmip7_packing failed for file: '{file_path}': file can not be parsed")
+
+        chunks = None
+        if "time" in hdf_file:
+            time_variable = hdf_file["time"]
+            chunks = time_variable.chunks
+            if chunks is not None and time_variable.id.get_num_chunks() > 1:
+                return verdict(PACKING_FAIL, f"time coordinates variable 'time' has "
+                                             f"{time_variable.id.get_num_chunks()} chunks")
+            if "bounds" in time_variable.attrs:
+                bounds = str(np.array(time_variable.attrs["bounds"]).astype("U"))
+                if bounds in hdf_file:
+                    bounds_variable = hdf_file[bounds]
+                    chunks = bounds_variable.chunks
+                    if chunks is not None and bounds_variable.id.get_num_chunks() > 1:
+                        return verdict(PACKING_FAIL, f"time bounds variable '{bounds}' has "
+                                                     f"{bounds_variable.id.get_num_chunks()} chunks")
+
+        # As in check_cmip7_packing, the data variable is only checked when the
+        # time coordinates (or their bounds) are chunked.
+        if "variable_id" in hdf_file.attrs:
+            variable_id = str(np.array(hdf_file.attrs["variable_id"]).astype("U"))
+            if variable_id in hdf_file:
+                data_variable = hdf_file[variable_id]
+                if chunks is not None and data_variable.id.get_num_chunks() > 1:
+                    data_chunks = data_variable.chunks
+                    word_size = data_variable.dtype.itemsize
+                    if not data_chunk_is_large_enough(data_chunks, word_size):
+                        return verdict(PACKING_FAIL, f"data variable '{variable_id}' has uncompressed chunk size "
+                                                     f"{prod(data_chunks) * word_size} B")
+        return verdict(PACKING_PASS)
+
+
+class PackingCache:
+    """
+    Stores packing verdicts keyed by file path, so that files which have
+    not changed (same size and modification time) since they were last
+    checked do not need to be checked again.
+    """
+
+    def __init__(self, cache_file: Optional[str] = None):
+        """
+        Parameters
+        ----------
+        cache_file : str, optional
+            The JSON file the verdicts are read from and saved to. If not
+            given, the verdicts are only kept in memory.
+        """
+        self._cache = StatCache(cache_file)
+
+    def get(self, file_path: str) -> Optional[PackingVerdict]:
+        """
+        Return the cached verdict for the file if it is still valid.
+
+        Parameters
+        ----------
+        file_path : str
+            The full path to the netCDF file.
+
+        Returns
+        -------
+        Optional[PackingVerdict]
+            The cached verdict, or None if there is none or the file has
+            changed since it was checked.
+        """
+        cached = self._cache.get(file_path)
+        return None if cached is None else PackingVerdict(**cached)
+
+    def add(self, verdict: PackingVerdict) -> None:
+        """
+        Add a verdict to the cache, replacing any earlier one for the file.
+
+        Parameters
+        ----------
+        verdict : PackingVerdict
+            The verdict to add.
+        """
+        self._cache.add(verdict.file_path, asdict(verdict), verdict.size, verdict.mtime_ns)
+
+    def invalidate(self, file_path: str) -> None:
+        """
+        Remove the verdict for a file, e.g. after it has been repacked.
+
+        Parameters
+        ----------
+        file_path : str
+            The full path to the netCDF file.
+        """
+        self._cache.discard(file_path)
+
+    def save(self) -> None:
+        """Write the verdicts to the cache file, if there is one."""
+        self._cache.save()
+
+
+def check_packing_of_files(nc_files: List[Union[str, Path]], max_workers: int = 1,
+                           cache: Optional[PackingCache] = None) -> Dict[str, PackingVerdict]:
+    """
+    Check the packing of the given files, using any valid cached verdicts and
+    checking the remaining files in a pool of ``max_workers`` processes.
+
+    Parameters
+    ----------
+    nc_files : List[Union[str, Path]]
+        The netCDF files to check.
+    max_workers : int
+        The number of worker processes to use.
+    cache : PackingCache, optional
+        Cache of verdicts to read from and add the new verdicts to.
+
+    Returns
+    -------
+    Dict[str, PackingVerdict]
+        The verdict for each file, keyed by file path.
+
+    Raises
+    ------
+    RuntimeError
+        If any of the files cannot be checked.
+    """
+    logger = logging.getLogger(__name__)
+    verdicts = {}
+    files_to_check = []
+    for nc_file in nc_files:
+        file_path = str(nc_file)
+        cached = cache.get(file_path) if cache is not None else None
+        if cached is not None:
+            verdicts[file_path] = cached
+        else:
+            files_to_check.append(file_path)
+    logger.info(f"Using cached packing verdicts for {len(verdicts)} files, checking {len(files_to_check)} files")
+
+    failures = []
+    if max_workers > 1 and len(files_to_check) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(check_packing, file_path) for file_path in files_to_check]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    _add_verdict(future.result(), verdicts, cache)
+                except RuntimeError as exc:
+                    failures.append(exc)
+    else:
+        for file_path in files_to_check:
+            try:
+                _add_verdict(check_packing(file_path), verdicts, cache)
+            except RuntimeError as exc:
+                failures.append(exc)
+
+    if failures:
+        logger.critical(f"Packing could not be checked for {len(failures)} files")
+        for exception in failures:
+            logger.debug(exception)
+        raise failures[-1]
+    return verdicts
+
+
+def _add_verdict(verdict: PackingVerdict, verdicts: Dict[str, PackingVerdict], cache: Optional[PackingCache]) -> None:
+    logger = logging.getLogger(__name__)
+    if not verdict.passed:
+        logger.debug(f"FAIL: File '{verdict.file_path}' {verdict.message}")
+    verdicts[verdict.file_path] = verdict
+    if cache is not None:
+        cache.add(verdict)
@@ -12,16 +12,20 @@ import subprocess
 import concurrent.futures
 from argparse import Namespace
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from cdds.common import configure_logger, run_command
 from cdds.common.cdds_files.cdds_directories import (
+    component_directory,
     output_data_directory,
     update_log_dir,
 )
 from cdds.common.plugins.plugin_loader import load_plugin
 from cdds.common.request.request import read_request
 from cdds.configure.constants import DEFLATE_LEVEL
+from cdds.convert.packing import PackingCache, check_packing, check_packing_of_files
+
+REPACK_CACHE_FILE_TEMPLATE = "repack_cache_{stream}.json"
 
 
 def parse_repack_args() -> Namespace:
@@ -139,25 +143,41 @@ def repack_single_file(nc_file: Path) -> bool:
     bool
         True if file was repacked, False if already packed.
     """
-    checked_file_return_code = run_check_cmip7_packing(str(nc_file))
-    if checked_file_return_code == 0:
+    if check_packing(str(nc_file)).passed:
         return False
     else:
         run_cmip7repack(str(nc_file))
         return True
 
 
-def repack_files(nc_files: List[Path]) -> None:
+def get_max_workers() -> int:
+    """
+    Return the number of workers to use, as given by the SLURM_NTASKS
+    environment variable, defaulting to 1 if not set.
+
+    Returns
+    -------
+    int
+        The number of workers.
+    """
+    slurm_ntasks = os.environ.get("SLURM_NTASKS")
+    return int(slurm_ntasks) if slurm_ntasks else 1
+
+
+def repack_files(nc_files: List[Path], cache: Optional[PackingCache] = None) -> None:
     """
     Check and repack NetCDF files in the given list as needed.
 
-    For each file, runs the check_cmip7_packing tool. If the file is not already
-    packed according to CMIP7 requirements, repacks it using cmip7repack.
+    The packing of each file is checked in-process against the CMIP7
+    requirements (see ``cdds.convert.packing``), using a pool of worker
+    processes and any still valid verdicts held in the cache. Files that are
+    not already packed according to CMIP7 requirements are repacked using
+    cmip7repack.
 
-    Files are processed in parallel using ThreadPoolExecutor. The number of worker
-    threads is determined by the SLURM_NTASKS environment variable, defaulting to 1
-    if not set. If any file fails to repack, processing stops immediately and the
-    exception is propagated.
+    Files are processed in parallel. The number of workers is determined by
+    the SLURM_NTASKS environment variable, defaulting to 1 if not set. If
+    any file fails to repack, the exception is propagated once all files
+    have been processed.
 
     Logs a summary of how many files were already packed and how many were repacked.
 
@@ -165,37 +185,38 @@ def repack_files(nc_files: List[Path]) -> None:
     ----------
     nc_files : List[Path]
         List of Path objects pointing to NetCDF files to check and repack.
+    cache : PackingCache, optional
+        Cache of packing verdicts from earlier checks.
 
     Raises
     ------
     RuntimeError
-        If check_cmip7_packing or cmip7repack fails for any file.
+        If the packing of a file cannot be checked or cmip7repack fails for any file.
     FileNotFoundError
-        If check_cmip7_packing or cmip7repack tools are not found.
+        If the cmip7repack tool is not found.
     """
     logger = logging.getLogger(__name__)
     total_files = len(nc_files)
 
-    # Use ThreadPoolExecutor for parallel processing
-    slurm_ntasks = os.environ.get("SLURM_NTASKS")
-    max_workers = int(slurm_ntasks) if slurm_ntasks else 1
-    logger.info(f"Using parallel processing with {max_workers} worker threads (SLURM_NTASKS={slurm_ntasks})")
+    max_workers = get_max_workers()
+    logger.info(f"Using parallel processing with {max_workers} workers (SLURM_NTASKS={os.environ.get('SLURM_NTASKS')})")
 
+    verdicts = check_packing_of_files(nc_files, max_workers, cache)
+    files_to_repack = [nc_file for nc_file in nc_files if not verdicts[str(nc_file)].passed]
+    files_already_packed = total_files - len(files_to_repack)
     files_repacked = 0
-    files_already_packed = 0
 
     with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(repack_single_file, nc_file): nc_file for nc_file in nc_files}
+        futures = {executor.submit(run_cmip7repack, str(nc_file)): nc_file for nc_file in files_to_repack}
 
         failure_exception = []
         failure_count = 0
         for future in concurrent.futures.as_completed(futures):
+            if cache is not None:
+                cache.invalidate(str(futures[future]))
             try:
-                was_repacked = future.result()
-                if was_repacked:
-                    files_repacked += 1
-                else:
-                    files_already_packed += 1
+                future.result()
+                files_repacked += 1
             except Exception as exc:
                 failure_exception.append(exc)
                 failure_count += 1
@@ -213,11 +234,13 @@ def repack_files(nc_files: List[Path]) -> None:
             raise failure_exception[-1]  # Raise the last exception for visibility
 
 
-def verify_repacked_files(nc_files: List[Path]) -> None:
+def verify_repacked_files(nc_files: List[Path], cache: Optional[PackingCache] = None) -> None:
     """
     Verify all output NetCDF files pass CMIP7 packing checks after repacking.
 
-    Runs check_cmip7_packing on every file. Raises an exception if any file
+    Checks the packing of every file, reusing the verdicts in the cache for
+    files that have not changed since they were checked (i.e. files that
+    already passed and were not repacked). Raises an exception if any file
     fails the packing check, to catch cases where repacking did not produce
     a correctly packed file.
 
@@ -225,22 +248,19 @@ def verify_repacked_files(nc_files: List[Path]) -> None:
     ----------
     nc_files : List[Path]
         List of Path objects pointing to NetCDF files to verify.
+    cache : PackingCache, optional
+        Cache of packing verdicts from earlier checks.
 
     Raises
     ------
     RuntimeError
-        If any file fails the packing check or check_cmip7_packing encounters an error.
-    FileNotFoundError
-        If the check_cmip7_packing tool is not found in PATH.
+        If any file fails the packing check or its packing cannot be checked.
     """
     logger = logging.getLogger(__name__)
     logger.info("Verifying packing of all repacked files...")
 
-    failed_files = []
-    for nc_file in nc_files:
-        return_code = run_check_cmip7_packing(str(nc_file))
-        if return_code == 1:
-            failed_files.append(nc_file)
+    verdicts = check_packing_of_files(nc_files, get_max_workers(), cache)
+    failed_files = [nc_file for nc_file in nc_files if not verdicts[str(nc_file)].passed]
 
     if failed_files:
         logger.critical(f"Repack verification failed for {len(failed_files)} file(s):")
@@ -366,6 +386,8 @@ def main_repack() -> int:
     3. Locates mip_table directories for the specified stream.
     4. Finds all NetCDF files in those directories.
     5. Checks and repacks files as needed using cmip7repack.
+    6. Verifies the packing of the files, reusing the cached verdicts of
+       files that already passed.
 
     Parameters
     ----------
@@ -401,23 +423,22 @@ def main_repack() -> int:
     mip_table_dirs = get_mip_table_dirs(args.request_file, args.stream)
     nc_files = find_netcdf_files(mip_table_dirs)
 
-    try:
-        repack_files(nc_files)
-    except RuntimeError as err:
-        logger.critical(f"Runtime error during repack. {err}")
-        return 1
-    except FileNotFoundError as err:
-        logger.critical(f"Repack tool not found. {err}")
-        return 2
+    cache_file = os.path.join(
+        component_directory(request, "convert"), REPACK_CACHE_FILE_TEMPLATE.format(stream=args.stream)
+    )
+    cache = PackingCache(cache_file)
 
     try:
-        verify_repacked_files(nc_files)
+        repack_files(nc_files, cache)
+        verify_repacked_files(nc_files, cache)
     except RuntimeError as err:
-        logger.critical(f"Runtime error during verification. {err}")
+        logger.critical(f"Runtime error during repack. {err}")
         return 1
     except FileNotFoundError as err:
         logger.critical(f"Repack tool not found. {err}")
         return 2
+    finally:
+        cache.save()
 
     logger.info("repack completed successfully.")
     return 0
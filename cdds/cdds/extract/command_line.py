@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2016-2025, Met Office.
+# (C) British Crown Copyright 2016-2026, Met Office.
 # Please see LICENSE.md for license details.
 """The :mod:`command_line` module contains the main functions for the command line scripts in the ``bin`` directory."""
 import argparse
@@ -10,6 +10,7 @@ from cdds import __version__
 from cdds.common.cdds_files.cdds_directories import update_log_dir
 from cdds.common.plugins.plugin_loader import load_plugin
 from cdds.common.request.request import read_request
+from cdds.extract.constants import MOOSE_MAX_CONCURRENT_REQUESTS
 from cdds.extract.lang import set_language
 from cdds.extract.runner import ExtractRunner
 from cdds.extract.validate import validate_streams
@@ -52,6 +53,14 @@ def parse_cdds_extract_command_line(user_arguments):
                         '--streams',
                         default=None, nargs='*',
                         help='Restrict extraction only to these streams')
+    parser.add_argument('--max_concurrent_requests', type=int, default=MOOSE_MAX_CONCURRENT_REQUESTS,
+                        help='Number of MOOSE retrieval requests run at the same time across all streams')
+    parser.add_argument('--validate', action='store_true',
+                        help='Validate the files of each retrieval request as soon as it has finished, retrieve '
+                             'the files that failed validation once more and write the validation report of each '
+                             'stream')
+    parser.add_argument('--max_workers', type=int, default=1,
+                        help='Number of worker processes validating the retrieved files')
     arguments = parser.parse_args(user_arguments)
     return arguments
 
@@ -114,6 +123,8 @@ def parse_validate_streams_command_line(user_arguments):
                         '--streams',
                         default=None, nargs='*',
                         help='Restrict validation only to these streams')
+    parser.add_argument('--max_workers', type=int, default=1,
+                        help='Number of worker processes reading the headers of pp files')
     # Add arguments common to all scripts.
     arguments = parser.parse_args(user_arguments)
     return arguments
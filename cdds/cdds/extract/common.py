@@ -13,14 +13,19 @@ import sys
 from collections import defaultdict
 from operator import itemgetter
 
+import cftime
+import netCDF4
+
 from cdds.common import retry, run_command
+from cdds.common.netcdf import classic_netcdf_minimum_size
+from cdds.common.pp import read_pp_headers
 from cdds.extract.constants import (
     MAX_MOOSE_LOG_MESSAGE,
+    MOOSE_DEFAULT_TAPE_ID,
     MOOSE_TAPE_PATTERN,
-    NUM_PP_HEADER_LINES,
+    NETCDF_TIME_DIMENSIONS,
     STREAMTYPE_NC,
     STREAMTYPE_PP,
-    TIME_REGEXP,
 )
 from cdds.extract.variables import Variables
 
@@ -49,8 +54,8 @@ def moose_date(when, mode):
 
 
 def get_stash_from_pp(filepath) -> dict[str, int] | None:
-    """Executes a ppfp command as a subprocess and parses the output
-    to extract stash codes
+    """Reads the headers of the fields in a pp file and counts the fields
+    of each stash code
 
     Parameters
     ----------
@@ -59,25 +64,18 @@ def get_stash_from_pp(filepath) -> dict[str, int] | None:
 
     Returns
     -------
-    set|None
-        A set of stash codes from the file or None if the command fails
+    dict|None
+        The number of fields of each stash code in the file, or None if the
+        file cannot be read
     """
-    stash: dict = defaultdict(int)
-
-    command = ["ppfp", "-stash", filepath]
-    process = subprocess.Popen(command, stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE, universal_newlines=True)
-    cmd_out = process.communicate()[0]
-    if process.returncode > 0:
+    try:
+        headers = read_pp_headers(filepath)
+    except (OSError, ValueError):
         return None
-    else:
-        for lines in cmd_out.split("\n")[NUM_PP_HEADER_LINES:]:
-            try:
-                int(lines)
-                stash[lines.strip().lstrip("0")] += 1
-            except ValueError:
-                continue
-        return stash
+    stash: dict = defaultdict(int)
+    for header in headers:
+        stash[str(header.stash)] += 1
+    return stash
 
 
 def run_moo_cmd(sub_cmd, args, simulate=False, verbose=True):
@@ -425,56 +423,74 @@ def process_info(args):
     return pinfo
 
 
-def validate_netcdf(filepath):
-    """"Attempts to open a netCDF file, validates it, and returns
-    a success/fail status
+def validate_netcdf(filepath, expected_variables=None, time_range=None):
+    """Opens a |netCDF| file in-process and validates its structure and
+    contents.
+
+    The file is checked for truncation, for a non-empty unlimited `time` or
+    `time_counter` dimension, for the expected variables and for time
+    values within the expected time range. The last record of each record
+    variable is read, so truncated data is detected as well.
 
     Parameters
     ----------
     filepath: str
         File location
+    expected_variables: list, optional
+        Names of the variables the file must contain
+    time_range: tuple, optional
+        Start and end dates (YYYYMMDD strings) the time values of the file
+        must lie between
 
     Returns
     -------
-    bool
-        True if the file appears to be valid, false if not
-    str
-        Error message
+    FileContentError|None
+        The problem found with the file, or None if the file is valid
     """
-    error = None
-    command = ['ncdump', '-h', filepath]
     try:
-        output = run_command(command, exception=IOError)
-        if not check_dimensions(output):
-            error = FileContentError(filepath, "File has zero time length")
-    except IOError:
-        error = FileContentError(filepath, "File cannot be opened")
-    return error
-
+        minimum_size = classic_netcdf_minimum_size(filepath)
+        file_size = os.path.getsize(filepath)
+        if minimum_size is not None and file_size < minimum_size:
+            return TruncatedFileError(
+                filepath, "File is truncated ({} of {} bytes)".format(file_size, minimum_size))
+        with netCDF4.Dataset(filepath) as dataset:
+            return _validate_netcdf_contents(filepath, dataset, expected_variables, time_range)
+    except (OSError, ValueError):
+        return UnreadableFileError(filepath, "File cannot be opened")
+
+
+def _validate_netcdf_contents(filepath, dataset, expected_variables, time_range):
+    time_dimensions = [dataset.dimensions[name] for name in NETCDF_TIME_DIMENSIONS if name in dataset.dimensions]
+    time_dimensions = [dimension for dimension in time_dimensions if dimension.isunlimited() and dimension.size > 0]
+    if not time_dimensions:
+        return TimeAxisError(filepath, "File has zero time length")
+    time_dimension = time_dimensions[0].name
+
+    if expected_variables:
+        missing_variables = sorted(set(expected_variables).difference(dataset.variables))
+        if missing_variables:
+            return MissingVariablesError(filepath, missing_variables)
 
-def check_dimensions(netcdf_headers):
-    """Parses the |netCDF| metadata header and checks if `time` or
-    `time_counter` variable has length greater than 0.
-
-    Parameters
-    ----------
-    netcdf_headers: str
-        |netCDF| file headers.
-
-    Returns
-    -------
-    bool
-        True if the file has a correct number of time steps
-    """
-    valid = False
-    match = re.search(TIME_REGEXP, netcdf_headers)
-    if match:
-        try:
-            if int(match.group(2)) > 0:
-                valid = True
-        except IndexError:
-            pass
-    return valid
+    try:
+        for variable in dataset.variables.values():
+            if variable.dimensions and variable.dimensions[0] == time_dimension:
+                variable[-1]
+    except (OSError, RuntimeError, IndexError):
+        return TruncatedFileError(filepath, "File data cannot be read")
+
+    time_variable = dataset.variables.get(time_dimension)
+    if time_range is not None and time_variable is not None and "units" in time_variable.ncattrs():
+        units = time_variable.units
+        calendar = getattr(time_variable, "calendar", "standard")
+        start, end = [cftime.date2num(cftime.datetime(int(date[:4]), int(date[4:6]), int(date[6:8]),
+                                                      calendar=calendar), units, calendar)
+                      for date in time_range]
+        times = time_variable[:]
+        if times.min() < start or times.max() > end:
+            first, last = cftime.num2date([times.min(), times.max()], units, calendar)
+            return TimeAxisError(filepath, "Time values from {} to {} are outside {}-{}".format(
+                first, last, *time_range))
+    return None
 
 
 def calculate_period(date, start=True):
@@ -517,6 +533,35 @@ class FileContentError(object):
         self.error_message = error_message
 
 
+class UnreadableFileError(FileContentError):
+    """Class representing a file that cannot be opened."""
+
+
+class TruncatedFileError(FileContentError):
+    """Class representing a file that is shorter than its header describes,
+    or whose data cannot be read."""
+
+
+class TimeAxisError(FileContentError):
+    """Class representing a file with an empty time axis or time values
+    outside of the expected time range."""
+
+
+class MissingVariablesError(FileContentError):
+    """Class representing a |netCDF| file without some expected variables."""
+    def __init__(self, filepath, missing_variables):
+        """Parameters
+        ----------
+        filepath: str
+            Where the faulty file is stored.
+        missing_variables: list
+            Names of the missing variables.
+        """
+        super(MissingVariablesError, self).__init__(
+            filepath, "Missing variables: {}".format(", ".join(missing_variables)))
+        self.missing_variables = missing_variables
+
+
 class StashError(FileContentError):
     """Class representing a problematic pp file with STASH errors."""
     def __init__(self, filepath, error_message):
@@ -944,10 +989,17 @@ def get_data_target(input_data_directory, model_workflow_id, stream):
 def fetch_filelist_from_mass(mass_dir, simulation=False):
     """Retrieves a list of files stored in a MASS directory along with the tape number
 
+    The files are listed with ``moo ls`` and the tape holding each file is
+    taken from the output of ``moo getstats``. Files without a tape id, e.g.
+    when the tape ids are not available from the MASS system, get the tape
+    id ``MOOSE_DEFAULT_TAPE_ID``.
+
     Parameters
     ----------
     mass_dir: str
         name of a MASS directory
+    simulation: bool
+        if True no real interaction with MASS will happen
 
     Returns
     -------
@@ -956,26 +1008,91 @@ def fetch_filelist_from_mass(mass_dir, simulation=False):
     error
         An error output from MOOSE
     """
+    logger = logging.getLogger(__name__)
     files = []
     error = None
     if not simulation:
         try:
             cmd_out = run_command(["moo", "ls", mass_dir, "--page=1-10:50000"])
-            filelines = cmd_out.split('\n')[0:-1]
-            for fileline in filelines:
-                try:
-                    filepath = fileline
-                    # set tape id to "01" as not relevant with Az MASS
-                    files.append(("01", filepath))
-                except ValueError:
-                    # skip files which hasn't been completely written to the tape system yet
-                    pass
+            filepaths = []
+            for fileline in cmd_out.split('\n'):
+                if not fileline.strip():
+                    continue
+                if len(fileline.split()) != 1:
+                    logger.warning('Unexpected line in the listing of "{}": "{}"'.format(mass_dir, fileline))
+                filepaths.append(fileline)
+            tapes = fetch_tapes_from_mass(mass_dir)
+            files = [(tapes.get(filepath, MOOSE_DEFAULT_TAPE_ID), filepath) for filepath in filepaths]
         except RuntimeError as e:
             files = []
             error = str(e)
     return files, error
 
 
+def fetch_tapes_from_mass(mass_dir):
+    """Retrieves the ids of the tapes holding the files in a MASS directory
+    from the output of ``moo getstats``, which gives the tape id before the
+    path of each file.
+
+    Parameters
+    ----------
+    mass_dir: str
+        name of a MASS directory
+
+    Returns
+    -------
+    dict
+        The tape id of each file, keyed by its MASS path. Empty if the tape
+        ids are not available.
+    """
+    logger = logging.getLogger(__name__)
+    tapes = {}
+    try:
+        cmd_out = run_command(["moo", "getstats", mass_dir])
+    except RuntimeError as err:
+        logger.info('Tape ids of the files in "{}" are not available: {}'.format(mass_dir, err))
+        return tapes
+    for line in cmd_out.split('\n'):
+        fields = line.split()
+        if len(fields) == 2 and fields[1].startswith('moose:'):
+            tapes[fields[1]] = fields[0]
+        elif fields:
+            logger.debug('Ignoring line in the output of moo getstats for "{}": "{}"'.format(mass_dir, line))
+    return tapes
+
+
+def fetch_file_sizes_from_mass(mass_dir, simulation=False):
+    """Retrieves the sizes of the files stored in a MASS directory
+
+    Parameters
+    ----------
+    mass_dir: str
+        name of a MASS directory
+    simulation: bool
+        if True no real interaction with MASS will happen
+
+    Returns
+    -------
+    dict
+        Size in bytes of each file, keyed by its MASS path
+    error
+        An error output from MOOSE
+    """
+    sizes = {}
+    error = None
+    if not simulation:
+        try:
+            cmd_out = run_command(["moo", "ls", "-l", mass_dir])
+            for fileline in cmd_out.split('\n'):
+                fields = fileline.split()
+                # e.g. F user 0.00 GBP 1000000 2018-11-09 15:29:08 GMT moose:/crum/u-ab123/ap5.pp/ab123a.p51850jan.pp
+                if len(fields) == 9 and fields[0] == 'F':
+                    sizes[fields[8]] = int(fields[4])
+        except RuntimeError as e:
+            error = str(e)
+    return sizes, error
+
+
 def get_tape_limit(tape_msg_pattern=MOOSE_TAPE_PATTERN, simulation=False):
     """Retrieves a current tape limit from MASS
 
@@ -1049,6 +1166,82 @@ def chunk_by_files_and_tapes(fileset: dict, tape_limit: int, file_limit: int) ->
     return chunks
 
 
+class ChunkPlan(object):
+    """Class representing the chunks of files retrieved by separate MOOSE
+    requests, and the number of tape mounts they need."""
+
+    def __init__(self, chunks, chunk_tapes, naive_mounts):
+        """Parameters
+        ----------
+        chunks: list
+            List of chunked lists of filenames.
+        chunk_tapes: list
+            List of the sets of tape identifiers read by each chunk.
+        naive_mounts: int
+            Number of tape mounts needed by the chunks of
+            :func:`chunk_by_files_and_tapes`.
+        """
+        self.chunks = chunks
+        self.chunk_tapes = chunk_tapes
+        self.naive_mounts = naive_mounts
+
+    @property
+    def mounts(self):
+        """Number of tape mounts needed by the planned chunks."""
+        return sum(len(tapes) for tapes in self.chunk_tapes)
+
+
+def plan_chunks(fileset: dict, tape_limit: int, file_limit: int) -> ChunkPlan:
+    """Divides the files into chunks under the same file number and tape limits as
+    :func:`chunk_by_files_and_tapes`, but with as few tape mounts as possible.
+
+    Every chunk mounts each of its tapes once, so a tape must be mounted at least once for each `file_limit` files
+    on it. The files of each tape are first split into full chunks of `file_limit` files, which mount a single tape,
+    then the remaining files of each tape are packed together (first fit decreasing) without splitting them across
+    chunks, which achieves this minimum with few chunks.
+
+    Parameters
+    ----------
+    fileset: dict
+        A dictionary of filenames lists indexed by their tape identifier
+    tape_limit: int
+        Maximum number of tapes that can be accessed in a single moo filter request
+    file_limit: int
+        Maximum number of files that can be fetched in a single moo filter request
+
+    Returns
+    -------
+    ChunkPlan
+        The chunks with the tapes they read, and the number of mounts needed by the greedy chunks.
+    """
+    chunks, chunk_tapes, remainders = [], [], []
+    for tape_id, files in fileset.items():
+        full_size = len(files) - len(files) % file_limit
+        for index in range(0, full_size, file_limit):
+            chunks.append(files[index:index + file_limit])
+            chunk_tapes.append({tape_id})
+        if full_size < len(files):
+            remainders.append((tape_id, files[full_size:]))
+
+    bins = []
+    for tape_id, files in sorted(remainders, key=lambda remainder: len(remainder[1]), reverse=True):
+        for files_in_bin, tapes_in_bin in bins:
+            if len(tapes_in_bin) < tape_limit and len(files_in_bin) + len(files) <= file_limit:
+                break
+        else:
+            files_in_bin, tapes_in_bin = [], set()
+            bins.append((files_in_bin, tapes_in_bin))
+        files_in_bin.extend(files)
+        tapes_in_bin.add(tape_id)
+    chunks += [files_in_bin for files_in_bin, _ in bins]
+    chunk_tapes += [tapes_in_bin for _, tapes_in_bin in bins]
+
+    file_tapes = {file: tape_id for tape_id, files in fileset.items() for file in files}
+    naive_mounts = sum(len({file_tapes[file] for file in chunk})
+                       for chunk in chunk_by_files_and_tapes(fileset, tape_limit, file_limit))
+    return ChunkPlan(chunks, chunk_tapes, naive_mounts)
+
+
 def get_zero_sized_files(dirpath: str) -> list:
     """Checks if a given directory contain files of zero size and returns them.
 
@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2019-2025, Met Office.
+# (C) British Crown Copyright 2019-2026, Met Office.
 # Please see LICENSE.md for license details.
 """The :mod:`constants` module contains constants (values that should never
 be changes by a user and exist for readability and maintainability
@@ -12,6 +12,7 @@ EXTRACT_COMMAND = (
     'cdds_extract {request} --log_name {log_name} '
     '--root_proc_dir {root_proc_dir} --root_data_dir {root_data_dir} '
 )
+EXTRACT_MANIFEST_FILENAME = '{}_manifest.db'
 GRID_LOOKUPS = {"diad-T": "medusa",
                 "ptrc-T": "medusa",
                 "ptrd-T": "medusa",
@@ -32,16 +33,25 @@ MEMORY = '2G'
 MONTHLY_DATESTAMP_PATTERN_APRIL = "{}a.p{}{}apr.pp"
 MONTHLY_DATESTAMP_PATTERN_SEPTEMBER = "{}a.p{}{}sep.pp"
 MOOSE_CALL_LIMIT = 20
+# Tape id given to files whose tape is not known, e.g. with Azure MASS.
+MOOSE_DEFAULT_TAPE_ID = "01"
 MOOSE_LS_PAGESIZE = 25000  # lines
 MOOSE_LS_MAX_PAGES = 1000  # max number of pages
 MOOSE_MAX_NC_FILES = 1000  # max number of files per moo filter command
+MOOSE_MAX_CONCURRENT_REQUESTS = 1
+MOOSE_RETRIES = 3
+MOOSE_RETRY_DELAY = 60  # seconds
 MOOSE_TAPE_PATTERN = r'Multiple-get tape-number limit: (\d+)'
-NUM_PP_HEADER_LINES = 4
+# Errors reported by MOOSE when MASS is temporarily unable to serve a request.
+MOOSE_TRANSIENT_ERRORS = ('STORAGE_SYSTEM_UNAVAILABLE', 'ERROR_TRANSFER', 'SYSTEM_BUSY', 'TRANSFER_TIMEOUT')
+# Start and end dates in the names of |netCDF| model output files.
+NC_FILENAME_DATES_REGEXP = r'_(\d{8})-(\d{8})'
+# Names of the unlimited time dimension of |netCDF| model output files.
+NETCDF_TIME_DIMENSIONS = ('time', 'time_counter')
 QUEUE = 'long'
 SPICE_SCRIPT_NAME = 'cdds_extract_spice.sh'
 SUBDAILY_DATESTAMP_PATTERN = "{}a.p{}{}{:02d}{:02d}.pp"
 STREAMDIR_PERMISSIONS = 0o777
 STREAMTYPE_PP = 'pp'
 STREAMTYPE_NC = 'nc'
-TIME_REGEXP = r'time(_counter)?\s=\sUNLIMITED\s;\s\/\/\s\((\d+)\scurrently\)'
 WALLTIME = '2-00:00:00'
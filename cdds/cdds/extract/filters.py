@@ -19,8 +19,8 @@ from cdds.common.mass import mass_list_dir
 from cdds.common.plugins.grid import GridType
 from cdds.common.plugins.plugins import PluginStore
 from cdds.extract.constants import MOOSE_CALL_LIMIT
-from cdds.extract.common import (check_moo_cmd, chunk_by_files_and_tapes, fetch_filelist_from_mass, get_streamtype,
-                                 get_stash, get_tape_limit, run_moo_cmd, condense_constraints)
+from cdds.extract.common import (check_moo_cmd, fetch_filelist_from_mass, get_streamtype, get_stash, get_tape_limit,
+                                 plan_chunks, run_moo_cmd, condense_constraints)
 from cdds.extract.constants import GRID_LOOKUPS, MOOSE_MAX_NC_FILES, STREAMTYPE_PP, STREAMTYPE_NC
 from cdds.common import generate_datestamps_nc
 
@@ -944,13 +944,17 @@ class Filters(object):
         tape_limit, error = 50, ""
         if error:
             raise MooseException(error)
-        chunks = chunk_by_files_and_tapes(files_on_tapes, tape_limit, MOOSE_MAX_NC_FILES)
-        for chunk in chunks:
+        plan = plan_chunks(files_on_tapes, tape_limit, MOOSE_MAX_NC_FILES)
+        if not self.simulation:
+            logger.info("Planned {} requests with {} tape mounts ({} mounts without planning)".format(
+                len(plan.chunks), plan.mounts, plan.naive_mounts))
+        for chunk, tapes in zip(plan.chunks, plan.chunk_tapes):
             cmd = {
                 "moo_cmd": moo_cmd,
                 "param_args": moo_args + chunk + [self.target],
                 "start": start,
                 "end": end,
+                "tapes": len(tapes),
             }
             self.mass_cmd.append(cmd)
         if self.simulation:
@@ -0,0 +1,242 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""
+The :mod:`manifest` module contains the per stream manifest of the files
+retrieved from MASS by extract, which allows an interrupted extraction to
+request only the files that are missing or corrupt when it is resumed.
+"""
+import logging
+import os
+import sqlite3
+from collections import Counter
+from typing import Dict, List, Optional
+
+RETRIEVAL_PENDING = 'pending'
+RETRIEVAL_RETRIEVED = 'retrieved'
+RETRIEVAL_FAILED = 'failed'
+VALIDATION_UNKNOWN = 'unknown'
+VALIDATION_VALID = 'valid'
+VALIDATION_INVALID = 'invalid'
+
+
+class ExtractionManifest:
+    """
+    Records each file expected from MASS for a stream with its expected size
+    (where known), the size and modification time of the retrieved file and
+    its retrieval and validation states, in a sqlite database. The contents
+    of the files are not read; the outcome of validating them is recorded
+    with `set_validation`.
+    """
+
+    def __init__(self, db_file: str):
+        """
+        Parameters
+        ----------
+        db_file : str
+            Path to the database file, created if it does not exist.
+        """
+        self.db_file = db_file
+        self.connection = sqlite3.connect(db_file)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS extract_file '
+            '(mass_path TEXT PRIMARY KEY, '
+            'filename TEXT NOT NULL, '
+            'expected_size INTEGER, '
+            'local_size INTEGER, '
+            'local_mtime INTEGER, '
+            'retrieval_state TEXT NOT NULL, '
+            'validation_state TEXT NOT NULL, '
+            'updated DATETIME DEFAULT (DATETIME(\'NOW\')) NOT NULL)')
+        self.connection.commit()
+
+    def close(self) -> None:
+        """Close the database."""
+        self.connection.close()
+
+    def register(self, expected_files: Dict[str, Optional[int]]) -> None:
+        """
+        Add files expected from MASS to the manifest. The states of files
+        already in the manifest are kept, but their expected size is updated.
+
+        Parameters
+        ----------
+        expected_files : Dict[str, Optional[int]]
+            The expected size in bytes of each file, or None if not known,
+            keyed by MASS path.
+        """
+        self.connection.executemany(
+            'INSERT INTO extract_file (mass_path, filename, expected_size, retrieval_state, validation_state) '
+            'VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (mass_path) DO UPDATE SET expected_size = excluded.expected_size',
+            [(mass_path, os.path.basename(mass_path), size, RETRIEVAL_PENDING, VALIDATION_UNKNOWN)
+             for mass_path, size in expected_files.items()])
+        self.connection.commit()
+
+    def outstanding(self, target_dir: str, mass_paths: List[str]) -> List[str]:
+        """
+        Return the files which still have to be retrieved, i.e. that have not
+        been retrieved, have failed validation or whose local copy has since
+        been removed or changed. Local copies of files retrieved before which
+        are invalid or have changed are removed, so that they are not skipped
+        by the retrieval.
+
+        Parameters
+        ----------
+        target_dir : str
+            The directory the files are retrieved to.
+        mass_paths : List[str]
+            The MASS paths of the files.
+
+        Returns
+        -------
+        List[str]
+            The MASS paths of the files to retrieve, in the given order.
+        """
+        records = self._records(mass_paths)
+        outstanding = []
+        for mass_path in mass_paths:
+            filepath = os.path.join(target_dir, os.path.basename(mass_path))
+            record = records.get(mass_path)
+            if record is not None and self._is_complete(record, filepath):
+                continue
+            if record is not None and record[5] == RETRIEVAL_RETRIEVED and os.path.exists(filepath):
+                logging.getLogger(__name__).info('Removing invalid file {}'.format(filepath))
+                os.remove(filepath)
+            outstanding.append(mass_path)
+        return outstanding
+
+    def update(self, target_dir: str, mass_paths: List[str]) -> Counter:
+        """
+        Record the states of files after a retrieval request has finished.
+        Only the sizes and modification times of the files which have
+        arrived are recorded. Files whose size differs from the expected size
+        are invalid, the validation state of the others is left unknown
+        until recorded with `set_validation`.
+
+        Parameters
+        ----------
+        target_dir : str
+            The directory the files are retrieved to.
+        mass_paths : List[str]
+            The MASS paths of the requested files.
+
+        Returns
+        -------
+        Counter
+            The number of files in each retrieval state.
+        """
+        records = self._records(mass_paths)
+        rows = []
+        states = Counter()
+        for mass_path in mass_paths:
+            filepath = os.path.join(target_dir, os.path.basename(mass_path))
+            local_size, local_mtime = None, None
+            retrieval_state, validation_state = RETRIEVAL_FAILED, VALIDATION_UNKNOWN
+            try:
+                stat_result = os.stat(filepath)
+            except OSError:
+                stat_result = None
+            if stat_result is not None:
+                local_size, local_mtime = stat_result.st_size, stat_result.st_mtime_ns
+                retrieval_state = RETRIEVAL_RETRIEVED
+                expected_size = records[mass_path][1] if mass_path in records else None
+                if expected_size is not None and local_size != expected_size:
+                    validation_state = VALIDATION_INVALID
+            rows.append((local_size, local_mtime, retrieval_state, validation_state, mass_path))
+            states[retrieval_state] += 1
+        self.connection.executemany(
+            'UPDATE extract_file SET local_size = ?, local_mtime = ?, retrieval_state = ?, validation_state = ?, '
+            'updated = DATETIME(\'NOW\') WHERE mass_path = ?', rows)
+        self.connection.commit()
+        return states
+
+    def mass_paths(self, filenames: List[str]) -> Dict[str, str]:
+        """
+        Return the MASS paths of retrieved files.
+
+        Parameters
+        ----------
+        filenames : List[str]
+            Names of the files in the directory they are retrieved to.
+
+        Returns
+        -------
+        Dict[str, str]
+            The MASS path of each file in the manifest, keyed by filename.
+        """
+        mass_paths = {}
+        for index in range(0, len(filenames), 500):
+            chunk = filenames[index:index + 500]
+            mass_paths.update((filename, mass_path) for mass_path, filename in self.connection.execute(
+                'SELECT mass_path, filename FROM extract_file '
+                'WHERE filename IN ({})'.format(', '.join('?' * len(chunk))), chunk))
+        return mass_paths
+
+    def set_validation(self, results: Dict[str, bool]) -> None:
+        """
+        Record the outcome of validating retrieved files elsewhere. Files
+        whose size did not match the expected size stay invalid.
+
+        Parameters
+        ----------
+        results : Dict[str, bool]
+            Whether each file is valid, keyed by MASS path.
+        """
+        self.connection.executemany(
+            'UPDATE extract_file SET validation_state = ?, updated = DATETIME(\'NOW\') '
+            'WHERE mass_path = ? AND retrieval_state = ? AND validation_state != ?',
+            [(VALIDATION_VALID if valid else VALIDATION_INVALID, mass_path, RETRIEVAL_RETRIEVED, VALIDATION_INVALID)
+             for mass_path, valid in results.items()])
+        self.connection.commit()
+
+    def validated(self, target_dir: str) -> List[str]:
+        """
+        Return the names of the files which have been validated and are
+        still present unchanged in the target directory.
+
+        Parameters
+        ----------
+        target_dir : str
+            The directory the files are retrieved to.
+
+        Returns
+        -------
+        List[str]
+            The names of the files.
+        """
+        records = self.connection.execute(
+            'SELECT mass_path, expected_size, local_size, local_mtime, validation_state, retrieval_state '
+            'FROM extract_file WHERE validation_state = ?', (VALIDATION_VALID,)).fetchall()
+        return sorted(os.path.basename(record[0]) for record in records
+                      if self._is_complete(record, os.path.join(target_dir, os.path.basename(record[0]))))
+
+    def summary(self) -> Dict[str, int]:
+        """Return the number of files in each retrieval and validation state."""
+        return dict(self.connection.execute(
+            'SELECT retrieval_state || \'/\' || validation_state, COUNT(*) FROM extract_file '
+            'GROUP BY retrieval_state, validation_state').fetchall())
+
+    def _records(self, mass_paths):
+        records = {}
+        # Stay within the limit of sqlite on the number of parameters in a query.
+        for index in range(0, len(mass_paths), 500):
+            chunk = mass_paths[index:index + 500]
+            records.update((record[0], record) for record in self.connection.execute(
+                'SELECT mass_path, expected_size, local_size, local_mtime, validation_state, retrieval_state '
+                'FROM extract_file '
+                'WHERE mass_path IN ({})'.format(', '.join('?' * len(chunk))), chunk))
+        return records
+
+    @staticmethod
+    def _is_complete(record, filepath):
+        # A retrieved file is complete unless it failed validation or has changed since it was retrieved.
+        _, expected_size, local_size, local_mtime, validation_state, retrieval_state = record
+        if retrieval_state != RETRIEVAL_RETRIEVED or validation_state == VALIDATION_INVALID:
+            return False
+        if expected_size is not None and local_size != expected_size:
+            return False
+        try:
+            stat_result = os.stat(filepath)
+        except OSError:
+            return False
+        return stat_result.st_size == local_size and stat_result.st_mtime_ns == local_mtime
@@ -5,13 +5,22 @@
 import getpass
 import logging
 import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from cdds.common.request.request import read_request
 from cdds.common.constants import INPUT_DATA_DIRECTORY
 from cdds.extract.common import (
-    check_moo_cmd, configure_mappings, configure_variables, exit_nicely, get_data_target,
-    get_zero_sized_files, ValidationResult)
+    configure_mappings, configure_variables, exit_nicely, fetch_file_sizes_from_mass, get_data_target,
+    get_streamtype, get_tape_limit, get_zero_sized_files, StreamValidationResult, ValidationResult)
+from cdds.extract.constants import EXTRACT_MANIFEST_FILENAME, MOOSE_MAX_CONCURRENT_REQUESTS, STREAMTYPE_NC
 from cdds.extract.filters import Filters
+from cdds.extract.manifest import ExtractionManifest
 from cdds.extract.process import Process
+from cdds.extract.scheduler import RetrievalJob, RetrievalScheduler
+from cdds.extract.validate import (
+    StreamingValidator, calculate_file_frequency, expected_nc_variables,
+    process_pp_streamtype)
+from cdds.common.cdds_files.cdds_directories import log_directory
 from cdds.common.plugins.plugins import PluginStore
 
 
@@ -72,6 +81,16 @@ class ExtractRunner(object):
         stream_validation = ValidationResult()
         stream_count = 0
         stream_success = {}
+        stream_end_msg = {}
+        manifests = {}
+        data_targets = {}
+        validators = {}
+        stream_jobs = {}
+        # the files of every stream are validated by one pool of worker processes
+        executor = None
+        if getattr(self.args, "validate", False):
+            executor = ProcessPoolExecutor(max_workers=getattr(self.args, "max_workers", 1))
+        jobs = []
         for stream in streams:
             stream_success[stream] = True
             # Skip afx/ofx streams as fixed fields are read from local ancil files
@@ -88,11 +107,18 @@ class ExtractRunner(object):
 
             # process stream if no missing filters and check option is not skip
             if stream in mapping_status:
+                stream_end_msg[stream] = "[{} of {}]".format(stream_count, len(streams))
 
                 # get data source and target for this stream
                 data_source = extract_process.get_data_source(stream)
                 data_target = get_data_target(input_data_dir, request.data.model_workflow_id, stream)
 
+                # the files retrieved by previous runs are recorded in the manifest of the stream
+                if not request.common.simulation:
+                    manifests[stream] = ExtractionManifest(
+                        os.path.join(proc_directory, "extract", EXTRACT_MANIFEST_FILENAME.format(stream)))
+                    data_targets[stream] = data_target
+
                 # check data stream exists in MASS
                 if extract_process.request_exists(data_source):
 
@@ -109,6 +135,15 @@ class ExtractRunner(object):
                         extract_process.configure_commands(
                             mappings, stream, data_source, data_target))
 
+                    # only request the files which are not already retrieved; the commands are built first, so
+                    # that files added by widening the request are requested as well
+                    retrieval_cmd = mass_cmd
+                    if stream in manifests and status != "skip" and mass_cmd:
+                        retrieval_cmd = self._outstanding_commands(
+                            manifests[stream], mass_cmd, data_source, data_target)
+                        if not retrieval_cmd:
+                            logger.info("All files of stream {} have already been retrieved".format(stream))
+
                     # if status is skip OR mass_cmd is empty
                     # then skip this stream
                     if status == "skip" or not mass_cmd:
@@ -119,49 +154,26 @@ class ExtractRunner(object):
                             )
                         )
 
-                    # submit one moose retrieval request (block)
+                    # one moose retrieval request (block)
                     # per period (pp) or substream (nc)
                     else:
-                        blocknum = 0
-                        for block in mass_cmd:
-                            blocknum += 1
-
-                            # log this MASS request
-                            logger.info(
-                                self.lang["block_start"].format(
-                                    stream, blocknum, block["start"],
-                                    block["end"]))
-
-                            code, output = extract_process.mass_request(block)
-                            status = check_moo_cmd(code, output)
-                            if status == "ok":
-                                msg = self.lang["block_success"].format(
-                                    blocknum)
-                            else:
-                                stream_success[stream] = False
-                                overall_result = "quality"
-                                msg = self.lang["block_fail"].format(
-                                    blocknum, output)
-
-                            logger.info(msg)
-
-                            if status == "stop":
-                                logger.info("{}: {}".format(
-                                    self.lang["extract_failed"],
-                                    self.lang["moose_fail"].format(
-                                        code, output)))
-                                exit_nicely(self.lang["script_end"])
-
-                        # ---- end of retrieve block loop ----
+                        jobs += [RetrievalJob(stream, blocknum, block)
+                                 for blocknum, block in enumerate(retrieval_cmd, start=1)]
+                        if getattr(self.args, "validate", False):
+                            # files retrieved by earlier runs are validated as well and are retrieved again by
+                            # the full commands if invalid; the netCDF files validated by earlier runs are not
+                            # read again, while the stash of every PP file is needed to check its consistency
+                            validators[stream] = self._stream_validator(
+                                request, plugin, mappings, stream, data_target, stash_codes, executor)
+                            if stream in manifests and get_streamtype(stream) == STREAMTYPE_NC:
+                                validators[stream].skip(manifests[stream].validated(data_target))
+                            validators[stream].submit_new()
+                            stream_jobs[stream] = [RetrievalJob(stream, blocknum, block)
+                                                   for blocknum, block in enumerate(mass_cmd, start=1)]
 
                 else:
                     overall_result = "failed"
                     stash_codes = {}
-                # log stream completion and update progress in CREM
-                logger.info(extract_process.stream_completion_message(
-                    stream, "[{} of {}]".format(stream_count, len(streams)), stream_success[stream]))
-                # do validation check for this stream and write to log
-                substreams = list(mappings.filters.keys())
             else:
                 end_msg = "skipped [{} of {}]".format(stream_count,
                                                       len(streams))
@@ -173,6 +185,91 @@ class ExtractRunner(object):
                 logger.info(extract_process.stream_completion_message(
                     stream, end_msg, stream_success[stream]))
             # ---- end of stream loop ----
+
+        # submit the retrieval requests of all streams
+        stop_result = None
+        running_jobs = Counter(job.stream for job in jobs)
+
+        def log_result(result):
+            nonlocal overall_result, stop_result
+            job = result.job
+            sources = _mass_sources(job.command)
+            running_jobs[job.stream] -= 1
+            if job.stream in manifests:
+                states = manifests[job.stream].update(data_targets[job.stream], sources)
+                if states:
+                    logger.info("{}: block {}: {}".format(job.stream, job.blocknum, ", ".join(
+                        "{} files {}".format(count, state) for state, count in sorted(states.items()))))
+            if job.stream in validators:
+                # validate the files of the request while the other requests run; the files retrieved
+                # by select requests are not known, so they are validated when the stream has finished
+                if sources:
+                    validators[job.stream].submit([os.path.basename(source) for source in sources])
+                elif not running_jobs[job.stream]:
+                    validators[job.stream].submit_new()
+                for stream in validators:
+                    self._record_validation(validators[stream], manifests.get(stream))
+            if result.status == "ok":
+                msg = self.lang["block_success"].format(job.blocknum)
+            else:
+                stream_success[job.stream] = False
+                overall_result = "quality"
+                msg = self.lang["block_fail"].format(job.blocknum, result.output)
+            logger.info("{}: {}".format(job.stream, msg))
+            if result.status == "stop":
+                stop_result = result
+                return False
+            return True
+
+        def log_start(job):
+            # log this MASS request
+            logger.info(self.lang["block_start"].format(
+                job.stream, job.blocknum, job.command["start"], job.command["end"]))
+
+        max_concurrent_requests = getattr(self.args, "max_concurrent_requests", MOOSE_MAX_CONCURRENT_REQUESTS)
+        scheduler = RetrievalScheduler(extract_process.mass_request, max_concurrent_requests,
+                                       self._tape_limit(request, max_concurrent_requests))
+        scheduler.run(jobs, log_result, log_start)
+
+        # retrieve the files which failed validation once more
+        if validators and stop_result is None:
+            retry_jobs = []
+            for stream, validator in validators.items():
+                self._record_validation(validator, manifests.get(stream), block=True)
+                retry_jobs += self._retry_jobs(validator, stream_jobs[stream])
+            running_jobs.update(job.stream for job in retry_jobs)
+            scheduler.run(retry_jobs, log_result, log_start)
+        if stop_result is not None:
+            for validator in validators.values():
+                validator.close()
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            logger.info("{}: {}".format(
+                self.lang["extract_failed"],
+                self.lang["moose_fail"].format(stop_result.code, stop_result.output)))
+            exit_nicely(self.lang["script_end"])
+
+        # report the validation of each stream
+        for stream, validator in validators.items():
+            self._record_validation(validator, manifests.get(stream), block=True)
+            validation_result = StreamValidationResult(stream)
+            validation_result.add_mappings(mappings)
+            validator.finish(validation_result)
+            validation_result.log_results(log_directory(request, "extract"))
+            if not validation_result.valid:
+                stream_success[stream] = False
+                overall_result = "quality"
+        if executor is not None:
+            executor.shutdown()
+
+        # log stream completion and update progress in CREM
+        for stream, end_msg in stream_end_msg.items():
+            logger.info(extract_process.stream_completion_message(stream, end_msg, stream_success[stream]))
+        for stream, manifest in manifests.items():
+            logger.info("{}: retrieval/validation state of the files: {}".format(stream, ", ".join(
+                "{} {}".format(count, state) for state, count in sorted(manifest.summary().items()))))
+            manifest.close()
+
         # log end of process
         logger.info("{}: {}".format(
             self.lang["extract_{}".format(overall_result)], overall_summary))
@@ -180,3 +277,114 @@ class ExtractRunner(object):
             msg=self.lang["script_end"],
             success=True if overall_result == "success" else False
         )
+
+    @staticmethod
+    def _outstanding_commands(manifest, mass_cmd, data_source, data_target):
+        """Records the files requested by the MOOSE commands in the manifest
+        and returns the commands restricted to the files that are still
+        outstanding. Commands which do not list the files they retrieve
+        (e.g. select) are returned unchanged.
+
+        Parameters
+        ----------
+        manifest: cdds.extract.manifest.ExtractionManifest
+            The manifest of the stream.
+        mass_cmd: list of dict
+            MOOSE commands - dict per command
+        data_source: str
+            MOOSE data source of the stream
+        data_target: str
+            Directory the files of the stream are retrieved to
+
+        Returns
+        -------
+        list of dict
+            The MOOSE commands still to run.
+        """
+        logger = logging.getLogger(__name__)
+        sizes = {}
+        if any(block["moo_cmd"] == "get" for block in mass_cmd):
+            sizes, error = fetch_file_sizes_from_mass(data_source)
+            if error:
+                logger.warning("Sizes of the files in {} are not known: {}".format(data_source, error))
+        outstanding_cmd = []
+        for block in mass_cmd:
+            sources = _mass_sources(block)
+            if not sources:
+                outstanding_cmd.append(block)
+                continue
+            manifest.register({source: sizes.get(source) for source in sources})
+            outstanding = manifest.outstanding(data_target, sources)
+            if len(outstanding) < len(sources):
+                logger.info("{} of {} files requested from {} to {} have already been retrieved".format(
+                    len(sources) - len(outstanding), len(sources), block["start"], block["end"]))
+            if outstanding:
+                outstanding = set(outstanding)
+                block = dict(block, param_args=[arg for arg in block["param_args"]
+                                                if arg not in sources or arg in outstanding])
+                outstanding_cmd.append(block)
+        return outstanding_cmd
+
+    @staticmethod
+    def _stream_validator(request, plugin, mappings, stream, data_target, stash_codes, executor):
+        """Returns the validator of the files of a stream, which are
+        validated by the shared executor as soon as the request retrieving
+        them has finished."""
+        file_frequency = calculate_file_frequency(plugin, request, stream)
+        expected_variables = None
+        if get_streamtype(stream) == STREAMTYPE_NC:
+            expected_variables = expected_nc_variables(request, file_frequency, mappings)
+            filenames = list(expected_variables)
+        else:
+            filenames = process_pp_streamtype(request, file_frequency, mappings)
+        return StreamingValidator(data_target, stream, stash_codes, filenames, file_frequency, expected_variables,
+                                  executor=executor)
+
+    @staticmethod
+    def _record_validation(validator, manifest, block=False):
+        """Records the results of the files validated since the last call in
+        the manifest of the stream."""
+        results = validator.collect(block)
+        if manifest is not None and results:
+            mass_paths = manifest.mass_paths(list(results))
+            manifest.set_validation({mass_paths[filename]: valid for filename, valid in results.items()
+                                     if filename in mass_paths})
+
+    @staticmethod
+    def _retry_jobs(validator, jobs):
+        """Returns the retrieval requests for the files of a stream that
+        failed validation, after removing the invalid files."""
+        invalid_files = set(validator.invalid_files)
+        retry_jobs = []
+        for job in jobs:
+            sources = _mass_sources(job.command)
+            invalid_sources = [source for source in sources if os.path.basename(source) in invalid_files]
+            if not invalid_sources:
+                continue
+            logging.getLogger(__name__).info("{}: retrieving {} files of block {} again after failed validation".format(
+                job.stream, len(invalid_sources), job.blocknum))
+            for source in invalid_sources:
+                filepath = os.path.join(validator.path, os.path.basename(source))
+                if os.path.exists(filepath):
+                    os.remove(filepath)
+            param_args = [arg for arg in job.command["param_args"] if arg not in sources or arg in invalid_sources]
+            retry_jobs.append(RetrievalJob(job.stream, job.blocknum, dict(job.command, param_args=param_args)))
+        return retry_jobs
+
+    @staticmethod
+    def _tape_limit(request, max_concurrent_requests):
+        """Returns the number of tapes the concurrent MOOSE requests may read,
+        or None if only one request runs at a time or the limit is unknown."""
+        if max_concurrent_requests <= 1:
+            return None
+        tape_limit, error = get_tape_limit(simulation=request.common.simulation)
+        if error:
+            logging.getLogger(__name__).warning("Tape limit is not applied to concurrent requests: {}".format(error))
+        return tape_limit
+
+
+def _mass_sources(block):
+    """Returns the MASS paths of the files retrieved by a MOOSE get or filter command."""
+    if block["moo_cmd"] not in ("get", "filter"):
+        return []
+    return [arg for arg in block["param_args"] if arg.startswith("moose:")]
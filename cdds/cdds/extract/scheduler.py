@@ -0,0 +1,169 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""
+The :mod:`scheduler` module contains the scheduler running the MOOSE
+retrieval requests of several streams concurrently.
+"""
+import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from cdds.extract.common import check_moo_cmd
+from cdds.extract.constants import MOOSE_RETRIES, MOOSE_RETRY_DELAY, MOOSE_TRANSIENT_ERRORS
+
+
+@dataclass
+class RetrievalJob:
+    """A MOOSE retrieval request (block) of a stream."""
+    stream: str
+    blocknum: int
+    command: Dict
+
+    @property
+    def tapes(self) -> int:
+        """The number of tapes the request reads, if known, otherwise 1."""
+        return self.command.get("tapes", 1)
+
+
+@dataclass
+class RetrievalResult:
+    """The outcome of a retrieval job after any retries."""
+    job: RetrievalJob
+    code: int
+    output: str
+    status: str
+    attempts: int
+
+
+class RetrievalScheduler:
+    """
+    Runs MOOSE retrieval jobs in a pool of threads.
+
+    At most ``max_concurrent`` jobs run at any time, and a job is only
+    started while the total number of tapes read by the running jobs stays
+    within the tape limit of MASS, so that concurrent requests are not
+    rejected or queued by MASS. Jobs failing with a transient MASS error are
+    retried with exponential backoff.
+
+    The MOOSE commands are run by the ``mass_request`` callable, so they
+    can be replaced when testing.
+    """
+
+    def __init__(self, mass_request: Callable[[Dict], Tuple[int, str]], max_concurrent: int = 1,
+                 tape_limit: Optional[int] = None, retries: int = MOOSE_RETRIES,
+                 retry_delay: float = MOOSE_RETRY_DELAY, sleep: Callable[[float], None] = time.sleep):
+        """
+        Parameters
+        ----------
+        mass_request : Callable[[Dict], Tuple[int, str]]
+            Runs a MOOSE command and returns its return code and output,
+            e.g. :meth:`cdds.extract.process.Process.mass_request`.
+        max_concurrent : int
+            Maximum number of MOOSE requests running at the same time.
+        tape_limit : int, optional
+            Maximum number of tapes read by the running requests, see
+            :func:`cdds.extract.common.get_tape_limit`. No limit if None.
+        retries : int
+            Number of times a request failing with a transient error is
+            retried.
+        retry_delay : float
+            Seconds to wait before the first retry, doubled for every
+            further retry.
+        sleep : Callable[[float], None]
+            Waits the given number of seconds.
+        """
+        self.mass_request = mass_request
+        self.max_concurrent = max(1, max_concurrent)
+        self.tape_limit = tape_limit
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.sleep = sleep
+
+    def run(self, jobs: List[RetrievalJob], on_result: Optional[Callable[[RetrievalResult], bool]] = None,
+            on_start: Optional[Callable[[RetrievalJob], None]] = None) -> List[RetrievalResult]:
+        """
+        Run the jobs, starting them in the given order as slots and tapes
+        become available.
+
+        Parameters
+        ----------
+        jobs : List[RetrievalJob]
+            The jobs to run.
+        on_result : Callable[[RetrievalResult], bool], optional
+            Called with the result of every job as it finishes. If it
+            returns False, no further jobs are started.
+        on_start : Callable[[RetrievalJob], None], optional
+            Called with every job as it is started.
+
+        Returns
+        -------
+        List[RetrievalResult]
+            The results of the jobs that were run, in the order of the jobs.
+        """
+        pending = deque(jobs)
+        running = {}
+        results = {}
+        stopped = False
+        with ThreadPoolExecutor(max_workers=self.max_concurrent) as executor:
+            while running or (pending and not stopped):
+                while pending and not stopped:
+                    job = self._next_job(pending, running.values())
+                    if job is None:
+                        break
+                    if on_start is not None:
+                        on_start(job)
+                    running[executor.submit(self._execute, job)] = job
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    result = future.result()
+                    results[id(job)] = result
+                    if on_result is not None and on_result(result) is False:
+                        stopped = True
+        return [results[id(job)] for job in jobs if id(job) in results]
+
+    def _next_job(self, pending: deque, running_jobs) -> Optional[RetrievalJob]:
+        running_jobs = list(running_jobs)
+        if len(running_jobs) >= self.max_concurrent:
+            return None
+        if not running_jobs or self.tape_limit is None:
+            return pending.popleft()
+        tapes_in_use = sum(job.tapes for job in running_jobs)
+        for job in pending:
+            if tapes_in_use + job.tapes <= self.tape_limit:
+                pending.remove(job)
+                return job
+        return None
+
+    def _execute(self, job: RetrievalJob) -> RetrievalResult:
+        logger = logging.getLogger(__name__)
+        attempt = 1
+        while True:
+            code, output = self.mass_request(job.command)
+            if code == 0 or attempt > self.retries or not is_transient_moo_error(output):
+                return RetrievalResult(job, code, output, check_moo_cmd(code, output), attempt)
+            delay = self.retry_delay * 2 ** (attempt - 1)
+            logger.warning("Stream {} block {}: transient MOOSE error, retrying in {} seconds".format(
+                job.stream, job.blocknum, delay))
+            self.sleep(delay)
+            attempt += 1
+
+
+def is_transient_moo_error(output: str) -> bool:
+    """Return whether the output of a failed MOOSE command reports an error
+    that may not occur again when the command is retried.
+
+    Parameters
+    ----------
+    output : str
+        Text output from the MOOSE command.
+
+    Returns
+    -------
+    bool
+        True if the command should be retried.
+    """
+    return any(error in output for error in MOOSE_TRANSIENT_ERRORS)
@@ -3,7 +3,9 @@
 
 import logging
 import os
+import re
 import argparse
+from concurrent.futures import Executor, ProcessPoolExecutor, wait
 
 from metomi.isodatetime.data import Calendar
 
@@ -23,7 +25,7 @@ from cdds.extract.common import (
     get_streamtype,
     validate_netcdf,
 )
-from cdds.extract.constants import STREAMTYPE_NC, STREAMTYPE_PP
+from cdds.extract.constants import NC_FILENAME_DATES_REGEXP, STREAMTYPE_NC, STREAMTYPE_PP
 from cdds.extract.filters import Filters
 from cdds.common.request.request import Request
 
@@ -141,13 +143,36 @@ def process_nc_streamtype(request: Request, file_frequency: str, mappings: Filte
     list
         List of filenames with datestamps and substreams.
     """
-    datestamps, _ = generate_datestamps_nc(request.data.start_date, request.data.end_date, file_frequency)
-    filenames = []
-    substreams = list(mappings.filters.keys())
-    for sub_stream in substreams:
-        filenames += mappings.generate_filenames_nc(datestamps, sub_stream)
+    return list(expected_nc_variables(request, file_frequency, mappings))
+
+
+def expected_nc_variables(request: Request, file_frequency: str, mappings: Filters) -> dict[str, list]:
+    """Returns the |netCDF| files expected in the stream and the variables each of them must contain.
+
+    Generating the filenames of ensemble members lists MASS, so callers needing both the filenames and the variables
+    should use the keys of the returned dictionary rather than also calling :func:`process_nc_streamtype`.
+
+    Parameters
+    ----------
+    request: Request
+        Object that stores the information about the request.
+    file_frequency: str
+        The frequency.
+    mappings: Filters
+        The mappings for the data request.
 
-    return filenames
+    Returns
+    -------
+    dict[str, list]
+        Names of the variables filtered from MASS, keyed by filename.
+    """
+    datestamps, _ = generate_datestamps_nc(request.data.start_date, request.data.end_date, file_frequency)
+    expected_variables = {}
+    for sub_stream, filter_str in mappings.filters.items():
+        variables = [variable for variable in filter_str.split(",") if variable]
+        for filename in mappings.generate_filenames_nc(datestamps, sub_stream):
+            expected_variables[filename] = variables
+    return expected_variables
 
 
 def validate_streams(streams: list, args: argparse.Namespace) -> StreamValidationResult:
@@ -182,11 +207,14 @@ def validate_streams(streams: list, args: argparse.Namespace) -> StreamValidatio
         data_target = get_data_target(target_path_root, request.data.model_workflow_id, stream)
         streamtype = get_streamtype(stream)
         _, _, _, stash_codes = (mappings.format_filter(streamtype, stream))
+        expected_variables = None
         if streamtype == STREAMTYPE_PP:
             filenames = process_pp_streamtype(request, file_frequency, mappings)
         elif streamtype == STREAMTYPE_NC:
-            filenames = process_nc_streamtype(request, file_frequency, mappings)
-        validate(data_target, stream, stash_codes, stream_validation, filenames, file_frequency)
+            expected_variables = expected_nc_variables(request, file_frequency, mappings)
+            filenames = list(expected_variables)
+        validate(data_target, stream, stash_codes, stream_validation, filenames, file_frequency,
+                 getattr(args, 'max_workers', 1), expected_variables)
     else:
         logger.info('skipped [{}]: there are no variables requiring this stream'.format(stream))
 
@@ -196,9 +224,10 @@ def validate_streams(streams: list, args: argparse.Namespace) -> StreamValidatio
 
 
 def validate(path: str, stream: str, stash_codes: set, validation_result: StreamValidationResult, filenames: list,
-             file_frequency: str) -> None:
+             file_frequency: str, max_workers: int = 1, expected_variables: dict[str, list] = None) -> None:
     """Simple validation based on checking correct number of files have been extracted, and stash codes comparison in
-    the case of pp streams. In the case of ncdf files, it tests if they can be opened at all.
+    the case of pp streams. In the case of ncdf files, it tests if they can be read and contain the expected variables
+    and time range.
 
     Parameters
     ----------
@@ -214,17 +243,21 @@ def validate(path: str, stream: str, stash_codes: set, validation_result: Stream
         A list of all found files.
     file_frequency: str
         The frequency.
+    max_workers: int
+        Number of worker processes reading the headers of pp files or validating |netCDF| files.
+    expected_variables: dict[str, list]
+        Names of the variables each |netCDF| file must contain, keyed by filename.
     """
     streamtype = get_streamtype(stream)
     validate_file_names(path, streamtype, filenames, validation_result)
     if streamtype == STREAMTYPE_PP:
         logger = logging.getLogger(__name__)
         logger.info("Checking STASH fields")
-        stash_in_file = get_stash_fields(path, validation_result)
+        stash_in_file = get_stash_fields(path, validation_result, max_workers)
         check_expected_stash(stash_in_file, validation_result, path, stash_codes)
         check_consistent_stash(stash_in_file, validation_result, path, file_frequency)
     elif streamtype == STREAMTYPE_NC:
-        validate_directory_netcdf(path, validation_result)
+        validate_directory_netcdf(path, validation_result, expected_variables, max_workers)
 
 
 def validate_file_names(path: str, file_type: str, filenames: list, validation_result: StreamValidationResult) -> None:
@@ -250,9 +283,10 @@ def validate_file_names(path: str, file_type: str, filenames: list, validation_r
     validation_result.add_file_names(expected_files, actual_files)
 
 
-def validate_directory_netcdf(path: str, validation_result: StreamValidationResult) -> None:
-    """Checks that |netCDF| files at provided location can be read. Returns overall validation status, error message(s),
-    and a list of unreadable files (if present).
+def validate_directory_netcdf(path: str, validation_result: StreamValidationResult,
+                              expected_variables: dict[str, list] = None, max_workers: int = 1) -> None:
+    """Checks that |netCDF| files at provided location can be read, contain the expected variables and have time values
+    within the dates in their filenames. Any problems found are added to the validation result.
 
     Parameters
     ----------
@@ -260,17 +294,40 @@ def validate_directory_netcdf(path: str, validation_result: StreamValidationResu
         Path pointing to the location of |netCDF| dataset.
     validation_result: StreamValidationResult
         An object to hold results from the stream validation.
+    expected_variables: dict[str, list]
+        Names of the variables each file must contain, keyed by filename.
+    max_workers: int
+        Number of worker processes validating the files.
     """
     logger = logging.getLogger(__name__)
     logger.info("Checking netCDF files in \"{}\"".format(path))
+    if expected_variables is None:
+        expected_variables = {}
+    datafiles = []
     for root, _, files in os.walk(path):
-        for datafile in sorted(files):
-            error = validate_netcdf(os.path.join(root, datafile))
-            if error is not None:
-                validation_result.add_file_content_error(error)
+        datafiles += [(root, datafile) for datafile in sorted(files)]
+    nc_paths = [os.path.join(root, datafile) for root, datafile in datafiles]
+    variables = [expected_variables.get(datafile) for _, datafile in datafiles]
+    time_ranges = [_filename_time_range(datafile) for _, datafile in datafiles]
+
+    if max_workers > 1 and len(nc_paths) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            errors = list(executor.map(validate_netcdf, nc_paths, variables, time_ranges))
+    else:
+        errors = [validate_netcdf(*arguments) for arguments in zip(nc_paths, variables, time_ranges)]
+
+    for error in errors:
+        if error is not None:
+            validation_result.add_file_content_error(error)
+
 
+def _filename_time_range(filename: str) -> tuple[str, str] | None:
+    match = re.search(NC_FILENAME_DATES_REGEXP, filename)
+    return match.groups() if match else None
 
-def get_stash_fields(path: str, validation_result: StreamValidationResult) -> dict[str, dict[str, int]]:
+
+def get_stash_fields(path: str, validation_result: StreamValidationResult,
+                     max_workers: int = 1) -> dict[str, dict[str, int]]:
     """Validates if pp files in a given location contain all required stash codes.
 
     Parameters
@@ -279,6 +336,8 @@ def get_stash_fields(path: str, validation_result: StreamValidationResult) -> di
         Path of interest.
     validation_result: StreamValidationResult
         Holds errors and results of validation.
+    max_workers: int
+        Number of worker processes reading the headers of the files.
 
     Returns
     -------
@@ -286,15 +345,19 @@ def get_stash_fields(path: str, validation_result: StreamValidationResult) -> di
         The stash codes in each file.
     """
     stash_in_file = {}
-    pp_files = [file for file in os.listdir(path) if file.endswith('.pp')]
+    pp_files = sorted(file for file in os.listdir(path) if file.endswith('.pp'))
+    pp_paths = [os.path.join(path, pp_file) for pp_file in pp_files]
+
+    if max_workers > 1 and len(pp_files) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            stashes = list(executor.map(get_stash_from_pp, pp_paths, chunksize=64))
+    else:
+        stashes = [get_stash_from_pp(pp_path) for pp_path in pp_paths]
 
-    if pp_files:
-        for pp_file in sorted(pp_files):
-            stash = get_stash_from_pp(os.path.join(path, pp_file))
-            if stash is None:
-                validation_result.add_file_content_error(
-                    FileContentError(os.path.join(path, pp_file), "unreadable file"))
-            stash_in_file[pp_file] = stash
+    for pp_file, pp_path, stash in zip(pp_files, pp_paths, stashes):
+        if stash is None:
+            validation_result.add_file_content_error(FileContentError(pp_path, "unreadable file"))
+        stash_in_file[pp_file] = stash
 
     return stash_in_file
 
@@ -315,13 +378,35 @@ def check_expected_stash(stash_in_file: dict[str, dict], validation_result: Stre
         The set of expected stash codes.
     """
     for file, stash in stash_in_file.items():
-        if expected_stash.difference(set(stash.keys())):
-            stash_diff = expected_stash.difference(set(stash.keys()))
-            if stash_diff:
-                error = StashError(os.path.join(path, file), "STASH errors")
-                for diff in stash_diff:
-                    error.add_stash_error(diff)
-                validation_result.add_file_content_error(error)
+        error = missing_stash_error(os.path.join(path, file), stash, expected_stash)
+        if error is not None:
+            validation_result.add_file_content_error(error)
+
+
+def missing_stash_error(filepath: str, stash: dict[str, int], expected_stash: set[int]) -> StashError | None:
+    """Returns the error for a pp file without some of the expected stash codes.
+
+    Parameters
+    ----------
+    filepath: str
+        Path to the file.
+    stash: dict[str, int]
+        Stash entries in the file.
+    expected_stash: set[int]
+        The set of expected stash codes.
+
+    Returns
+    -------
+    StashError | None
+        The error listing the missing stash codes, or None if all were found.
+    """
+    stash_diff = expected_stash.difference(set(stash.keys()))
+    if not stash_diff:
+        return None
+    error = StashError(filepath, "STASH errors")
+    for diff in stash_diff:
+        error.add_stash_error(diff)
+    return error
 
 
 def check_consistent_stash(stash_in_file: dict[str, dict[str, int]], validation_result: StreamValidationResult,
@@ -359,3 +444,168 @@ def check_consistent_stash(stash_in_file: dict[str, dict[str, int]], validation_
                 if key not in reference_stash:
                     error.add_stash_error(key)
             validation_result.add_file_content_error(error)
+
+
+class StreamingValidator(object):
+    """Validates the files of a stream in worker processes as soon as they
+    have been retrieved, so that validation runs alongside the retrieval of
+    the remaining files rather than after it. The results of the files are
+    kept as they arrive and files can be submitted again after they have been
+    retrieved again.
+    """
+
+    def __init__(self, path: str, stream: str, stash_codes: set, filenames: list, file_frequency: str,
+                 expected_variables: dict[str, list] = None, max_workers: int = 1, executor: Executor = None):
+        """
+        Parameters
+        ----------
+        path: str
+            Directory the files of the stream are retrieved to.
+        stream: str
+            The stream.
+        stash_codes: set
+            A set of short stash codes appearing in filters.
+        filenames: list
+            The files expected in the stream.
+        file_frequency: str
+            The frequency.
+        expected_variables: dict[str, list]
+            Names of the variables each |netCDF| file must contain, keyed by filename.
+        max_workers: int
+            Number of worker processes validating the files, if no executor is given.
+        executor: Executor
+            The executor validating the files, which may be shared with the
+            validators of other streams. If not given, the validator starts
+            its own worker processes.
+        """
+        self.path = path
+        self.stream = stream
+        self.streamtype = get_streamtype(stream)
+        self.stash_codes = set(stash_codes) if stash_codes else set()
+        self.filenames = filenames
+        self.file_frequency = file_frequency
+        self.expected_variables = expected_variables or {}
+        self.errors = {}
+        self.stash_in_file = {}
+        self._futures = {}
+        self._submitted = {}
+        self._owns_executor = executor is None
+        self._executor = ProcessPoolExecutor(max_workers=max_workers) if executor is None else executor
+
+    def submit(self, filenames: list) -> None:
+        """Starts the validation of retrieved files, replacing any earlier
+        results for them. Files which are not present are ignored.
+
+        Parameters
+        ----------
+        filenames: list
+            Names of the files in the stream directory.
+        """
+        for filename in filenames:
+            filepath = os.path.join(self.path, filename)
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue
+            self.errors.pop(filename, None)
+            self.stash_in_file.pop(filename, None)
+            self._submitted[filename] = (stat.st_size, stat.st_mtime)
+            time_range = _filename_time_range(filename) if self.streamtype == STREAMTYPE_NC else None
+            self._futures[filename] = self._executor.submit(
+                _validate_file, filepath, self.streamtype, self.expected_variables.get(filename), time_range)
+
+    def skip(self, filenames: list) -> None:
+        """Records files which have been validated before, e.g. by an earlier
+        extraction, so that they are not validated again unless they change.
+
+        Parameters
+        ----------
+        filenames: list
+            Names of the files in the stream directory.
+        """
+        for filename in filenames:
+            try:
+                stat = os.stat(os.path.join(self.path, filename))
+            except OSError:
+                continue
+            self._submitted[filename] = (stat.st_size, stat.st_mtime)
+
+    def submit_new(self) -> None:
+        """Starts the validation of the files in the stream directory which
+        are new or have changed since they were last submitted."""
+        changed = []
+        for filename in sorted(os.listdir(self.path)):
+            if not filename.endswith(self.streamtype):
+                continue
+            stat = os.stat(os.path.join(self.path, filename))
+            if self._submitted.get(filename) != (stat.st_size, stat.st_mtime):
+                changed.append(filename)
+        self.submit(changed)
+
+    def collect(self, block: bool = False) -> dict[str, bool]:
+        """Records the results of the files whose validation has finished.
+
+        Parameters
+        ----------
+        block: bool
+            Whether to wait for the validation of all submitted files.
+
+        Returns
+        -------
+        dict[str, bool]
+            Whether each file validated since the last call is valid, keyed by filename.
+        """
+        if block:
+            wait(self._futures.values())
+        results = {}
+        for filename, future in list(self._futures.items()):
+            if not future.done():
+                continue
+            del self._futures[filename]
+            error, stash = future.result()
+            if stash is not None:
+                self.stash_in_file[filename] = stash
+                error = missing_stash_error(os.path.join(self.path, filename), stash, self.stash_codes)
+            if error is not None:
+                self.errors[filename] = error
+            results[filename] = error is None
+        return results
+
+    @property
+    def invalid_files(self) -> list:
+        """The names of the files which failed validation."""
+        return sorted(self.errors)
+
+    def finish(self, validation_result: StreamValidationResult) -> None:
+        """Waits for the outstanding validations and adds the results of the
+        stream to the validation result.
+
+        Parameters
+        ----------
+        validation_result: StreamValidationResult
+            An object to hold results from the stream validation.
+        """
+        self.collect(block=True)
+        self.close()
+        validate_file_names(self.path, self.streamtype, self.filenames, validation_result)
+        for filename in self.invalid_files:
+            validation_result.add_file_content_error(self.errors[filename])
+        if self.streamtype == STREAMTYPE_PP and self.stash_in_file:
+            check_consistent_stash(dict(sorted(self.stash_in_file.items())), validation_result, self.path,
+                                   self.file_frequency)
+
+    def close(self) -> None:
+        """Cancels the outstanding validations and stops the worker
+        processes, unless they are shared with other validators."""
+        for future in self._futures.values():
+            future.cancel()
+        if self._owns_executor:
+            self._executor.shutdown(cancel_futures=True)
+
+
+def _validate_file(filepath: str, streamtype: str, expected_variables: list | None,
+                   time_range: tuple[str, str] | None) -> tuple[FileContentError | None, dict | None]:
+    if streamtype == STREAMTYPE_PP:
+        stash = get_stash_from_pp(filepath)
+        return (FileContentError(filepath, "unreadable file") if stash is None else None), stash
+    return validate_netcdf(filepath, expected_variables, time_range), None
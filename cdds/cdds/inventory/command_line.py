@@ -6,17 +6,15 @@ import gzip
 import logging
 import os
 import shutil
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 from cdds import __version__
 from cdds.common import common_command_line_args, configure_logger, get_log_datestamp
-from cdds.common.constants import INVENTORY_DB_FILENAME, INVENTORY_FACET_LIST
+from cdds.common.constants import (INVENTORY_DB_FILENAME, INVENTORY_FACET_LIST, INVENTORY_MAX_CONCURRENT_LISTINGS,
+                                   INVENTORY_RECURSIVE_LEVELS)
 from cdds.common.mass import mass_list_dir, mass_list_files_recursively
-from cdds.inventory.db_models import (
-    execute_insert_query,
-    get_row_id_by_column_value,
-    populate_dataset_dictionary,
-    setup_db,
-)
+from cdds.inventory.db_models import setup_db
+from cdds.inventory.loader import InventoryLoader
 
 
 def main_populate_inventory(arguments=None):
@@ -30,11 +28,16 @@ def main_populate_inventory(arguments=None):
     inventory_filename = '{}_{}'.format(INVENTORY_DB_FILENAME, datestamp)
     new_inventory_path = os.path.join(args.inventory_dir, inventory_filename + '.db')
     old_inventory_path = os.path.join(args.inventory_dir, INVENTORY_DB_FILENAME + '.db')
+    incremental = args.incremental and os.path.exists(old_inventory_path)
+    if incremental:
+        logger.info('Updating a copy of the inventory file {}'.format(old_inventory_path))
+        shutil.copyfile(old_inventory_path, new_inventory_path)
     db_connection = setup_db(new_inventory_path)
 
     try:
         logger.info('Creating inventory file {} from MASS location {}'.format(new_inventory_path, args.mass_path))
-        populate_inventory_from_mass(db_connection, args.mass_path)
+        populate_inventory_from_mass(db_connection, args.mass_path, incremental, args.max_concurrent_listings,
+                                     args.recursive_levels)
         archive_and_replace_file(new_inventory_path, old_inventory_path)
         exit_code = 0
     except BaseException as exc:
@@ -71,6 +74,18 @@ def parse_args(arguments):
     parser.add_argument(
         'mass_path', type=str,
         help=('The moose URI to build an inventory from.'))
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help=('Update a copy of the existing inventory, only writing the datasets that have changed in MASS, '
+              'rather than building it from scratch.'))
+    parser.add_argument(
+        '--max_concurrent_listings', type=int, default=INVENTORY_MAX_CONCURRENT_LISTINGS,
+        help='The number of MASS directories listed at the same time.')
+    parser.add_argument(
+        '--recursive_levels', type=int, choices=range(1, len(INVENTORY_FACET_LIST) + 1),
+        default=INVENTORY_RECURSIVE_LEVELS, metavar='{{1-{}}}'.format(len(INVENTORY_FACET_LIST)),
+        help=('The number of directory levels at the bottom of the MASS tree, starting from the timestamp, '
+              'that are listed by a single recursive listing of each directory above them.'))
 
     # Add arguments common to all scripts.
     common_command_line_args(parser, 'inventory', logging.INFO, __version__)
@@ -78,12 +93,17 @@ def parse_args(arguments):
     return parsed_arguments
 
 
-def walk_mass_dir(root, facet_list, inventory):
-    """Explores recursively MASS location given as root, matching
-    directories at the current level with the first element from
-    the facet_list. Once it gets down to the final 4 facets, it builds
-    a list of datasets contained in the (current) root directory and
-    adds them to the database.
+def walk_mass_dir(root, facet_list, loader, max_concurrent=INVENTORY_MAX_CONCURRENT_LISTINGS,
+                  recursive_levels=INVENTORY_RECURSIVE_LEVELS):
+    """Explores MASS location given as root, matching directories at
+    each level with the next element from the facet_list. Once it gets
+    down to the final `recursive_levels` facets, it builds a list of the
+    datasets contained in each directory at that level with one recursive
+    listing and adds them to the database.
+
+    The directories are listed by up to `max_concurrent` threads, and
+    the datasets are passed to the loader as each recursive listing
+    finishes.
 
     Parameters
     ----------
@@ -92,36 +112,36 @@ def walk_mass_dir(root, facet_list, inventory):
     facet_list: list
         A list of facets which should correspond to the directory hierarchy
         under root
-    inventory: sqlite3.Connection
-        Database connection instance
+    loader: cdds.inventory.loader.InventoryLoader
+        Loader writing the datasets to the database
+    max_concurrent: int
+        The number of directories listed at the same time
+    recursive_levels: int
+        The number of facets at the bottom of the hierarchy that are listed
+        recursively
     """
-    cursor = inventory.cursor()
     logger = logging.getLogger(__name__)
-    if len(facet_list) == 4:
-        # we're down to variable/grid/status/timestamp/
-        datasets = mass_list_files_recursively(root, False)
-        for dataset_id, dataset_metadata in datasets.items():
-            dataset_facets = dataset_id.split('.')
-            facet_dict = build_facet_dictionary(dataset_facets, INVENTORY_FACET_LIST)
-            dataset_dict = populate_dataset_dictionary(cursor, facet_dict)
-            dataset_dict['variant'] = dataset_facets[5]
-            dataset_dict['status_id'] = get_row_id_by_column_value(cursor, 'status', dataset_metadata['status'])
-            dataset_dict['timestamp'] = dataset_metadata['timestamp']
-            dataset_dict['dataset_id'] = dataset_id
-            execute_insert_query(cursor, 'dataset', dataset_dict)
-            row_id = cursor.lastrowid
-            for file_metadata in dataset_metadata['files']:
-                file_metadata['dataset_id'] = row_id
-                execute_insert_query(cursor, 'netcdf_file', file_metadata)
-        inventory.commit()
-        return
-    else:
-        directories = mass_list_dir(root, False)
-        for elem in directories:
-            if facet_list[0] == 'mip':
-                logger.info('Processing data for {}'.format(os.path.basename(elem)))
-            walk_mass_dir(elem, facet_list[1:], inventory)
-    return
+    with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
+        pending = {executor.submit(_list_mass_dir, root, facet_list, recursive_levels): facet_list}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                level_facets = pending.pop(future)
+                if len(level_facets) <= recursive_levels:
+                    loader.add_datasets(future.result())
+                    continue
+                for elem in future.result():
+                    if level_facets[0] == 'mip':
+                        logger.info('Processing data for {}'.format(os.path.basename(elem)))
+                    pending[executor.submit(_list_mass_dir, elem, level_facets[1:], recursive_levels)] = (
+                        level_facets[1:])
+
+
+def _list_mass_dir(root, facet_list, recursive_levels):
+    if len(facet_list) <= recursive_levels:
+        # e.g. we're down to variable/grid/status/timestamp/
+        return mass_list_files_recursively(root, False)
+    return mass_list_dir(root, False)
 
 
 def build_facet_dictionary(dataset_facets, facet_list):
@@ -144,7 +164,9 @@ def build_facet_dictionary(dataset_facets, facet_list):
     return {facet: dataset_facets[index] for index, facet in enumerate(facet_list) if facet not in excluded_facets}
 
 
-def populate_inventory_from_mass(db_conn, mass_dir):
+def populate_inventory_from_mass(db_conn, mass_dir, incremental=False,
+                                 max_concurrent=INVENTORY_MAX_CONCURRENT_LISTINGS,
+                                 recursive_levels=INVENTORY_RECURSIVE_LEVELS):
     """Build inventory for the provided MASS location
 
     Parameters
@@ -153,8 +175,24 @@ def populate_inventory_from_mass(db_conn, mass_dir):
         Database connection instance
     mass_dir : str
         MASS location of the archive to be inventorised
+    incremental : bool
+        If True, update the datasets already in the inventory, which must
+        have been built from the same MASS location, rather than expect
+        an empty inventory
+    max_concurrent : int
+        The number of MASS directories listed at the same time
+    recursive_levels : int
+        The number of facet levels at the bottom of the MASS tree listed
+        with one recursive listing
+
+    Returns
+    -------
+    Counter
+        The number of datasets added, updated, unchanged and removed
     """
-    walk_mass_dir(mass_dir, INVENTORY_FACET_LIST, db_conn)
+    loader = InventoryLoader(db_conn, incremental)
+    walk_mass_dir(mass_dir, INVENTORY_FACET_LIST, loader, max_concurrent, recursive_levels)
+    return loader.finish()
 
 
 def archive_and_replace_file(new_inventory_path, old_inventory_path):
@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2020-2025, Met Office.
+# (C) British Crown Copyright 2020-2026, Met Office.
 # Please see LICENSE.md for license details.
 
 import logging
@@ -7,9 +7,25 @@ import os
 
 from cdds.common.sqlite import execute_insert_query, execute_query
 
+INVENTORY_INDEXES = [
+    ('mip_era_name', 'mip_era', 'name'),
+    ('mip_name', 'mip', 'name'),
+    ('institution_name', 'institution', 'name'),
+    ('model_name', 'model', 'name'),
+    ('mip_table_name', 'mip_table', 'name'),
+    ('experiment_name', 'experiment', 'name'),
+    ('grid_name', 'grid', 'name'),
+    ('status_name', 'status', 'name'),
+    ('variable_name', 'variable', 'name'),
+    ('dataset_dataset_id', 'dataset', 'dataset_id'),
+    ('dataset_simulation', 'dataset', 'model_id, experiment_id, variant'),
+    ('netcdf_file_dataset', 'netcdf_file', 'dataset_id'),
+]
+
 
 def setup_db(db_file):
-    """Initialises a qc database.
+    """Initialises an inventory database. The indexes are added to an
+    existing database if they are missing.
 
     Parameters
     ----------
@@ -21,6 +37,11 @@ def setup_db(db_file):
     sqlite3.Connection
         Database connection instance.
     """
+    if db_file != ':memory:' and os.path.exists(db_file if db_file.endswith('.db') else db_file + '.db'):
+        conn = connect(db_file)
+        create_indexes(conn)
+        conn.commit()
+        return conn
     conn = connect(db_file)
     conn.execute('PRAGMA foreign_keys = 1')
     conn.row_factory = sqlite3.Row
@@ -86,11 +107,24 @@ def setup_db(db_file):
     ]
     for command in create_sql:
         cursor.execute(command)
+    create_indexes(conn)
     conn.commit()
 
     return conn
 
 
+def create_indexes(conn):
+    """Creates the indexes used to look up facet values, datasets and files if they are missing.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Database connection instance.
+    """
+    for name, table, columns in INVENTORY_INDEXES:
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_{} ON {} ({})'.format(name, table, columns))
+
+
 def connect(db_file):
     """Connect to the qc database.
 
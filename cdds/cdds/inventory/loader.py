@@ -0,0 +1,155 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""
+The :mod:`loader` module contains the bulk loader that writes the datasets
+found in MASS to the inventory database.
+"""
+import logging
+from collections import Counter
+
+from cdds.common.constants import INVENTORY_FACET_LIST
+
+DICTIONARY_TABLES = ['mip_era', 'mip', 'institution', 'model', 'mip_table', 'experiment', 'grid', 'status', 'variable']
+DATASET_COLUMNS = ['id', 'variant', 'mip_era_id', 'mip_id', 'institution_id', 'model_id', 'mip_table_id',
+                   'variable_id', 'experiment_id', 'status_id', 'grid_id', 'timestamp', 'dataset_id']
+FILE_COLUMNS = ['filesize', 'filename', 'mass_path', 'dataset_id']
+# The facets of a dataset id that are stored in dictionary tables.
+DATASET_FACETS = [(index, facet) for index, facet in enumerate(INVENTORY_FACET_LIST)
+                  if facet not in ['variant', 'status', 'timestamp']]
+VARIANT_INDEX = INVENTORY_FACET_LIST.index('variant')
+
+ADDED = 'added'
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+REMOVED = 'removed'
+
+
+class InventoryLoader:
+    """
+    Writes datasets to the inventory database in batches of prepared
+    statements within a single transaction. The ids of the facet values and
+    of the datasets are kept in memory, so that no query is needed to look
+    them up.
+
+    In incremental mode the datasets already in the database are compared
+    with the ones added, and only those that are new or have a different
+    status, version or files are written. Datasets that were not added again
+    are removed when the load is finished.
+    """
+
+    def __init__(self, connection, incremental=False, batch_size=1000):
+        """
+        Parameters
+        ----------
+        connection : sqlite3.Connection
+            Connection to an inventory database created with
+            :func:`cdds.inventory.db_models.setup_db`.
+        incremental : bool
+            If True, update the datasets already in the database, otherwise
+            the database is expected to be empty.
+        batch_size : int
+            The number of datasets written by each batch of statements.
+        """
+        self.connection = connection
+        self.incremental = incremental
+        self.batch_size = batch_size
+        self.counts = Counter()
+        self._cursor = connection.cursor()
+        self._facet_ids = {table: {name: row_id for row_id, name in self._cursor.execute(
+            'SELECT id, name FROM {}'.format(table))} for table in DICTIONARY_TABLES}
+        self._next_id = (self._cursor.execute('SELECT MAX(id) FROM dataset').fetchone()[0] or 0) + 1
+        self._existing = {}
+        if incremental:
+            self._existing = {dataset_id: (row_id, status_id, timestamp)
+                              for row_id, status_id, timestamp, dataset_id in self._cursor.execute(
+                                  'SELECT id, status_id, timestamp, dataset_id FROM dataset')}
+        self._seen = set()
+        self._datasets = []
+        self._updates = []
+        self._files = []
+
+    def add_datasets(self, datasets):
+        """Add datasets found in MASS.
+
+        Parameters
+        ----------
+        datasets : dict
+            The status, version and files of each dataset keyed by dataset
+            id, as returned by
+            :func:`cdds.common.mass.mass_list_files_recursively`.
+        """
+        for dataset_id, dataset_metadata in datasets.items():
+            self._add_dataset(dataset_id, dataset_metadata)
+            if len(self._datasets) + len(self._updates) >= self.batch_size:
+                self._flush()
+
+    def finish(self):
+        """Write the outstanding batches, remove the datasets that were not
+        added again in incremental mode and commit the transaction.
+
+        Returns
+        -------
+        Counter
+            The number of datasets added, updated, unchanged and removed.
+        """
+        logger = logging.getLogger(__name__)
+        self._flush()
+        if self.incremental:
+            removed = [(row_id,) for dataset_id, (row_id, _, _) in self._existing.items()
+                       if dataset_id not in self._seen]
+            self._cursor.executemany('DELETE FROM netcdf_file WHERE dataset_id = ?', removed)
+            self._cursor.executemany('DELETE FROM dataset WHERE id = ?', removed)
+            self.counts[REMOVED] += len(removed)
+        self.connection.commit()
+        logger.info('Inventory datasets: {}'.format(', '.join(
+            '{} {}'.format(self.counts[state], state) for state in [ADDED, UPDATED, UNCHANGED, REMOVED])))
+        return self.counts
+
+    def _add_dataset(self, dataset_id, dataset_metadata):
+        self._seen.add(dataset_id)
+        dataset_facets = dataset_id.split('.')
+        status_id = self._facet_id('status', dataset_metadata['status'])
+        files = [(int(file_metadata['filesize']), file_metadata['filename'], file_metadata['mass_path'])
+                 for file_metadata in dataset_metadata['files']]
+        existing = self._existing.get(dataset_id)
+        if existing is not None:
+            row_id, existing_status_id, existing_timestamp = existing
+            if (existing_status_id == status_id and existing_timestamp == dataset_metadata['timestamp']
+                    and sorted(files) == self._stored_files(row_id)):
+                self.counts[UNCHANGED] += 1
+                return
+            self._updates.append((status_id, dataset_metadata['timestamp'], row_id))
+            self.counts[UPDATED] += 1
+        else:
+            row_id = self._next_id
+            self._next_id += 1
+            row = {'id': row_id, 'variant': dataset_facets[VARIANT_INDEX], 'status_id': status_id,
+                   'timestamp': dataset_metadata['timestamp'], 'dataset_id': dataset_id}
+            row.update(('{}_id'.format(facet), self._facet_id(facet, dataset_facets[index]))
+                       for index, facet in DATASET_FACETS)
+            self._datasets.append(tuple(row[column] for column in DATASET_COLUMNS))
+            self.counts[ADDED] += 1
+        self._files.extend(file_row + (row_id,) for file_row in files)
+
+    def _facet_id(self, table, name):
+        ids = self._facet_ids[table]
+        if name not in ids:
+            self._cursor.execute('INSERT INTO {} (name) VALUES (?)'.format(table), (name,))
+            ids[name] = self._cursor.lastrowid
+        return ids[name]
+
+    def _stored_files(self, row_id):
+        return sorted(tuple(row) for row in self._cursor.execute(
+            'SELECT filesize, filename, mass_path FROM netcdf_file WHERE dataset_id = ?', (row_id,)))
+
+    def _flush(self):
+        # The files of datasets that have changed are replaced.
+        self._cursor.executemany('DELETE FROM netcdf_file WHERE dataset_id = ?',
+                                 [(row_id,) for _, _, row_id in self._updates])
+        self._cursor.executemany(
+            'UPDATE dataset SET status_id = ?, timestamp = ?, changed = DATETIME(\'NOW\') WHERE id = ?', self._updates)
+        self._cursor.executemany('INSERT INTO dataset ({}) VALUES ({})'.format(
+            ', '.join(DATASET_COLUMNS), ', '.join('?' * len(DATASET_COLUMNS))), self._datasets)
+        self._cursor.executemany('INSERT INTO netcdf_file ({}) VALUES ({})'.format(
+            ', '.join(FILE_COLUMNS), ', '.join('?' * len(FILE_COLUMNS))), self._files)
+        self._datasets, self._updates, self._files = [], [], []
@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2017-2025, Met Office.
+# (C) British Crown Copyright 2017-2026, Met Office.
 # Please see LICENSE.md for license details.
 """The :mod:`command_line` module contains the main functions for the
 command line scripts in the ``bin`` directory.
@@ -19,13 +19,14 @@ from cdds import __version__
 from cdds.prepare.alter import alter_variable_list, select_variables
 from cdds.prepare.constants import ACTIVATE, DEACTIVATE, EPILOG
 from cdds.prepare.directory_structure import create_cdds_directory_structure
-from cdds.prepare.generate import generate_variable_list
+from cdds.prepare.generate import generate_variable_list, generate_variable_lists
 
 from mip_convert.plugins.plugin_loader import load_mapping_plugin
 
 COMPONENT = 'prepare'
 CREATE_CDDS_DIR_LOG_NAME = 'create_cdds_directory_structure'
 GENERATE_VARIABLE_LIST_LOG_NAME = 'prepare_generate_variable_list'
+GENERATE_VARIABLE_LISTS_LOG_NAME = 'prepare_generate_variable_lists'
 PREPARE_ALTER_LOG_NAME = 'cdds_prepare_alter'
 PREPARE_SELECT_VARIABLES_LOG_NAME = 'prepare_select_variables'
 
@@ -109,6 +110,41 @@ def main_generate_variable_list(arguments: List[str] = None) -> int:
         return 1
 
 
+def main_generate_variable_lists(arguments: List[str] = None) -> int:
+    """Generate the |requested variables lists| for many requests in one process.
+
+    Parameters
+    ----------
+    arguments : List[str]
+        The command line arguments to be parsed.
+
+    Returns
+    -------
+    int
+        Exit status
+    """
+    args = parse_generate_lists_args(arguments)
+
+    log_name = GENERATE_VARIABLE_LISTS_LOG_NAME
+    if args.output_dir:
+        log_name = os.path.join(args.output_dir, GENERATE_VARIABLE_LISTS_LOG_NAME)
+
+    # Create the configured logger.
+    configure_logger(log_name, logging.INFO, False)
+
+    # Retrieve the logger.
+    logger = logging.getLogger(__name__)
+
+    # Log version.
+    logger.info('Using CDDS Prepare version {}'.format(__version__))
+
+    try:
+        return generate_variable_lists(args)
+    except BaseException as exc:
+        logger.exception(exc, exc_info=PRINT_STACK_TRACE)
+        return 1
+
+
 def main_alter_variable_list(arguments=None):
     """Alter the |requested variables list|.
 
@@ -246,6 +282,45 @@ def parse_generate_args(arguments: List[str]) -> Namespace:
     return args
 
 
+def parse_generate_lists_args(arguments: List[str]) -> Namespace:
+    """Return the names of the command line arguments for ``prepare_generate_variable_lists``
+    and their validated values.
+
+    Parameters
+    ----------
+    arguments : List[str]
+        The command line arguments to be parsed.
+
+    Returns
+    -------
+    Namespace
+        The names of the command line arguments and their validated values.
+    """
+    parser = argparse.ArgumentParser(
+        description=('Generate the requested variables lists for many requests, reading the MIP tables and model '
+                     'to MIP mappings they share only once.'),
+        epilog=EPILOG)
+    parser.add_argument(
+        'requests', nargs='+', help=(
+            'The full paths to the configuration files containing the information about the requests.'
+        ))
+    parser.add_argument(
+        '-r', '--reconfigure', action='store_true', help=(
+            'Replace the MIP Convert config files generated by the configure step')
+    )
+    parser.add_argument(
+        '-o', '--output_dir', default=None, help=(
+            'The full path to the directory where the files containing the requested variable lists will be '
+            'written. If not given, each list is written to the proc directory of its request.'
+        ))
+
+    args = parser.parse_args(arguments)
+    if args.output_dir is not None:
+        args.output_dir = check_directory(args.output_dir)
+
+    return args
+
+
 def parse_alter_args(arguments):
     """Return the names of the command line arguments for
     ``prepare_alter_variable_list`` and their validated values.
@@ -11,6 +11,7 @@ from collections import defaultdict
 from datetime import datetime
 from typing import Any
 
+from mip_convert.plugins.plugin_loader import load_mapping_plugin
 from mip_convert.plugins.plugins import MappingPluginStore
 from mip_convert.requested_variables import get_variable_model_to_mip_mapping
 
@@ -71,7 +72,91 @@ def get_requested_variables(request: Request):
     return requested_variables
 
 
-def generate_variable_list(arguments: Namespace) -> int:
+class PrepareReferenceData:
+    """Holds the |MIP tables| and |model to MIP mappings| read while
+    generating |requested variables lists|, so that they are read only
+    once when the lists for many requests are generated in one process.
+    """
+
+    def __init__(self):
+        self._mip_tables = {}
+        self._mappings = {}
+        self._mapping_plugin = None
+
+    def mip_tables(self, mip_table_dir: str) -> UserMipTables:
+        """Return the |MIP tables| in the given directory.
+
+        Parameters
+        ----------
+        mip_table_dir : str
+            The directory containing the |MIP tables|.
+
+        Returns
+        -------
+        UserMipTables
+            The |MIP tables|.
+        """
+        if mip_table_dir not in self._mip_tables:
+            self._mip_tables[mip_table_dir] = UserMipTables(mip_table_dir)
+        return self._mip_tables[mip_table_dir]
+
+    def load_mapping_plugin(self, request: Request) -> dict[str, Any]:
+        """Load the mapping plugin of the request, unless it is already
+        loaded, and return the |model to MIP mappings| already read with it.
+
+        Parameters
+        ----------
+        request : Request
+            The request information.
+
+        Returns
+        -------
+        dict
+            The |model to MIP mappings| already read, keyed by |MIP table|
+            name.
+        """
+        mapping_plugin = (request.conversion.mip_convert_plugin,
+                          request.conversion.mip_convert_external_plugin,
+                          request.conversion.mip_convert_external_plugin_location)
+        if mapping_plugin != self._mapping_plugin:
+            load_mapping_plugin(*mapping_plugin)
+            self._mapping_plugin = mapping_plugin
+        return self._mappings.setdefault(mapping_plugin, {})
+
+
+def generate_variable_lists(arguments: Namespace) -> int:
+    """
+    Generate the |requested variables lists| for many requests, reading
+    the |MIP tables| and |model to MIP mappings| they share only once.
+
+    Parameters
+    ----------
+    arguments: :class:`argparse.Namespace` object
+        The names of the command line arguments and their validated
+        values.
+
+    Returns
+    -------
+    int
+        1 if any of the lists could not be generated or has issues,
+        otherwise 0.
+    """
+    logger = logging.getLogger(__name__)
+    reference_data = PrepareReferenceData()
+    exit_code = 0
+    for request_path in arguments.requests:
+        logger.info('Generating the Requested variables list for "{}".'.format(request_path))
+        request_arguments = Namespace(request=request_path, output_dir=arguments.output_dir,
+                                      reconfigure=arguments.reconfigure)
+        try:
+            exit_code = max(exit_code, generate_variable_list(request_arguments, reference_data))
+        except Exception as exc:
+            logger.exception('Failed to generate the Requested variables list for "{}": {}'.format(request_path, exc))
+            exit_code = 1
+    return exit_code
+
+
+def generate_variable_list(arguments: Namespace, reference_data: PrepareReferenceData = None) -> int:
     """
     Generate the |requested variables list|.
 
@@ -80,6 +165,9 @@ def generate_variable_list(arguments: Namespace) -> int:
     arguments: :class:`argparse.Namespace` object
         The names of the command line arguments and their validated
         values.
+    reference_data: PrepareReferenceData, optional
+        The reference data read for previous requests. If given, the
+        mapping plugin of the request is loaded through it.
 
     Raises
     ------
@@ -103,7 +191,12 @@ def generate_variable_list(arguments: Namespace) -> int:
     if os.path.exists(output_file) and request.misc.no_overwrite:
         raise IOError('Output file "{}" already exists'.format(output_file))
 
-    cmip_tables = UserMipTables(request.common.mip_table_dir)
+    if reference_data is None:
+        cmip_tables = UserMipTables(request.common.mip_table_dir)
+        loaded_mappings = None
+    else:
+        cmip_tables = reference_data.mip_tables(request.common.mip_table_dir)
+        loaded_mappings = reference_data.load_mapping_plugin(request)
 
     requested_variables = get_requested_variables(request)
 
@@ -113,6 +206,7 @@ def generate_variable_list(arguments: Namespace) -> int:
         user_requested_variables,
         request.metadata.mip_era,
         request.metadata.model_id,
+        loaded_mappings,
     )
 
     logger.info('Bypassing the Data Request and using Mip Tables.')
@@ -258,7 +352,8 @@ def reconfigure_mip_cfg_file(request: Request, requested_variables_file: str) ->
     logger.info('* Completed reconfiguration *')
 
 
-def retrieve_mappings(variables: list[UserDefinedVariable], mip_era, model_id) -> dict[str, dict[str, Any]]:
+def retrieve_mappings(variables: list[UserDefinedVariable], mip_era, model_id,
+                      loaded_mappings: dict = None) -> dict[str, dict[str, Any]]:
     """Return the |model to MIP mappings| for the |MIP requested variables|.
 
     The returned |model to MIP mappings| are organised by |MIP table|,
@@ -275,6 +370,10 @@ def retrieve_mappings(variables: list[UserDefinedVariable], mip_era, model_id) -
         The |MIP era|.
     model_id : str
         The |model identifier|.
+    loaded_mappings : dict, optional
+        The |model to MIP mappings| already read with the current mapping
+        plugin, keyed by |MIP table| name. The mappings read by this call
+        are added to it.
 
     Returns
     -------
@@ -283,10 +382,15 @@ def retrieve_mappings(variables: list[UserDefinedVariable], mip_era, model_id) -
     """
     mapping_plugin = MappingPluginStore.instance().get_plugin()
     mappings: dict = defaultdict(dict)
+    if loaded_mappings is None:
+        loaded_mappings = {}
 
     for variable in variables:
         mip_table_name = "{}_{}".format(mip_era, variable.mip_table)
-        model_to_mip_mappings = mapping_plugin.load_model_to_mip_mapping(mip_table_name)
+        # The mappings of a MIP table are read once rather than for each variable.
+        if mip_table_name not in loaded_mappings:
+            loaded_mappings[mip_table_name] = mapping_plugin.load_model_to_mip_mapping(mip_table_name)
+        model_to_mip_mappings = loaded_mappings[mip_table_name]
         try:
             mapping = get_variable_model_to_mip_mapping(model_to_mip_mappings, variable.var_name, variable.mip_table)
             mapping = remove_ancils_from_mapping(mapping, model_id)
@@ -12,18 +12,20 @@ from typing import Tuple, List, Union
 
 from cdds.common import configure_logger, check_directory
 from cdds.common.cdds_files.cdds_directories import component_directory, output_data_directory
+from cdds.common.crawler import DirectoryCrawler
 
 from cdds.common.plugins.plugins import PluginStore
 from cdds.common.mip_tables import MipTables
 from cdds.common.request.request import read_request, Request
 from cdds.common.cdds_files.cdds_directories import update_log_dir
 from cdds import __version__
-from cdds.qc.constants import COMPONENT, QC_DB_FILENAME
+from cdds.qc.constants import COMPONENT, QC_CRAWL_SNAPSHOT_FILENAME, QC_DB_FILENAME, QC_SNAPSHOT_FILENAME
 from cdds.qc.suite import QCSuite
 from cdds.qc.runner import QCRunner
 from cdds.qc.dataset.cmip6 import Cmip6Dataset
 from cdds.qc.dataset.cmip7 import Cmip7Dataset
 from cdds.qc.dataset.cordex import CordexDataset
+from cdds.qc.dataset.snapshot import SnapshotStore
 
 
 QC_LOG_NAME = 'cdds_qc'
@@ -107,6 +109,14 @@ def parse_args(arguments: List[str]) -> Tuple[Namespace, Request]:
     parser.add_argument('-s', '--stream',
                         default=None,
                         help='Stream selection')
+    parser.add_argument('--max_workers', type=int, default=1,
+                        help='Number of worker processes used to check files')
+    parser.add_argument('--incremental', action='store_true', required=False,
+                        help=('Reuse the results of the latest run for files '
+                              'that have not changed since'))
+    parser.add_argument('--hash_files', action='store_true', required=False,
+                        help=('Include a hash of the content of each file in '
+                              'its fingerprint'))
     output_dir_group = parser.add_mutually_exclusive_group()
     output_dir_group.add_argument(
         '-o', '--output_dir', default=None, help=(
@@ -163,7 +173,13 @@ def run_and_report(args: Namespace, request: Request) -> dict:  # TODO: kerstin
         ds = Cmip6Dataset(basedir, request, mip_tables, logging.getLogger(__name__), args.mip_table, None, None,
                           args.stream)
 
-    ds.load_dataset(Dataset)
+    snapshot_store = SnapshotStore(os.path.join(output_dir, QC_SNAPSHOT_FILENAME.format(stream_id=args.stream)))
+    crawler = DirectoryCrawler(snapshot_file=os.path.join(
+        output_dir, QC_CRAWL_SNAPSHOT_FILENAME.format(stream_id=args.stream)))
+    ds.load_dataset(Dataset, snapshot_store, crawler)
+    snapshot_store.save()
+    crawler.save()
     cdds_runner.init_suite(QCSuite(), ds, request.common.is_relaxed_cmor())
-    run_id = cdds_runner.run_tests(mip_table_dir, request)
+    run_id = cdds_runner.run_tests(mip_table_dir, request, max_workers=args.max_workers,
+                                   incremental=args.incremental, hash_files=args.hash_files)
     return cdds_runner.generate_report(run_id, output_dir, args.do_not_filter, args.details)
@@ -1,7 +1,10 @@
-# (C) British Crown Copyright 2019-2025, Met Office.
+# (C) British Crown Copyright 2019-2026, Met Office.
 # Please see LICENSE.md for license details.
 
+import hashlib
+
 import metomi.isodatetime.parsers as parse
+import numpy as np
 from metomi.isodatetime.data import Calendar, Duration, TimePoint, get_is_leap_year
 from netCDF4 import Dataset
 
@@ -45,6 +48,18 @@ class GlobalAttributesCache:
                 self._cache[ncpath][attrname] = ncfile.getncattr(attrname)
         return self._cache[ncpath][attrname]
 
+    def add_attributes(self, ncpath: str, attributes: dict) -> None:
+        """Stores already known global attributes of a netCDF4 file, e.g. from a snapshot of the file.
+
+        Parameters
+        ----------
+        ncpath : str
+            Path to the netCDF4 file
+        attributes : dict
+            Attribute values keyed by attribute name
+        """
+        self._cache.setdefault(ncpath, {}).update(attributes)
+
 
 class NoDataForQualityCheck(Exception):
     pass
@@ -79,6 +94,28 @@ def equal_with_tolerance(a, b, tolerance):
     return abs(a - b) <= tolerance
 
 
+def file_content_hash(filepath, block_size=2**20):
+    """Calculate the SHA-256 hash of the content of a file.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the file
+    block_size : int
+        Number of bytes read at a time
+
+    Returns
+    -------
+    str
+        Hexadecimal digest of the file content
+    """
+    content_hash = hashlib.sha256()
+    with open(filepath, 'rb') as file_handle:
+        for block in iter(lambda: file_handle.read(block_size), b''):
+            content_hash.update(block)
+    return content_hash.hexdigest()
+
+
 def strip_zeros(number):
     """Remove .0 from a float number with following format x.0.
 
@@ -184,6 +221,93 @@ class DatetimeCalculator():
         # it's possible that end date is different from the last item in sequence
         return sequence_points, sequence_bounds
 
+    def get_numeric_sequence(self, start_date: TimePoint, end_date: TimePoint, mode: str,
+                             with_bounds: bool = True) -> tuple:
+        """Generates the sequence of :meth:`get_sequence` as arrays of days since the base date.
+
+        Fixed length periods (days, hours, minutes and seconds) and whole numbers of months or years starting
+        before the 29th day of a month are generated arithmetically; any other period falls back to stepping
+        through the sequence with isodatetime.
+
+        Parameters
+        ----------
+        start_date: TimePoint
+            Starting date of the period
+        end_date: TimePoint
+            Ending date of the period
+        mode: str
+            Frequency code defining the sequency, e.g. P1M for monthlies, PT6H for 6-hourlies, etc.
+        with_bounds: bool
+            If true will generate bounds as well
+
+        Returns
+        -------
+        tuple
+            An array of time points and an array of shape (N, 2) with the bounds (None if `with_bounds` is
+            False), both in days since the base date
+        """
+        duration = parse.DurationParser().parse('{}'.format(mode))
+        start = self._seconds_since_base_date(start_date)
+        end = self._seconds_since_base_date(end_date)
+        edges = self._sequence_edges(start_date, start, end, duration)
+        if edges is None:
+            points, bounds = self.get_sequence(start_date, end_date, mode, with_bounds)
+            points = np.array([self._seconds_since_base_date(point) for point in points], dtype=np.int64)
+            bounds = np.array([[self._seconds_since_base_date(bound) for bound in pair] for pair in bounds],
+                              dtype=np.int64).reshape(-1, 2)
+        elif with_bounds:
+            bounds = np.column_stack((edges[:-1], edges[1:]))
+            points = edges[:-1] + (edges[1:] - edges[:-1]) // 2
+        else:
+            points = edges
+        if not with_bounds:
+            return points / self.seconds_in_day, None
+        return points / self.seconds_in_day, bounds / self.seconds_in_day
+
+    def days_since_base_date_to_time_point(self, days: float) -> TimePoint:
+        """Converts (fractional) number of days since the base date into a time point object.
+
+        Parameters
+        ----------
+        days: float
+            Number of days since the base date
+
+        Returns
+        -------
+        metomi.isodatetime.data.TimePoint
+            Converted time point
+        """
+        return self.base_date + Duration(seconds=int(round(days * self.seconds_in_day)))
+
+    def _seconds_since_base_date(self, time_point: TimePoint) -> int:
+        return int(round(self.days_since_base_date(time_point.strftime('%Y-%m-%dT%H:%M:%SZ')) * self.seconds_in_day))
+
+    def _sequence_edges(self, start_date: TimePoint, start: int, end: int, duration: Duration):
+        """Returns the boundaries of consecutive periods of the given duration from `start` until a period ends at
+        or after `end`, in seconds since the base date, or None if they can not be calculated arithmetically."""
+        months = (duration.years or 0) * 12 + (duration.months or 0)
+        step = duration.get_seconds() if months == 0 else 0
+        if months and (duration.weeks or duration.days or duration.hours or duration.minutes or duration.seconds):
+            return None
+        if months == 0:
+            if step <= 0 or step != int(step):
+                return None
+            number_of_steps = max(0, -(-(end - start) // int(step)))
+            return start + int(step) * np.arange(number_of_steps + 1, dtype=np.int64)
+        if start_date.day_of_month > 28:
+            return None
+        # a period of whole months is as long as the months it starts in, whatever the day and time it starts at
+        calendar = Calendar.default()
+        number_of_months = months * (max(0, end - start) // (28 * self.seconds_in_day * months) + 2)
+        month_index = start_date.month_of_year - 1 + np.arange(number_of_months)
+        years = start_date.year + month_index // 12
+        leap = np.array([get_is_leap_year(year) for year in range(years[0], years[-1] + 1)])[years - years[0]]
+        month_lengths = np.where(leap, np.take(calendar.DAYS_IN_MONTHS_LEAP, month_index % 12),
+                                 np.take(calendar.DAYS_IN_MONTHS, month_index % 12))
+        edges = start + np.concatenate(([0], np.cumsum(month_lengths * self.seconds_in_day)))[::months]
+        number_of_steps = int(np.argmax(edges >= end)) if edges[-1] >= end else len(edges) - 1
+        return edges[:number_of_steps + 1].astype(np.int64)
+
     @staticmethod
     def date_in_leap_year(date: TimePoint) -> bool:
         """Checks if the provided date occurs in a leap year
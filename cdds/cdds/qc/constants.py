@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2019-2025, Met Office.
+# (C) British Crown Copyright 2019-2026, Met Office.
 # Please see LICENSE.md for license details.
 """The :mod:`constants` module contains constants (values that should never
 be changes by a user and exist for readability and maintainability
@@ -8,11 +8,16 @@ purposes) for the CDDS QC component.
 from typing import Any, Dict
 
 COMPONENT = 'qualitycheck'
+CONTIGUITY_CHECKER = 'Time contiguity check'
 DIURNAL_CLIMATOLOGY = '1hrCM'
 DS_TYPE_SINGLE_FILE = 1
 DS_TYPE_DATASET = 2
 EPOCH = "cmip6"
+FILENAME_CHECKER = 'Filename and size checker'
 EXCLUDE_DIRECTORIES_REGEXP = r"(output\/[a-z0-9]{3})_(concat|mip_convert)"
+# netCDF filenames, with the start and end dates of the date range if there is one.
+NETCDF_FILENAME_REGEXP = r"^(?:.+_(?P<start>\d{6,8})-(?P<end>\d{6,8})\.nc|.*\.nc)$"
+QC_CRAWL_SNAPSHOT_FILENAME = 'qc_directories_{stream_id}.json'
 FREQ_DICT = {
     'dec': 'P10Y',
     'yr': 'P1Y',
@@ -44,7 +49,9 @@ DIURNAL_OFFSETS = [
     29,
 ]
 QC_DB_FILENAME = 'qc_{stream_id}.db'
+QC_DB_BATCH_SIZE = 100  # number of checked files committed per transaction
 QC_REPORT_FILENAME = 'report_{dt}.json'
+QC_SNAPSHOT_FILENAME = 'qc_snapshots_{stream_id}.json'
 QC_REPORT_STREAM_FILENAME = 'report_{stream_id}_{dt}.json'
 RADIATION_TIMESTEP = 1.0 / 24.0  # 1 hour as a fractional day
 SECONDS_IN_DAY = 86400
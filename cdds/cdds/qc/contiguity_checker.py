@@ -6,6 +6,8 @@
 from collections import defaultdict
 from typing import DefaultDict, List, Dict, TYPE_CHECKING
 
+import numpy as np
+
 if TYPE_CHECKING:
     from cdds.common.request.request import Request
 from cdds.common.constants import CALENDAR_MAPPING_CDDS_TO_CYLC
@@ -13,7 +15,7 @@ from cdds.qc.dataset.cmip6 import Cmip6Dataset
 from cdds.qc.dataset.cmip7 import Cmip7Dataset
 from cdds.qc.dataset.cordex import CordexDataset
 from cdds.qc.common import equal_with_tolerance, DatetimeCalculator
-from cdds.qc.constants import DIURNAL_CLIMATOLOGY, HOURLY_OFFSET, DIURNAL_OFFSETS, TIME_TOLERANCE
+from cdds.qc.constants import CONTIGUITY_CHECKER, DIURNAL_CLIMATOLOGY, HOURLY_OFFSET, DIURNAL_OFFSETS, TIME_TOLERANCE
 
 
 class CollectionsCheck(object):
@@ -31,13 +33,15 @@ class CollectionsCheck(object):
         self.calendar_calculator = DatetimeCalculator(calendar, self.request.metadata.base_date)
         self.results: DefaultDict[str, List[Dict[str, str]]] = defaultdict(list)
 
-    def perform_checks(self, ds):
+    def perform_checks(self, ds, var_keys=None):
         """Runs tests on a provided dataset.
 
         Parameters
         ----------
         ds: StructuredDataset
             A collection of netCDF files associated with a request.
+        var_keys: list
+            If set, only the variables with these facet indexes are checked.
 
         Returns
         -------
@@ -47,15 +51,17 @@ class CollectionsCheck(object):
         if type(ds) not in self.supported_ds:
             raise Exception("Dataset {} is not of supported type.".format(ds))
 
-        return self.check_time_contiguity(ds)
+        return self.check_time_contiguity(ds, var_keys)
 
-    def check_time_contiguity(self, ds):
+    def check_time_contiguity(self, ds, var_keys=None):
         """Runs internal and external time contiguity checks.
 
         Parameters
         ----------
         ds: StructuredDataset
             A collection of netCDF files.
+        var_keys: list
+            If set, only the variables with these facet indexes are checked.
 
         Returns
         -------
@@ -66,6 +72,8 @@ class CollectionsCheck(object):
 
         # checks only if more than one file in the aggregated dict
         for var_key, filepaths in list(aggregated.items()):
+            if var_keys is not None and var_key not in var_keys:
+                continue
             time_axis, time_bounds, frequency = ds.variable_time_axis(var_key, self.request.misc.atmos_timestep)
             if time_axis is None:
                 # Fixed-field variables (frequency="fx") have no time dimension; skip contiguity check.
@@ -73,7 +81,7 @@ class CollectionsCheck(object):
             run_start = self.request.data.start_date
             run_end = self.request.data.end_date
             self.check_contiguity(var_key, time_axis, time_bounds, frequency, run_start, run_end)
-        return "Time contiguity check", self.results
+        return CONTIGUITY_CHECKER, self.results
 
     def check_diurnal_climatology(self, time_dim, time_bnds):
         """1-hourly climatologies are calculated in 24-hourly cycles, with one value per month.
@@ -162,7 +170,7 @@ class CollectionsCheck(object):
                                      'Climatology time bounds in {} appear to be mismatched'.format(key))
                 prev_val = time_bounds[key][-1][1]
             return
-        point_sequence, bound_sequence = self.calendar_calculator.get_sequence(
+        point_sequence, bound_sequence = self.calendar_calculator.get_numeric_sequence(
             run_start, run_end, frequency, time_bounds is not None)
         reference_index = 0
         # before checking individual values we'll check run bounds first
@@ -174,7 +182,7 @@ class CollectionsCheck(object):
             return
         if offset_adjustment:
             # remove the first midnight from reference time axis of instantenous variable
-            point_sequence.pop(0)
+            point_sequence = point_sequence[1:]
         # testing total length of the sequence
         total_length = sum([len(vals) for vals in time_axis.values()])
         if total_length != len(point_sequence):
@@ -193,26 +201,39 @@ class CollectionsCheck(object):
                 continue
             if time_bounds is not None and len(vals) != len(time_bounds[key]):
                 self.add_message(key, var_key, 'Number of time points is different from number of time bounds')
-            for index, val in enumerate(vals):
+            reference_slice = slice(reference_index, reference_index + len(vals))
+            # compare the whole file at once, then only build the messages for the offending points
+            mismatches = ~self._matches(point_sequence[reference_slice], vals)
+            test_bounds = time_bounds is not None and len(vals) == len(time_bounds[key])
+            if test_bounds:
+                file_bounds = np.asarray(time_bounds[key], dtype=np.float64).reshape(-1, 2)
+                bound_mismatches = ~self._matches(bound_sequence[reference_slice], file_bounds)
+                mismatches |= bound_mismatches.any(axis=1)
+            for index in np.flatnonzero(mismatches):
+                reference = reference_index + index
                 self.add_message(key, var_key, self._test_datetime_sequence(
-                    point_sequence[reference_index], val, 'Time axis value '))
-                if time_bounds is not None and len(vals) == len(time_bounds[key]):
+                    point_sequence[reference], vals[index], 'Time axis value '))
+                if test_bounds:
                     # testing both bounds
                     self.add_message(key, var_key, self._test_datetime_sequence(
-                        bound_sequence[reference_index][0], time_bounds[key][index][0], 'Time bounds value '))
+                        bound_sequence[reference][0], time_bounds[key][index][0], 'Time bounds value '))
                     self.add_message(key, var_key, self._test_datetime_sequence(
-                        bound_sequence[reference_index][1], time_bounds[key][index][1], 'Time bounds value '))
-                reference_index = reference_index + 1
+                        bound_sequence[reference][1], time_bounds[key][index][1], 'Time bounds value '))
+            reference_index = reference_index + len(vals)
         return
 
-    def _test_datetime_sequence(self, reference_datetime, tested_value, msg_prefix, tolerance=TIME_TOLERANCE):
+    @staticmethod
+    def _matches(reference_values, tested_values, tolerance=TIME_TOLERANCE):
+        return np.abs(np.asarray(tested_values, dtype=np.float64) - reference_values) <= tolerance
+
+    def _test_datetime_sequence(self, reference_time_point, tested_value, msg_prefix, tolerance=TIME_TOLERANCE):
         msg = None
-        reference_time_point = self.calendar_calculator.days_since_base_date(
-            reference_datetime.strftime('%Y-%m-%dT%H:%MZ'))
+        reference_time_point = float(reference_time_point)
         if not equal_with_tolerance(
                 tested_value,
                 reference_time_point,
                 tolerance):
+            reference_datetime = self.calendar_calculator.days_since_base_date_to_time_point(reference_time_point)
             msg = '{}{} does not correspond to reference value {} (difference {} days)'.format(
                 msg_prefix, tested_value, reference_datetime, reference_time_point - tested_value)
         return msg
@@ -143,40 +143,42 @@ class Cmip6Dataset(StructuredDataset):
         variable_names = {}
         self._logger.info("Aggregating files")
         for filepath in self._dataset:
-            with self._loader_class(filepath) as ds:
-                attrs = [
-                    'mip_era',
-                    'source_id',
-                    'experiment_id',
-                    'sub_experiment_id',
-                    'table_id',
-                    'variant_label',
-                    'variable_id',
-                    'grid_label',
-                ]
+            ds = self.file_snapshot(filepath)
+            if ds is None:
+                continue
+            attrs = [
+                'mip_era',
+                'source_id',
+                'experiment_id',
+                'sub_experiment_id',
+                'table_id',
+                'variant_label',
+                'variable_id',
+                'grid_label',
+            ]
+            try:
+                file_index = '_'.join([self.global_attributes_cache.getncattr(x, ds) for x in attrs])
                 try:
-                    file_index = '_'.join([self.global_attributes_cache.getncattr(x, ds) for x in attrs])
-                    try:
-                        var_name = self.global_attributes_cache.getncattr('variable_name', ds)
-                    except AttributeError:
-                        # Following changes introduced #1052,
-                        # the `variable_name` attribute is expected
-                        # to be present in all output files.
-                        # To make the code backward compatible
-                        # with datasets generated pre-1052,
-                        # we try to replace it with `variable_id`
-                        # when it's not present.
-                        # Note that this mean some variables will not pass QC.
-                        var_name = self.global_attributes_cache.getncattr('variable_id', ds)
-                    if file_index not in variable_names:
-                        variable_names[file_index] = var_name
-
-                    if file_index in aggregated_dataset:
-                        aggregated_dataset[file_index].append(filepath)
-                    else:
-                        aggregated_dataset[file_index] = [filepath]
-                except AttributeError as e:
-                    self._logger.error(
-                        "Error when parsing dataset {}: {}".format(
-                            filepath, str(e)))
+                    var_name = self.global_attributes_cache.getncattr('variable_name', ds)
+                except AttributeError:
+                    # Following changes introduced #1052,
+                    # the `variable_name` attribute is expected
+                    # to be present in all output files.
+                    # To make the code backward compatible
+                    # with datasets generated pre-1052,
+                    # we try to replace it with `variable_id`
+                    # when it's not present.
+                    # Note that this mean some variables will not pass QC.
+                    var_name = self.global_attributes_cache.getncattr('variable_id', ds)
+                if file_index not in variable_names:
+                    variable_names[file_index] = var_name
+
+                if file_index in aggregated_dataset:
+                    aggregated_dataset[file_index].append(filepath)
+                else:
+                    aggregated_dataset[file_index] = [filepath]
+            except AttributeError as e:
+                self._logger.error(
+                    "Error when parsing dataset {}: {}".format(
+                        filepath, str(e)))
         return aggregated_dataset, variable_names
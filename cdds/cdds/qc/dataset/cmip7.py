@@ -120,27 +120,29 @@ class Cmip7Dataset(StructuredDataset):
         variable_names = {}
         self._logger.info("Aggregating files")
         for filepath in self._dataset:
-            with self._loader_class(filepath) as ds:
-                facet_attrs = [
-                    'mip_era',
-                    'source_id',
-                    'experiment_id',
-                    'variant_label',
-                    'realm',
-                    'frequency',
-                    'variable_name',
-                    'grid_label',
-                    'region',
-                ]
-                try:
-                    file_index = '_'.join([self.global_attributes_cache.getncattr(x, ds) for x in facet_attrs])
-
-                    var_name = self.global_attributes_cache.getncattr('variable_name', ds)
-                    if file_index not in variable_names:
-                        variable_names[file_index] = var_name
-
-                    aggregated_dataset[file_index].append(filepath)
-
-                except AttributeError as e:
-                    self._logger.error("Error when parsing dataset {}: {}".format(filepath, str(e)))
+            ds = self.file_snapshot(filepath)
+            if ds is None:
+                continue
+            facet_attrs = [
+                'mip_era',
+                'source_id',
+                'experiment_id',
+                'variant_label',
+                'realm',
+                'frequency',
+                'variable_name',
+                'grid_label',
+                'region',
+            ]
+            try:
+                file_index = '_'.join([self.global_attributes_cache.getncattr(x, ds) for x in facet_attrs])
+
+                var_name = self.global_attributes_cache.getncattr('variable_name', ds)
+                if file_index not in variable_names:
+                    variable_names[file_index] = var_name
+
+                aggregated_dataset[file_index].append(filepath)
+
+            except AttributeError as e:
+                self._logger.error("Error when parsing dataset {}: {}".format(filepath, str(e)))
         return aggregated_dataset, variable_names
@@ -121,45 +121,47 @@ class CordexDataset(StructuredDataset):
         variable_names = {}
         self._logger.info("Aggregating files")
         for filepath in self._dataset:
-            with self._loader_class(filepath) as ds:
-                attrs = [
-                    'mip_era',
-                    'source_id',
-                    'table_id',
-                    'variant_label',
-                    'grid_label',
-                    'domain',
-                    'driving_experiment_id',
-                    'frequency',
-                    'version_realization',
-                    'driving_source_id',
-                    'driving_variant_label',
-                    'variable_id'
-                ]
+            ds = self.file_snapshot(filepath)
+            if ds is None:
+                continue
+            attrs = [
+                'mip_era',
+                'source_id',
+                'table_id',
+                'variant_label',
+                'grid_label',
+                'domain',
+                'driving_experiment_id',
+                'frequency',
+                'version_realization',
+                'driving_source_id',
+                'driving_variant_label',
+                'variable_id'
+            ]
 
+            try:
+                file_index = '_'.join([ds.getncattr(x) for x in attrs])
                 try:
-                    file_index = '_'.join([ds.getncattr(x) for x in attrs])
-                    try:
-                        var_name = ds.getncattr('variable_name')
-                    except AttributeError:
-                        # Following changes introduced #1052,
-                        # the `variable_name` attribute is expected
-                        # to be present in all output files.
-                        # To make the code backward compatible
-                        # with datasets generated pre-1052,
-                        # we try to replace it with `variable_id`
-                        # when it's not present.
-                        # Note that this mean some variables will not pass QC.
-                        var_name = ds.getncattr('variable_id')
-                    if file_index not in variable_names:
-                        variable_names[file_index] = var_name
-
-                    if file_index in aggregated_dataset:
-                        aggregated_dataset[file_index].append(filepath)
-                    else:
-                        aggregated_dataset[file_index] = [filepath]
-                except AttributeError as e:
-                    self._logger.error(
-                        "Error when parsing dataset {}: {}".format(
-                            filepath, str(e)))
+                    var_name = ds.getncattr('variable_name')
+                except AttributeError:
+                    # Following changes introduced #1052,
+                    # the `variable_name` attribute is expected
+                    # to be present in all output files.
+                    # To make the code backward compatible
+                    # with datasets generated pre-1052,
+                    # we try to replace it with `variable_id`
+                    # when it's not present.
+                    # Note that this mean some variables will not pass QC.
+                    var_name = ds.getncattr('variable_id')
+                if file_index not in variable_names:
+                    variable_names[file_index] = var_name
+
+                if file_index in aggregated_dataset:
+                    aggregated_dataset[file_index].append(filepath)
+                else:
+                    aggregated_dataset[file_index] = [filepath]
+            except AttributeError as e:
+                self._logger.error(
+                    "Error when parsing dataset {}: {}".format(
+                        filepath, str(e)))
         return aggregated_dataset, variable_names
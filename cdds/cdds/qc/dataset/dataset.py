@@ -7,8 +7,12 @@ from logging import Logger
 
 from abc import ABCMeta, abstractmethod
 from collections import OrderedDict
-from cdds.qc.constants import DIURNAL_CLIMATOLOGY, EXCLUDE_DIRECTORIES_REGEXP, FREQ_DICT, SECONDS_IN_DAY
+from cdds.common.crawler import DirectoryCrawler
+from cdds.qc.constants import (
+    DIURNAL_CLIMATOLOGY, EXCLUDE_DIRECTORIES_REGEXP, FREQ_DICT, NETCDF_FILENAME_REGEXP, SECONDS_IN_DAY
+)
 from cdds.qc.common import GlobalAttributesCache
+from cdds.qc.dataset.snapshot import FileSnapshot, SnapshotStore, take_snapshot
 from cdds.common.request.request import Request
 from cdds.common.mip_tables import MipTables
 
@@ -64,6 +68,7 @@ class StructuredDataset(object, metaclass=ABCMeta):
         self._dataset: list = []
         self._aggregated: dict = {}
         self._var_names: dict = {}
+        self._snapshots: dict[str, FileSnapshot] = {}
         self.global_attributes_cache = GlobalAttributesCache()
 
     @classmethod
@@ -99,21 +104,75 @@ class StructuredDataset(object, metaclass=ABCMeta):
     def var_names(self):
         return self._var_names
 
-    def load_dataset(self, loader_class):
+    def load_dataset(self, loader_class, snapshot_store: SnapshotStore | None = None,
+                     crawler: DirectoryCrawler | None = None):
         """A utility method necessary to make this class testable.
-        Walks the root directory and gathers ncdf files.
+        Walks the root directory, gathers ncdf files and takes a snapshot of the metadata of each file.
 
         Parameters
         ----------
         loader_class : type
             A type of dataset loader (e.g. netCDF4.Dataset)
+        snapshot_store : SnapshotStore | None
+            Store of snapshots taken by earlier runs, which are reused for unchanged files and to which new
+            snapshots are added.
+        crawler : DirectoryCrawler | None
+            The crawler used to find the files of the dataset.
         """
         self._loader_class = loader_class
-        self._dataset = self.walk_directory()
+        self._dataset = self.walk_directory(crawler)
+        self._snapshots = self._take_snapshots(snapshot_store)
         aggregated, var_names = self._aggregate_files()
         self._aggregated = aggregated
         self._var_names = var_names
 
+    def _take_snapshots(self, snapshot_store: SnapshotStore | None) -> dict[str, FileSnapshot]:
+        """Takes a snapshot of every file in this dataset, opening each file once at most.
+
+        Parameters
+        ----------
+        snapshot_store : SnapshotStore | None
+            Store of earlier snapshots.
+
+        Returns
+        -------
+        dict[str, FileSnapshot]
+            Snapshots keyed by file path
+        """
+        snapshots = {}
+        reused = 0
+        for fp in self._dataset:
+            snapshot = snapshot_store.get(fp) if snapshot_store is not None else None
+            if snapshot is None:
+                try:
+                    snapshot = take_snapshot(fp, self._loader_class)
+                except IOError:
+                    self._logger.error("Unable to load file {}".format(fp))
+                    continue
+                if snapshot_store is not None:
+                    snapshot_store.add(snapshot)
+            else:
+                reused += 1
+            self.global_attributes_cache.add_attributes(fp, snapshot.global_attributes)
+            snapshots[fp] = snapshot
+        self._logger.info('Reused the snapshots of {} unchanged files'.format(reused))
+        return snapshots
+
+    def file_snapshot(self, filepath: str) -> FileSnapshot | None:
+        """Returns the snapshot of the metadata of a file in this dataset.
+
+        Parameters
+        ----------
+        filepath : str
+            Path to the file
+
+        Returns
+        -------
+        FileSnapshot | None
+            The snapshot, or None if the file could not be loaded
+        """
+        return self._snapshots.get(filepath)
+
     def check_filenames_and_sizes(self):
         """Tests all filenames and file sizes in this dataset
 
@@ -125,20 +184,18 @@ class StructuredDataset(object, metaclass=ABCMeta):
 
         errors = {}
         for fp in self._dataset:
-            try:
-                ds = self._loader_class(fp)
-                _, messages = self.check_filename(ds, os.path.basename(fp))
-                file_size = os.path.getsize(fp)
-                if file_size > self._request.data.max_file_size:
-                    messages.append(
-                        "The size of the file {} ({} bytes) exceeds the limit of {} bytes"
-                        "".format(fp, file_size, self._request.data.max_file_size)
-                    )
-                if messages:
-                    errors[fp] = messages
-                ds.close()
-            except IOError:
-                self._logger.error("Unable to load file {}".format(fp))
+            ds = self.file_snapshot(fp)
+            if ds is None:
+                continue
+            _, messages = self.check_filename(ds, os.path.basename(fp))
+            file_size = ds.size
+            if file_size > self._request.data.max_file_size:
+                messages.append(
+                    "The size of the file {} ({} bytes) exceeds the limit of {} bytes"
+                    "".format(fp, file_size, self._request.data.max_file_size)
+                )
+            if messages:
+                errors[fp] = messages
         return errors
 
     @abstractmethod
@@ -181,31 +238,31 @@ class StructuredDataset(object, metaclass=ABCMeta):
         time_bnds = OrderedDict()
         frequency = None
         for filepath in filepaths:
-            with self._loader_class(filepath) as nc_file:
-                # Fixed-field files (frequency="fx") have no time dimension; skip them.
-                if self.global_attributes_cache.getncattr("frequency", nc_file) == "fx":
-                    return (None, None, None)
-                time_axis[filepath] = nc_file.variables["time"][:].data
-                if "time_bnds" in nc_file.variables:
-                    time_bnds[filepath] = nc_file.variables["time_bnds"][:].data
-                # Time variable can have bounds in the climatology_bnds variable in CMIP7 for some data sets, add them.
-                if "climatology_bnds" in nc_file.variables:
-                    time_bnds[filepath] = nc_file.variables["climatology_bnds"][:].data
-                    self._logger.info("Adding bounds from climatology_bnds to time_bnds")
-                frequency_code = self.global_attributes_cache.getncattr("frequency", nc_file)
-                variable_id = self.global_attributes_cache.getncattr("variable_id", nc_file)
-                if frequency_code == 'subhrPt':
-                    if variable_id.startswith("rs") or variable_id.startswith("rl"):
-                        # despite the frequency code, radiation variables are on hourly timepoints
-                        frequency = 'PT1H'
-                    else:
-                        # the rest are reported once per timestep
-                        frequency = 'PT{}S'.format(atmos_timestep)
-                elif frequency_code == DIURNAL_CLIMATOLOGY:
-                    frequency = DIURNAL_CLIMATOLOGY
-                    time_bnds[filepath] = nc_file.variables["climatology_bnds"][:].data
+            nc_file = self.file_snapshot(filepath)
+            # Fixed-field files (frequency="fx") have no time dimension; skip them.
+            if self.global_attributes_cache.getncattr("frequency", nc_file) == "fx":
+                return (None, None, None)
+            time_axis[filepath] = nc_file.time_variable("time")
+            if nc_file.time_variable("time_bnds") is not None:
+                time_bnds[filepath] = nc_file.time_variable("time_bnds")
+            # Time variable can have bounds in the climatology_bnds variable in CMIP7 for some data sets, add them.
+            if nc_file.time_variable("climatology_bnds") is not None:
+                time_bnds[filepath] = nc_file.time_variable("climatology_bnds")
+                self._logger.info("Adding bounds from climatology_bnds to time_bnds")
+            frequency_code = self.global_attributes_cache.getncattr("frequency", nc_file)
+            variable_id = self.global_attributes_cache.getncattr("variable_id", nc_file)
+            if frequency_code == 'subhrPt':
+                if variable_id.startswith("rs") or variable_id.startswith("rl"):
+                    # despite the frequency code, radiation variables are on hourly timepoints
+                    frequency = 'PT1H'
                 else:
-                    frequency = FREQ_DICT[self.global_attributes_cache.getncattr("frequency", nc_file)]
+                    # the rest are reported once per timestep
+                    frequency = 'PT{}S'.format(atmos_timestep)
+            elif frequency_code == DIURNAL_CLIMATOLOGY:
+                frequency = DIURNAL_CLIMATOLOGY
+                time_bnds[filepath] = nc_file.time_variable("climatology_bnds")
+            else:
+                frequency = FREQ_DICT[self.global_attributes_cache.getncattr("frequency", nc_file)]
         if len(time_bnds.keys()) == 0:
             time_bnds = None
         return (time_axis, time_bnds, frequency)
@@ -214,46 +271,38 @@ class StructuredDataset(object, metaclass=ABCMeta):
     def _aggregate_files(self) -> tuple[dict, dict]:
         pass
 
-    def walk_directory(self):
+    def walk_directory(self, crawler: DirectoryCrawler | None = None):
         """Traverses a base directory and adds netcdf files to the dataset
 
+        Only files belonging to the |MIP Table|, stream and date range of
+        the dataset (if set) are included.
+
         Parameters
         ----------
-        basedir: str
-            Dataset root directory
-        mip_table: str
-            If set, only files belonging to this |MIP Table| will be
-            included
-        start: str
-            Date in YYYMM[DD] format, if set only files in this daterange
-            will be included.
-        end: str
-            Date in YYYMM[DD] format, if set only files in this daterange
-            will be included.
+        crawler: DirectoryCrawler | None
+            The crawler used to list the directory tree; a new one is used
+            if not given.
 
         Returns
         -------
         list
             List of filepaths to the dataset.
         """
+        if crawler is None:
+            crawler = DirectoryCrawler()
         dataset = []
-        for root, _, files in os.walk(self._root):
-            if re.search(EXCLUDE_DIRECTORIES_REGEXP, root):
+        for record in crawler.crawl(self._root, file_pattern=NETCDF_FILENAME_REGEXP,
+                                    exclude_pattern=EXCLUDE_DIRECTORIES_REGEXP):
+            if self._mip_table is not None and "_{}_".format(self._mip_table) not in record.filename:
+                continue
+            if self._stream is not None and "/output/{}/".format(self._stream) not in record.directory:
                 continue
-            for filename in files:
-                if filename.endswith(".nc") and \
-                        ((self._mip_table is None or
-                          "_{}_".format(self._mip_table) in filename) and
-                         (self._stream is None or
-                          "/output/{}/".format(self._stream) in root)):
-                    m = re.match(r"^.+_(\d{6,8})-(\d{6,8})\.nc$", filename)
-                    # it does not have to match if start and end are None
-                    if (self._start is None and self._end is None) or\
-                            (m and int(m.group(1)) >= int(self._start) and
-                             int(m.group(2)) <= int(self._end)):
-                        dataset.append(os.path.join(root, filename))
-                        self._file_count += 1
-                        # Log version.
+            # the date range does not have to be present if start and end are None
+            if (self._start is None and self._end is None) or (
+                    record.facets["start"] is not None and int(record.facets["start"]) >= int(self._start) and
+                    int(record.facets["end"]) <= int(self._end)):
+                dataset.append(record.path)
+                self._file_count += 1
         self._logger.info('Added {} files to the dataset'.format(
             self._file_count))
         return dataset
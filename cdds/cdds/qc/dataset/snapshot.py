@@ -0,0 +1,200 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""
+Snapshots of the metadata of netCDF files, captured by opening each file
+once and shared by the filename, size and time contiguity checks of QC.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from cdds.common.stat_cache import StatCache
+
+TIME_VARIABLES = ["time", "time_bnds", "climatology_bnds"]
+
+
+@dataclass
+class FileSnapshot:
+    """The metadata of a single netCDF file.
+
+    The global attributes can be read with the same ``getncattr`` and
+    ``ncattrs`` methods as from an open ``netCDF4.Dataset``, so a snapshot
+    can be used wherever only the global attributes of a file are needed.
+    """
+    path: str
+    size: int
+    mtime_ns: int
+    global_attributes: Dict[str, Any] = field(default_factory=dict)
+    dimensions: Dict[str, int] = field(default_factory=dict)
+    variables: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    time_values: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def mtime(self) -> float:
+        """The modification time of the file in seconds."""
+        return self.mtime_ns / 1e9
+
+    def filepath(self) -> str:
+        return self.path
+
+    def ncattrs(self) -> List[str]:
+        return list(self.global_attributes.keys())
+
+    def getncattr(self, name: str) -> Any:
+        if name not in self.global_attributes:
+            raise AttributeError("NetCDF: Attribute not found: {}".format(name))
+        return self.global_attributes[name]
+
+    def __getattr__(self, name: str) -> Any:
+        # Mirrors netCDF4.Dataset, which exposes global attributes as
+        # attributes, so that hasattr can be used to test for them.
+        global_attributes = self.__dict__.get("global_attributes", {})
+        if name in global_attributes:
+            return global_attributes[name]
+        raise AttributeError(name)
+
+    def time_variable(self, name: str) -> Optional[np.ndarray]:
+        """Return the values of a time coordinate or time bounds variable.
+
+        Parameters
+        ----------
+        name : str
+            Name of the variable, one of ``TIME_VARIABLES``.
+
+        Returns
+        -------
+        Optional[np.ndarray]
+            The values, or None if the file does not contain the variable.
+        """
+        return self.time_values.get(name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the snapshot as a JSON serialisable dictionary."""
+        return {
+            "path": self.path,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "global_attributes": _encode_attributes(self.global_attributes),
+            "dimensions": self.dimensions,
+            "variables": {name: dict(variable, attributes=_encode_attributes(variable["attributes"]))
+                          for name, variable in self.variables.items()},
+            "time_values": {name: values.tolist() for name, values in self.time_values.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, entry: Dict[str, Any]) -> "FileSnapshot":
+        """Create a snapshot from a dictionary returned by :meth:`to_dict`."""
+        entry = dict(entry)
+        entry["global_attributes"] = _decode_attributes(entry["global_attributes"])
+        entry["variables"] = {name: dict(variable, attributes=_decode_attributes(variable["attributes"]))
+                              for name, variable in entry["variables"].items()}
+        entry["time_values"] = {name: np.array(values) for name, values in entry["time_values"].items()}
+        return cls(**entry)
+
+
+def take_snapshot(filepath: str, loader_class: type) -> FileSnapshot:
+    """Open a netCDF file once and capture its metadata.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the netCDF file.
+    loader_class : type
+        A type of dataset loader (e.g. netCDF4.Dataset).
+
+    Returns
+    -------
+    FileSnapshot
+        The metadata of the file.
+    """
+    stat_result = os.stat(filepath)
+    with loader_class(filepath) as nc_file:
+        global_attributes = {name: nc_file.getncattr(name) for name in nc_file.ncattrs()}
+        dimensions = {name: len(dimension) for name, dimension in nc_file.dimensions.items()}
+        variables = {}
+        time_values = {}
+        for name, variable in nc_file.variables.items():
+            variables[name] = {
+                "dimensions": list(variable.dimensions),
+                "dtype": str(variable.dtype),
+                "attributes": {attr: variable.getncattr(attr) for attr in variable.ncattrs()},
+            }
+            if name in TIME_VARIABLES:
+                time_values[name] = np.ma.getdata(variable[:])
+    return FileSnapshot(filepath, stat_result.st_size, stat_result.st_mtime_ns, global_attributes, dimensions,
+                        variables, time_values)
+
+
+def _encode_attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    # Numeric attribute values are stored with their dtype, so that they are restored with the type read from the
+    # file and the QC validators, which check the types of attributes, give the same results for stored snapshots.
+    encoded = {}
+    for name, value in attributes.items():
+        if isinstance(value, (np.ndarray, np.generic)):
+            value = {"dtype": value.dtype.str, "value": value.tolist(), "array": isinstance(value, np.ndarray)}
+        encoded[name] = value
+    return encoded
+
+
+def _decode_attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    decoded = {}
+    for name, value in attributes.items():
+        if isinstance(value, dict):
+            array = np.array(value["value"], dtype=value["dtype"])
+            value = array if value["array"] else array[()]
+        decoded[name] = value
+    return decoded
+
+
+class SnapshotStore:
+    """
+    Stores file snapshots keyed by file path, so that files which have not
+    changed (same size and modification time) since their snapshot was
+    taken do not need to be opened again by later QC runs.
+    """
+
+    def __init__(self, store_file: Optional[str] = None):
+        """
+        Parameters
+        ----------
+        store_file : str, optional
+            The JSON file the snapshots are read from and saved to. If not
+            given, the snapshots are only kept in memory.
+        """
+        self._cache = StatCache(store_file)
+
+    def get(self, filepath: str) -> Optional[FileSnapshot]:
+        """
+        Return the stored snapshot of the file if it is still valid.
+
+        Parameters
+        ----------
+        filepath : str
+            Path to the netCDF file.
+
+        Returns
+        -------
+        Optional[FileSnapshot]
+            The stored snapshot, or None if there is none or the file has
+            changed since it was taken.
+        """
+        entry = self._cache.get(filepath)
+        return None if entry is None else FileSnapshot.from_dict(entry)
+
+    def add(self, snapshot: FileSnapshot) -> None:
+        """
+        Add a snapshot to the store, replacing any earlier one for the file.
+
+        Parameters
+        ----------
+        snapshot : FileSnapshot
+            The snapshot to add.
+        """
+        self._cache.add(snapshot.path, snapshot.to_dict(), snapshot.size, snapshot.mtime_ns)
+
+    def save(self) -> None:
+        """Write the snapshots to the store file, if there is one."""
+        self._cache.save()
@@ -1,15 +1,36 @@
-# (C) British Crown Copyright 2017-2025, Met Office.
+# (C) British Crown Copyright 2017-2026, Met Office.
 # Please see LICENSE.md for license details.
 
 
 import sqlite3
 import os
+from cdds.common.sqlite import execute_insert_many, execute_insert_query
 from cdds.qc.constants import (
     STATUS_WARNING, STATUS_ERROR, STATUS_IGNORED,
     DS_TYPE_SINGLE_FILE, DS_TYPE_DATASET, SUMMARY_STARTED,
-    SUMMARY_FAILED, SUMMARY_PASSED
+    SUMMARY_FAILED, SUMMARY_PASSED, QC_DB_BATCH_SIZE
 )
 
+QC_MESSAGE_COLUMNS = ["qc_dataset_id", "message", "status", "checker"]
+# Columns storing the fingerprint of a checked file and the summary of the checks of the file alone, added to
+# databases created before they existed.
+FINGERPRINT_COLUMNS = [
+    ("file_size", "INTEGER"),
+    ("file_mtime", "REAL"),
+    ("content_hash", "TEXT"),
+    ("checker_version", "TEXT"),
+    ("checks_summary", "INTEGER"),
+]
+# Version of the schema, stored as the user_version of the database. Databases with an older version are migrated
+# when they are opened.
+QC_SCHEMA_VERSION = 3
+QC_INDEXES = [
+    ("qc_run_run_id", "qc_run", "run_id"),
+    ("qc_run_basepath", "qc_run", "basepath, mip_table"),
+    ("qc_dataset_variable", "qc_dataset", "qc_run_id, mip_table, variable_directory, variable_name"),
+    ("qc_message_dataset", "qc_message", "qc_dataset_id, status"),
+]
+
 
 def setup_db(db_file):
     """Initialises a qc database.
@@ -27,13 +48,12 @@ def setup_db(db_file):
     if not db_file.endswith(".db") and db_file != ":memory:":
         db_file += ".db"
     if os.path.exists(db_file):
-        conn = sqlite3.connect(db_file)
-        conn.execute("PRAGMA foreign_keys = 1")
+        conn = _connect(db_file)
+        _migrate(conn)
         return conn
     elif db_file != ":memory:":
         print("Creating database file {}".format(db_file))
-    conn = sqlite3.connect(db_file)
-    conn.execute("PRAGMA foreign_keys = 1")
+    conn = _connect(db_file)
     cursor = conn.cursor()
     create_sql = [
         (
@@ -60,6 +80,11 @@ def setup_db(db_file):
             "variable_name TEXT NOT NULL,"
             "grid TEXT NOT NULL, "
             "summary INTEGER NOT NULL, "
+            "file_size INTEGER, "
+            "file_mtime REAL, "
+            "content_hash TEXT, "
+            "checker_version TEXT, "
+            "checks_summary INTEGER, "
             "qc_run_id INTEGER NOT NULL, "
             "FOREIGN KEY(qc_run_id) REFERENCES qc_run(id))"
         ),
@@ -75,11 +100,215 @@ def setup_db(db_file):
     ]
     for command in create_sql:
         cursor.execute(command)
+    _create_indexes(conn)
+    conn.execute("PRAGMA user_version = {}".format(QC_SCHEMA_VERSION))
     conn.commit()
 
     return conn
 
 
+def _connect(db_file):
+    """Opens a connection to a qc database.
+
+    File based databases use write-ahead logging, so that committing a
+    transaction appends to the log rather than rewriting the database file,
+    and ``synchronous = NORMAL``, which only syncs the log at checkpoints
+    while keeping the database consistent after a crash.
+
+    Parameters
+    ----------
+    db_file : str
+        Path to the database file.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Database connection instance.
+    """
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA foreign_keys = 1")
+    if db_file != ":memory:":
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+
+def _migrate(conn):
+    """Migrates the schema of an existing database to the current version.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Database connection instance.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= QC_SCHEMA_VERSION:
+        return
+    _add_fingerprint_columns(conn)
+    _create_indexes(conn)
+    conn.execute("PRAGMA user_version = {}".format(QC_SCHEMA_VERSION))
+    conn.commit()
+
+
+def _create_indexes(conn):
+    """Creates the indexes used by the report queries if they are missing.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Database connection instance.
+    """
+    existing = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    for name, table, columns in QC_INDEXES:
+        if table in existing:
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_{} ON {} ({})".format(name, table, columns))
+
+
+def _add_fingerprint_columns(conn):
+    """Adds the file fingerprint columns to the qc_dataset table of an
+    existing database if they are missing.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Database connection instance.
+    """
+    existing = [row[1] for row in conn.execute("PRAGMA table_info(qc_dataset)")]
+    if not existing:
+        return
+    for column, column_type in FINGERPRINT_COLUMNS:
+        if column not in existing:
+            conn.execute("ALTER TABLE qc_dataset ADD COLUMN {} {}".format(column, column_type))
+    conn.commit()
+
+
+class QCResultWriter(object):
+    """Writes the results of a qc run to the database in batches.
+
+    Rows are collected in memory and written with prepared statements in
+    a single transaction for every ``batch_size`` checked files. A crash
+    leaves the database at the last committed batch, with every committed
+    file already carrying its final summary.
+    """
+
+    def __init__(self, db, batch_size=QC_DB_BATCH_SIZE):
+        """Constructor
+
+        Parameters
+        ----------
+        db : sqlite3.Connection
+            Database connection instance.
+        batch_size : int
+            Number of checked files to commit in each transaction.
+        """
+        self.db = db
+        self.cursor = db.cursor()
+        self.batch_size = batch_size
+        self._messages = []
+        self._summaries = []
+        self._files_in_batch = 0
+
+    def start_run(self, basepath, run_id, mip_table):
+        """Inserts and commits a new qc run.
+
+        Parameters
+        ----------
+        basepath : str
+            Root directory of the checked dataset.
+        run_id : int
+            Run id.
+        mip_table : str
+            MIP table filter of the run.
+
+        Returns
+        -------
+        int
+            PK of the new row in the qc_run table.
+        """
+        execute_insert_query(self.cursor, "qc_run", {
+            "basepath": basepath,
+            "run_id": run_id,
+            "mip_table": mip_table
+        })
+        self.db.commit()
+        return self.cursor.lastrowid
+
+    def add_dataset(self, values):
+        """Inserts a qc_dataset row within the current batch transaction.
+
+        Parameters
+        ----------
+        values : dict
+            Column names and values of the row.
+
+        Returns
+        -------
+        int
+            PK of the new row in the qc_dataset table.
+        """
+        execute_insert_query(self.cursor, "qc_dataset", values)
+        return self.cursor.lastrowid
+
+    def add_message(self, qc_dataset_id, message, status, checker):
+        """Queues a qc_message row.
+
+        Parameters
+        ----------
+        qc_dataset_id : int
+            PK from the qc_dataset table.
+        message : str
+            QC message.
+        status : int
+            Message status.
+        checker : str
+            Name of the checker that produced the message.
+        """
+        self._messages.append((qc_dataset_id, message, status, checker))
+
+    def finish_dataset(self, qc_dataset_id, summary):
+        """Queues the summary of a checked file and commits the batch if it
+        is full.
+
+        Parameters
+        ----------
+        qc_dataset_id : int
+            PK from the qc_dataset table.
+        summary : int
+            Summary of the checks of the file.
+        """
+        self._summaries.append((summary, qc_dataset_id))
+        self._files_in_batch += 1
+        if self._files_in_batch >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Writes all queued rows and commits the current transaction."""
+        if self._messages:
+            execute_insert_many(self.cursor, "qc_message", QC_MESSAGE_COLUMNS, self._messages)
+        if self._summaries:
+            self.cursor.executemany("UPDATE qc_dataset SET summary = ? WHERE id = ?", self._summaries)
+        self.db.commit()
+        self._messages = []
+        self._summaries = []
+        self._files_in_batch = 0
+
+    def finish_run(self, qc_run_id, finished):
+        """Commits any outstanding rows, marks the qc run as finished and
+        checkpoints the write-ahead log into the database file.
+
+        Parameters
+        ----------
+        qc_run_id : int
+            PK from the qc_run table.
+        finished : datetime.datetime
+            Time the run finished.
+        """
+        self.flush()
+        self.cursor.execute("UPDATE qc_run SET finished = ? WHERE id = ?", (finished, qc_run_id))
+        self.db.commit()
+        self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
 def get_qc_runs(cursor, run_id):
     """Executes a select query on the qc_run table filtering by run_id
 
@@ -100,7 +329,7 @@ def get_qc_runs(cursor, run_id):
     )
 
 
-def get_qc_files(cursor, qc_run_id, all_errors=False):
+def get_qc_files(cursor, qc_run_id, all_errors=False, ignored_messages=()):
     """Executes a select query on the qc_files table filtering by qc_run_id.
 
     Column order:
@@ -118,6 +347,10 @@ def get_qc_files(cursor, qc_run_id, all_errors=False):
         PK from the qc_run table
     all_errors : bool
         If True will also return ignored messages.
+    ignored_messages : iterable of str
+        Messages are not returned if any of these strings is found in the
+        message as it is written to the report, i.e. ``str`` of its UTF-8
+        encoding, in which non-ASCII characters are escaped.
 
     Returns
     -------
@@ -125,16 +358,36 @@ def get_qc_files(cursor, qc_run_id, all_errors=False):
         Cursor object
     """
     skipped = 0 if all_errors else STATUS_IGNORED
+    ignored_messages = list(ignored_messages)
+    if ignored_messages:
+        cursor.connection.create_function("report_text", 1, _report_text, deterministic=True)
 
     return cursor.execute(
         "SELECT qcd.experiment, qcd.mip_table, qcd.variable, qcd.filename, "
         "qcm.message FROM qc_dataset qcd "
         "INNER JOIN qc_message qcm ON qcm.qc_dataset_id = qcd.id "
-        "WHERE qcd.qc_run_id = ? AND qcm.status != ?"
-        "ORDER BY qcd.filename", (qc_run_id, skipped,)
+        "WHERE qcd.qc_run_id = ? AND qcm.status != ? "
+        + "".join("AND instr(report_text(qcm.message), ?) = 0 " for _ in ignored_messages)
+        + "ORDER BY qcd.filename, qcm.id", [qc_run_id, skipped] + ignored_messages
     )
 
 
+def _report_text(message):
+    """Returns a QC message as it is written to the report.
+
+    Parameters
+    ----------
+    message : str
+        QC message.
+
+    Returns
+    -------
+    str
+        The message as written to the report.
+    """
+    return str(message.encode('utf-8'))
+
+
 def get_error_counts(cursor, run_id, all_errors=False):
     """Executes a select query calculating distribution of errors per .
 
@@ -213,7 +466,7 @@ def get_aggregated_errors(cursor, run_id, all_errors=False):
     - checker
     - error message
     - file count
-    - pipe-separated list of affected variables
+    - pipe-separated list of distinct affected variables
 
     Parameters
     ----------
@@ -233,7 +486,8 @@ def get_aggregated_errors(cursor, run_id, all_errors=False):
 
     return cursor.execute(
         "SELECT qcd.mip_table, qcm.checker, qcm.message, "
-        "count(qcd.filename), group_concat(variable,'|') FROM qc_message qcm "
+        "count(qcd.filename), replace(group_concat(DISTINCT qcd.variable), ',', '|') "
+        "FROM qc_message qcm "
         "INNER JOIN qc_dataset qcd ON qcm.qc_dataset_id = qcd.id "
         "INNER JOIN qc_run qcr ON qcd.qc_run_id = qcr.id "
         "WHERE qcr.run_id = ? AND qcm.status != ?"
@@ -278,3 +532,68 @@ def get_validated_variables(cursor, run_id, all_errors=False):
         "ORDER BY qcd.mip_table, qcd.variable_directory, "
         "qcd.variable_name ", (skipped, run_id, )
     )
+
+
+def get_previous_file_results(cursor, basepath, mip_table):
+    """Executes a select query returning the checked files of the latest
+    finished qc run of the same dataset.
+
+    Column order:
+    - id
+    - variable_directory
+    - filename
+    - realization_index
+    - file_size
+    - file_mtime
+    - content_hash
+    - checker_version
+    - checks_summary
+
+    Parameters
+    ----------
+    cursor : sqlite3.Cursor
+        A cursor instance
+    basepath : str
+        Root directory of the dataset
+    mip_table : str
+        MIP table filter of the qc run
+
+    Returns
+    -------
+    sqlite3.Cursor
+        Cursor object
+    """
+    return cursor.execute(
+        "SELECT qcd.id, qcd.variable_directory, qcd.filename, "
+        "qcd.realization_index, qcd.file_size, qcd.file_mtime, "
+        "qcd.content_hash, qcd.checker_version, qcd.checks_summary FROM qc_dataset qcd "
+        "WHERE qcd.summary != ? AND qcd.qc_run_id = ("
+        "SELECT max(id) FROM qc_run WHERE basepath = ? AND mip_table IS ? "
+        "AND finished IS NOT NULL)", (SUMMARY_STARTED, basepath, mip_table)
+    )
+
+
+def get_dataset_messages(cursor, qc_dataset_id):
+    """Executes a select query returning all messages of a checked file.
+
+    Column order:
+    - message
+    - status
+    - checker
+
+    Parameters
+    ----------
+    cursor : sqlite3.Cursor
+        A cursor instance
+    qc_dataset_id : int
+        PK from the qc_dataset table
+
+    Returns
+    -------
+    sqlite3.Cursor
+        Cursor object
+    """
+    return cursor.execute(
+        "SELECT message, status, checker FROM qc_message "
+        "WHERE qc_dataset_id = ? ORDER BY id", (qc_dataset_id,)
+    )
@@ -1,23 +1,31 @@
 # (C) British Crown Copyright 2018-2026, Met Office.
 # Please see LICENSE.md for license details.
 
+import concurrent.futures
+import contextlib
 import datetime
 import inspect
 import json
 import logging
+import multiprocessing
 import os
 import time
 
+import compliance_checker
 from compliance_checker.runner import CheckSuite
 
+from cdds import __version__
+
 from cdds.common.constants import (
     APPROVED_VARS_FILENAME_STREAM_TEMPLATE,
     APPROVED_VARS_FILENAME_TEMPLATE,
 )
 from cdds.common.plugins.plugins import PluginStore
-from cdds.common.sqlite import execute_insert_query
-from cdds.qc.common import NoDataForQualityCheck
+from cdds.qc.common import NoDataForQualityCheck, file_content_hash
 from cdds.qc.constants import (
+    CONTIGUITY_CHECKER,
+    FILENAME_CHECKER,
+    QC_DB_BATCH_SIZE,
     QC_REPORT_FILENAME,
     QC_REPORT_STREAM_FILENAME,
     STATUS_ERROR,
@@ -32,8 +40,11 @@ from cdds.qc.constants import (
 )
 from cdds.qc.contiguity_checker import CollectionsCheck
 from cdds.qc.models import (
+    QCResultWriter,
     get_aggregated_errors,
+    get_dataset_messages,
     get_error_counts,
+    get_previous_file_results,
     get_qc_files,
     get_qc_runs,
     get_validated_variables,
@@ -42,6 +53,9 @@ from cdds.qc.models import (
 from cdds.qc.dataset.dataset import StructuredDataset
 from cdds.qc.suite import QCSuite
 
+# State of a QC worker process, set when the worker pool is started.
+_WORKER_STATE = {}
+
 
 class QCRunner(object):
     """Wrapper class for managing QC run configuration"""
@@ -106,9 +120,20 @@ class QCRunner(object):
             self.check_suite.checkers[checker_name](), inspect.ismethod)
         return [x[0] for x in methods if x[0].startswith("check_")]
 
-    def run_tests(self, mip_tables_dir, request, run_id=None):
+    def run_tests(self, mip_tables_dir, request, run_id=None, max_workers=1, incremental=False,
+                  hash_files=False):
         """Runs all ioos and ad-hoc checks
 
+        The checks of individual files can be run in a pool of worker
+        processes. Only this process writes to the database, and results are
+        written in the same order whatever the number of workers.
+
+        In incremental mode the results of the latest finished run of the
+        same dataset are reused for files whose fingerprint (size,
+        modification time, optional content hash and checker versions) has
+        not changed, and the time contiguity is only checked again for
+        variables with new, changed or removed files.
+
         Parameters
         ----------
         mip_tables_dir: str
@@ -118,6 +143,13 @@ class QCRunner(object):
         run_id: int
             An arbitrary identifier that can be used for grouping multiple qc
             runs
+        max_workers: int
+            Number of worker processes used to check individual files
+        incremental: bool
+            If True, reuse the results of unchanged files
+        hash_files: bool
+            If True, include a hash of the content of each file in its
+            fingerprint
 
         Returns
         -------
@@ -174,29 +206,38 @@ class QCRunner(object):
         if run_id is None:
             run_id = int(time.time())
         self.logger.info("Starting QC tests")
-        cursor = self.db.cursor()
-        execute_insert_query(cursor, "qc_run", {
-            "basepath": self.dataset.root,
-            "run_id": run_id,
-            "mip_table": self.dataset.mip_table
-        })
-        self.db.commit()
-        qc_run_id = cursor.lastrowid
+        writer = QCResultWriter(self.db)
+        qc_run_id = writer.start_run(self.dataset.root, run_id, self.dataset.mip_table)
+        aggr = self.dataset.get_aggregated_files(False)
+        fingerprints = {
+            data_file: self._fingerprint(data_file, hash_files) for index in aggr for data_file in aggr[index]
+        }
+        reusable, affected_var_keys = {}, None
+        if incremental:
+            reusable, affected_var_keys = self._find_reusable_results(aggr, fingerprints)
+            self.logger.info("Reusing the results of {} unchanged files".format(len(reusable)))
         contiguity_checker = CollectionsCheck(request)
         self.logger.info("Checking filenames")
         file_errors = self.dataset.check_filenames_and_sizes()
         self.logger.info("Checking time contiguity")
-        crs = contiguity_checker.perform_checks(self.dataset)
-        aggr = self.dataset.get_aggregated_files(False)
+        crs = contiguity_checker.perform_checks(self.dataset, affected_var_keys)
         self.logger.info("Checking individual files")
 
         est_count = self.dataset.file_count
         counter = 0
-        for index in aggr:
-            for data_file in aggr[index]:
+        data_files = [(index, data_file) for index in aggr for data_file in aggr[index]]
+        files_to_check = [data_file for _, data_file in data_files if data_file not in reusable]
+        with self._file_checks(conf, request, files_to_check, max_workers) as results:
+            for index, data_file in data_files:
+                if data_file in reusable:
+                    invalid, messages = self._reuse_results(
+                        *reusable[data_file], affected_var_keys is not None and index not in affected_var_keys)
+                else:
+                    invalid, messages = next(results)
+                checks_summary = SUMMARY_FAILED if invalid else SUMMARY_PASSED
                 drs = index.split('_')
                 if request.common.force_plugin == 'CORDEX':
-                    execute_insert_query(cursor, "qc_dataset", {
+                    qc_dataset_id = writer.add_dataset({
                         "qc_run_id": qc_run_id,
                         "filename": os.path.basename(data_file),
                         "variable_directory": os.path.dirname(data_file),
@@ -209,9 +250,11 @@ class QCRunner(object):
                         "variable": self.dataset.var_names[index],
                         "variable_name": self.dataset.var_names[index],
                         "grid": drs[4],
+                        **fingerprints[data_file],
+                        "checks_summary": checks_summary,
                     })
                 elif request.metadata.mip_era == 'CMIP7':
-                    execute_insert_query(cursor, "qc_dataset", {
+                    qc_dataset_id = writer.add_dataset({
                         "qc_run_id": qc_run_id,
                         "filename": os.path.basename(data_file),
                         "variable_directory": os.path.dirname(data_file),
@@ -224,9 +267,11 @@ class QCRunner(object):
                         "variable": drs[6] + "_" + drs[7],
                         "variable_name": self.dataset.var_names[index],
                         "grid": drs[7],
+                        **fingerprints[data_file],
+                        "checks_summary": checks_summary,
                     })
                 else:
-                    execute_insert_query(cursor, "qc_dataset", {
+                    qc_dataset_id = writer.add_dataset({
                         "qc_run_id": qc_run_id,
                         "filename": os.path.basename(data_file),
                         "variable_directory": os.path.dirname(data_file),
@@ -240,65 +285,199 @@ class QCRunner(object):
                         "variable": drs[6],
                         "variable_name": self.dataset.var_names[index],
                         "grid": drs[7],
+                        **fingerprints[data_file],
+                        "checks_summary": checks_summary,
                     })
-                self.db.commit()
-                qc_dataset_id = cursor.lastrowid
-                with self.check_suite.load_dataset(data_file) as ds:
-                    if request.common.force_plugin == 'CORDEX':
-                        output = self.check_suite.run(ds, conf, CORDEX_SKIP_QC_CHECKS, "cdds_cf:1.7", "cordex")
-                    elif request.metadata.mip_era == 'CMIP7':
-                        output = self.check_suite.run(ds, conf, CMIP7_SKIP_QC_CHECKS, "cdds_cf:1.11", "cmip7")
-                    else:
-                        # all other projects (CMIP6, CMIP6Plus, GCModelDev) use CF-1.7 and CMIP6 style checks.
-                        output = self.check_suite.run(ds, conf, CMIP6_SKIP_QC_CHECKS, "cdds_cf:1.7", "cmip6")
-                invalid = self._parse_and_log(cursor, output, qc_dataset_id)
+                for message, status, checker in messages:
+                    writer.add_message(qc_dataset_id, message, status, checker)
                 if data_file in crs[1] and crs[1][data_file]:
                     for msg in crs[1][data_file]:
-                        execute_insert_query(cursor, "qc_message", {
-                            "qc_dataset_id": qc_dataset_id,
-                            "message": msg["message"],
-                            "status": STATUS_ERROR,
-                            "checker": crs[0],
-                        })
-                        self.db.commit()
+                        writer.add_message(qc_dataset_id, msg["message"], STATUS_ERROR, crs[0])
                     invalid = True
 
                 if data_file in file_errors:
                     for msg in file_errors[data_file]:
-                        execute_insert_query(cursor, "qc_message", {
-                            "qc_dataset_id": qc_dataset_id,
-                            "message": msg,
-                            "status": STATUS_ERROR,
-                            "checker": "Filename and size checker",
-                        })
-                        self.db.commit()
+                        writer.add_message(qc_dataset_id, msg, STATUS_ERROR, FILENAME_CHECKER)
                     invalid = True
 
-                cursor.execute(
-                    "UPDATE qc_dataset "
-                    "SET summary = ? "
-                    "WHERE id = ?", (
-                        SUMMARY_FAILED if invalid else SUMMARY_PASSED,
-                        qc_dataset_id
-                    )
-                )
-                self.db.commit()
+                writer.finish_dataset(qc_dataset_id, SUMMARY_FAILED if invalid else SUMMARY_PASSED)
                 counter += 1
                 if counter % 100 == 0:
                     self.logger.info(
                         "Completed {}/{}".format(counter, est_count))
         self.logger.info("All tests completed")
-        cursor.execute(
-            "UPDATE qc_run "
-            "SET finished = ? "
-            "WHERE id = ?", (
-                datetime.datetime.utcnow(),
-                qc_run_id
-            )
-        )
-        self.db.commit()
+        writer.finish_run(qc_run_id, datetime.datetime.utcnow())
         return run_id
 
+    def check_file(self, data_file, conf, request):
+        """Runs the compliance checker suites on a single file
+
+        Parameters
+        ----------
+        data_file: str
+            Path to the file to be checked
+        conf: dict
+            Configuration of the checkers
+        request: cdds.common.request.request.Request
+            Request object
+
+        Returns
+        -------
+        tuple
+            Whether the file is invalid, and a list of (message, status,
+            checker) tuples to be saved in the database
+        """
+        with self.check_suite.load_dataset(data_file) as ds:
+            if request.common.force_plugin == 'CORDEX':
+                output = self.check_suite.run(ds, conf, CORDEX_SKIP_QC_CHECKS, "cdds_cf:1.7", "cordex")
+            elif request.metadata.mip_era == 'CMIP7':
+                output = self.check_suite.run(ds, conf, CMIP7_SKIP_QC_CHECKS, "cdds_cf:1.11", "cmip7")
+            else:
+                # all other projects (CMIP6, CMIP6Plus, GCModelDev) use CF-1.7 and CMIP6 style checks.
+                output = self.check_suite.run(ds, conf, CMIP6_SKIP_QC_CHECKS, "cdds_cf:1.7", "cmip6")
+        return self._parse_results(output)
+
+    def checker_version(self):
+        """Returns the versions of the checks run on each file, which are
+        part of the fingerprint of a checked file
+
+        Returns
+        -------
+        str
+            The versions of CDDS and the compliance checker
+        """
+        version = "cdds {}, compliance-checker {}".format(__version__, compliance_checker.__version__)
+        if self.relaxed_cmor:
+            version += ", relaxed CMOR"
+        return version
+
+    def _fingerprint(self, data_file, hash_files):
+        """Returns the fingerprint of a file to be stored with its results
+
+        Parameters
+        ----------
+        data_file: str
+            Path to the file
+        hash_files: bool
+            If True, include a hash of the content of the file
+
+        Returns
+        -------
+        dict
+            Values of the fingerprint columns of the qc_dataset table
+        """
+        snapshot = self.dataset.file_snapshot(data_file)
+        return {
+            "file_size": snapshot.size if snapshot is not None else None,
+            "file_mtime": snapshot.mtime if snapshot is not None else None,
+            "content_hash": file_content_hash(data_file) if hash_files else None,
+            "checker_version": self.checker_version(),
+        }
+
+    def _find_reusable_results(self, aggr, fingerprints):
+        """Finds the files checked by the latest finished run of this
+        dataset which have not changed since
+
+        Parameters
+        ----------
+        aggr: dict
+            Files of the dataset, indexed by variable facets
+        fingerprints: dict
+            Fingerprint of each file
+
+        Returns
+        -------
+        tuple
+            The qc_dataset id and the summary of the checks of the earlier
+            results of each unchanged file, and a list of the variable facet
+            indexes whose time contiguity needs to be checked again
+        """
+        cursor = self.db.cursor()
+        reusable = {}
+        previous_var_files = {}
+        for row in get_previous_file_results(cursor, self.dataset.root, self.dataset.mip_table).fetchall():
+            (qc_dataset_id, directory, filename, index, file_size, file_mtime, content_hash, checker_version,
+             checks_summary) = row
+            data_file = os.path.join(directory, filename)
+            previous_var_files.setdefault(index, set()).add(data_file)
+            fingerprint = fingerprints.get(data_file)
+            previous_fingerprint = {
+                "file_size": file_size,
+                "file_mtime": file_mtime,
+                "content_hash": content_hash,
+                "checker_version": checker_version}
+            # results stored before the summary of the checks was kept cannot be reused
+            if (fingerprint is not None and fingerprint["file_size"] is not None and checks_summary is not None
+                    and fingerprint == previous_fingerprint):
+                reusable[data_file] = (qc_dataset_id, checks_summary)
+        affected_var_keys = [
+            index for index, data_files in aggr.items()
+            if set(data_files) != previous_var_files.get(index)
+            or any(data_file not in reusable for data_file in data_files)
+        ]
+        return reusable, affected_var_keys
+
+    def _reuse_results(self, qc_dataset_id, checks_summary, reuse_contiguity):
+        """Returns the earlier results of an unchanged file
+
+        The filename and size checks are always run again, so their
+        messages are not reused.
+
+        Parameters
+        ----------
+        qc_dataset_id: int
+            PK of the earlier results in the qc_dataset table
+        checks_summary: int
+            Summary of the earlier checks of the file alone, which may have
+            failed without leaving a message
+        reuse_contiguity: bool
+            If True, the time contiguity messages are reused as well
+
+        Returns
+        -------
+        tuple
+            Whether the file is invalid, and a list of (message, status,
+            checker) tuples to be saved in the database
+        """
+        messages = []
+        for message, status, checker in get_dataset_messages(self.db.cursor(), qc_dataset_id).fetchall():
+            if checker == FILENAME_CHECKER or (checker == CONTIGUITY_CHECKER and not reuse_contiguity):
+                continue
+            messages.append((message, status, checker))
+        return checks_summary == SUMMARY_FAILED, messages
+
+    @contextlib.contextmanager
+    def _file_checks(self, conf, request, data_files, max_workers):
+        """Provides the results of checking the given files, in order
+
+        Parameters
+        ----------
+        conf: dict
+            Configuration of the checkers
+        request: cdds.common.request.request.Request
+            Request object
+        data_files: list
+            Paths to the files to be checked
+        max_workers: int
+            Number of worker processes
+
+        Yields
+        ------
+        iterator
+            The result of :meth:`check_file` for each file
+        """
+        if max_workers <= 1 or len(data_files) <= 1:
+            yield (self.check_file(data_file, conf, request) for data_file in data_files)
+            return
+        self.logger.info("Checking files with {} worker processes".format(max_workers))
+        # Workers are forked so that they inherit the loaded checkers and
+        # the global attributes cache rather than having them pickled.
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("fork"),
+                initializer=_init_worker, initargs=(self, conf, request)) as executor:
+            chunksize = max(1, min(QC_DB_BATCH_SIZE, len(data_files) // (4 * max_workers)))
+            yield executor.map(_check_file_in_worker, data_files, chunksize=chunksize)
+
     def generate_report(self, run_id, location="", process_all=False,
                         with_details=False):
         """Generates a json report for a given run_id as well as the approved variables txt file.
@@ -404,27 +583,25 @@ class QCRunner(object):
             List containing error messages and other meta data
         """
         output = []
-        qc_runs = get_qc_runs(cursor, run_id)
-        for qc_run in qc_runs:
+        ignored_messages = [] if process_all else list(self.get_ignored_messages().keys())
+        for qc_run_id, mip_table_filter in get_qc_runs(cursor, run_id).fetchall():
             # one element for each MIP table
             item = {
-                "mip_table_filter": qc_run[1],
+                "mip_table_filter": mip_table_filter,
                 "results": [],
-                "db_id": qc_run[0]
+                "db_id": qc_run_id
             }
 
             # generate reports by MIP table
-            qc_files = get_qc_files(cursor, qc_run[0])
-            for qc_file in qc_files:
-                err_msg = str(qc_file[4].encode('utf-8'))
-                if process_all or self._process_errors(err_msg):
-                    item["results"].append({
-                        "experiment": qc_file[0].split(':')[0],
-                        "mip_table": qc_file[1],
-                        "variable": qc_file[2],
-                        "filename": qc_file[3],
-                        "errors": err_msg,
-                    })
+            for experiment, mip_table, variable, filename, message in get_qc_files(
+                    cursor, qc_run_id, ignored_messages=ignored_messages):
+                item["results"].append({
+                    "experiment": experiment.split(':')[0],
+                    "mip_table": mip_table,
+                    "variable": variable,
+                    "filename": filename,
+                    "errors": str(message.encode('utf-8')),
+                })
             output.append(item)
         return output
 
@@ -481,7 +658,7 @@ class QCRunner(object):
                 "checker": r[1],
                 "error_message": r[2],
                 "affected_files": r[3],
-                "affected_vars": "|".join(list(set(r[4].split("|")))),
+                "affected_vars": r[4],
             })
         return output
 
@@ -510,63 +687,60 @@ class QCRunner(object):
                 errors += self._process_children(child)
         return errors
 
-    def _parse_and_log(self, cursor, result, qc_dataset_id):
-        """Parses a result instance returned by the QC checker and saves it
-        in the database
+    def _parse_results(self, result):
+        """Parses a result instance returned by the QC checker
 
         Parameters
         ----------
-        cursor: sqlite3.Cursor
-            An active db cursor
         result: tuple
             A tuple with QC results
-        qc_dataset_id:
-            Dataset table identifier
 
         Returns
         -------
-        bool
-            True if the run was a success, i.e. the checked dataset was
-            validated, and there were no other errors raised when running
-            QC checks.
+        tuple
+            True if the checked dataset was not validated or there were other
+            errors raised when running QC checks, and a list of (message,
+            status, checker) tuples
         """
         errors = False
+        messages = []
         for checker, rpair in list(result.items()):
             for elem in rpair[0]:
                 # process if actual score is lower than expected score
                 if elem.value[0] < elem.value[1]:
-                    msgs = self._process_children(elem)
-                    for msg in msgs:
-                        if self._process_errors(msg):
-                            status = STATUS_ERROR
-                        else:
-                            status = STATUS_IGNORED
-                        execute_insert_query(cursor, "qc_message", {
-                            "qc_dataset_id": qc_dataset_id,
-                            "message": msg,
-                            "status": status,
-                            "checker": checker,
-                        })
+                    messages += self._classify_messages(elem, checker)
                     errors = True
             # test for exceptions and other errors
             if bool(rpair[1]):
                 errors = True
                 # not empty
                 for elem in rpair[1]:
-                    msgs = self._process_children(elem)
-                    for msg in msgs:
-                        if self._process_errors(msg):
-                            status = STATUS_ERROR
-                        else:
-                            status = STATUS_IGNORED
-                        execute_insert_query(cursor, "qc_message", {
-                            "qc_dataset_id": qc_dataset_id,
-                            "message": msg,
-                            "status": status,
-                            "checker": checker,
-                        })
-        self.db.commit()
-        return errors
+                    messages += self._classify_messages(elem, checker)
+        return errors, messages
+
+    def _classify_messages(self, elem, checker):
+        """Flattens a message tuple and sets the status of each message
+
+        Parameters
+        ----------
+        elem: tuple
+            A tuple with QC results
+        checker: str
+            Name of the checker
+
+        Returns
+        -------
+        list
+            A list of (message, status, checker) tuples
+        """
+        messages = []
+        for msg in self._process_children(elem):
+            if self._process_errors(msg):
+                status = STATUS_ERROR
+            else:
+                status = STATUS_IGNORED
+            messages.append((msg, status, checker))
+        return messages
 
     def _process_errors(self, message):
         """An ugly metod evaluate error messages and discard/downgrade those
@@ -697,3 +871,15 @@ class QCRunner(object):
              "no default"): "seasurface/osurf is a character string and hence has no units.",
         }
         return msg_dictionary
+
+
+def _init_worker(runner, conf, request):
+    """Stores the state needed to check files in a QC worker process."""
+    _WORKER_STATE["runner"] = runner
+    _WORKER_STATE["conf"] = conf
+    _WORKER_STATE["request"] = request
+
+
+def _check_file_in_worker(data_file):
+    """Checks a single file in a QC worker process."""
+    return _WORKER_STATE["runner"].check_file(data_file, _WORKER_STATE["conf"], _WORKER_STATE["request"])
@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2022-2025, Met Office.
+# (C) British Crown Copyright 2022-2026, Met Office.
 # Please see LICENSE.md for license details.
 from cdds.archive.command_line import main_store
 from cdds.tests.test_archive.functional.store_test_tools import DEFAULT_LOG_DATESTAMP, TestData, LogFile
@@ -22,7 +22,8 @@ class TestStoreFailingMoo(StoreTestCase):
 
     @mock.patch('cdds.common.get_log_datestamp', return_value=DEFAULT_LOG_DATESTAMP)
     @mock.patch('cdds.common.mass.run_mass_command', side_effect=RuntimeError("moo command failed"))
-    def test_transfer_functional_failing_moo(self, mock_run_command, mock_log_datestamp):
+    @mock.patch('cdds.common.mass.run_mass_command_lines', side_effect=RuntimeError("moo command failed"))
+    def test_transfer_functional_failing_moo(self, mock_run_command_lines, mock_run_command, mock_log_datestamp):
         self.test_dir, variable_file = setup_basic_test_data('piControl_10096_proc', 'piControl_10096_data')
         test_data = TestData(
             number_variables=1,
@@ -1,20 +1,25 @@
-# (C) British Crown Copyright 2019-2025, Met Office.
+# (C) British Crown Copyright 2019-2026, Met Office.
 # Please see LICENSE.md for license details.
 # pylint: disable = missing-docstring
 """Tests for :mod:`mass.py`."""
 
 import copy
 import os
+import shutil
+import tempfile
+import threading
 import unittest
 import unittest.mock
 
 from cdds.common.plugins.plugin_loader import load_plugin
 from cdds.common.plugins.plugins import PluginStore
+from cdds.common.mass_exception import MassError, MassFailure, VariableArchivingError
 from cdds.common.mass_record import MassRecord
 
 from cdds.archive.constants import (
     DATA_PUBLICATION_STATUS_DICT, SUPERSEDED_INFO_FILE_STR)
 import cdds.archive.mass
+from cdds.archive.outcome_log import ArchiveOutcomeLog
 from cdds.tests.factories.request_factory import simple_request
 from cdds.tests.test_archive import common
 
@@ -147,7 +152,8 @@ class TestArchiveFiles(unittest.TestCase):
             mass_dest = os.path.join(var1['mass_path'], 'embargoed', common.APPROVED_NEW_DATESTAMP)
             mkdir_calls += [unittest.mock.call(mass_dest, simulation=False, create_parents=True, exist_ok=True)]
             put_calls += [unittest.mock.call(
-                var1['mip_output_files'], mass_dest, simulation=False, check_mass_location=False
+                var1['mip_output_files'], mass_dest, simulation=False, check_mass_location=False,
+                ignore_existing=False
             )]
 
         mock_mass_mkdir.assert_has_calls(mkdir_calls, any_order=True)
@@ -173,7 +179,8 @@ class TestArchiveFiles(unittest.TestCase):
             input_vars += [prefilter_var]
             mkdir_calls += [unittest.mock.call(mass_dest, simulation=False, create_parents=True, exist_ok=True)]
             put_calls += [unittest.mock.call(
-                var1['mip_output_files'][cont_ix:], mass_dest, simulation=False, check_mass_location=False
+                var1['mip_output_files'][cont_ix:], mass_dest, simulation=False, check_mass_location=False,
+                ignore_existing=False
             )]
 
         cdds.archive.mass.archive_files(input_vars, simulation=False)
@@ -242,7 +249,8 @@ class TestArchiveFiles(unittest.TestCase):
             ]
             put_calls += [
                 unittest.mock.call(
-                    var1['mip_output_files'][cont_ix[vid]:], mass_dest, simulation=False, check_mass_location=False
+                    var1['mip_output_files'][cont_ix[vid]:], mass_dest, simulation=False, check_mass_location=False,
+                    ignore_existing=False
                 )]
             rmdir_calls += [unittest.mock.call(mass_src, simulation=False)]
 
@@ -274,7 +282,8 @@ class TestArchiveFiles(unittest.TestCase):
             input_var_list += [input_var1]
             mkdir_calls += [unittest.mock.call(mass_dest, simulation=False, create_parents=True, exist_ok=True)]
             put_calls += [unittest.mock.call(
-                var1['mip_output_files'], mass_dest, simulation=False, check_mass_location=False
+                var1['mip_output_files'], mass_dest, simulation=False, check_mass_location=False,
+                ignore_existing=False
             )]
 
         cdds.archive.mass.archive_files(input_var_list, simulation=False)
@@ -282,5 +291,91 @@ class TestArchiveFiles(unittest.TestCase):
         mock_mass_put.assert_has_calls(put_calls, any_order=True)
 
 
+class TestArchiveFilesConcurrently(unittest.TestCase):
+    """Tests for :func:`archive_files` in :mod:`mass.py` archiving variables in parallel."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.outcome_log = ArchiveOutcomeLog(os.path.join(self.temp_dir, 'cdds_store_outcomes.jsonl'))
+        self.var_list = copy.deepcopy(common.APPROVED_REF_WITH_MASS)
+        self.mass_dests = [os.path.join(var1['mass_path'], 'embargoed', common.APPROVED_NEW_DATESTAMP)
+                           for var1 in self.var_list]
+
+    @unittest.mock.patch('cdds.archive.mass.mass_mkdirs')
+    @unittest.mock.patch('cdds.archive.mass.mass_mkdir')
+    @unittest.mock.patch('cdds.archive.mass.mass_put')
+    def test_directories_created_in_bulk(self, mock_mass_put, mock_mass_mkdir, mock_mass_mkdirs):
+        cdds.archive.mass.archive_files(self.var_list, False, max_concurrent=3, outcome_log=self.outcome_log)
+
+        mock_mass_mkdirs.assert_called_once_with(self.mass_dests, False)
+        self.assertEqual(0, mock_mass_mkdir.call_count)
+        mock_mass_put.assert_has_calls([
+            unittest.mock.call(var1['mip_output_files'], mass_dest, simulation=False, check_mass_location=False,
+                               ignore_existing=False)
+            for var1, mass_dest in zip(self.var_list, self.mass_dests)], any_order=True)
+        outcomes = self.outcome_log.read()
+        self.assertEqual(['archived'] * 3, [outcome['status'] for outcome in outcomes.values()])
+
+    @unittest.mock.patch('cdds.archive.mass.mass_mkdirs')
+    @unittest.mock.patch('cdds.archive.mass.mass_put')
+    def test_failed_variables_are_recorded_and_resumed(self, mock_mass_put, mock_mass_mkdirs):
+        def put(files, mass_dest, **kwargs):
+            if '/tos/' in mass_dest:
+                raise VariableArchivingError('put failed')
+        mock_mass_put.side_effect = put
+
+        with self.assertRaises(VariableArchivingError):
+            cdds.archive.mass.archive_files(copy.deepcopy(self.var_list), False, max_concurrent=2,
+                                            outcome_log=self.outcome_log)
+        statuses = {key[0]: outcome['status'] for key, outcome in self.outcome_log.read().items()}
+        self.assertEqual({'Amon/tas': 'archived', 'day/ua': 'archived', 'Omon/tos': 'failed'}, statuses)
+
+        mock_mass_put.reset_mock(side_effect=True)
+        cdds.archive.mass.archive_files(copy.deepcopy(self.var_list), False, max_concurrent=2,
+                                        outcome_log=self.outcome_log, resume=True)
+        mock_mass_put.assert_called_once_with(self.var_list[2]['mip_output_files'], self.mass_dests[2],
+                                              simulation=False, check_mass_location=False, ignore_existing=False)
+
+    @unittest.mock.patch('cdds.archive.mass.mass_mkdirs')
+    @unittest.mock.patch('cdds.archive.mass.mass_put')
+    def test_no_variable_is_started_after_a_failure(self, mock_mass_put, mock_mass_mkdirs):
+        started, failed = threading.Event(), threading.Event()
+        record = self.outcome_log.record
+
+        def record_outcome(var_dict, mass_path, files, status, *args):
+            record(var_dict, mass_path, files, status, *args)
+            if status == 'failed':
+                failed.set()
+
+        def put(files, mass_dest, **kwargs):
+            if '/tas/' in mass_dest:
+                self.assertTrue(started.wait(10))
+                raise VariableArchivingError('put failed')
+            started.set()
+            self.assertTrue(failed.wait(10))
+
+        self.outcome_log.record = record_outcome
+        mock_mass_put.side_effect = put
+        with self.assertRaises(VariableArchivingError):
+            cdds.archive.mass.archive_files(copy.deepcopy(self.var_list), False, max_concurrent=2,
+                                            outcome_log=self.outcome_log)
+
+        self.assertEqual(self.mass_dests[:2], sorted(call.args[1] for call in mock_mass_put.call_args_list))
+        statuses = {key[0]: outcome['status'] for key, outcome in self.outcome_log.read().items()}
+        self.assertEqual({'Amon/tas': 'failed', 'day/ua': 'archived'}, statuses)
+
+    @unittest.mock.patch('cdds.archive.mass.mass_mkdirs')
+    @unittest.mock.patch('cdds.archive.mass.mass_put')
+    def test_transient_errors_are_retried(self, mock_mass_put, mock_mass_mkdirs):
+        mock_mass_put.side_effect = [MassError(MassFailure.SYSTEM_ERROR, ['moo', 'put']), None, None, None]
+
+        cdds.archive.mass.archive_files(self.var_list, False, max_concurrent=2, retry_delay=0)
+
+        self.assertEqual(4, mock_mass_put.call_count)
+        self.assertEqual([False, False, False, True],
+                         sorted(call.kwargs['ignore_existing'] for call in mock_mass_put.call_args_list))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2019-2025, Met Office.
+# (C) British Crown Copyright 2019-2026, Met Office.
 # Please see LICENSE.md for license details.
 # pylint: disable = missing-docstring
 """Tests for :mod:`store.py`."""
@@ -14,6 +14,7 @@ from textwrap import dedent
 from metomi.isodatetime.data import Calendar, TimePoint
 
 from cdds.common import configure_logger
+from cdds.common.crawler import FileRecord
 from cdds.common.plugins.plugins import PluginStore
 from cdds.common.plugins.plugin_loader import load_plugin
 
@@ -88,8 +89,8 @@ class TestRetrieveFilePaths(unittest.TestCase):
         PluginStore.clean_instance()
 
     @unittest.mock.patch('os.path.isdir')
-    @unittest.mock.patch('os.listdir')
-    def test_retrieve_file_paths(self, mock_os_listdir, mock_os_isdir):
+    @unittest.mock.patch('cdds.archive.store.DirectoryCrawler.crawl')
+    def test_retrieve_file_paths(self, mock_crawl, mock_os_isdir):
         mip_approved_vars = cdds.tests.test_archive.common.APPROVED_REF_WITH_STREAM
 
         additional_ids = {'tas': {'grid': 'dummygrid',
@@ -110,12 +111,12 @@ class TestRetrieveFilePaths(unittest.TestCase):
                                     },
                           }
 
-        output_path = cdds.tests.test_archive.common.DUMMY_VAR_OUT_DIR
         fname_template = (
             '{out_var_name}_{mip_table_id}_{model_id}_{experiment_id}_'
             '{variant_label}_{grid}_{start_date}-{end_date}.nc')
         var_files = []
         reference_vars = []
+        var_dirs = []
 
         request_items = self.request.metadata.items
         for var_dict in mip_approved_vars:
@@ -123,21 +124,20 @@ class TestRetrieveFilePaths(unittest.TestCase):
             test_dict.update(var_dict)
             test_dict.update(request_items)
             test_dict.update(additional_ids[var_dict['variable_id']])
-            fname1 = os.path.join(output_path,
-                                  var_dict['stream_id'],
-                                  var_dict['mip_table_id'],
-                                  var_dict['variable_id'],
+            fname1 = os.path.join(var_dict['output_dir'],
                                   fname_template.format(**test_dict))
-            var_files += [[fname1]]
+            var_files += [FileRecord(var_dict['output_dir'], os.path.basename(fname1))]
+            var_dirs += [var_dict['output_dir']]
             ref_dict = {'mip_output_files': [fname1],
                         'date_range': (TimePoint(year=2001, month_of_year=1, day_of_month=1),
                                        TimePoint(year=2050, month_of_year=1, day_of_month=1))}
             ref_dict.update(var_dict)
             reference_vars += [ref_dict]
-        mock_os_listdir.side_effect = var_files
+        mock_crawl.return_value = var_files
         mock_os_isdir.return_value = True
 
         output_vars = cdds.archive.store.retrieve_file_paths(mip_approved_vars, self.request)
+        mock_crawl.assert_called_once_with(var_dirs, recursive=False)
         self.assertEqual(len(reference_vars), len(output_vars))
         for ref_var, out_var in zip(reference_vars, output_vars):
             self.assertDictEqual(ref_var, out_var)
@@ -0,0 +1,86 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""Tests for the :mod:`cdds.common.crawler` module."""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from cdds.common.crawler import DirectoryCrawler, FileRecord
+
+
+class TestDirectoryCrawler(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for path in ['ap5/Amon/tas/tas_Amon_185001-185912.nc', 'ap5/Amon/tas/tas.txt', 'ap5/top.nc',
+                     'ap5_concat/Amon/tas/tas_Amon_185001-186912.nc', 'onm/Omon/tos/tos_Omon_185001-185912.nc']:
+            self._touch(path)
+        # Listings of recently modified directories are not kept by the crawler.
+        an_hour_ago = time.time() - 3600
+        for directory, _, _ in os.walk(self.root):
+            os.utime(directory, (an_hour_ago, an_hour_ago))
+
+    def _touch(self, path):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'w').close()
+
+    def _paths(self, records):
+        return [os.path.relpath(record.path, self.root) for record in records]
+
+    def test_recursive_crawl(self):
+        records = DirectoryCrawler(max_workers=4).crawl(self.root)
+        self.assertEqual([
+            'ap5/top.nc', 'ap5/Amon/tas/tas.txt', 'ap5/Amon/tas/tas_Amon_185001-185912.nc',
+            'ap5_concat/Amon/tas/tas_Amon_185001-186912.nc', 'onm/Omon/tos/tos_Omon_185001-185912.nc',
+        ], self._paths(records))
+
+    def test_non_recursive_crawl_of_several_roots(self):
+        roots = [os.path.join(self.root, 'ap5'), os.path.join(self.root, 'onm/Omon/tos')]
+        records = DirectoryCrawler().crawl(roots, recursive=False)
+        self.assertEqual([
+            FileRecord(roots[0], 'top.nc'), FileRecord(roots[1], 'tos_Omon_185001-185912.nc'),
+        ], records)
+
+    def test_facets_and_excluded_directories(self):
+        records = DirectoryCrawler().crawl(
+            self.root, file_pattern=r'^(?P<variable>[^_]+)_.*_(?P<start>\d{6})-(?P<end>\d{6})\.nc$',
+            exclude_pattern=r'_concat$')
+        self.assertEqual(['ap5/Amon/tas/tas_Amon_185001-185912.nc', 'onm/Omon/tos/tos_Omon_185001-185912.nc'],
+                         self._paths(records))
+        self.assertEqual({'variable': 'tas', 'start': '185001', 'end': '185912'}, records[0].facets)
+
+    def test_missing_directory_is_empty(self):
+        self.assertEqual([], DirectoryCrawler().crawl(os.path.join(self.root, 'missing')))
+
+    def test_unchanged_directories_are_not_scanned_again(self):
+        snapshot_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, snapshot_dir)
+        snapshot_file = os.path.join(snapshot_dir, 'directories.json')
+        crawler = DirectoryCrawler(snapshot_file=snapshot_file)
+        expected = crawler.crawl(self.root)
+        crawler.save()
+        self._touch('onm/Omon/tos/tos_Omon_186001-186912.nc')
+
+        with mock.patch('os.scandir', wraps=os.scandir) as scandir:
+            records = DirectoryCrawler(snapshot_file=snapshot_file).crawl(self.root)
+        self.assertEqual([mock.call(os.path.join(self.root, 'onm/Omon/tos'))], scandir.call_args_list)
+        self.assertEqual(self._paths(expected) + ['onm/Omon/tos/tos_Omon_186001-186912.nc'], self._paths(records))
+
+    def test_recently_modified_directories_are_scanned_again(self):
+        crawler = DirectoryCrawler()
+        crawler.crawl(self.root)
+        self._touch('onm/Omon/tos/tos_Omon_186001-186912.nc')
+        crawler.crawl(self.root)
+
+        with mock.patch('os.scandir', wraps=os.scandir) as scandir:
+            crawler.crawl(self.root)
+        self.assertEqual([mock.call(os.path.join(self.root, 'onm/Omon/tos'))], scandir.call_args_list)
+
+
+if __name__ == '__main__':
+    unittest.main()
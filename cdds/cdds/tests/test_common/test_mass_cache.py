@@ -0,0 +1,79 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+# pylint: disable = missing-docstring, invalid-name, too-many-public-methods
+"""Tests for the :mod:`cdds.common.mass_cache` module."""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from cdds.common.mass_cache import MassListingCache
+
+ARCHIVE_DIR = 'moose:/adhoc/projects/cdds/production/CMIP6/CMIP/MOHC/UKESM1-0-LL/historical/r1i1p1f2'
+
+
+class TestMassListingCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.db_file = os.path.join(self.temp_dir, 'mass_listings.db')
+        self.cache = MassListingCache(self.db_file, 600)
+        self.commands = []
+
+    def run_command(self, moo_cmd):
+        self.commands.append(moo_cmd)
+        return ['D moose:/adhoc', 'F {}/Amon/tas/gn/embargoed/v20190624/tas.nc'.format(moo_cmd[-1]), '']
+
+    def list(self, mass_path, cache=None):
+        return list((cache or self.cache).lines(['moo', 'ls', '-Rl', mass_path], self.run_command))
+
+    def test_listing_is_cached(self):
+        listing = self.list(ARCHIVE_DIR)
+        self.assertEqual(listing, self.list(ARCHIVE_DIR + '/'))
+        self.assertEqual(listing, self.list(ARCHIVE_DIR, MassListingCache(self.db_file, 600)))
+        self.assertEqual(1, len(self.commands))
+
+    def test_listing_expires(self):
+        self.list(ARCHIVE_DIR)
+        with mock.patch('cdds.common.mass_cache.time.time', return_value=time.time() + 601):
+            self.list(ARCHIVE_DIR)
+        self.assertEqual(2, len(self.commands))
+
+    def test_refresh(self):
+        self.list(ARCHIVE_DIR)
+        cache = MassListingCache(self.db_file, 600, refresh=True)
+        self.list(ARCHIVE_DIR, cache)
+        self.list(ARCHIVE_DIR, cache)
+        self.assertEqual(2, len(self.commands))
+
+    def test_incomplete_listing_is_not_cached(self):
+        lines = self.cache.lines(['moo', 'ls', '-Rl', ARCHIVE_DIR], self.run_command)
+        next(lines)
+        lines.close()
+        self.list(ARCHIVE_DIR)
+        self.assertEqual(2, len(self.commands))
+
+    def test_invalidate(self):
+        other_dir = ARCHIVE_DIR.replace('r1i1p1f2', 'r1i1p1f2_other')
+        for mass_path in [ARCHIVE_DIR, ARCHIVE_DIR + '/Amon/tas', other_dir]:
+            self.list(mass_path)
+        self.cache.invalidate([ARCHIVE_DIR + '/Amon/tas/gn/embargoed/v20190624/'])
+        for mass_path in [ARCHIVE_DIR, ARCHIVE_DIR + '/Amon/tas', other_dir]:
+            self.list(mass_path)
+        self.assertEqual(5, len(self.commands))
+
+        self.cache.invalidate([ARCHIVE_DIR])
+        self.list(ARCHIVE_DIR + '/Amon/tas')
+        self.assertEqual(6, len(self.commands))
+
+    def test_large_listing(self):
+        lines = ['F {}/file_{}.nc'.format(ARCHIVE_DIR, index) for index in range(100000)]
+        self.assertEqual(lines, list(self.cache.lines(['moo', 'ls', ARCHIVE_DIR], lambda moo_cmd: lines)))
+        self.assertEqual(lines, list(self.cache.lines(['moo', 'ls', ARCHIVE_DIR], self.run_command)))
+
+
+if __name__ == '__main__':
+    unittest.main()
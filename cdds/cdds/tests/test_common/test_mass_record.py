@@ -1,8 +1,91 @@
-# (C) British Crown Copyright 2019-2025, Met Office.
+# (C) British Crown Copyright 2019-2026, Met Office.
 # Please see LICENSE.md for license details.
 from unittest import TestCase
 
-from cdds.common.mass_record import get_records_from_stdout
+from cdds.common.mass_record import (
+    MassRecordIndex, SearchPathMatcher, filter_records_by_paths, get_records_from_lines, get_records_from_stdout)
+
+
+class TestMassRecordIndex(TestCase):
+
+    def test_children(self):
+        stdout = ('D owner         2021-03-08 11:21:10 GMT moose:/adhoc/users/owner/test1\n'
+                  'D owner         2021-03-08 11:21:10 GMT moose:/adhoc/users/owner/test1/v20210308\n'
+                  'F owner         2021-03-08 11:21:10 GMT moose:/adhoc/users/owner/test1/v20210308/a.nc\n'
+                  'F owner         2021-03-08 11:21:10 GMT moose:/adhoc/users/owner/test1/v20210308/b.nc\n'
+                  'D owner         2021-03-08 11:21:10 GMT moose:/adhoc/users/owner/test2')
+        index = MassRecordIndex(get_records_from_stdout(stdout))
+
+        self.assertEqual(['moose:/adhoc/users/owner/test1', 'moose:/adhoc/users/owner/test2'],
+                         index.children('moose:/adhoc/users/owner'))
+        self.assertEqual(['moose:/adhoc/users/owner/test1/v20210308/a.nc',
+                          'moose:/adhoc/users/owner/test1/v20210308/b.nc'],
+                         index.children('moose:/adhoc/users/owner/test1/v20210308'))
+        self.assertEqual([], index.children('moose:/adhoc/users/owner/test2'))
+        self.assertIn('moose:/adhoc/users/owner/test2', index)
+        self.assertTrue(index['moose:/adhoc/users/owner/test2'].is_empty)
+
+
+class TestSearchPathMatcher(TestCase):
+
+    PATHS = ['moose:/adhoc/users/owner', 'moose:/adhoc/users/owner/test', 'moose:/adhoc/users/owner/test1',
+             'moose:/adhoc/users/owner/test1/sub', 'moose:/adhoc/users/owner/test2/sub/file.nc',
+             'moose:/adhoc/users/other/test1', 'moose:/adhoc/users/owner/copy_of_moose:/adhoc/users/x']
+
+    def assertMatchesContainment(self, search_paths):
+        matcher = SearchPathMatcher(search_paths)
+        for path in self.PATHS:
+            self.assertEqual(any(search_path in path for search_path in search_paths), matcher.matches(path), path)
+
+    def test_moose_uris(self):
+        self.assertMatchesContainment(['moose:/adhoc/users/owner/test'])
+        self.assertMatchesContainment(['moose:/adhoc/users/owner/test1/sub', 'moose:/adhoc/users/owner/test1',
+                                       'moose:/adhoc/users/owner/test2/sub/file.nc', 'moose:/adhoc/users/x'])
+        self.assertMatchesContainment(['moose:/adhoc/users/other', 'moose:/adhoc/users/owner/test3'])
+
+    def test_partial_paths(self):
+        self.assertMatchesContainment(['test1/sub', 'moose:/adhoc/users/other'])
+        self.assertMatchesContainment(['file.nc'])
+        self.assertMatchesContainment([''])
+
+    def test_filter_records_by_paths(self):
+        records = get_records_from_stdout('\n'.join(
+            'D owner 2021-03-08 11:21:10 GMT {}'.format(path) for path in self.PATHS[:4]))
+        self.assertEqual(['moose:/adhoc/users/owner/test1', 'moose:/adhoc/users/owner/test1/sub'],
+                         sorted(filter_records_by_paths(records, ['moose:/adhoc/users/owner/test1', 'test1/sub'])))
+
+
+class TestGetRecordsFromLines(TestCase):
+
+    LINES = ['D owner 2021-03-08 11:21:10 GMT moose:/adhoc/users/owner/test1',
+             'D owner 2021-03-08 11:21:10 GMT moose:/adhoc/users/owner/test1/sub',
+             'D owner 2021-03-08 11:21:10 GMT moose:/adhoc/users/owner/test2',
+             'D owner 2021-03-08 11:21:10 GMT moose:/adhoc/users/owner/test2/sub',
+             'F owner 0.00 GBP 1024 2021-03-08 11:21:10 GMT moose:/adhoc/users/owner/test2/sub/file.nc',
+             '']
+
+    def test_store(self):
+        store = get_records_from_lines(iter(self.LINES))
+
+        self.assertEqual(5, len(store))
+        self.assertEqual([line.split()[-1] for line in self.LINES[:-1]], list(store))
+        self.assertEqual(['moose:/adhoc/users/owner/test1', 'moose:/adhoc/users/owner/test1/sub'],
+                         store.empty_dirs())
+        self.assertEqual(1024, store.size('moose:/adhoc/users/owner/test2/sub/file.nc'))
+        self.assertIsNone(store.size('moose:/adhoc/users/owner/test2'))
+        self.assertNotIn('moose:/adhoc/users/owner/test3', store)
+        self.assertRaises(KeyError, store.__getitem__, 'moose:/adhoc/users/owner/test3')
+
+        record = store['moose:/adhoc/users/owner/test2/sub']
+        self.assertEqual(('moose:/adhoc/users/owner/test2', True, False), (record.parent, record.is_dir,
+                                                                           record.is_empty))
+
+    def test_searched_paths(self):
+        store = get_records_from_lines(iter(self.LINES), ['test2/sub'])
+
+        self.assertEqual(['moose:/adhoc/users/owner/test2/sub', 'moose:/adhoc/users/owner/test2/sub/file.nc'],
+                         list(store))
+        self.assertEqual([], store.empty_dirs())
 
 
 class TestGetRecordsFromStdout(TestCase):
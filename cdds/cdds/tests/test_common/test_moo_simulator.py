@@ -0,0 +1,153 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+# pylint: disable = missing-docstring, invalid-name, too-many-public-methods
+"""Tests for :mod:`cdds.common.moo_simulator`, running the MASS functions against the simulator."""
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from cdds.archive.mass import archive_files
+from cdds.common import configure_logger
+from cdds.common.mass import (
+    mass_isdir, mass_list_files_recursively, mass_list_records, mass_mkdir, mass_mkdirs, mass_put)
+from cdds.common.mass_cache import MassListingCache, set_listing_cache
+from cdds.common.mass_exception import DirAlreadyExistMassError
+from cdds.common.moo_simulator import MooSimulator, MooSimulatorConfig, install_moo_simulator
+from cdds.extract.common import fetch_file_sizes_from_mass, fetch_filelist_from_mass, get_tape_limit, run_moo_cmd
+
+DATASET_PATH = 'adhoc/projects/cdds/production/CMIP6/CMIP/MOHC/UKESM1-0-LL/historical/r1i1p1f2/Amon/tas/gn/embargoed'
+
+
+def create_file(path, size=10):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file_handle:
+        file_handle.write(b'x' * size)
+
+
+class TestMooSimulator(unittest.TestCase):
+
+    def setUp(self):
+        configure_logger(None, logging.CRITICAL, False)
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.root = os.path.join(self.temp_dir, 'mass')
+        self.bin_dir = os.path.join(self.temp_dir, 'bin')
+        self.config = MooSimulatorConfig(root=self.root, files_per_tape=2, tape_limit=7)
+        install_moo_simulator(self.bin_dir, self.config)
+        path_patcher = mock.patch.dict(os.environ, {'PATH': '{}:{}'.format(self.bin_dir, os.environ['PATH'])})
+        path_patcher.start()
+        self.addCleanup(path_patcher.stop)
+        for index in range(3):
+            create_file(os.path.join(self.root, DATASET_PATH, 'v20190624',
+                                     'tas_Amon_UKESM1-0-LL_historical_r1i1p1f2_gn_{}01-{}12.nc'.format(
+                                         1850 + index, 1850 + index)), size=100 + index)
+
+    def test_list_files_recursively(self):
+        datasets = mass_list_files_recursively('moose:/adhoc/projects/cdds/production/CMIP6', False)
+        dataset = datasets['CMIP6.CMIP.MOHC.UKESM1-0-LL.historical.r1i1p1f2.Amon.tas.gn']
+        self.assertEqual(('embargoed', 'v20190624'), (dataset['status'], dataset['timestamp']))
+        self.assertEqual(['100', '101', '102'], [file_info['filesize'] for file_info in dataset['files']])
+
+    def test_list_records(self):
+        mass_mkdir('moose:/adhoc/empty', False, create_parents=True)
+        records = mass_list_records('moose:/adhoc', False)
+        self.assertTrue(records['moose:/adhoc/empty'].is_empty)
+        self.assertFalse(records['moose:/adhoc/projects'].is_empty)
+        self.assertEqual(0, len(mass_list_records('moose:/adhoc/missing', False)))
+
+    def test_mkdir_and_put(self):
+        mass_dir = 'moose:/adhoc/projects/cdds/new/dir'
+        self.assertFalse(mass_isdir(mass_dir, False))
+        source = os.path.join(self.temp_dir, 'local', 'file.nc')
+        create_file(source)
+        mass_put([source], mass_dir, False, True)
+
+        self.assertTrue(mass_isdir(mass_dir, False))
+        self.assertTrue(os.path.isfile(os.path.join(self.root, 'adhoc/projects/cdds/new/dir/file.nc')))
+        self.assertRaises(DirAlreadyExistMassError, mass_mkdir, mass_dir, False, False)
+
+    def test_interrupted_put_is_retried(self):
+        install_moo_simulator(self.bin_dir, MooSimulatorConfig(root=self.root, fail_first=1, failure_commands=['put']))
+        sources = [os.path.join(self.temp_dir, 'local', 'tas_{}.nc'.format(index)) for index in range(3)]
+        for source in sources:
+            create_file(source)
+        var_dict = {'mip_table_id': 'Amon', 'variable_id': 'tas', 'mass_status': 'FIRST_PUBLICATION',
+                    'mass_path': 'moose:/adhoc/projects/cdds/archive/tas', 'mass_status_suffix': 'embargoed/v20260101',
+                    'mip_output_files': sources}
+        # the first file was archived before the put failed
+        mass_dir = os.path.join(self.root, 'adhoc/projects/cdds/archive/tas/embargoed/v20260101')
+        create_file(os.path.join(mass_dir, 'tas_0.nc'))
+
+        archive_files([var_dict], False, retry_delay=0)
+        self.assertEqual(['tas_0.nc', 'tas_1.nc', 'tas_2.nc'], sorted(os.listdir(mass_dir)))
+
+    def test_mkdirs(self):
+        mass_dirs = ['moose:/adhoc/projects/cdds/new/{}'.format(name) for name in ('a', 'a/b', 'c')]
+        mass_dirs.append('moose:/{}/v20190624'.format(DATASET_PATH))
+        mass_mkdirs(mass_dirs, False, chunk_size=2)
+
+        self.assertTrue(all(mass_isdir(mass_dir, False) for mass_dir in mass_dirs))
+
+    def test_cached_listing_is_invalidated_by_put(self):
+        set_listing_cache(MassListingCache(os.path.join(self.temp_dir, 'mass_listings.db'), 600))
+        self.addCleanup(set_listing_cache, None)
+        records = sorted(mass_list_records('moose:/adhoc/projects/cdds', False))
+        shutil.rmtree(os.path.join(self.root, 'adhoc/projects/cdds/production/CMIP6/CMIP/MOHC'))
+        self.assertEqual(records, sorted(mass_list_records('moose:/adhoc/projects/cdds', False)))
+
+        source = os.path.join(self.temp_dir, 'local', 'file.nc')
+        create_file(source)
+        mass_put([source], 'moose:/adhoc/projects/cdds/new', False, True)
+        self.assertEqual(['moose:/adhoc/projects/cdds/new', 'moose:/adhoc/projects/cdds/new/file.nc',
+                          'moose:/adhoc/projects/cdds/production', 'moose:/adhoc/projects/cdds/production/CMIP6',
+                          'moose:/adhoc/projects/cdds/production/CMIP6/CMIP'],
+                         sorted(mass_list_records('moose:/adhoc/projects/cdds', False)))
+
+    def test_get_and_tapes(self):
+        target = os.path.join(self.temp_dir, 'input')
+        os.makedirs(target)
+        mass_dir = 'moose:/{}/v20190624'.format(DATASET_PATH)
+        code, _, _ = run_moo_cmd('get', ['-i', '{}/tas_Amon_UKESM1-0-LL_historical_r1i1p1f2_gn_185001-185012.nc'
+                                         ''.format(mass_dir), target])
+        self.assertEqual(0, code)
+        self.assertEqual(['tas_Amon_UKESM1-0-LL_historical_r1i1p1f2_gn_185001-185012.nc'], os.listdir(target))
+
+        code, output, _ = run_moo_cmd('getstats', [mass_dir])
+        tapes = [line.split()[0] for line in output.splitlines()]
+        self.assertEqual(3, len(tapes))
+        self.assertEqual(2, len(set(tapes)))
+        self.assertEqual((7, None), get_tape_limit())
+
+        files, error = fetch_filelist_from_mass(mass_dir)
+        self.assertIsNone(error)
+        self.assertEqual(['{}/{}'.format(mass_dir, name) for name in sorted(os.listdir(
+            os.path.join(self.root, DATASET_PATH, 'v20190624')))], [path for _, path in files])
+        self.assertEqual(dict(line.split()[::-1] for line in output.splitlines()),
+                         {path: tape for tape, path in files})
+
+    def test_file_sizes(self):
+        mass_dir = 'moose:/{}/v20190624'.format(DATASET_PATH)
+        sizes, error = fetch_file_sizes_from_mass(mass_dir)
+        self.assertIsNone(error)
+        self.assertEqual({'{}/tas_Amon_UKESM1-0-LL_historical_r1i1p1f2_gn_{}01-{}12.nc'.format(
+            mass_dir, 1850 + index, 1850 + index): 100 + index for index in range(3)}, sizes)
+
+    def test_missing_path(self):
+        code, output, _ = run_moo_cmd('get', ['moose:/adhoc/missing.nc', self.temp_dir])
+        self.assertEqual(2, code)
+        self.assertIn('PATH_DOES_NOT_EXIST', output)
+
+    def test_failure_injection(self):
+        config = MooSimulatorConfig(root=self.root, fail_first=2, failure_commands=['test'])
+        config_file = os.path.join(self.temp_dir, 'failing.json')
+        simulator = MooSimulator(config, config_file)
+        codes = [simulator.run(['test', '-d', 'moose:/adhoc'])[0] for _ in range(3)]
+        self.assertEqual([3, 3, 0], codes)
+        self.assertEqual(0, simulator.run(['ls', 'moose:/adhoc'])[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
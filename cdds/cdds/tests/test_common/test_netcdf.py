@@ -0,0 +1,65 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""Tests for the :mod:`cdds.common.netcdf` module."""
+import os
+import shutil
+import tempfile
+import unittest
+
+import netCDF4
+import numpy as np
+
+from cdds.common.netcdf import classic_netcdf_minimum_size
+
+
+def write_netcdf_file(filepath, variables=('tas',), times=(15.5, 45.0), file_format='NETCDF3_CLASSIC'):
+    """Write a |netCDF| file with a time axis and the given variables on
+    a small latitude axis."""
+    with netCDF4.Dataset(filepath, 'w', format=file_format) as dataset:
+        dataset.title = 'test file'
+        dataset.createDimension('time', None)
+        dataset.createDimension('lat', 3)
+        time = dataset.createVariable('time', 'f8', ('time',))
+        time.units = 'days since 1850-01-01'
+        time.calendar = '360_day'
+        time[:] = np.array(times)
+        dataset.createVariable('lat', 'f4', ('lat',))[:] = [-45.0, 0.0, 45.0]
+        for name in variables:
+            dataset.createVariable(name, 'f4', ('time', 'lat'))[:] = np.ones((len(times), 3))
+
+
+class TestClassicNetcdfMinimumSize(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.filepath = os.path.join(self.temp_dir, 'test.nc')
+
+    def test_classic_formats(self):
+        for file_format in ['NETCDF3_CLASSIC', 'NETCDF3_64BIT_OFFSET', 'NETCDF3_64BIT_DATA']:
+            write_netcdf_file(self.filepath, variables=('tas', 'pr'), file_format=file_format)
+            minimum_size = classic_netcdf_minimum_size(self.filepath)
+            file_size = os.path.getsize(self.filepath)
+            # Only the padding of the last variable may be missing.
+            self.assertTrue(file_size - 4 < minimum_size <= file_size, file_format)
+
+    def test_truncated_file(self):
+        write_netcdf_file(self.filepath)
+        file_size = os.path.getsize(self.filepath)
+        with open(self.filepath, 'r+b') as file_handle:
+            file_handle.truncate(file_size - 12)
+        self.assertEqual(file_size, classic_netcdf_minimum_size(self.filepath))
+
+    def test_netcdf4_file(self):
+        write_netcdf_file(self.filepath, file_format='NETCDF4')
+        self.assertIsNone(classic_netcdf_minimum_size(self.filepath))
+
+    def test_invalid_header(self):
+        write_netcdf_file(self.filepath)
+        with open(self.filepath, 'r+b') as file_handle:
+            file_handle.truncate(20)
+        self.assertRaises(ValueError, classic_netcdf_minimum_size, self.filepath)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""Tests for the :mod:`cdds.common.packing` module."""
+import unittest
+
+from cdds.common.packing import (CMIP7_MINIMUM_CHUNK_SIZE, data_chunk_is_large_enough, data_chunk_shape,
+                                 time_chunk_shape)
+
+
+class TestDataChunkShape(unittest.TestCase):
+
+    def test_matches_cmip7repack_example(self):
+        # From the cmip7repack manual: pr(1800, 144, 192) float32 is rechunked to 37 x 144 x 192.
+        self.assertEqual(data_chunk_shape((1800, 144, 192), 4), (37, 144, 192))
+
+    def test_leading_dimension_limited_by_data_shape(self):
+        self.assertEqual(data_chunk_shape((12, 144, 192), 4), (12, 144, 192))
+
+    def test_inner_chunk_shape_is_kept(self):
+        self.assertEqual(data_chunk_shape((1800, 85, 144, 192), 4, (1, 144, 192)), (37, 1, 144, 192))
+
+    def test_large_slices_give_one_element_chunks(self):
+        self.assertEqual(data_chunk_shape((100, 2048, 4096), 4), (1, 2048, 4096))
+
+    def test_target_shapes_are_large_enough(self):
+        for shape in [(1800, 144, 192), (1800, 85, 144, 192), (100, 2048, 4096)]:
+            self.assertTrue(data_chunk_is_large_enough(data_chunk_shape(shape, 4), 4), shape)
+
+    def test_small_chunks_are_not_large_enough(self):
+        self.assertFalse(data_chunk_is_large_enough((1, 144, 192), 4))
+        self.assertTrue(data_chunk_is_large_enough((CMIP7_MINIMUM_CHUNK_SIZE // 4,), 4))
+
+    def test_time_chunk_shape_is_single_chunk(self):
+        self.assertEqual(time_chunk_shape((1800, 2)), (1800, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""Tests for the :mod:`cdds.common.pp` module."""
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from cdds.common.pp import PPFieldHeader, read_pp_headers
+
+
+def write_pp_file(filepath, fields, byte_order='>', marker_type='i', word_size=4):
+    """Write a PP file with the given (stash, lbproc, lbtim, t1, t2) fields,
+    each with four data values."""
+    integer_type = 'i' if word_size == 4 else 'q'
+    real_type = 'f' if word_size == 4 else 'd'
+    with open(filepath, 'wb') as file_handle:
+        for stash, lbproc, lbtim, t1, t2 in fields:
+            integers = [0] * 45
+            integers[0:6] = t1
+            integers[6:12] = t2
+            integers[12] = lbtim
+            integers[24] = lbproc
+            integers[41] = stash
+            records = [
+                struct.pack('{}45{}19{}'.format(byte_order, integer_type, real_type), *integers, *[0.0] * 19),
+                struct.pack('{}4{}'.format(byte_order, real_type), 1.0, 2.0, 3.0, 4.0),
+            ]
+            for record in records:
+                marker = struct.pack(byte_order + marker_type, len(record))
+                file_handle.write(marker + record + marker)
+
+
+class TestReadPPHeaders(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.filepath = os.path.join(self.temp_dir, 'ap5.pp')
+        self.fields = [
+            (3236, 128, 122, (1850, 1, 1, 0, 0, 0), (1850, 2, 1, 0, 0, 0)),
+            (16203, 0, 121, (1850, 1, 16, 0, 0, 0), (1850, 1, 16, 0, 0, 0)),
+        ]
+        self.expected = [PPFieldHeader(*field) for field in self.fields]
+
+    def test_layouts(self):
+        for byte_order in '><':
+            for marker_type in 'iq':
+                for word_size in (4, 8):
+                    write_pp_file(self.filepath, self.fields, byte_order, marker_type, word_size)
+                    self.assertEqual(self.expected, read_pp_headers(self.filepath),
+                                     (byte_order, marker_type, word_size))
+
+    def test_truncated_file(self):
+        write_pp_file(self.filepath, self.fields)
+        with open(self.filepath, 'r+b') as file_handle:
+            file_handle.truncate(os.path.getsize(self.filepath) - 2)
+        self.assertRaises(ValueError, read_pp_headers, self.filepath)
+
+    def test_not_a_pp_file(self):
+        with open(self.filepath, 'w') as file_handle:
+            file_handle.write('netcdf foo {}')
+        self.assertRaises(ValueError, read_pp_headers, self.filepath)
+
+    def test_empty_file(self):
+        open(self.filepath, 'w').close()
+        self.assertRaises(ValueError, read_pp_headers, self.filepath)
+
+
+if __name__ == '__main__':
+    unittest.main()
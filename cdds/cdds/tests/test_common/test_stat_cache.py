@@ -0,0 +1,75 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+# pylint: disable = missing-docstring, invalid-name, too-many-public-methods
+"""Tests for the :mod:`cdds.common.stat_cache` module."""
+import os
+import shutil
+import tempfile
+import unittest
+
+from cdds.common.stat_cache import StatCache
+
+
+class TestStatCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.path = os.path.join(self.temp_dir, 'tas_Amon_185001-185012.nc')
+        with open(self.path, 'w') as file_handle:
+            file_handle.write('data')
+
+    def add(self, cache, value):
+        stat_result = os.stat(self.path)
+        cache.add(self.path, value, stat_result.st_size, stat_result.st_mtime_ns)
+
+    def test_value_of_unchanged_path(self):
+        cache = StatCache()
+        self.add(cache, {'passed': True})
+        self.assertEqual({'passed': True}, cache.get(self.path))
+        self.assertEqual({'passed': True}, cache.get(self.path, os.stat(self.path)))
+
+    def test_changed_path(self):
+        cache = StatCache()
+        self.add(cache, {'passed': True})
+        os.utime(self.path, (0, 0))
+        self.assertIsNone(cache.get(self.path))
+
+        self.add(cache, {'passed': True})
+        with open(self.path, 'a') as file_handle:
+            file_handle.write('more data')
+        os.utime(self.path, (0, 0))
+        self.assertIsNone(cache.get(self.path))
+
+    def test_missing_path(self):
+        cache = StatCache()
+        self.add(cache, [1, 2])
+        os.remove(self.path)
+        self.assertIsNone(cache.get(self.path))
+        self.assertIsNone(cache.get(os.path.join(self.temp_dir, 'other.nc')))
+
+    def test_discard(self):
+        cache = StatCache()
+        self.add(cache, [1, 2])
+        cache.discard(self.path)
+        cache.discard(self.path)
+        self.assertIsNone(cache.get(self.path))
+
+    def test_saved_and_loaded(self):
+        cache_file = os.path.join(self.temp_dir, 'cache', 'values.json')
+        cache = StatCache(cache_file)
+        self.add(cache, {'files': ['a.nc'], 'size': 4})
+        cache.save()
+
+        self.assertEqual(['values.json'], os.listdir(os.path.dirname(cache_file)))
+        self.assertEqual({'files': ['a.nc'], 'size': 4}, StatCache(cache_file).get(self.path))
+
+    def test_save_without_file(self):
+        cache = StatCache()
+        self.add(cache, [1, 2])
+        cache.save()
+        self.assertEqual([os.path.basename(self.path)], os.listdir(self.temp_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,18 @@
-# (C) British Crown Copyright 2017-2025, Met Office.
+# (C) British Crown Copyright 2017-2026, Met Office.
 # Please see LICENSE.md for license details.
 # pylint: disable = missing-docstring
 """Tests for the :mod:`cdds.convert.concatenation` module."""
 from collections import defaultdict
 import logging
 import os
+import shutil
+import tempfile
 import unittest
 from unittest import mock
 from unittest.mock import patch
 
+import netCDF4
+import numpy as np
 import pytest
 
 from metomi.isodatetime.data import TimePoint, Calendar
@@ -19,6 +23,7 @@ from cdds.common.plugins.plugin_loader import load_plugin
 from cdds.convert import concatenation
 from cdds.convert.concatenation import concatenation_setup, NCRCAT
 from cdds.convert.exceptions import ConcatenationError
+from cdds.convert.packing import check_packing
 
 
 MINIMAL_CDL = '''
@@ -58,27 +63,29 @@ class TestConcatenation(unittest.TestCase):
         if os.path.exists(self.testing_db):
             os.unlink(self.testing_db)
 
-    @mock.patch('cdds.convert.concatenation.os.walk')
-    def test_list_cmor_files(self, mock_walk):
-        # 1850 file in current directory, 1851-1859 in subdirectories
+    def test_list_cmor_files(self):
+        # 1850 file in top directory, 1851-1859 in subdirectories
         # junk.nc files littered throughout
         file_template = ('cli_Amon_HadGEM3-GC31-LL_piControl_r1i1p1f1_gn_'
                          '{0}01-{0}12.nc')
-        retval = [('.', [], [file_template.format(1850), 'junk_1850.nc'])]
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        filenames = [file_template.format(1850), 'junk_1850.nc']
         for i in range(1851, 1860):
-            retval.append((str(i), [], [file_template.format(i),
-                                        'junk_{}.nc'.format(i)]))
+            os.mkdir(os.path.join(location, str(i)))
+            filenames += [os.path.join(str(i), file_template.format(i)),
+                          os.path.join(str(i), 'junk_{}.nc'.format(i))]
+        for filename in filenames:
+            open(os.path.join(location, filename), 'w').close()
 
-        mock_walk.return_value = retval
-
-        ncfiles = concatenation_setup.list_cmor_files('.', '*',
+        ncfiles = concatenation_setup.list_cmor_files(location, '*',
                                                       recursive=False)
-        expected = [os.path.join('.', file_template.format(1850))]
+        expected = [os.path.join(location, file_template.format(1850))]
         self.assertEqual(ncfiles, expected, 'Non-recursive test')
 
-        ncfiles = concatenation_setup.list_cmor_files('.', '*',
+        ncfiles = concatenation_setup.list_cmor_files(location, '*',
                                                       recursive=True)
-        expected += [os.path.join(str(i), file_template.format(i))
+        expected += [os.path.join(location, str(i), file_template.format(i))
                      for i in range(1851, 1860)]
         self.assertEqual(ncfiles, expected, 'Recursive test')
 
@@ -111,6 +118,75 @@ class TestConcatenation(unittest.TestCase):
             candidate=candidate_path)
         self.assertEqual(dummy_commands, expected)
 
+    def _write_files(self, temp_dir, years, steps_per_year=180):
+        input_files = []
+        for year in years:
+            input_file = os.path.join(temp_dir, 'pr_{}.nc'.format(year))
+            with netCDF4.Dataset(input_file, 'w') as dataset:
+                dataset.createDimension('time', None)
+                dataset.createDimension('bnds', 2)
+                dataset.createDimension('lat', 144)
+                dataset.createDimension('lon', 192)
+                time = dataset.createVariable('time', 'f8', ('time',))
+                time.bounds = 'time_bnds'
+                time[:] = (year - 1850) * steps_per_year + np.arange(steps_per_year)
+                dataset.createVariable('time_bnds', 'f8', ('time', 'bnds'))[:] = np.column_stack((time[:], time[:] + 1))
+                dataset.createVariable('pr', 'f4', ('time', 'lat', 'lon'), chunksizes=(1, 144, 192))[:] = 1
+                dataset.variable_id = 'pr'
+            input_files.append(input_file)
+        return input_files
+
+    def test_packing_options(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        input_files = self._write_files(temp_dir, range(1850, 1860))
+
+        options = concatenation.packing_options(input_files)
+
+        self.assertListEqual(options, ['--cnk_plc=all', '--cnk_dmn', 'time,37',
+                                       '--cnk_dmn', 'time,time,1800', '--cnk_dmn', 'time_bnds,time,1800'])
+
+    def test_concatenate_files_with_packing_options(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        input_files = self._write_files(temp_dir, range(1850, 1860))
+        candidate_path = os.path.join(temp_dir, 'candidate.nc')
+
+        command = concatenation.concatenate_files(input_files, 'output.nc', candidate_path, dummy_run=True)
+
+        self.assertEqual(
+            NCRCAT + ['--cnk_plc=all', '--cnk_dmn', 'time,37', '--cnk_dmn', 'time,time,1800',
+                      '--cnk_dmn', 'time_bnds,time,1800'] + input_files + ['-o', candidate_path],
+            command.split(' '))
+
+    def test_packing_options_data_in_single_chunk(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        input_files = self._write_files(temp_dir, range(1850, 1852), steps_per_year=12)
+
+        self.assertListEqual(concatenation.packing_options(input_files),
+                             ['--cnk_plc=all', '--cnk_dmn', 'time,24'])
+
+    @unittest.skipUnless(shutil.which('ncrcat'), 'requires ncrcat')
+    def test_concatenated_file_is_packed(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        input_files = self._write_files(temp_dir, range(1850, 1853))
+        output_file = os.path.join(temp_dir, 'output', 'pr_1850-1852.nc')
+        os.makedirs(os.path.dirname(output_file))
+
+        concatenation.concatenate_files(input_files, output_file, output_file + '.tmp')
+
+        verdict = check_packing(output_file)
+        self.assertTrue(verdict.passed, verdict.message)
+
+    def test_packing_options_missing_files(self):
+        self.addCleanup(logging.disable, logging.root.manager.disable)
+        logging.disable(logging.NOTSET)
+        with self.assertLogs('cdds.convert.concatenation', 'WARNING') as logs:
+            self.assertListEqual(concatenation.packing_options(['1/a.nc', '2/b.nc']), [])
+        self.assertIn('default chunking', logs.output[0])
+
     @unittest.mock.patch('os.rename')
     def test_move_single_file(self, mock_os_rename):
         input_file = ['test/path/ap5_concat/file_a.nc']
@@ -0,0 +1,121 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""Tests of the in-process CMIP7 packing checks."""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import netCDF4
+import numpy as np
+
+from cdds.convert.packing import PACKING_FAIL, PACKING_PASS, PackingCache, check_packing, check_packing_of_files
+from cdds.convert.repack import repack_files, verify_repacked_files
+
+
+def write_netcdf_file(file_path, chunked):
+    with netCDF4.Dataset(file_path, 'w') as dataset:
+        dataset.createDimension('time', None if chunked else 5)
+        dataset.createDimension('lat', 2)
+        time = dataset.createVariable('time', 'f8', ('time',))
+        time.bounds = 'time_bnds'
+        if chunked:
+            data = dataset.createVariable('tas', 'f4', ('time', 'lat'), chunksizes=(1, 2))
+        else:
+            data = dataset.createVariable('tas', 'f4', ('time', 'lat'), contiguous=True)
+        dataset.variable_id = 'tas'
+        time[:] = np.arange(5)
+        data[:] = np.ones((5, 2))
+
+
+class TestCheckPacking(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.packed_file = os.path.join(self.temp_dir, 'packed.nc')
+        self.unpacked_file = os.path.join(self.temp_dir, 'unpacked.nc')
+        write_netcdf_file(self.packed_file, chunked=False)
+        write_netcdf_file(self.unpacked_file, chunked=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_packed_file_passes(self):
+        verdict = check_packing(self.packed_file)
+        self.assertEqual(verdict.return_code, PACKING_PASS)
+        self.assertTrue(verdict.passed)
+
+    def test_small_data_chunks_fail(self):
+        verdict = check_packing(self.unpacked_file)
+        self.assertEqual(verdict.return_code, PACKING_FAIL)
+        self.assertIn("data variable 'tas' has uncompressed chunk size 8 B", verdict.message)
+
+    def test_blank_file_raises_error(self):
+        blank_file = os.path.join(self.temp_dir, 'blank.nc')
+        open(blank_file, 'w').close()
+        with self.assertRaises(RuntimeError):
+            check_packing(blank_file)
+
+    @unittest.skipUnless(os.path.isdir('/proc/self/fd'), 'requires /proc')
+    def test_files_are_closed(self):
+        open_files = len(os.listdir('/proc/self/fd'))
+        for _ in range(20):
+            check_packing(self.packed_file)
+        self.assertEqual(open_files, len(os.listdir('/proc/self/fd')))
+
+    def test_cached_verdicts_are_reused(self):
+        cache = PackingCache()
+        check_packing_of_files([self.packed_file, self.unpacked_file], cache=cache)
+        with mock.patch('cdds.convert.packing.check_packing') as mock_check:
+            verdicts = check_packing_of_files([self.packed_file, self.unpacked_file], cache=cache)
+            mock_check.assert_not_called()
+        self.assertTrue(verdicts[self.packed_file].passed)
+        self.assertFalse(verdicts[self.unpacked_file].passed)
+
+    def test_changed_file_is_checked_again(self):
+        cache = PackingCache()
+        check_packing_of_files([self.packed_file], cache=cache)
+        os.utime(self.packed_file, (0, 0))
+        self.assertIsNone(cache.get(self.packed_file))
+
+    def test_cache_is_saved_and_loaded(self):
+        cache_file = os.path.join(self.temp_dir, 'cache', 'repack_cache_ap5.json')
+        cache = PackingCache(cache_file)
+        check_packing_of_files([self.packed_file, self.unpacked_file], cache=cache)
+        cache.save()
+        reloaded = PackingCache(cache_file)
+        self.assertTrue(reloaded.get(self.packed_file).passed)
+        self.assertFalse(reloaded.get(self.unpacked_file).passed)
+
+
+class TestRepackWithCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.packed_file = os.path.join(self.temp_dir, 'packed.nc')
+        self.unpacked_file = os.path.join(self.temp_dir, 'unpacked.nc')
+        write_netcdf_file(self.packed_file, chunked=False)
+        write_netcdf_file(self.unpacked_file, chunked=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    @mock.patch('cdds.convert.repack.run_cmip7repack')
+    def test_only_unpacked_files_are_repacked_and_verified(self, mock_repack):
+        def fake_repack(file_path):
+            write_netcdf_file(file_path, chunked=False)
+            return 0
+
+        mock_repack.side_effect = fake_repack
+        cache = PackingCache()
+        repack_files([self.packed_file, self.unpacked_file], cache)
+        mock_repack.assert_called_once_with(self.unpacked_file)
+
+        with mock.patch('cdds.convert.packing.check_packing', wraps=check_packing) as mock_check:
+            verify_repacked_files([self.packed_file, self.unpacked_file], cache)
+            mock_check.assert_called_once_with(self.unpacked_file)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,16 @@
-# (C) British Crown Copyright 2017-2025, Met Office.
+# (C) British Crown Copyright 2017-2026, Met Office.
 # Please see LICENSE.md for license details.
 """Tests of mip_convert_wrapper.actions"""
+import json
+import os
+import shutil
+import tempfile
 import unittest
 
 from cdds.convert.exceptions import MipConvertWrapperDiskUsageError
-from cdds.convert.mip_convert_wrapper.actions import (check_disk_usage,
-                                                      get_disk_usage_in_mb)
+from cdds.convert.mip_convert_wrapper.actions import (DiskUsageTracker, check_disk_usage,
+                                                      get_disk_usage_in_mb, report_disk_usage)
+from cdds.convert.mip_convert_wrapper.constants import BYTES_PER_MB, RESOURCE_RECORD_FILENAME
 from unittest import mock
 
 
@@ -41,5 +46,57 @@ class TestCheckDiskUsage(unittest.TestCase):
             check_disk_usage(staging_dir, max_space_in_mb)
 
 
+class TestDiskUsageTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.staging_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.staging_dir, 'output', 'ap5')
+        os.makedirs(self.output_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.staging_dir)
+
+    def _write_file(self, path, size):
+        with open(path, 'wb') as file_handle:
+            file_handle.write(b'\x01' * size)
+        return path
+
+    def test_add_file_counts_each_file_once(self):
+        tracker = DiskUsageTracker(self.staging_dir)
+        path = self._write_file(os.path.join(self.staging_dir, 'input.pp'), BYTES_PER_MB)
+        tracker.add_file(path)
+        tracker.add_file(path)
+        self.assertEqual(tracker.usage_in_bytes, os.stat(path).st_blocks * 512)
+        self.assertEqual(tracker.usage_in_mb, 1)
+
+    def test_add_directory_and_remove_file(self):
+        tracker = DiskUsageTracker(self.staging_dir)
+        first = self._write_file(os.path.join(self.output_dir, 'tas.nc'), 2 * BYTES_PER_MB)
+        self._write_file(os.path.join(self.output_dir, 'pr.nc'), BYTES_PER_MB // 2)
+        tracker.add_directory(os.path.join(self.staging_dir, 'output'))
+        self.assertEqual(tracker.usage_in_mb, 3)
+        tracker.remove_file(first)
+        self.assertEqual(tracker.usage_in_mb, 1)
+
+    @mock.patch('subprocess.check_output')
+    def test_tracker_replaces_du(self, mock_check_output):
+        tracker = DiskUsageTracker(self.staging_dir)
+        tracker.add_file(self._write_file(os.path.join(self.staging_dir, 'input.pp'), 3 * BYTES_PER_MB))
+        self.assertEqual(get_disk_usage_in_mb(self.staging_dir, tracker), 3)
+        with self.assertRaises(MipConvertWrapperDiskUsageError):
+            check_disk_usage(self.staging_dir, 2, tracker)
+        mock_check_output.assert_not_called()
+
+    def test_report_disk_usage_writes_resource_record(self):
+        tracker = DiskUsageTracker(self.staging_dir)
+        tracker.add_file(self._write_file(os.path.join(self.staging_dir, 'input.pp'), 2 * BYTES_PER_MB))
+        log_dir = os.path.join(self.staging_dir, 'log')
+        os.makedirs(log_dir)
+        report_disk_usage(self.staging_dir, tracker, log_dir)
+        with open(os.path.join(log_dir, RESOURCE_RECORD_FILENAME)) as file_handle:
+            record = json.load(file_handle)
+        self.assertDictEqual(record, {'used_storage': 2})
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,10 +1,12 @@
-# (C) British Crown Copyright 2017-2025, Met Office.
+# (C) British Crown Copyright 2017-2026, Met Office.
 # Please see LICENSE.md for license details.
 # pylint: disable = missing-docstring, invalid-name, too-many-public-methods
 
 """Tests for common utility functions in the extract module"""
+import logging
 import os
 import shutil
+import tempfile
 import unittest
 from unittest.mock import patch
 
@@ -12,17 +14,25 @@ import pytest
 
 from cdds.extract.common import (
     FileContentError,
+    MissingVariablesError,
     StreamValidationResult,
+    TimeAxisError,
+    TruncatedFileError,
+    UnreadableFileError,
     build_mass_location,
     calculate_period,
     check_moo_cmd,
     chunk_by_files_and_tapes,
+    plan_chunks,
     condense_constraints,
     create_dir,
+    fetch_filelist_from_mass,
     validate_netcdf,
 )
-from cdds.extract.validate import check_expected_stash, get_stash_fields
+from cdds.extract.validate import check_expected_stash, get_stash_fields, validate_directory_netcdf
 from cdds.tests.test_common.common import create_simple_netcdf_file
+from cdds.tests.test_common.test_netcdf import write_netcdf_file
+from cdds.tests.test_common.test_pp import write_pp_file
 from cdds.tests.test_extract.common import break_netcdf_file
 from cdds.tests.test_extract.constants import (
     MINIMAL_CDL,
@@ -74,7 +84,7 @@ class TestCommon(unittest.TestCase):
         self.assertEqual(validation_result.file_errors["foo/foobaz.pp"].stash_errors, [1234])
 
     @patch("os.listdir")  # decorators are applied in reverse order :S
-    @patch("cdds.extract.common.get_stash_from_pp")
+    @patch("cdds.extract.validate.get_stash_from_pp")
     def test_stash_fields_validation_unreadable(self, mock_get_stash_from_pp, mock_listdir):
         mock_get_stash_from_pp.return_value = None
         mock_listdir.return_value = ["bar.pp"]
@@ -85,6 +95,21 @@ class TestCommon(unittest.TestCase):
         self.assertIsInstance(validation_result.file_errors["foo/bar.pp"], FileContentError)
         self.assertEqual(validation_result.file_errors["foo/bar.pp"].error_message, "unreadable file")
 
+    def test_stash_fields_read_from_pp_headers(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        times = ((1850, 1, 1, 0, 0, 0), (1850, 2, 1, 0, 0, 0))
+        write_pp_file(os.path.join(path, "ap5a.pp"), [(3236, 128, 122, *times)] * 2 + [(16203, 128, 122, *times)])
+        write_pp_file(os.path.join(path, "ap5b.pp"), [(3236, 128, 122, *times)])
+        open(os.path.join(path, "ap5c.pp"), "w").close()
+
+        for max_workers in (1, 2):
+            validation_result = StreamValidationResult("ap5")
+            stash_in_file = get_stash_fields(path, validation_result, max_workers)
+            self.assertEqual({"ap5a.pp": {"3236": 2, "16203": 1}, "ap5b.pp": {"3236": 1}, "ap5c.pp": None},
+                             stash_in_file)
+            self.assertEqual([os.path.join(path, "ap5c.pp")], list(validation_result.file_errors))
+
     def test_stash_fields_validation_pass(self):
         stash_in_file = {"file1.pp": {1234: 1, 5678: 1}}
         expected_stash_codes = {1234, 5678}
@@ -142,6 +167,54 @@ class TestCommon(unittest.TestCase):
         self.assertIsInstance(error, FileContentError)
         os.remove(nc_path)
 
+    def test_ncdf_validation_typed_errors(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        nc_path = os.path.join(temp_dir, "ocean_18500101-18500301.nc")
+
+        write_netcdf_file(nc_path, variables=("tas", "pr"))
+        self.assertIsNone(validate_netcdf(nc_path, ["tas", "pr"], ("18500101", "18500301")))
+
+        error = validate_netcdf(nc_path, ["tas", "pr", "uas", "vas"])
+        self.assertIsInstance(error, MissingVariablesError)
+        self.assertEqual(["uas", "vas"], error.missing_variables)
+
+        error = validate_netcdf(nc_path, time_range=("18500101", "18500201"))
+        self.assertIsInstance(error, TimeAxisError)
+
+        write_netcdf_file(nc_path, times=())
+        self.assertIsInstance(validate_netcdf(nc_path), TimeAxisError)
+
+        write_netcdf_file(nc_path)
+        with open(nc_path, "r+b") as file_handle:
+            file_handle.truncate(os.path.getsize(nc_path) - 12)
+        self.assertIsInstance(validate_netcdf(nc_path), TruncatedFileError)
+
+        write_netcdf_file(nc_path, file_format="NETCDF4")
+        with open(nc_path, "r+b") as file_handle:
+            file_handle.truncate(os.path.getsize(nc_path) // 2)
+        self.assertIsInstance(validate_netcdf(nc_path), UnreadableFileError)
+
+    def test_directory_ncdf_validation(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        good_file = "cice_18500101-18500301.nc"
+        missing_file = "nemo_18500101-18500301_grid-T.nc"
+        outside_file = "nemo_18500301-18500501_grid-T.nc"
+        for filename in [good_file, missing_file, outside_file]:
+            write_netcdf_file(os.path.join(temp_dir, filename))
+        expected_variables = {good_file: ["tas"], missing_file: ["tos"], outside_file: ["tas"]}
+
+        for max_workers in [1, 2]:
+            validation_result = StreamValidationResult("onm")
+            validate_directory_netcdf(temp_dir, validation_result, expected_variables, max_workers)
+            self.assertFalse(validation_result.valid)
+            self.assertEqual({os.path.join(temp_dir, missing_file): "Missing variables: tos",
+                              os.path.join(temp_dir, outside_file): "Time values from 1850-01-16 12:00:00 to "
+                                                                    "1850-02-16 00:00:00 are outside "
+                                                                    "18500301-18500501"},
+                             {path: error.error_message for path, error in validation_result.file_errors.items()})
+
     def test_check_moo_cmd_with_status_zero(self):
         code = 0
         status = check_moo_cmd(code, "")
@@ -318,6 +391,90 @@ class TestChunkByFilesAndTapes(unittest.TestCase):
         self.assertEqual(expected_fileset, chunk_by_files_and_tapes(self.tapes_dict, tape_limit, file_limit))
 
 
+class TestPlanChunks(unittest.TestCase):
+
+    def setUp(self):
+        self.tapes_dict = {
+            'tape1': ['t1_file1', 't1_file2'],
+            'tape2': ['t2_file3', 't2_file4', 't2_file5', 't2_file6', 't2_file7', 't2_file8', 't2_file9', 't2_file10'],
+            'tape3': ['t3_file11'],
+            'tape4': ['t4_file12'],
+            'tape5': ['t5_file13'],
+            'tape6': ['t6_file14'],
+            'tape7': ['t7_file15'],
+            'tape8': ['t8_file16', 't8_file17', 't8_file18', 't8_file19', 't8_file20']
+        }
+
+    def test_plan_tape_limit3_file_limit4(self):
+        plan = plan_chunks(self.tapes_dict, 3, 4)
+        expected_chunks = [
+            ['t2_file3', 't2_file4', 't2_file5', 't2_file6'],
+            ['t2_file7', 't2_file8', 't2_file9', 't2_file10'],
+            ['t8_file16', 't8_file17', 't8_file18', 't8_file19'],
+            ['t1_file1', 't1_file2', 't3_file11', 't4_file12'],
+            ['t5_file13', 't6_file14', 't7_file15'],
+            ['t8_file20'],
+        ]
+        self.assertEqual(expected_chunks, plan.chunks)
+        self.assertEqual([{'tape2'}, {'tape2'}, {'tape8'}, {'tape1', 'tape3', 'tape4'},
+                          {'tape5', 'tape6', 'tape7'}, {'tape8'}], plan.chunk_tapes)
+        self.assertEqual(10, plan.mounts)
+        self.assertEqual(11, plan.naive_mounts)
+
+    def test_plan_respects_limits_and_keeps_all_files(self):
+        all_files = sorted(file for files in self.tapes_dict.values() for file in files)
+        for tape_limit, file_limit in [(1, 1), (2, 4), (4, 2), (3, 7), (50, 1000)]:
+            plan = plan_chunks(self.tapes_dict, tape_limit, file_limit)
+            self.assertEqual(all_files, sorted(file for chunk in plan.chunks for file in chunk))
+            for chunk, tapes in zip(plan.chunks, plan.chunk_tapes):
+                self.assertLessEqual(len(chunk), file_limit)
+                self.assertLessEqual(len(tapes), tape_limit)
+            # each tape is mounted once for every file_limit files on it
+            self.assertEqual(sum(-(-len(files) // file_limit) for files in self.tapes_dict.values()), plan.mounts)
+            self.assertLessEqual(plan.mounts, plan.naive_mounts)
+
+
+class TestFetchFilelistFromMass(unittest.TestCase):
+
+    MASS_DIR = 'moose:/crum/u-ab123/onm.nc.file'
+
+    def setUp(self):
+        # other tests may leave logging disabled
+        self.addCleanup(logging.disable, logging.root.manager.disable)
+        logging.disable(logging.NOTSET)
+
+    def run_command(self, getstats_output):
+        def run_command(command):
+            if command[1] == 'getstats':
+                if getstats_output is None:
+                    raise RuntimeError('Problem running command "moo getstats"')
+                return getstats_output
+            return '{0}/a.nc\n{0}/b.nc\n\n{0}/c d.nc\n'.format(self.MASS_DIR)
+        return run_command
+
+    @patch('cdds.extract.common.run_command')
+    def test_tapes_from_getstats(self, mock_run_command):
+        mock_run_command.side_effect = self.run_command(
+            'T00001 {0}/a.nc\nT00002 {0}/b.nc\nsummary line\n'.format(self.MASS_DIR))
+        with self.assertLogs('cdds.extract.common', 'WARNING') as logs:
+            files, error = fetch_filelist_from_mass(self.MASS_DIR)
+
+        self.assertIsNone(error)
+        self.assertEqual([('T00001', self.MASS_DIR + '/a.nc'), ('T00002', self.MASS_DIR + '/b.nc'),
+                          ('01', self.MASS_DIR + '/c d.nc')], files)
+        self.assertEqual(1, len(logs.records))
+        self.assertIn('c d.nc', logs.output[0])
+
+    @patch('cdds.extract.common.run_command')
+    def test_tapes_not_available(self, mock_run_command):
+        mock_run_command.side_effect = self.run_command(None)
+        files, error = fetch_filelist_from_mass(self.MASS_DIR)
+
+        self.assertIsNone(error)
+        self.assertEqual({'01'}, {tape for tape, _ in files})
+        self.assertEqual(3, len(files))
+
+
 class TestCondenseStashes(unittest.TestCase):
 
     def test_condense_constraints(self):
@@ -0,0 +1,124 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+# pylint: disable = missing-docstring, invalid-name, too-many-public-methods
+"""Tests for the :mod:`cdds.extract.manifest` module."""
+import os
+import shutil
+import tempfile
+import unittest
+
+from cdds.extract.manifest import ExtractionManifest, RETRIEVAL_FAILED, RETRIEVAL_RETRIEVED
+
+MASS_DIR = 'moose:/crum/u-ab123/onm.nc.file'
+MASS_PATHS = ['{}/nemo_ab123o_1m_1850{:02d}01-1850{:02d}01_grid-T.nc'.format(MASS_DIR, month, month + 1)
+              for month in range(1, 4)]
+
+
+class TestExtractionManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.target = os.path.join(self.temp_dir, 'onm')
+        os.makedirs(self.target)
+        self.manifest = ExtractionManifest(os.path.join(self.temp_dir, 'onm_manifest.db'))
+        self.addCleanup(self.manifest.close)
+
+    def retrieve(self, mass_path, size=10):
+        filepath = os.path.join(self.target, os.path.basename(mass_path))
+        with open(filepath, 'wb') as file_handle:
+            file_handle.write(b'x' * size)
+        return filepath
+
+    def test_new_files_are_outstanding(self):
+        self.manifest.register(dict.fromkeys(MASS_PATHS, 10))
+        self.assertEqual(MASS_PATHS, self.manifest.outstanding(self.target, MASS_PATHS))
+
+    def test_resume_requests_only_missing_files(self):
+        self.manifest.register(dict.fromkeys(MASS_PATHS, 10))
+        for mass_path in MASS_PATHS[:2]:
+            self.retrieve(mass_path)
+        states = self.manifest.update(self.target, MASS_PATHS)
+
+        self.assertEqual({RETRIEVAL_RETRIEVED: 2, RETRIEVAL_FAILED: 1}, states)
+        self.assertEqual(MASS_PATHS[2:], self.manifest.outstanding(self.target, MASS_PATHS))
+
+        self.retrieve(MASS_PATHS[2])
+        self.manifest.update(self.target, MASS_PATHS[2:])
+        self.assertEqual([], self.manifest.outstanding(self.target, MASS_PATHS))
+        self.assertEqual({'retrieved/unknown': 3}, self.manifest.summary())
+
+    def test_manifest_persists(self):
+        self.manifest.register(dict.fromkeys(MASS_PATHS, 10))
+        self.retrieve(MASS_PATHS[0])
+        self.manifest.update(self.target, MASS_PATHS)
+        self.manifest.close()
+
+        self.manifest = ExtractionManifest(os.path.join(self.temp_dir, 'onm_manifest.db'))
+        self.manifest.register(dict.fromkeys(MASS_PATHS, 10))
+        self.assertEqual(MASS_PATHS[1:], self.manifest.outstanding(self.target, MASS_PATHS))
+
+    def test_invalid_file_is_removed_and_requested_again(self):
+        self.manifest.register(dict.fromkeys(MASS_PATHS, 10))
+        filepath = self.retrieve(MASS_PATHS[0])
+        self.manifest.update(self.target, MASS_PATHS[:1])
+        self.manifest.set_validation({MASS_PATHS[0]: False})
+
+        self.assertEqual({'retrieved/invalid': 1, 'pending/unknown': 2}, self.manifest.summary())
+        self.assertEqual(MASS_PATHS, self.manifest.outstanding(self.target, MASS_PATHS))
+        self.assertFalse(os.path.exists(filepath))
+
+    def test_truncated_file_is_requested_again(self):
+        self.manifest.register(dict.fromkeys(MASS_PATHS, 10))
+        self.retrieve(MASS_PATHS[0], size=4)
+        self.manifest.update(self.target, MASS_PATHS[:1])
+
+        self.assertIn(MASS_PATHS[0], self.manifest.outstanding(self.target, MASS_PATHS))
+
+    def test_file_changed_after_retrieval_is_requested_again(self):
+        self.manifest.register({mass_path: None for mass_path in MASS_PATHS})
+        for mass_path in MASS_PATHS:
+            self.retrieve(mass_path)
+        self.manifest.update(self.target, MASS_PATHS)
+        self.retrieve(MASS_PATHS[1], size=20)
+        os.remove(os.path.join(self.target, os.path.basename(MASS_PATHS[2])))
+
+        self.assertEqual(MASS_PATHS[1:], self.manifest.outstanding(self.target, MASS_PATHS))
+
+    def test_validation_recorded_separately(self):
+        self.manifest.register(dict.fromkeys(MASS_PATHS, 10))
+        self.retrieve(MASS_PATHS[0])
+        self.retrieve(MASS_PATHS[1], size=4)
+        self.manifest.update(self.target, MASS_PATHS[:2])
+        self.assertEqual({'retrieved/unknown': 1, 'retrieved/invalid': 1, 'pending/unknown': 1},
+                         self.manifest.summary())
+
+        filenames = [os.path.basename(mass_path) for mass_path in MASS_PATHS[:2]]
+        mass_paths = self.manifest.mass_paths(filenames)
+        self.assertEqual(dict(zip(filenames, MASS_PATHS)), mass_paths)
+        self.manifest.set_validation({mass_path: True for mass_path in mass_paths.values()})
+        self.assertEqual({'retrieved/valid': 1, 'retrieved/invalid': 1, 'pending/unknown': 1},
+                         self.manifest.summary())
+
+    def test_file_touched_after_retrieval_is_requested_again(self):
+        self.manifest.register(dict.fromkeys(MASS_PATHS, 10))
+        filepath = self.retrieve(MASS_PATHS[0])
+        self.manifest.update(self.target, MASS_PATHS[:1])
+        stat_result = os.stat(filepath)
+        os.utime(filepath, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1000000000))
+
+        self.assertEqual(MASS_PATHS, self.manifest.outstanding(self.target, MASS_PATHS))
+
+    def test_validated_files(self):
+        self.manifest.register(dict.fromkeys(MASS_PATHS, 10))
+        for mass_path in MASS_PATHS:
+            self.retrieve(mass_path)
+        self.manifest.update(self.target, MASS_PATHS)
+        self.manifest.set_validation({MASS_PATHS[0]: True, MASS_PATHS[1]: True, MASS_PATHS[2]: False})
+        self.retrieve(MASS_PATHS[1], size=20)
+
+        self.assertEqual([os.path.basename(MASS_PATHS[0])], self.manifest.validated(self.target))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+# pylint: disable = missing-docstring, invalid-name, too-many-public-methods
+"""Tests for the :mod:`cdds.extract.runner` module."""
+import os
+import shutil
+import tempfile
+import unittest
+from argparse import Namespace
+from collections import defaultdict
+from unittest import mock
+
+from cdds.common.constants import INPUT_DATA_DIRECTORY
+from cdds.extract.constants import EXTRACT_MANIFEST_FILENAME
+from cdds.extract.manifest import ExtractionManifest
+from cdds.extract.runner import ExtractRunner
+from cdds.extract.validate import StreamingValidator
+from cdds.tests.test_common.test_netcdf import write_netcdf_file
+
+STREAM = 'onm'
+WORKFLOW_ID = 'u-ab123'
+MASS_DIR = 'moose:/crum/{}/{}.nc.file'.format(WORKFLOW_ID, STREAM)
+MASS_PATHS = ['{}/nemo_ab123o_1m_1850{:02d}01-1850{:02d}01_grid-T.nc'.format(MASS_DIR, month, month + 1)
+              for month in range(1, 4)]
+
+
+class TestExtractRunnerManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.data_target = os.path.join(self.temp_dir, INPUT_DATA_DIRECTORY, WORKFLOW_ID, STREAM)
+        os.makedirs(self.data_target)
+        self.manifest_file = os.path.join(self.temp_dir, 'extract', EXTRACT_MANIFEST_FILENAME.format(STREAM))
+        os.makedirs(os.path.dirname(self.manifest_file))
+
+        self.request = mock.Mock()
+        self.request.data.streams = [STREAM]
+        self.request.data.model_workflow_id = WORKFLOW_ID
+        self.request.common.simulation = False
+        plugin = mock.Mock()
+        plugin.proc_directory.return_value = self.temp_dir
+        plugin.data_directory.return_value = self.temp_dir
+        plugin.requested_variables_list_filename.return_value = 'variables.json'
+        self.process = mock.Mock()
+        self.process.request_exists.return_value = True
+        self.scheduler = mock.Mock()
+        for target, kwargs in [
+                ('read_request', {'return_value': self.request}),
+                ('PluginStore.instance', {'return_value': mock.Mock(get_plugin=mock.Mock(return_value=plugin))}),
+                ('configure_variables', {}),
+                ('Filters', {}),
+                ('configure_mappings', {'return_value': {STREAM: 'ok'}}),
+                ('Process', {'return_value': self.process}),
+                ('fetch_file_sizes_from_mass', {'return_value': ({}, None)}),
+                ('get_zero_sized_files', {'return_value': []}),
+                ('RetrievalScheduler', {'return_value': self.scheduler}),
+                ('exit_nicely', {})]:
+            patcher = mock.patch('cdds.extract.runner.{}'.format(target), **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def retrieve(self, mass_paths):
+        manifest = ExtractionManifest(self.manifest_file)
+        manifest.register(dict.fromkeys(mass_paths))
+        for mass_path in mass_paths:
+            write_netcdf_file(os.path.join(self.data_target, os.path.basename(mass_path)))
+        manifest.update(self.data_target, mass_paths)
+        manifest.close()
+
+    def run_extract(self, mass_paths, validate=False):
+        self.process.configure_commands.return_value = (
+            'ok', [{'moo_cmd': 'get', 'param_args': ['-i'] + mass_paths + [self.data_target],
+                    'start': '1850-01-01', 'end': '1850-04-01'}], '', set())
+        runner = ExtractRunner(Namespace(request='request.cfg', streams=None, validate=validate), defaultdict(str))
+        runner.run_extract()
+        return [[arg for job in call[0][0] for arg in job.command['param_args'] if arg.startswith('moose:')]
+                for call in self.scheduler.run.call_args_list]
+
+    def test_widened_request_retrieves_new_files(self):
+        self.retrieve(MASS_PATHS[:2])
+
+        self.assertEqual(MASS_PATHS[2:], self.run_extract(MASS_PATHS)[0])
+
+    def test_retrieved_stream_is_not_requested(self):
+        self.retrieve(MASS_PATHS)
+
+        self.assertEqual([[]], self.run_extract(MASS_PATHS))
+
+    @mock.patch('cdds.extract.runner.StreamValidationResult')
+    @mock.patch('cdds.extract.runner.log_directory')
+    @mock.patch('cdds.extract.runner.ExtractRunner._stream_validator')
+    def test_retrieved_stream_is_validated(self, mock_stream_validator, *_):
+        self.retrieve(MASS_PATHS)
+        # the second file was retrieved without being validated and lacks the expected variable
+        write_netcdf_file(os.path.join(self.data_target, os.path.basename(MASS_PATHS[1])), ('sos',))
+        manifest = ExtractionManifest(self.manifest_file)
+        manifest.update(self.data_target, MASS_PATHS[1:2])
+        manifest.set_validation({MASS_PATHS[0]: True, MASS_PATHS[2]: True})
+        manifest.close()
+        filenames = [os.path.basename(mass_path) for mass_path in MASS_PATHS]
+        mock_stream_validator.side_effect = lambda *args: StreamingValidator(
+            self.data_target, STREAM, set(), filenames, 'monthly', dict.fromkeys(filenames, ['tas']),
+            executor=args[-1])
+
+        self.assertEqual([[], MASS_PATHS[1:2]], self.run_extract(MASS_PATHS, validate=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+# pylint: disable = missing-docstring, invalid-name, too-many-public-methods
+"""Tests for the :mod:`cdds.extract.scheduler` module."""
+import threading
+import time
+import unittest
+
+from cdds.extract.scheduler import RetrievalJob, RetrievalScheduler, is_transient_moo_error
+
+
+class FakeMoose(object):
+    """Runs MOOSE commands by sleeping, recording how many were running at
+    the same time and returning the queued outputs of each command."""
+
+    def __init__(self, duration=0.05, outputs=None):
+        self.duration = duration
+        self.outputs = outputs or {}
+        self.lock = threading.Lock()
+        self.running = []
+        self.max_running = 0
+        self.max_tapes = 0
+        self.calls = []
+
+    def mass_request(self, command):
+        with self.lock:
+            self.running.append(command)
+            self.calls.append(command["name"])
+            self.max_running = max(self.max_running, len(self.running))
+            self.max_tapes = max(self.max_tapes, sum(cmd.get("tapes", 1) for cmd in self.running))
+            outputs = self.outputs.get(command["name"], [])
+            code, output = outputs.pop(0) if outputs else (0, "")
+        time.sleep(self.duration)
+        with self.lock:
+            self.running.remove(command)
+        return code, output
+
+
+def make_jobs(streams, blocks, tapes=1):
+    return [RetrievalJob(stream, blocknum, {"name": "{}-{}".format(stream, blocknum), "tapes": tapes})
+            for stream in streams for blocknum in range(1, blocks + 1)]
+
+
+class TestRetrievalScheduler(unittest.TestCase):
+
+    def test_requests_run_concurrently_across_streams(self):
+        moose = FakeMoose()
+        jobs = make_jobs(["ap4", "ap5", "ap6", "onm", "inm"], 2)
+        results = RetrievalScheduler(moose.mass_request, max_concurrent=4).run(jobs)
+
+        self.assertEqual(4, moose.max_running)
+        self.assertEqual(jobs, [result.job for result in results])
+        self.assertTrue(all(result.status == "ok" for result in results))
+
+    def test_single_request_at_a_time(self):
+        moose = FakeMoose(duration=0.01)
+        jobs = make_jobs(["ap4", "ap5"], 3)
+        RetrievalScheduler(moose.mass_request).run(jobs)
+
+        self.assertEqual(1, moose.max_running)
+        self.assertEqual(["ap4-1", "ap4-2", "ap4-3", "ap5-1", "ap5-2", "ap5-3"], moose.calls)
+
+    def test_tape_limit(self):
+        moose = FakeMoose()
+        jobs = make_jobs(["ap5", "onm"], 3, tapes=20)
+        RetrievalScheduler(moose.mass_request, max_concurrent=6, tape_limit=50).run(jobs)
+
+        self.assertEqual(2, moose.max_running)
+        self.assertEqual(40, moose.max_tapes)
+
+    def test_request_reading_more_tapes_than_the_limit_runs_alone(self):
+        moose = FakeMoose()
+        jobs = make_jobs(["ap5"], 2, tapes=60)
+        results = RetrievalScheduler(moose.mass_request, max_concurrent=2, tape_limit=50).run(jobs)
+
+        self.assertEqual(1, moose.max_running)
+        self.assertEqual(2, len(results))
+
+    def test_transient_errors_are_retried_with_backoff(self):
+        moose = FakeMoose(duration=0, outputs={
+            "ap5-1": [(2, "ERROR: STORAGE_SYSTEM_UNAVAILABLE"), (2, "ERROR: STORAGE_SYSTEM_UNAVAILABLE")],
+        })
+        delays = []
+        scheduler = RetrievalScheduler(moose.mass_request, retries=3, retry_delay=10, sleep=delays.append)
+        result, = scheduler.run(make_jobs(["ap5"], 1))
+
+        self.assertEqual((0, "ok", 3), (result.code, result.status, result.attempts))
+        self.assertEqual([10, 20], delays)
+
+    def test_retries_are_limited(self):
+        moose = FakeMoose(duration=0, outputs={"ap5-1": [(2, "ERROR: STORAGE_SYSTEM_UNAVAILABLE")] * 5})
+        scheduler = RetrievalScheduler(moose.mass_request, retries=2, sleep=lambda delay: None)
+        result, = scheduler.run(make_jobs(["ap5"], 1))
+
+        self.assertEqual((2, "stop", 3), (result.code, result.status, result.attempts))
+
+    def test_permanent_errors_are_not_retried(self):
+        moose = FakeMoose(duration=0, outputs={"ap5-1": [(2, "(TSSC_SPANS_TOO_MANY_RESOURCES)")]})
+        scheduler = RetrievalScheduler(moose.mass_request, sleep=lambda delay: self.fail("retried"))
+        result, = scheduler.run(make_jobs(["ap5"], 1))
+
+        self.assertEqual(("skip", 1), (result.status, result.attempts))
+
+    def test_no_requests_are_started_after_stop(self):
+        moose = FakeMoose(duration=0, outputs={"ap5-2": [(2, "PATH_DOES_NOT_EXIST")]})
+        started = []
+        results = RetrievalScheduler(moose.mass_request).run(
+            make_jobs(["ap5"], 4), lambda result: result.status != "stop", started.append)
+
+        self.assertEqual(["ap5-1", "ap5-2"], moose.calls)
+        self.assertEqual([1, 2], [job.blocknum for job in started])
+        self.assertEqual(["ok", "stop"], [result.status for result in results])
+
+    def test_is_transient_moo_error(self):
+        self.assertTrue(is_transient_moo_error("(SSC_STORAGE_SYSTEM_UNAVAILABLE) storage unavailable"))
+        self.assertFalse(is_transient_moo_error("(SSC_TASK_REJECTION) (TSSC_INVALID_SET) invalid path"))
+
+
+if __name__ == '__main__':
+    unittest.main()
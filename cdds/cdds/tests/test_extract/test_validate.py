@@ -3,15 +3,24 @@
 
 """Tests for validate in the extract module"""
 
+import os
+import shutil
+import tempfile
 import unittest
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from unittest import mock
 
 from cdds.common.plugins.plugins import PluginStore
 from cdds.common.request.request import read_request
-from cdds.extract.common import configure_variables
+from cdds.extract.common import MissingVariablesError, StreamValidationResult, TruncatedFileError, configure_variables
 from cdds.extract.filters import Filters
-from cdds.extract.validate import configure_mapping_for_each_variable, calculate_file_frequency, process_pp_streamtype
+from cdds.extract.validate import (
+    StreamingValidator, configure_mapping_for_each_variable, calculate_file_frequency, expected_nc_variables,
+    process_nc_streamtype, process_pp_streamtype)
+from cdds.tests.factories.request_factory import simple_request
+from cdds.tests.test_common.test_netcdf import write_netcdf_file
 
 
 class TestValidate(unittest.TestCase):
@@ -48,5 +57,99 @@ class TestValidate(unittest.TestCase):
         self.assertEqual(output, expected, msg)
 
 
+class TestExpectedNcVariables(unittest.TestCase):
+
+    def test_filenames_are_generated_once_per_sub_stream(self):
+        mappings = Filters(var_list=[])
+        mappings.filters = {"grid-T": "thetao,so", "grid-U": "uo,"}
+        with mock.patch.object(Filters, "generate_filenames_nc", autospec=True,
+                               side_effect=lambda _, datestamps, sub_stream: ["{}.nc".format(sub_stream)]) as generate:
+            expected_variables = expected_nc_variables(simple_request(), "monthly", mappings)
+            self.assertEqual(2, generate.call_count)
+            self.assertEqual(["grid-T.nc", "grid-U.nc"], process_nc_streamtype(simple_request(), "monthly", mappings))
+
+        self.assertEqual({"grid-T.nc": ["thetao", "so"], "grid-U.nc": ["uo"]}, expected_variables)
+
+
+class TestStreamingValidator(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.filenames = ["nemo_ab123o_1m_18500101-18500201_grid-T.nc", "nemo_ab123o_1m_18500201-18500301_grid-T.nc"]
+        self.validator = StreamingValidator(self.path, "onm", set(), self.filenames, "monthly",
+                                            dict.fromkeys(self.filenames, ["tos"]))
+        self.addCleanup(self.validator.close)
+
+    def write(self, filename, variables=("tos",), times=(15.0,), truncate=False):
+        filepath = os.path.join(self.path, filename)
+        write_netcdf_file(filepath, variables, times)
+        if truncate:
+            with open(filepath, "r+b") as file_handle:
+                file_handle.truncate(os.path.getsize(filepath) - 8)
+
+    def test_files_are_validated_as_they_are_submitted(self):
+        self.write(self.filenames[0])
+        self.validator.submit(self.filenames)
+
+        self.assertEqual({self.filenames[0]: True}, self.validator.collect(block=True))
+        self.write(self.filenames[1], variables=("sos",), times=(45.0,))
+        self.validator.submit_new()
+        self.assertEqual({self.filenames[1]: False}, self.validator.collect(block=True))
+        self.assertEqual([self.filenames[1]], self.validator.invalid_files)
+        self.assertIsInstance(self.validator.errors[self.filenames[1]], MissingVariablesError)
+
+    def test_file_is_validated_again_after_retrieval(self):
+        self.write(self.filenames[0], truncate=True)
+        self.validator.submit(self.filenames[:1])
+        self.validator.collect(block=True)
+        self.assertIsInstance(self.validator.errors[self.filenames[0]], TruncatedFileError)
+
+        self.write(self.filenames[0])
+        self.validator.submit_new()
+        self.assertEqual({self.filenames[0]: True}, self.validator.collect(block=True))
+        self.assertEqual([], self.validator.invalid_files)
+
+    def test_skipped_files_are_validated_only_after_they_change(self):
+        self.write(self.filenames[0], variables=("sos",))
+        self.validator.skip(self.filenames)
+        self.validator.submit_new()
+        self.assertEqual({}, self.validator.collect(block=True))
+
+        self.write(self.filenames[0])
+        self.validator.submit_new()
+        self.assertEqual({self.filenames[0]: True}, self.validator.collect(block=True))
+
+    def test_finish(self):
+        self.write(self.filenames[0], times=(75.0,))
+        self.validator.submit_new()
+        result = StreamValidationResult("onm")
+        self.validator.finish(result)
+
+        self.assertFalse(result.valid)
+        self.assertEqual({self.filenames[0]}, result.file_names_actual)
+        self.assertEqual([os.path.join(self.path, self.filenames[0])], list(result.file_errors))
+
+    def test_executor_is_shared_between_streams(self):
+        executor = ProcessPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        other_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other_path)
+        filenames = ["nemo_ab123o_1m_18500101-18500201_grid-U.nc"]
+        validators = [
+            StreamingValidator(self.path, "onm", set(), self.filenames, "monthly",
+                               dict.fromkeys(self.filenames, ["tos"]), executor=executor),
+            StreamingValidator(other_path, "onm", set(), filenames, "monthly",
+                               dict.fromkeys(filenames, ["uo"]), executor=executor)]
+        self.write(self.filenames[0])
+        write_netcdf_file(os.path.join(other_path, filenames[0]), ("uo",), (15.0,))
+        for validator in validators:
+            validator.submit_new()
+
+        validators[0].finish(StreamValidationResult("onm"))
+        self.assertEqual({filenames[0]: True}, validators[1].collect(block=True))
+        validators[1].close()
+        self.assertEqual(4, executor.submit(pow, 2, 2).result())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,9 +1,34 @@
-# (C) British Crown Copyright 2020-2025, Met Office.
+# (C) British Crown Copyright 2020-2026, Met Office.
 # Please see LICENSE.md for license details.
 
 import unittest
+from unittest import mock
+
 from cdds.common.constants import INVENTORY_FACET_LIST
-from cdds.inventory.command_line import build_facet_dictionary
+from cdds.inventory.command_line import build_facet_dictionary, populate_inventory_from_mass
+from cdds.inventory.db_models import setup_db
+
+MASS_ROOT = 'moose:/adhoc/projects/cdds/production'
+DATASET_PATHS = [
+    '{}/CMIP6/{}/MOHC/UKESM1-0-LL/{}/r1i1p1f2/{}/{}/gn/embargoed/v20190802'.format(
+        MASS_ROOT, mip, experiment, mip_table, variable)
+    for mip, experiment in [('CMIP', 'piControl'), ('CMIP', 'historical'), ('DAMIP', 'hist-GHG')]
+    for mip_table, variable in [('Amon', 'tas'), ('Amon', 'pr'), ('Omon', 'tos')]]
+
+
+def list_dir(mass_path, simulation):
+    depth = mass_path.count('/') + 2
+    return sorted({'/'.join(path.split('/')[:depth]) for path in DATASET_PATHS if path.startswith(mass_path + '/')})
+
+
+def list_files_recursively(mass_path, simulation):
+    datasets = {}
+    for path in DATASET_PATHS:
+        if path.startswith(mass_path + '/'):
+            facets = path.split('/')[-11:]
+            datasets['.'.join(facets[:-2])] = {'status': facets[-2], 'timestamp': facets[-1], 'files': [
+                {'filesize': '1024', 'filename': 'file.nc', 'mass_path': path + '/file.nc'}]}
+    return datasets
 
 
 class CommandLineTestCase(unittest.TestCase):
@@ -24,5 +49,30 @@ class CommandLineTestCase(unittest.TestCase):
         }, build_facet_dictionary(dataset_id.split('.'), INVENTORY_FACET_LIST))
 
 
+class PopulateInventoryTestCase(unittest.TestCase):
+
+    def populate(self, max_concurrent, recursive_levels):
+        db = setup_db(':memory:')
+        self.addCleanup(db.close)
+        with mock.patch('cdds.inventory.command_line.mass_list_dir', side_effect=list_dir) as mock_list_dir, \
+                mock.patch('cdds.inventory.command_line.mass_list_files_recursively',
+                           side_effect=list_files_recursively) as mock_list_recursively:
+            populate_inventory_from_mass(db, MASS_ROOT, max_concurrent=max_concurrent,
+                                         recursive_levels=recursive_levels)
+        datasets = sorted(row[0] for row in db.execute('SELECT dataset_id FROM dataset'))
+        return datasets, mock_list_dir.call_count, mock_list_recursively.call_count
+
+    def test_concurrent_listings(self):
+        datasets, list_dir_calls, recursive_calls = self.populate(1, 4)
+        self.assertEqual(9, len(datasets))
+        self.assertEqual((14, 6), (list_dir_calls, recursive_calls))
+        self.assertEqual((datasets, list_dir_calls, recursive_calls), self.populate(4, 4))
+
+    def test_recursive_levels(self):
+        datasets, list_dir_calls, recursive_calls = self.populate(4, 6)
+        self.assertEqual(datasets, self.populate(1, 4)[0])
+        self.assertEqual((8, 3), (list_dir_calls, recursive_calls))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+# pylint: disable = missing-docstring, invalid-name, too-many-public-methods
+"""Tests for the :mod:`cdds.inventory.loader` module."""
+import unittest
+
+from cdds.inventory.db_models import get_simulation_datasets, setup_db
+from cdds.inventory.loader import ADDED, REMOVED, UNCHANGED, UPDATED, InventoryLoader
+
+MASS_ROOT = 'moose:/adhoc/projects/cdds/production/CMIP6'
+
+
+def dataset(variable, experiment='piControl', status='embargoed', timestamp='v20190802', years=(1850, 1851)):
+    path = '{}/CMIP/MOHC/UKESM1-0-LL/{}/r1i1p1f2/Amon/{}/gn/{}/{}'.format(
+        MASS_ROOT, experiment, variable, status, timestamp)
+    dataset_id = 'CMIP6.CMIP.MOHC.UKESM1-0-LL.{}.r1i1p1f2.Amon.{}.gn'.format(experiment, variable)
+    files = []
+    for year in years:
+        filename = '{}_Amon_UKESM1-0-LL_{}_r1i1p1f2_gn_{}01-{}12.nc'.format(variable, experiment, year, year)
+        files.append({'filesize': '1024', 'filename': filename, 'mass_path': '{}/{}'.format(path, filename)})
+    return {dataset_id: {'status': status, 'timestamp': timestamp, 'files': files}}
+
+
+class TestInventoryLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.db = setup_db(':memory:')
+        self.addCleanup(self.db.close)
+
+    def load(self, incremental, *datasets):
+        loader = InventoryLoader(self.db, incremental, batch_size=2)
+        for datasets_in_directory in datasets:
+            loader.add_datasets(datasets_in_directory)
+        return loader.finish()
+
+    def simulation_datasets(self, experiment='piControl', status='embargoed'):
+        return sorted((row['variable_name'], row['timestamp']) for row in get_simulation_datasets(
+            self.db.cursor(), 'CMIP6', 'CMIP', 'UKESM1-0-LL', experiment, 'r1i1p1f2', status))
+
+    def test_load(self):
+        counts = self.load(False, {**dataset('tas'), **dataset('pr')}, dataset('tas', 'historical'))
+
+        self.assertEqual(3, counts[ADDED])
+        self.assertEqual([('pr', 'v20190802'), ('tas', 'v20190802')], self.simulation_datasets())
+        self.assertEqual([('tas', 'v20190802')], self.simulation_datasets('historical'))
+        self.assertEqual(1, self.db.execute('SELECT COUNT(*) FROM model').fetchone()[0])
+        self.assertEqual(6, self.db.execute('SELECT COUNT(*) FROM netcdf_file').fetchone()[0])
+
+    def test_incremental_load(self):
+        self.load(False, {**dataset('tas'), **dataset('pr'), **dataset('ps')})
+        created = self.db.execute('SELECT id, created FROM dataset ORDER BY id').fetchall()
+
+        counts = self.load(True, {**dataset('tas'), **dataset('pr', timestamp='v20200101'),
+                                  **dataset('rsut', status='available')}, dataset('ps', years=(1850, 1851, 1852)))
+
+        self.assertEqual({ADDED: 1, UPDATED: 2, UNCHANGED: 1, REMOVED: 0}, dict(counts))
+        self.assertEqual([('pr', 'v20200101'), ('ps', 'v20190802'), ('tas', 'v20190802')],
+                         self.simulation_datasets())
+        self.assertEqual([('rsut', 'v20190802')], self.simulation_datasets(status='available'))
+        self.assertEqual(9, self.db.execute('SELECT COUNT(*) FROM netcdf_file').fetchone()[0])
+        self.assertEqual([tuple(row) for row in created], [tuple(row) for row in self.db.execute(
+            'SELECT id, created FROM dataset WHERE id <= 3 ORDER BY id')])
+
+        counts = self.load(True, dataset('tas'))
+        self.assertEqual({UNCHANGED: 1, REMOVED: 3}, dict(counts))
+        self.assertEqual([('tas', 'v20190802')], self.simulation_datasets())
+        self.assertEqual(2, self.db.execute('SELECT COUNT(*) FROM netcdf_file').fetchone()[0])
+
+    def test_indexes(self):
+        indexes = [row[0] for row in self.db.execute('SELECT name FROM sqlite_master WHERE type = \'index\'')]
+        self.assertIn('idx_dataset_dataset_id', indexes)
+        self.assertIn('idx_netcdf_file_dataset', indexes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,4 @@
-# (C) British Crown Copyright 2017-2025, Met Office.
+# (C) British Crown Copyright 2017-2026, Met Office.
 # Please see LICENSE.md for license details.
 # pylint: disable = missing-docstring, invalid-name, too-many-public-methods
 """Tests for :mod:`generate.py`."""
@@ -6,18 +6,23 @@
 import configparser
 import os.path
 import unittest
-from unittest.mock import MagicMock
+from argparse import Namespace
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 from cdds.common.mip_tables import UserMipTables
 from cdds.common.plugins.plugin_loader import load_plugin
 from cdds.prepare.generate import (
+    PrepareReferenceData,
     check_mappings,
+    generate_variable_lists,
     parse_variable_list,
     check_variables_recognised,
     check_streams_match_variables,
+    retrieve_mappings,
 )
+from cdds.prepare.user_variable import UserDefinedVariable
 from cdds.tests.factories.request_factory import simple_request
 from cdds.tests.test_common.common import DummyMapping
 
@@ -167,3 +172,77 @@ class TestCheckVariableValidation(unittest.TestCase):
             self.var_list_with_substreams, self.request
         )
         self.assertEqual(result, 0)
+
+
+class TestRetrieveMappings(unittest.TestCase):
+
+    def setUp(self):
+        self.mapping_plugin = MagicMock()
+        self.mapping_plugin.load_model_to_mip_mapping.side_effect = lambda mip_table_name: {'table': mip_table_name}
+        for target, mock_object in [
+                ('cdds.prepare.generate.MappingPluginStore.instance',
+                 MagicMock(return_value=MagicMock(get_plugin=MagicMock(return_value=self.mapping_plugin)))),
+                ('cdds.prepare.generate.get_variable_model_to_mip_mapping',
+                 MagicMock(side_effect=lambda mappings, var_name, mip_table: (mappings['table'], var_name))),
+                ('cdds.prepare.generate.remove_ancils_from_mapping',
+                 MagicMock(side_effect=lambda mapping, model_id: mapping))]:
+            patcher = patch(target, mock_object)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        metadata = {key: '' for key in ['cell_measures', 'cell_methods', 'comment', 'dimensions', 'frequency',
+                                        'long_name', 'positive', 'standard_name', 'units']}
+        self.variables = [UserDefinedVariable(mip_table, var_name, dict(metadata))
+                          for mip_table, var_name in [('Amon', 'tas'), ('Amon', 'pr'), ('Omon', 'tos')]]
+
+    def test_mappings_are_read_once_per_mip_table(self):
+        mappings = retrieve_mappings(self.variables, 'CMIP6', 'UKESM1-0-LL')
+
+        self.assertEqual({'Amon': {'tas': ('CMIP6_Amon', 'tas'), 'pr': ('CMIP6_Amon', 'pr')},
+                          'Omon': {'tos': ('CMIP6_Omon', 'tos')}}, mappings)
+        self.assertEqual(2, self.mapping_plugin.load_model_to_mip_mapping.call_count)
+
+    def test_loaded_mappings_are_reused(self):
+        loaded_mappings = {}
+        retrieve_mappings(self.variables[:1], 'CMIP6', 'UKESM1-0-LL', loaded_mappings)
+        retrieve_mappings(self.variables, 'CMIP6', 'UKESM1-0-LL', loaded_mappings)
+
+        self.assertEqual(['CMIP6_Amon', 'CMIP6_Omon'], sorted(loaded_mappings))
+        self.assertEqual(2, self.mapping_plugin.load_model_to_mip_mapping.call_count)
+
+
+class TestPrepareReferenceData(unittest.TestCase):
+
+    @patch('cdds.prepare.generate.UserMipTables')
+    def test_mip_tables_are_read_once(self, mock_user_mip_tables):
+        reference_data = PrepareReferenceData()
+        mip_tables = reference_data.mip_tables('mip_tables/CMIP6')
+
+        self.assertIs(mip_tables, reference_data.mip_tables('mip_tables/CMIP6'))
+        reference_data.mip_tables('mip_tables/CMIP7')
+        self.assertEqual(2, mock_user_mip_tables.call_count)
+
+    @patch('cdds.prepare.generate.load_mapping_plugin')
+    def test_mapping_plugin_is_loaded_once(self, mock_load_mapping_plugin):
+        reference_data = PrepareReferenceData()
+        request = simple_request()
+        mappings = reference_data.load_mapping_plugin(request)
+        mappings['CMIP6_Amon'] = {}
+
+        self.assertIs(mappings, reference_data.load_mapping_plugin(request))
+        mock_load_mapping_plugin.assert_called_once()
+
+
+class TestGenerateVariableLists(unittest.TestCase):
+
+    @patch('cdds.prepare.generate.generate_variable_list')
+    def test_failed_request_does_not_stop_the_others(self, mock_generate_variable_list):
+        mock_generate_variable_list.side_effect = [RuntimeError('No request'), 0, 0]
+        arguments = Namespace(requests=['request1.cfg', 'request2.cfg', 'request3.cfg'], output_dir=None,
+                              reconfigure=False)
+
+        self.assertEqual(1, generate_variable_lists(arguments))
+        self.assertEqual(3, mock_generate_variable_list.call_count)
+        reference_data = {call.args[1] for call in mock_generate_variable_list.call_args_list}
+        self.assertEqual(1, len(reference_data))
+        self.assertEqual(['request1.cfg', 'request2.cfg', 'request3.cfg'],
+                         [call.args[0].request for call in mock_generate_variable_list.call_args_list])
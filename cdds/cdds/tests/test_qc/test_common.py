@@ -1,8 +1,9 @@
-# (C) British Crown Copyright 2019-2025, Met Office.
+# (C) British Crown Copyright 2019-2026, Met Office.
 # Please see LICENSE.md for license details.
 
 import unittest
 
+import numpy as np
 from metomi.isodatetime.data import TimePoint
 from cdds.qc.common import strip_zeros, DatetimeCalculator
 
@@ -17,7 +18,48 @@ class StripZerosTestCase(unittest.TestCase):
         self.assertEqual(result, 23)
 
 
-class Datetime360DayCalculatorTestCase(unittest.TestCase):
+class NumericSequenceTestMixin:
+
+    def assert_sequences_equal(self, start_date, end_date, mode, with_bounds=True):
+        points, bounds = self.calculator.get_sequence(start_date, end_date, mode, with_bounds)
+        numeric_points, numeric_bounds = self.calculator.get_numeric_sequence(start_date, end_date, mode, with_bounds)
+        np.testing.assert_allclose(numeric_points, [self._days(point) for point in points], atol=1e-9)
+        if with_bounds:
+            np.testing.assert_allclose(
+                numeric_bounds, np.array([[self._days(bound) for bound in pair] for pair in bounds]).reshape(-1, 2),
+                atol=1e-9)
+        else:
+            self.assertIsNone(numeric_bounds)
+
+    def _days(self, time_point):
+        return (time_point - self.calculator.base_date)._get_non_nominal_seconds() / 86400
+
+    def test_numeric_sequences(self):
+        start_date = TimePoint(year=1999, month_of_year=3, day_of_month=1)
+        end_date = TimePoint(year=2021, month_of_year=1, day_of_month=1)
+        for mode in ['P10Y', 'P1Y', 'P1M']:
+            for with_bounds in [True, False]:
+                self.assert_sequences_equal(start_date, end_date, mode, with_bounds)
+
+    def test_numeric_daily_and_subdaily_sequences(self):
+        start_date = TimePoint(year=2000, month_of_year=2, day_of_month=27)
+        end_date = TimePoint(year=2000, month_of_year=3, day_of_month=2)
+        for mode in ['P1D', 'PT6H', 'PT1200S', 'PT7M']:
+            for with_bounds in [True, False]:
+                self.assert_sequences_equal(start_date, end_date, mode, with_bounds)
+
+    def test_numeric_sequence_from_end_of_month(self):
+        start_date = TimePoint(year=2000, month_of_year=1, day_of_month=30)
+        end_date = TimePoint(year=2001, month_of_year=1, day_of_month=30)
+        self.assert_sequences_equal(start_date, end_date, 'P1M')
+
+    def test_days_since_base_date_to_time_point(self):
+        time_point = self.calculator.days_since_base_date_to_time_point(
+            self.calculator.days_since_base_date("1989-12-30T23:40Z"))
+        self.assertEqual("1989-12-30T23:40:00Z", str(time_point))
+
+
+class Datetime360DayCalculatorTestCase(NumericSequenceTestMixin, unittest.TestCase):
 
     def setUp(self):
         base_date = TimePoint(year=1850, month_of_year=1, day_of_month=1)
@@ -63,7 +105,7 @@ class Datetime360DayCalculatorTestCase(unittest.TestCase):
         self.assertAlmostEqual(50399.986111, self.calculator.days_since_base_date("1989-12-30T23:40Z"), places=6)
 
 
-class DatetimeGregorianCalculatorTestCase(unittest.TestCase):
+class DatetimeGregorianCalculatorTestCase(NumericSequenceTestMixin, unittest.TestCase):
 
     def setUp(self):
         base_date = TimePoint(year=1850, month_of_year=1, day_of_month=1)
@@ -2,8 +2,10 @@
 # Please see LICENSE.md for license details.
 
 import unittest
+from cdds.common.crawler import FileRecord
 from cdds.common.mip_tables import MipTables
 from cdds.qc.dataset.cmip6 import Cmip6Dataset
+from cdds.qc.dataset.snapshot import FileSnapshot
 from cdds.tests.test_qc.plugins.constants import MIP_TABLES_DIR
 from cdds.tests.factories.request_factory import simple_request
 from unittest.mock import patch
@@ -153,49 +155,34 @@ class Cmip6DatasetTestCase(unittest.TestCase):
         self.assertEqual(len(filelist), 1)
 
     @patch('logging.Logger')
-    @patch('os.walk')
+    @patch('cdds.qc.dataset.dataset.DirectoryCrawler.crawl')
+    @patch('cdds.qc.dataset.dataset.take_snapshot')
     def test_mip_requested_variable_name_is_present_in_dataset(
-            self, os_walk, logger):
+            self, take_snapshot, crawl, logger):
         request = simple_request()
-
-        class MockedDataset(object):
-
-            def __init__(self, filepath):
-                self._filepath = filepath
-
-            def __enter__(self):
-                return self
-
-            def __exit__(self, exc_type, exc_val, exc_tb):
-                pass
-
-            def getncattr(self, name):
-                return {
-                    "table_id": "day",
-                    "source_id": "HadGEM3-GC31-LL",
-                    "experiment_id": "piControl",
-                    "sub_experiment_id": "none",
-                    "grid_label": "gn",
-                    "variant_label": "r1i1p1f1",
-                    "frequency": "day",
-                    "variable_name": "ta27",
-                    "mip_era": "CMIP6",
-                    "variable_id": "ta",
-                }[name]
-
-            def hasattr(self, name):
-                return True
-
-            def filepath(self):
-                return ""
-
-        os_walk.return_value = [
-            ("foo", ("bar",), ("ta_day_HadGEM3-GC31-LL_piControl_"
-                               "r1i1p1f1_gn_18500101-18591230.nc",))]
+        global_attributes = {
+            "table_id": "day",
+            "source_id": "HadGEM3-GC31-LL",
+            "experiment_id": "piControl",
+            "sub_experiment_id": "none",
+            "grid_label": "gn",
+            "variant_label": "r1i1p1f1",
+            "frequency": "day",
+            "variable_name": "ta27",
+            "mip_era": "CMIP6",
+            "variable_id": "ta",
+        }
+        take_snapshot.side_effect = lambda filepath, loader_class: FileSnapshot(
+            filepath, 0, 0, global_attributes)
+
+        crawl.return_value = [
+            FileRecord("foo", "ta_day_HadGEM3-GC31-LL_piControl_"
+                       "r1i1p1f1_gn_18500101-18591230.nc",
+                       {"start": "18500101", "end": "18591230"})]
 
         structured_dataset = Cmip6Dataset('.', request, self.mip_tables, logger,
                                           None, None, None)
-        structured_dataset.load_dataset(MockedDataset)
+        structured_dataset.load_dataset(object)
         self.assertEqual({
             "CMIP6_HadGEM3-GC31-LL_piControl_none_day_r1i1p1f1_ta_gn": "ta27"
         }, structured_dataset.var_names)
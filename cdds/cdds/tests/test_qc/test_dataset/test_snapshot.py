@@ -0,0 +1,98 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import netCDF4
+import numpy as np
+
+from cdds.common.validation import ValidationError
+from cdds.qc.common import GlobalAttributesCache
+from cdds.qc.dataset.snapshot import SnapshotStore, take_snapshot
+from cdds.qc.plugins.base.validators import ValidatorFactory
+
+
+class FileSnapshotTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.temp_dir, 'tas_Amon_UKESM1-0-LL_piControl_r1i1p1f2_gn_185001-185012.nc')
+        with netCDF4.Dataset(self.filepath, 'w') as dataset:
+            dataset.createDimension('time', None)
+            dataset.createDimension('bnds', 2)
+            time = dataset.createVariable('time', 'f8', ('time',))
+            time.units = 'days since 1850-01-01'
+            time_bnds = dataset.createVariable('time_bnds', 'f8', ('time', 'bnds'))
+            time[:] = np.arange(12) * 30 + 15
+            time_bnds[:] = np.column_stack((np.arange(12) * 30, np.arange(1, 13) * 30))
+            dataset.frequency = 'mon'
+            dataset.variable_id = 'tas'
+            dataset.realization_index = np.int32(1)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_take_snapshot(self):
+        snapshot = take_snapshot(self.filepath, netCDF4.Dataset)
+        self.assertEqual(os.path.getsize(self.filepath), snapshot.size)
+        self.assertEqual('mon', snapshot.getncattr('frequency'))
+        self.assertEqual(1, snapshot.getncattr('realization_index'))
+        self.assertEqual({'time': 12, 'bnds': 2}, snapshot.dimensions)
+        self.assertEqual(['time', 'bnds'], snapshot.variables['time_bnds']['dimensions'])
+        self.assertEqual({'units': 'days since 1850-01-01'}, snapshot.variables['time']['attributes'])
+        np.testing.assert_array_equal(np.arange(12) * 30 + 15, snapshot.time_variable('time'))
+        self.assertEqual((12, 2), snapshot.time_variable('time_bnds').shape)
+        self.assertIsNone(snapshot.time_variable('climatology_bnds'))
+
+    def test_snapshot_in_global_attributes_cache(self):
+        snapshot = take_snapshot(self.filepath, netCDF4.Dataset)
+        cache = GlobalAttributesCache()
+        self.assertEqual('tas', cache.getncattr('variable_id', snapshot))
+        self.assertIsNone(cache.getncattr('table_id', snapshot, True))
+        with self.assertRaises(AttributeError):
+            cache.getncattr('source_id', snapshot)
+
+    def test_store_is_saved_and_loaded(self):
+        store_file = os.path.join(self.temp_dir, 'qc', 'qc_snapshots_ap5.json')
+        store = SnapshotStore(store_file)
+        store.add(take_snapshot(self.filepath, netCDF4.Dataset))
+        store.save()
+
+        snapshot = SnapshotStore(store_file).get(self.filepath)
+        self.assertEqual('mon', snapshot.getncattr('frequency'))
+        np.testing.assert_array_equal(np.arange(12) * 30 + 15, snapshot.time_variable('time'))
+
+    def test_attribute_types_are_kept(self):
+        with netCDF4.Dataset(self.filepath, 'a') as dataset:
+            dataset.realization_index = np.int64(1)
+            dataset.branch_time_in_child = np.float32(0.0)
+            dataset.variables['time'].flag_values = np.array([0, 360], dtype=np.float32)
+        store_file = os.path.join(self.temp_dir, 'qc', 'qc_snapshots_ap5.json')
+        store = SnapshotStore(store_file)
+        store.add(take_snapshot(self.filepath, netCDF4.Dataset))
+        store.save()
+
+        for snapshot in [take_snapshot(self.filepath, netCDF4.Dataset), SnapshotStore(store_file).get(self.filepath)]:
+            self.assertIsInstance(snapshot.getncattr('realization_index'), np.int64)
+            self.assertIsInstance(snapshot.getncattr('branch_time_in_child'), np.float32)
+            self.assertEqual('mon', snapshot.getncattr('frequency'))
+            flag_values = snapshot.variables['time']['attributes']['flag_values']
+            self.assertEqual(np.float32, flag_values.dtype)
+            np.testing.assert_array_equal([0, 360], flag_values)
+            with self.assertRaises(ValidationError):
+                ValidatorFactory.integer_validator()(snapshot.getncattr('realization_index'))
+            with self.assertRaises(ValidationError):
+                ValidatorFactory.float_validator()(snapshot.getncattr('branch_time_in_child'))
+
+    def test_changed_file_is_not_reused(self):
+        store = SnapshotStore()
+        store.add(take_snapshot(self.filepath, netCDF4.Dataset))
+        os.utime(self.filepath, (0, 0))
+        self.assertIsNone(store.get(self.filepath))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
-# (C) British Crown Copyright 2018-2025, Met Office.
+# (C) British Crown Copyright 2018-2026, Met Office.
 # Please see LICENSE.md for license details.
 
+import datetime
+import os
+import shutil
+import tempfile
 import unittest
 import cdds.qc.models as qc_models
 from cdds.common.sqlite import execute_insert_query
@@ -129,6 +133,38 @@ class DatabaseTestCase(unittest.TestCase):
         rows = qc_models.get_qc_files(self.cursor, 1).fetchall()
         self.assertEqual(5, len(rows))
 
+    def test_retrieving_datasets_without_ignored_messages(self):
+        rows = qc_models.get_qc_files(self.cursor, 1, ignored_messages=["message 2", "error"]).fetchall()
+        self.assertEqual([
+            ("abrupt-4xCO2 : none", "AERmon", "ua", "dataset1.nc", "message 1"),
+            ("abrupt-4xCO2 : none", "AERmon", "ua", "dataset2.nc", "message 1"),
+        ], rows)
+
+    def test_ignored_messages_are_matched_as_reported(self):
+        qc_dataset_id = self.cursor.execute("SELECT id FROM qc_dataset WHERE filename = 'dataset5.nc'").fetchone()[0]
+        for message in ["Vertical Coordinate: \u00a74.3.1 units must be defined", "units are 'K' and \"K\""]:
+            execute_insert_query(self.cursor, "qc_message", {
+                "qc_dataset_id": qc_dataset_id,
+                "message": message,
+                "status": qc_models.STATUS_ERROR,
+                "checker": "bar",
+            })
+        all_rows = qc_models.get_qc_files(self.cursor, 1).fetchall()
+        for ignored_messages in [["\u00a74.3.1"], ["units must"], ["'K' and \"K\""], ["are 'K'"]]:
+            rows = qc_models.get_qc_files(self.cursor, 1, ignored_messages=ignored_messages).fetchall()
+            self.assertEqual(
+                [row for row in all_rows
+                 if not any(ignored in str(row[4].encode('utf-8')) for ignored in ignored_messages)], rows)
+        self.assertEqual(7, len(qc_models.get_qc_files(self.cursor, 1, ignored_messages=["\u00a74.3.1"]).fetchall()))
+
+    def test_aggregated_errors_list_distinct_variables(self):
+        rows = qc_models.get_aggregated_errors(self.cursor, 5).fetchall()
+        self.assertEqual([
+            ("AERmon", "bar", "message 1", 2, "ua"),
+            ("AERmon", "bar", "message 2", 2, "ua"),
+            ("Amon", "bar", "error message 1", 1, "pr"),
+        ], rows)
+
     def test_error_counts(self):
         rows = qc_models.get_error_counts(self.cursor, 5).fetchall()
         self.assertEqual(3, len(rows))
@@ -178,5 +214,120 @@ class DatabaseTestCase(unittest.TestCase):
         return self.cursor.lastrowid
 
 
+class QCResultWriterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db = qc_models.setup_db(os.path.join(self.temp_dir, "qc.db"))
+        self.writer = qc_models.QCResultWriter(self.db, batch_size=2)
+        self.qc_run_id = self.writer.start_run("foo", 5, "Amon")
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_database_uses_write_ahead_logging(self):
+        journal_mode = self.db.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual("wal", journal_mode)
+
+    def test_rows_are_committed_per_batch(self):
+        first_id = self._add_dataset("dataset1.nc")
+        self.writer.add_message(first_id, "message 1", qc_models.STATUS_ERROR, "bar")
+        self.writer.finish_dataset(first_id, qc_models.SUMMARY_FAILED)
+        self.assertEqual(0, self._committed_count("qc_message"))
+
+        second_id = self._add_dataset("dataset2.nc")
+        self.writer.finish_dataset(second_id, qc_models.SUMMARY_PASSED)
+        self.assertEqual(1, self._committed_count("qc_message"))
+        self.assertEqual(2, self._committed_count("qc_dataset"))
+
+    def test_finish_run(self):
+        qc_dataset_id = self._add_dataset("dataset1.nc")
+        self.writer.add_message(qc_dataset_id, "message 1", qc_models.STATUS_ERROR, "bar")
+        self.writer.finish_dataset(qc_dataset_id, qc_models.SUMMARY_FAILED)
+        self.writer.finish_run(self.qc_run_id, datetime.datetime(2026, 1, 1))
+
+        rows = self.db.execute("SELECT summary FROM qc_dataset").fetchall()
+        self.assertEqual([(qc_models.SUMMARY_FAILED,)], rows)
+        finished = self.db.execute("SELECT finished FROM qc_run").fetchone()[0]
+        self.assertEqual("2026-01-01 00:00:00", finished)
+        rows = qc_models.get_aggregated_errors(self.db.cursor(), 5).fetchall()
+        self.assertEqual([("Amon", "bar", "message 1", 1, "tas")], rows)
+
+    def test_previous_file_results_come_from_latest_finished_run(self):
+        qc_dataset_id = self._add_dataset("dataset1.nc", file_size=10, file_mtime=1.5)
+        self.writer.add_message(qc_dataset_id, "message 1", qc_models.STATUS_ERROR, "bar")
+        self.writer.finish_dataset(qc_dataset_id, qc_models.SUMMARY_FAILED)
+        self.writer.finish_run(self.qc_run_id, datetime.datetime(2026, 1, 1))
+        self.qc_run_id = self.writer.start_run("foo", 6, "Amon")
+        self._add_dataset("dataset1.nc", file_size=20, file_mtime=2.5)
+
+        rows = qc_models.get_previous_file_results(self.db.cursor(), "foo", "Amon").fetchall()
+        self.assertEqual([(qc_dataset_id, "/foo/bar", "dataset1.nc",
+                           "CMIP6_HadGEM3-GC31-LL_abrupt-4xCO2_none_Amon_r1i1p1f1_tas_gn", 10, 1.5, None, None, None)],
+                         rows)
+        rows = qc_models.get_dataset_messages(self.db.cursor(), qc_dataset_id).fetchall()
+        self.assertEqual([("message 1", qc_models.STATUS_ERROR, "bar")], rows)
+
+    def test_report_queries_use_indexes(self):
+        plan = self.db.execute(
+            "EXPLAIN QUERY PLAN SELECT count(*) FROM qc_message WHERE qc_dataset_id = 1 AND status != 0").fetchall()
+        self.assertIn("idx_qc_message_dataset", " ".join(row[-1] for row in plan))
+        plan = self.db.execute("EXPLAIN QUERY PLAN SELECT id FROM qc_run WHERE run_id = 5").fetchall()
+        self.assertIn("idx_qc_run_run_id", " ".join(row[-1] for row in plan))
+
+    def test_existing_database_is_migrated(self):
+        for name, _, _ in qc_models.QC_INDEXES:
+            self.db.execute("DROP INDEX idx_{}".format(name))
+        self.db.execute("PRAGMA user_version = 1")
+        self.db.commit()
+        self.db.close()
+
+        self.db = qc_models.setup_db(os.path.join(self.temp_dir, "qc.db"))
+        self.assertEqual(qc_models.QC_SCHEMA_VERSION, self.db.execute("PRAGMA user_version").fetchone()[0])
+        indexes = [row[0] for row in self.db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+        for name, _, _ in qc_models.QC_INDEXES:
+            self.assertIn("idx_{}".format(name), indexes)
+
+    def test_fingerprint_columns_are_added_to_existing_database(self):
+        fingerprint_columns = [column for column, _ in qc_models.FINGERPRINT_COLUMNS]
+        old_columns = [row[1] for row in self.db.execute("PRAGMA table_info(qc_dataset)")
+                       if row[1] not in fingerprint_columns]
+        self.db.execute("CREATE TABLE old_qc_dataset AS SELECT {} FROM qc_dataset".format(", ".join(old_columns)))
+        self.db.execute("DROP TABLE qc_dataset")
+        self.db.execute("ALTER TABLE old_qc_dataset RENAME TO qc_dataset")
+        self.db.execute("PRAGMA user_version = 0")
+        self.db.commit()
+        self.db.close()
+
+        self.db = qc_models.setup_db(os.path.join(self.temp_dir, "qc.db"))
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(qc_dataset)")]
+        self.assertEqual(old_columns + fingerprint_columns, columns)
+
+    def _add_dataset(self, filename, **fingerprint):
+        return self.writer.add_dataset({
+            "qc_run_id": self.qc_run_id,
+            "filename": filename,
+            "variable_directory": "/foo/bar",
+            "summary": qc_models.SUMMARY_STARTED,
+            "realization_index": "CMIP6_HadGEM3-GC31-LL_abrupt-4xCO2_none_Amon_r1i1p1f1_tas_gn",
+            "model": "HadGEM3-GC31-LL",
+            "experiment": "abrupt-4xCO2 : none",
+            "mip_table": "Amon",
+            "variant": "r1i1p1f1",
+            "variable": "tas",
+            "variable_name": "tas",
+            "grid": "gn",
+            **fingerprint,
+        })
+
+    def _committed_count(self, table):
+        # A separate connection only sees committed rows.
+        reader = qc_models.setup_db(os.path.join(self.temp_dir, "qc.db"))
+        try:
+            return reader.execute("SELECT count(*) FROM {}".format(table)).fetchone()[0]
+        finally:
+            reader.close()
+
+
 if __name__ == "__main__":
     unittest.main()
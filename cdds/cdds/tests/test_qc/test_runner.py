@@ -0,0 +1,146 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+
+import datetime
+import os
+import unittest
+
+from cdds.qc.constants import (
+    CONTIGUITY_CHECKER, FILENAME_CHECKER, STATUS_ERROR, STATUS_IGNORED, SUMMARY_FAILED, SUMMARY_PASSED)
+from cdds.qc.models import QCResultWriter
+from cdds.qc.runner import QCRunner
+
+
+class FakeQCRunner(QCRunner):
+    """QCRunner reporting the process that checked each file instead of
+    running the compliance checkers"""
+
+    def check_file(self, data_file, conf, request):
+        status = STATUS_ERROR if data_file.endswith("1.nc") else STATUS_IGNORED
+        return status == STATUS_ERROR, [(data_file, status, str(os.getpid()))]
+
+
+class TestFileChecks(unittest.TestCase):
+
+    def setUp(self):
+        self.runner = FakeQCRunner(":memory:")
+        self.data_files = ["file_{}.nc".format(index) for index in range(40)]
+
+    def _check_files(self, max_workers):
+        with self.runner._file_checks({}, None, self.data_files, max_workers) as results:
+            return list(results)
+
+    def test_serial_checks(self):
+        results = self._check_files(1)
+        self.assertEqual(self.data_files, [messages[0][0] for _, messages in results])
+        self.assertEqual({str(os.getpid())}, {messages[0][2] for _, messages in results})
+
+    def test_parallel_checks_are_in_order(self):
+        serial_results = self._check_files(1)
+        parallel_results = self._check_files(4)
+        self.assertEqual(
+            [(invalid, [message[:2] for message in messages]) for invalid, messages in serial_results],
+            [(invalid, [message[:2] for message in messages]) for invalid, messages in parallel_results])
+        self.assertNotIn(str(os.getpid()), {messages[0][2] for _, messages in parallel_results})
+
+
+class FakeDataset(object):
+
+    root = "/data"
+    mip_table = None
+
+
+class TestReusableResults(unittest.TestCase):
+
+    def setUp(self):
+        self.runner = FakeQCRunner(":memory:")
+        self.runner.dataset = FakeDataset()
+        self.runner.relaxed_cmor = False
+        self.aggr = {
+            "tas": ["/data/tas/tas_1.nc", "/data/tas/tas_2.nc"],
+            "pr": ["/data/pr/pr_1.nc"],
+        }
+        self.fingerprints = {
+            data_file: self._fingerprint(size) for size, data_file in enumerate(self.aggr["tas"] + self.aggr["pr"])
+        }
+        writer = QCResultWriter(self.runner.db)
+        qc_run_id = writer.start_run("/data", 1, None)
+        self.qc_dataset_ids = {}
+        for index, data_files in self.aggr.items():
+            for data_file in data_files:
+                qc_dataset_id = writer.add_dataset({
+                    "qc_run_id": qc_run_id,
+                    "filename": os.path.basename(data_file),
+                    "variable_directory": os.path.dirname(data_file),
+                    "summary": SUMMARY_PASSED,
+                    "realization_index": index,
+                    "model": "UKESM1-0-LL",
+                    "experiment": "piControl",
+                    "mip_table": "Amon",
+                    "variant": "r1i1p1f2",
+                    "variable": index,
+                    "variable_name": index,
+                    "grid": "gn",
+                    **self.fingerprints[data_file],
+                    "checks_summary": SUMMARY_FAILED,
+                })
+                writer.add_message(qc_dataset_id, "cf message", STATUS_ERROR, "cf")
+                writer.add_message(qc_dataset_id, "gap", STATUS_ERROR, CONTIGUITY_CHECKER)
+                writer.add_message(qc_dataset_id, "bad name", STATUS_ERROR, FILENAME_CHECKER)
+                self.qc_dataset_ids[data_file] = qc_dataset_id
+        writer.finish_run(qc_run_id, datetime.datetime(2026, 1, 1))
+
+    def _fingerprint(self, size):
+        return {"file_size": size, "file_mtime": 1.0, "content_hash": None,
+                "checker_version": self.runner.checker_version()}
+
+    def test_unchanged_dataset_is_reused(self):
+        reusable, affected_var_keys = self.runner._find_reusable_results(self.aggr, self.fingerprints)
+        self.assertEqual({data_file: (qc_dataset_id, SUMMARY_FAILED)
+                          for data_file, qc_dataset_id in self.qc_dataset_ids.items()}, reusable)
+        self.assertEqual([], affected_var_keys)
+
+    def test_changed_file_is_checked_again(self):
+        self.fingerprints["/data/tas/tas_2.nc"] = self._fingerprint(10)
+        reusable, affected_var_keys = self.runner._find_reusable_results(self.aggr, self.fingerprints)
+        self.assertEqual(["/data/pr/pr_1.nc", "/data/tas/tas_1.nc"], sorted(reusable))
+        self.assertEqual(["tas"], affected_var_keys)
+
+    def test_new_file_affects_contiguity_of_its_variable(self):
+        self.aggr["pr"].append("/data/pr/pr_2.nc")
+        self.fingerprints["/data/pr/pr_2.nc"] = self._fingerprint(5)
+        reusable, affected_var_keys = self.runner._find_reusable_results(self.aggr, self.fingerprints)
+        self.assertEqual(sorted(self.qc_dataset_ids), sorted(reusable))
+        self.assertEqual(["pr"], affected_var_keys)
+
+    def test_new_checker_version_invalidates_results(self):
+        self.runner.relaxed_cmor = True
+        self.fingerprints = {data_file: dict(fingerprint, checker_version=self.runner.checker_version())
+                             for data_file, fingerprint in self.fingerprints.items()}
+        reusable, affected_var_keys = self.runner._find_reusable_results(self.aggr, self.fingerprints)
+        self.assertEqual({}, reusable)
+        self.assertEqual(["tas", "pr"], affected_var_keys)
+
+    def test_results_without_checks_summary_are_not_reused(self):
+        self.runner.db.execute("UPDATE qc_dataset SET checks_summary = NULL WHERE filename = 'pr_1.nc'")
+        reusable, affected_var_keys = self.runner._find_reusable_results(self.aggr, self.fingerprints)
+        self.assertEqual(["/data/tas/tas_1.nc", "/data/tas/tas_2.nc"], sorted(reusable))
+        self.assertEqual(["pr"], affected_var_keys)
+
+    def test_reused_messages(self):
+        qc_dataset_id = self.qc_dataset_ids["/data/pr/pr_1.nc"]
+        self.assertEqual(
+            (True, [("cf message", STATUS_ERROR, "cf"), ("gap", STATUS_ERROR, CONTIGUITY_CHECKER)]),
+            self.runner._reuse_results(qc_dataset_id, SUMMARY_FAILED, True))
+        self.assertEqual((True, [("cf message", STATUS_ERROR, "cf")]),
+                         self.runner._reuse_results(qc_dataset_id, SUMMARY_FAILED, False))
+
+    def test_reused_failure_without_messages(self):
+        self.runner.db.execute("DELETE FROM qc_message")
+        qc_dataset_id = self.qc_dataset_ids["/data/pr/pr_1.nc"]
+        self.assertEqual((True, []), self.runner._reuse_results(qc_dataset_id, SUMMARY_FAILED, True))
+        self.assertEqual((False, []), self.runner._reuse_results(qc_dataset_id, SUMMARY_PASSED, True))
+
+
+if __name__ == '__main__':
+    unittest.main()
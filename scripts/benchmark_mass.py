@@ -0,0 +1,176 @@
+# (C) British Crown Copyright 2026, Met Office.
+# Please see LICENSE.md for license details.
+"""Benchmark the CDDS code interacting with MASS against the local MOOSE simulator.
+
+Each benchmark builds a synthetic MASS tree in a temporary directory, runs
+the code under test with the simulator first on the PATH and reports the
+elapsed times, so that changes to chunking, parallelism and parsing can be
+measured without access to MASS, e.g.
+
+    python scripts/benchmark_mass.py extract --files 200 --tape_mount_delay 0.05
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from cdds.common.moo_simulator import MooSimulatorConfig, install_moo_simulator
+
+ARCHIVE_ROOT = 'adhoc/projects/cdds/production'
+CMIP6_DATASET = 'CMIP6/CMIP/MOHC/UKESM1-0-LL/historical/r{}i1p1f2/Amon/var{}/gn'
+NC_STREAM = 'crum/u-ab123/onm.nc.file'
+
+
+@contextmanager
+def timer(name):
+    start = time.perf_counter()
+    yield
+    print('{:<50} {:8.2f} s'.format(name, time.perf_counter() - start))
+
+
+def create_file(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file_handle:
+        file_handle.truncate(size)
+
+
+def build_archive(root, datasets, files_per_dataset, file_size):
+    """Create CMIP6 datasets in the simulated MASS tree."""
+    for index in range(datasets):
+        dataset_dir = os.path.join(root, ARCHIVE_ROOT, CMIP6_DATASET.format(index // 10 + 1, index % 10),
+                                   'embargoed', 'v20190624')
+        for year in range(files_per_dataset):
+            create_file(os.path.join(dataset_dir, 'var_Amon_{}01-{}12.nc'.format(1850 + year, 1850 + year)), file_size)
+
+
+def benchmark_listing(args, root):
+    from cdds.common.mass import mass_list_files_recursively
+    build_archive(root, args.datasets, args.files, args.file_size)
+    with timer('listing: mass_list_files_recursively'):
+        datasets = mass_list_files_recursively('moose:/{}'.format(ARCHIVE_ROOT), False)
+    print('  {} datasets'.format(len(datasets)))
+
+
+def benchmark_inventory(args, root):
+    from cdds.inventory.command_line import populate_inventory_from_mass
+    from cdds.inventory.db_models import setup_db
+    build_archive(root, args.datasets, args.files, args.file_size)
+    for max_concurrent in sorted({1, args.max_concurrent}):
+        for recursive_levels in [4, 6]:
+            connection = setup_db(os.path.join(args.work_dir, 'inventory_{}_{}.db'.format(
+                max_concurrent, recursive_levels)))
+            with timer('inventory: {} concurrent listings, {} recursive levels'.format(
+                    max_concurrent, recursive_levels)):
+                populate_inventory_from_mass(connection, 'moose:/{}'.format(ARCHIVE_ROOT),
+                                             max_concurrent=max_concurrent, recursive_levels=recursive_levels)
+            print('  {} files'.format(connection.execute('SELECT COUNT(*) FROM netcdf_file').fetchone()[0]))
+
+
+def benchmark_archive(args, root):
+    from cdds.archive.mass import archive_files
+    local_dir = os.path.join(args.work_dir, 'output')
+    for index in range(args.datasets):
+        for year in range(args.files):
+            create_file(os.path.join(local_dir, 'var{}'.format(index), 'var_Amon_{}.nc'.format(1850 + year)),
+                        args.file_size)
+    for max_concurrent in sorted({1, args.max_concurrent}):
+        var_list = []
+        for index in range(args.datasets):
+            dataset_dir = os.path.join(local_dir, 'var{}'.format(index))
+            var_list.append({
+                'mip_table_id': 'Amon',
+                'variable_id': 'var{}'.format(index),
+                'mass_path': 'moose:/{}/{}/{}'.format(ARCHIVE_ROOT, max_concurrent, CMIP6_DATASET.format(1, index)),
+                'mass_status': 'FIRST_PUBLICATION',
+                'mass_status_suffix': 'embargoed/v20190624',
+                'mip_output_files': [os.path.join(dataset_dir, name) for name in sorted(os.listdir(dataset_dir))],
+            })
+        with timer('archive: archive_files, {} concurrent variables'.format(max_concurrent)):
+            archive_files(var_list, False, max_concurrent)
+
+
+def benchmark_extract(args, root):
+    from cdds.extract.common import chunk_by_files_and_tapes, fetch_filelist_from_mass, plan_chunks, run_moo_cmd
+    from cdds.extract.scheduler import RetrievalJob, RetrievalScheduler
+    for month in range(args.files):
+        year, month_of_year = 1850 + month // 12, month % 12 + 1
+        create_file(os.path.join(root, NC_STREAM, 'nemo_ab123o_1m_{}{:02d}01-{}{:02d}01_grid-T.nc'.format(
+            year, month_of_year, year + month_of_year // 12, month_of_year % 12 + 1)), args.file_size)
+    mass_dir = 'moose:/{}'.format(NC_STREAM)
+    with timer('extract: list files'):
+        files, _ = fetch_filelist_from_mass(mass_dir)
+    file_tapes = {path: tape for tape, path in files}
+    fileset = {}
+    for tape, path in files:
+        fileset.setdefault(tape, []).append(path)
+
+    plans = {
+        'greedy chunks': chunk_by_files_and_tapes(fileset, args.tape_limit, args.file_limit),
+        'planned chunks': plan_chunks(fileset, args.tape_limit, args.file_limit).chunks,
+    }
+    for name, chunks in plans.items():
+        for max_concurrent in sorted({1, args.max_concurrent}):
+            target = os.path.join(args.work_dir, 'input', name.replace(' ', '_'), str(max_concurrent))
+            os.makedirs(target)
+            jobs = [RetrievalJob('onm', blocknum, {'moo_cmd': 'get', 'param_args': ['-i'] + chunk + [target]})
+                    for blocknum, chunk in enumerate(chunks, start=1)]
+            scheduler = RetrievalScheduler(
+                lambda command: run_moo_cmd(command['moo_cmd'], command['param_args'], verbose=False)[:2],
+                max_concurrent)
+            with timer('extract: {}, {} concurrent requests'.format(name, max_concurrent)):
+                scheduler.run(jobs)
+            mounts = sum(len({file_tapes[path] for path in chunk}) for chunk in chunks)
+            print('  {} requests, {} tape mounts'.format(len(chunks), mounts))
+
+
+BENCHMARKS = {
+    'listing': benchmark_listing,
+    'inventory': benchmark_inventory,
+    'archive': benchmark_archive,
+    'extract': benchmark_extract,
+}
+
+
+def parse_args(arguments):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmarks', nargs='*',
+                        help='The benchmarks to run ({}), all if none are given'.format(', '.join(sorted(BENCHMARKS))))
+    parser.add_argument('--datasets', type=int, default=20, help='Number of datasets in the archive')
+    parser.add_argument('--files', type=int, default=50, help='Number of files per dataset or stream')
+    parser.add_argument('--file_size', type=int, default=1024, help='Size of the files in bytes')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds taken by every moo command')
+    parser.add_argument('--tape_mount_delay', type=float, default=0.01, help='Seconds taken by every tape mount')
+    parser.add_argument('--files_per_tape', type=int, default=10, help='Number of files stored on each tape')
+    parser.add_argument('--tape_limit', type=int, default=5, help='Maximum number of tapes per request')
+    parser.add_argument('--file_limit', type=int, default=25, help='Maximum number of files per request')
+    parser.add_argument('--max_concurrent', type=int, default=4, help='Number of concurrent requests')
+    args = parser.parse_args(arguments)
+    unknown = set(args.benchmarks).difference(BENCHMARKS)
+    if unknown:
+        parser.error('unknown benchmarks: {}'.format(', '.join(sorted(unknown))))
+    return args
+
+
+def main(arguments=None):
+    args = parse_args(arguments)
+    for name in args.benchmarks or sorted(BENCHMARKS):
+        args.work_dir = tempfile.mkdtemp(prefix='cdds_benchmark_')
+        root = os.path.join(args.work_dir, 'mass')
+        bin_dir = os.path.join(args.work_dir, 'bin')
+        install_moo_simulator(bin_dir, MooSimulatorConfig(
+            root=root, latency=args.latency, tape_mount_delay=args.tape_mount_delay,
+            files_per_tape=args.files_per_tape, tape_limit=args.tape_limit))
+        os.environ['PATH'] = '{}:{}'.format(bin_dir, os.environ['PATH'])
+        try:
+            BENCHMARKS[name](args, root)
+        finally:
+            os.environ['PATH'] = os.environ['PATH'].split(':', 1)[1]
+            shutil.rmtree(args.work_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())